@@ -3,6 +3,8 @@ Fine-tuning Orchestration System for Digital Twin Agents
 Handles data preprocessing, model training, and agent personality development
 """
 import asyncio
+import copy
+import hashlib
 import json
 import os
 from typing import Dict, List, Any, Optional, Tuple
@@ -120,13 +122,39 @@ class FineTuningOrchestrator:
                 "ready_for_training": False
             }
     
+    def load_base_model(self) -> Tuple[Any, Any]:
+        """Load the base model and tokenizer once so several adapters can share them"""
+        
+        print("🔄 Loading base model and tokenizer...")
+        tokenizer = AutoTokenizer.from_pretrained(self.base_model_name)
+        
+        # Add padding token if missing
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        
+        model = AutoModelForCausalLM.from_pretrained(
+            self.base_model_name,
+            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+            device_map="auto" if torch.cuda.is_available() else None
+        )
+        
+        return model, tokenizer
+    
     async def fine_tune_agent(
         self, 
         person_name: str,
         agent_id: str = None,
-        resume_from_checkpoint: bool = False
+        resume_from_checkpoint: bool = False,
+        base_model: Any = None,
+        tokenizer: Any = None
     ) -> Dict[str, Any]:
-        """Fine-tune a model for a specific person"""
+        """Fine-tune a model for a specific person
+        
+        When ``base_model`` and ``tokenizer`` are passed (see
+        ``training_scheduler.MultiPersonaTrainingScheduler``) the LoRA adapter is
+        trained against those shared weights and unloaded afterwards, leaving the
+        base model clean for the next persona.
+        """
         
         print(f"🧠 Starting fine-tuning for {person_name}")
         
@@ -138,6 +166,9 @@ class FineTuningOrchestrator:
                 "ready_for_deployment": False
             }
         
+        shared_base = base_model is not None
+        model = None
+        
         try:
             # Load training data
             training_data = await self._load_training_data(person_name)
@@ -146,22 +177,14 @@ class FineTuningOrchestrator:
                 raise ValueError(f"Insufficient training data for {person_name} (need at least 50 samples)")
             
             # Prepare model and tokenizer
-            print("🔄 Loading base model and tokenizer...")
-            tokenizer = AutoTokenizer.from_pretrained(self.base_model_name)
-            
-            # Add padding token if missing
-            if tokenizer.pad_token is None:
-                tokenizer.pad_token = tokenizer.eos_token
-            
-            model = AutoModelForCausalLM.from_pretrained(
-                self.base_model_name,
-                torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-                device_map="auto" if torch.cuda.is_available() else None
-            )
+            if shared_base:
+                print("♻️  Reusing shared base model and tokenizer")
+            else:
+                base_model, tokenizer = self.load_base_model()
             
-            # Apply LoRA
+            # Apply a fresh LoRA adapter (peft mutates the config it is given)
             print("🔧 Applying LoRA configuration...")
-            model = get_peft_model(model, self.lora_config)
+            model = get_peft_model(base_model, copy.deepcopy(self.lora_config))
             model.print_trainable_parameters()
             
             # Prepare dataset
@@ -274,13 +297,29 @@ class FineTuningOrchestrator:
                 "error": str(e),
                 "ready_for_deployment": False
             }
+        
+        finally:
+            # Strip the LoRA layers so the shared base model is reset for the next persona
+            if shared_base and model is not None:
+                model.unload()
     
-    async def batch_fine_tune_all_agents(self) -> Dict[str, Any]:
-        """Fine-tune all configured agents"""
+    async def batch_fine_tune_all_agents(
+        self,
+        parallel_workers: int = 1,
+        resume: bool = True
+    ) -> Dict[str, Any]:
+        """Fine-tune all configured agents
+        
+        Setup runs per agent first; the ready agents are then trained by
+        ``MultiPersonaTrainingScheduler`` so the base model is loaded once
+        (or once per worker when ``parallel_workers`` > 1).
+        """
+        from digital_twin_backend.training_scheduler import MultiPersonaTrainingScheduler
         
         print("🎯 Starting batch fine-tuning for all agents")
         
         results = {}
+        ready = []
         
         for agent_id, agent_config in AGENT_CONFIGS.items():
             if agent_id == "manager":  # Skip manager for now
@@ -296,12 +335,7 @@ class FineTuningOrchestrator:
                 )
                 
                 if setup_result.get("ready_for_training"):
-                    # Fine-tune the model
-                    training_result = await self.fine_tune_agent(
-                        agent_config.person_name,
-                        agent_id
-                    )
-                    results[agent_id] = training_result
+                    ready.append((agent_id, agent_config.person_name))
                 else:
                     results[agent_id] = {
                         "person_name": agent_config.person_name,
@@ -318,6 +352,11 @@ class FineTuningOrchestrator:
                     "error": str(e)
                 }
         
+        # Fine-tune the ready agents against a shared base model
+        if ready:
+            scheduler = MultiPersonaTrainingScheduler(self, parallel_workers=parallel_workers)
+            results.update(await scheduler.train(ready, resume=resume))
+        
         # Summary
         successful = len([r for r in results.values() if r.get("status") == "completed"])
         total = len(results)
@@ -511,6 +550,34 @@ class FineTuningOrchestrator:
             print(f"❌ Error loading training data: {e}")
             return []
     
+    async def training_fingerprint(self, person_name: str) -> Optional[str]:
+        """Hash of what a training run depends on: base model, LoRA settings and training samples
+        
+        The training manifest stores it with each run, so a persona whose data
+        or configuration changed is retrained rather than skipped.
+        """
+        
+        training_data = await self._load_training_data(person_name)
+        if not training_data:
+            return None
+        
+        lora = self.lora_config
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            "base_model": self.base_model_name,
+            "max_length": self.max_length,
+            "lora": {
+                "r": getattr(lora, "r", None),
+                "lora_alpha": getattr(lora, "lora_alpha", None),
+                "lora_dropout": getattr(lora, "lora_dropout", None),
+                "target_modules": sorted(getattr(lora, "target_modules", None) or []),
+            },
+        }, sort_keys=True).encode("utf-8"))
+        for sample in training_data:
+            digest.update(json.dumps([sample.get("input"), sample.get("output")], ensure_ascii=False).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
     def _prepare_training_dataset(self, training_data: List[Dict[str, Any]], tokenizer) -> Dataset:
         """Prepare training dataset for fine-tuning"""
         
@@ -586,11 +653,11 @@ async def train_agent(person_name: str, agent_id: str = None):
     return result
 
 
-async def train_all_agents():
-    """CLI function to train all agents"""
+async def train_all_agents(parallel_workers: int = 1, resume: bool = True):
+    """CLI function to train all agents (``resume=False`` retrains completed ones too)"""
     
     orchestrator = FineTuningOrchestrator()
-    results = await orchestrator.batch_fine_tune_all_agents()
+    results = await orchestrator.batch_fine_tune_all_agents(parallel_workers=parallel_workers, resume=resume)
     
     print("\n📋 Batch Training Results:")
     print(json.dumps(results, indent=2))
@@ -616,13 +683,15 @@ if __name__ == "__main__":
             asyncio.run(train_agent(person_name, agent_id))
             
         elif command == "train_all":
-            asyncio.run(train_all_agents())
+            args = [arg for arg in sys.argv[2:] if arg != "--no-resume"]
+            parallel_workers = int(args[0]) if args else 1
+            asyncio.run(train_all_agents(parallel_workers, resume="--no-resume" not in sys.argv[2:]))
             
         else:
             print("Usage:")
             print("  python finetuning.py setup <person_name> <email> [platform1] [platform2] ...")
             print("  python finetuning.py train <person_name> [agent_id]")
-            print("  python finetuning.py train_all")
+            print("  python finetuning.py train_all [parallel_workers] [--no-resume]")
     else:
         print("🎯 Digital Twin Fine-tuning System")
         print("Run with --help for usage instructions")
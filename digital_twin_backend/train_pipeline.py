@@ -167,37 +167,90 @@ class ModularTrainingPipeline:
             
             return None
     
-    async def train_agent_model(self, agent_id: str) -> Dict[str, Any]:
-        """Train model for a specific agent"""
+    def _check_ready_for_training(self, agent_id: str) -> Optional[str]:
+        """Return an error message if the agent cannot be trained yet"""
         
         if agent_id not in self.config.get("agents", {}):
             logger.error(f"❌ Agent {agent_id} not found in config")
-            return {"status": "failed", "error": "Agent not found in config"}
-        
-        agent_config = self.config["agents"][agent_id]
-        person_name = agent_config["person_name"]
-        
-        logger.info(f"🧠 Training model for {person_name}...")
+            return "Agent not found in config"
         
         # Check if data was scraped
         scrape_status_file = Path(f"data/training_status/{agent_id}_scrape.json")
         if not scrape_status_file.exists():
             logger.error(f"❌ No scrape data found for {agent_id}")
             logger.info("   Run: python train_pipeline.py scrape <agent_id>")
-            return {"status": "failed", "error": "No scrape data found"}
+            return "No scrape data found"
         
         with open(scrape_status_file, 'r') as f:
             scrape_status = json.load(f)
         
         if scrape_status.get("status") != "completed":
             logger.error(f"❌ Scraping was not successful for {agent_id}")
-            return {"status": "failed", "error": "Scraping not completed"}
+            return "Scraping not completed"
+        
+        return None
+    
+    def _configure_fine_tuner(self):
+        """Configure fine-tuner from config"""
+        if "training_pipeline" in self.config:
+            pipeline_config = self.config["training_pipeline"]
+            self.fine_tuner.base_model_name = pipeline_config.get("base_model", "microsoft/DialoGPT-medium")
+    
+    def _save_training_status(self, agent_id: str, result: Dict[str, Any]):
+        """Persist and log the training result for an agent"""
+        
+        agent_config = self.config["agents"][agent_id]
+        person_name = agent_config["person_name"]
+        
+        training_status_file = Path(f"data/training_status/{agent_id}_training.json")
+        training_status = {
+            "agent_id": agent_id,
+            "person_name": person_name,
+            "trained_at": datetime.now().isoformat(),
+            "result": result,
+            "config": agent_config["training_config"]
+        }
+        
+        with open(training_status_file, 'w') as f:
+            json.dump(training_status, f, indent=2, default=str)
+        
+        if result.get("status") == "completed":
+            logger.info(f"✅ Model trained for {person_name}")
+            logger.info(f"   Model path: {result['model_path']}")
+            logger.info(f"   Training samples: {result.get('train_samples', 'N/A')}")
+        else:
+            logger.error(f"❌ Training failed for {person_name}: {result.get('error')}")
+    
+    def _save_training_error(self, agent_id: str, error: Exception):
+        """Persist a training exception for an agent"""
+        
+        person_name = self.config["agents"][agent_id]["person_name"]
+        logger.error(f"❌ Training failed for {person_name}: {error}")
+        
+        training_status_file = Path(f"data/training_status/{agent_id}_training.json")
+        training_status = {
+            "agent_id": agent_id,
+            "person_name": person_name,
+            "trained_at": datetime.now().isoformat(),
+            "status": "failed",
+            "error": str(error)
+        }
+        
+        with open(training_status_file, 'w') as f:
+            json.dump(training_status, f, indent=2)
+    
+    async def train_agent_model(self, agent_id: str) -> Dict[str, Any]:
+        """Train model for a specific agent"""
+        
+        error = self._check_ready_for_training(agent_id)
+        if error:
+            return {"status": "failed", "error": error}
+        
+        person_name = self.config["agents"][agent_id]["person_name"]
+        logger.info(f"🧠 Training model for {person_name}...")
         
         try:
-            # Configure fine-tuner from config
-            if "training_pipeline" in self.config:
-                pipeline_config = self.config["training_pipeline"]
-                self.fine_tuner.base_model_name = pipeline_config.get("base_model", "microsoft/DialoGPT-medium")
+            self._configure_fine_tuner()
             
             # Run fine-tuning
             result = await self.fine_tuner.fine_tune_agent(
@@ -206,44 +259,11 @@ class ModularTrainingPipeline:
                 resume_from_checkpoint=False
             )
             
-            # Save training status
-            training_status_file = Path(f"data/training_status/{agent_id}_training.json")
-            training_status = {
-                "agent_id": agent_id,
-                "person_name": person_name,
-                "trained_at": datetime.now().isoformat(),
-                "result": result,
-                "config": agent_config["training_config"]
-            }
-            
-            with open(training_status_file, 'w') as f:
-                json.dump(training_status, f, indent=2, default=str)
-            
-            if result.get("status") == "completed":
-                logger.info(f"✅ Model trained for {person_name}")
-                logger.info(f"   Model path: {result['model_path']}")
-                logger.info(f"   Training samples: {result.get('train_samples', 'N/A')}")
-            else:
-                logger.error(f"❌ Training failed for {person_name}: {result.get('error')}")
-            
+            self._save_training_status(agent_id, result)
             return result
             
         except Exception as e:
-            logger.error(f"❌ Training failed for {person_name}: {e}")
-            
-            # Save error status
-            training_status_file = Path(f"data/training_status/{agent_id}_training.json")
-            training_status = {
-                "agent_id": agent_id,
-                "person_name": person_name,
-                "trained_at": datetime.now().isoformat(),
-                "status": "failed",
-                "error": str(e)
-            }
-            
-            with open(training_status_file, 'w') as f:
-                json.dump(training_status, f, indent=2)
-            
+            self._save_training_error(agent_id, e)
             return {"status": "failed", "error": str(e)}
     
     async def scrape_all_agents(self) -> Dict[str, Optional[str]]:
@@ -275,15 +295,46 @@ class ModularTrainingPipeline:
         
         return results
     
-    async def train_all_agents(self) -> Dict[str, Dict[str, Any]]:
-        """Train models for all configured agents"""
+    async def train_all_agents(self, parallel_workers: int = 1, resume: bool = True) -> Dict[str, Dict[str, Any]]:
+        """Train models for all configured agents
+        
+        All ready agents are trained by one scheduler run, so the base model is
+        loaded once (or once per worker process) instead of once per agent.
+        """
+        from digital_twin_backend.training_scheduler import MultiPersonaTrainingScheduler
         
         logger.info("🧠 Training models for all agents...")
         
         results = {}
+        ready = []
         
-        for agent_id in self.config.get("agents", {}).keys():
-            result = await self.train_agent_model(agent_id)
+        for agent_id, agent_config in self.config.get("agents", {}).items():
+            error = self._check_ready_for_training(agent_id)
+            if error:
+                results[agent_id] = {"status": "failed", "error": error}
+            else:
+                ready.append((agent_id, agent_config["person_name"]))
+        
+        if not ready:
+            return results
+        
+        self._configure_fine_tuner()
+        scheduler = MultiPersonaTrainingScheduler(
+            self.fine_tuner,
+            manifest_path=Path("data/training_status/training_manifest.json"),
+            parallel_workers=parallel_workers
+        )
+        
+        try:
+            trained = await scheduler.train(ready, resume=resume)
+        except Exception as e:
+            for agent_id, _ in ready:
+                self._save_training_error(agent_id, e)
+                results[agent_id] = {"status": "failed", "error": str(e)}
+            return results
+        
+        for agent_id, result in trained.items():
+            self._save_training_status(agent_id, result)
             results[agent_id] = result
         
         return results
@@ -355,6 +406,15 @@ class ModularTrainingPipeline:
                     file_path.unlink()
                     logger.info(f"🗑️  Removed {filename}")
             
+            # Forget the agent's scheduler state so it is retrained from scratch
+            manifest_file = status_dir / "training_manifest.json"
+            if manifest_file.exists():
+                from digital_twin_backend.training_scheduler import TrainingManifest
+                manifest = TrainingManifest(manifest_file)
+                if manifest.entries.pop(agent_id, None) is not None:
+                    manifest.save()
+                    logger.info(f"🗑️  Removed {agent_id} from training manifest")
+            
             logger.info(f"✅ Cleaned training data for {agent_id}")
         else:
             # Clean all
@@ -385,10 +445,10 @@ async def train_agent(agent_id: str):
     pipeline = ModularTrainingPipeline()
     await pipeline.train_agent_model(agent_id)
 
-async def train_all():
+async def train_all(parallel_workers: int = 1, resume: bool = True):
     """Train all agents"""
     pipeline = ModularTrainingPipeline()
-    await pipeline.train_all_agents()
+    await pipeline.train_all_agents(parallel_workers=parallel_workers, resume=resume)
 
 def show_status():
     """Show training status"""
@@ -411,7 +471,8 @@ def main():
         print("  python train_pipeline.py scrape <agent_id>        # Scrape specific agent")
         print("  python train_pipeline.py scrape-all               # Scrape all agents")
         print("  python train_pipeline.py train <agent_id>         # Train specific agent")
-        print("  python train_pipeline.py train-all                # Train all agents")
+        print("  python train_pipeline.py train-all [workers]      # Train all agents (shared base model)")
+        print("  python train_pipeline.py train-all --no-resume    # Retrain all agents, ignoring the manifest")
         print("  python train_pipeline.py status                   # Show training status")
         print("  python train_pipeline.py clean [agent_id]         # Clean training data")
         print("\nExample workflow:")
@@ -434,7 +495,9 @@ def main():
         agent_id = sys.argv[2]
         asyncio.run(train_agent(agent_id))
     elif command == "train-all":
-        asyncio.run(train_all())
+        args = [arg for arg in sys.argv[2:] if arg != "--no-resume"]
+        parallel_workers = int(args[0]) if args else 1
+        asyncio.run(train_all(parallel_workers, resume="--no-resume" not in sys.argv[2:]))
     elif command == "status":
         show_status()
     elif command == "clean":
@@ -0,0 +1,295 @@
+"""
+Multi-persona Training Scheduler
+Trains every persona's LoRA adapter against one shared copy of the base model,
+with a checkpoint/resume manifest and an optional multi-process mode
+"""
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import queue
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from digital_twin_backend.finetuning import FineTuningOrchestrator, ML_AVAILABLE
+from digital_twin_backend.config.settings import settings, AGENT_CONFIGS
+
+
+class TrainingManifest:
+    """Per-persona training state persisted to disk for checkpoint/resume"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else Path(settings.MODELS_DIR) / "training_manifest.json"
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get("agents", {})
+            except Exception as e:
+                print(f"⚠️  Could not read training manifest {self.path}: {e}")
+
+    def get(self, agent_id: str) -> Dict[str, Any]:
+        return self.entries.get(agent_id, {})
+
+    def is_completed(self, agent_id: str, fingerprint: Optional[str] = None) -> bool:
+        """A run completed on the same training data and configuration"""
+        entry = self.get(agent_id)
+        return entry.get("status") == "completed" and entry.get("fingerprint") == fingerprint
+
+    def should_resume(self, agent_id: str, fingerprint: Optional[str] = None) -> bool:
+        """An interrupted or failed run on the same training data, with a saved checkpoint, can be resumed"""
+        entry = self.get(agent_id)
+        return (
+            entry.get("status") in ("running", "failed")
+            and bool(entry.get("checkpoint"))
+            and entry.get("fingerprint") == fingerprint
+        )
+
+    def mark(self, agent_id: str, status: str, **fields: Any):
+        """Update an agent's entry and write the manifest atomically"""
+        entry = self.entries.setdefault(agent_id, {})
+        entry.update(fields)
+        entry["status"] = status
+        entry["updated_at"] = datetime.now().isoformat()
+        self.save()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"agents": self.entries}, f, indent=2, default=str)
+        os.replace(tmp_path, self.path)
+
+
+class MultiPersonaTrainingScheduler:
+    """Schedule LoRA training for several personas over a shared base model
+
+    Sequential mode loads the base model once and trains each adapter in turn,
+    unloading it afterwards. Parallel mode splits the personas over
+    ``parallel_workers`` processes, each pinned to its own CPU cores and
+    loading the base model once.
+    """
+
+    def __init__(
+        self,
+        orchestrator: Optional[FineTuningOrchestrator] = None,
+        manifest_path: Optional[Path] = None,
+        parallel_workers: int = 1,
+        threads_per_worker: Optional[int] = None
+    ):
+        self.orchestrator = orchestrator or FineTuningOrchestrator()
+        self.manifest = TrainingManifest(manifest_path)
+        self.parallel_workers = max(1, parallel_workers)
+        self.threads_per_worker = threads_per_worker
+        self._fingerprints: Dict[str, Optional[str]] = {}
+
+    async def train(self, personas: List[Tuple[str, str]], resume: bool = True) -> Dict[str, Dict[str, Any]]:
+        """Train adapters for (agent_id, person_name) pairs
+
+        With ``resume`` set, personas already marked completed in the manifest
+        are skipped and interrupted runs continue from their last checkpoint,
+        as long as their training data and configuration (the fingerprint
+        recorded with the run) did not change since.
+        """
+
+        results = {}
+        todo = []
+        self._fingerprints = {
+            agent_id: await self.orchestrator.training_fingerprint(person_name)
+            for agent_id, person_name in personas
+        }
+
+        for agent_id, person_name in personas:
+            if resume and self.manifest.is_completed(agent_id, self._fingerprints[agent_id]):
+                print(f"⏭️  Skipping {person_name}: already trained ({self.manifest.get(agent_id).get('model_path')})")
+                results[agent_id] = {**self.manifest.get(agent_id), "person_name": person_name, "status": "completed"}
+            else:
+                todo.append((agent_id, person_name))
+
+        if not todo:
+            return results
+
+        if not ML_AVAILABLE:
+            for agent_id, person_name in todo:
+                results[agent_id] = await self.orchestrator.fine_tune_agent(person_name, agent_id)
+            return results
+
+        resume_flags = {
+            agent_id: resume and self.manifest.should_resume(agent_id, self._fingerprints[agent_id])
+            for agent_id, _ in todo
+        }
+
+        if self.parallel_workers > 1 and len(todo) > 1:
+            results.update(await asyncio.to_thread(self._train_parallel, todo, resume_flags))
+        else:
+            results.update(await self._train_sequential(todo, resume_flags))
+
+        return results
+
+    async def _train_sequential(
+        self,
+        todo: List[Tuple[str, str]],
+        resume_flags: Dict[str, bool]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Train all personas in this process against one loaded base model"""
+
+        results = {}
+        base_model, tokenizer = self.orchestrator.load_base_model()
+
+        for agent_id, person_name in todo:
+            print(f"\n🔄 Training adapter for {agent_id} ({person_name})")
+            self._mark_started(agent_id, person_name)
+
+            result = await self.orchestrator.fine_tune_agent(
+                person_name,
+                agent_id,
+                resume_from_checkpoint=resume_flags.get(agent_id, False),
+                base_model=base_model,
+                tokenizer=tokenizer
+            )
+
+            self._mark_finished(agent_id, person_name, result)
+            results[agent_id] = result
+
+        return results
+
+    def _train_parallel(
+        self,
+        todo: List[Tuple[str, str]],
+        resume_flags: Dict[str, bool]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Train personas in worker processes, one base model load per worker"""
+
+        num_workers = min(self.parallel_workers, len(todo))
+        shards = [todo[i::num_workers] for i in range(num_workers)]
+        cpu_sets = _split_cpus(num_workers, self.threads_per_worker)
+
+        print(f"🚀 Training {len(todo)} personas in {num_workers} worker processes")
+
+        ctx = mp.get_context("spawn")
+        events = ctx.Queue()
+        workers = []
+
+        for shard, cpus in zip(shards, cpu_sets):
+            process = ctx.Process(
+                target=_training_worker,
+                args=(shard, cpus, self.orchestrator.base_model_name, resume_flags, events),
+                daemon=False
+            )
+            process.start()
+            workers.append((process, shard))
+
+        results = {}
+        names = dict(todo)
+
+        while any(process.is_alive() for process, _ in workers) or not events.empty():
+            try:
+                event = events.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            kind, agent_id = event[0], event[1]
+            if kind == "started":
+                self._mark_started(agent_id, names[agent_id])
+            elif kind == "finished":
+                result = event[2]
+                self._mark_finished(agent_id, names[agent_id], result)
+                results[agent_id] = result
+
+        for process, shard in workers:
+            process.join()
+            for agent_id, person_name in shard:
+                if agent_id not in results:
+                    # Worker died before reporting this persona
+                    result = {
+                        "person_name": person_name,
+                        "status": "failed",
+                        "error": f"Training worker exited with code {process.exitcode}",
+                        "ready_for_deployment": False
+                    }
+                    self._mark_finished(agent_id, person_name, result)
+                    results[agent_id] = result
+
+        return results
+
+    def _mark_started(self, agent_id: str, person_name: str):
+        self.manifest.mark(
+            agent_id,
+            "running",
+            person_name=person_name,
+            started_at=datetime.now().isoformat(),
+            fingerprint=self._fingerprints.get(agent_id),
+            model_path=str(self.orchestrator.models_dir / f"{person_name}_model")
+        )
+
+    def _mark_finished(self, agent_id: str, person_name: str, result: Dict[str, Any]):
+        status = result.get("status", "failed")
+        output_dir = self.orchestrator.models_dir / f"{person_name}_model"
+        checkpoint = None
+        if status != "completed" and output_dir.exists():
+            checkpoint = self.orchestrator._find_latest_checkpoint(output_dir)
+
+        self.manifest.mark(
+            agent_id,
+            status,
+            completed_at=datetime.now().isoformat(),
+            checkpoint=checkpoint,
+            error=result.get("error"),
+            training_duration=result.get("training_duration"),
+            train_samples=result.get("train_samples")
+        )
+
+        # Results from worker processes have not touched this process's configs
+        if status == "completed" and agent_id in AGENT_CONFIGS:
+            AGENT_CONFIGS[agent_id].model_path = result["model_path"]
+            AGENT_CONFIGS[agent_id].fine_tuned = True
+
+
+def _split_cpus(num_workers: int, threads_per_worker: Optional[int] = None) -> List[List[int]]:
+    """Give each worker a disjoint slice of the CPUs available to this process"""
+
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+
+    per_worker = threads_per_worker or max(1, len(cpus) // num_workers)
+    return [
+        [cpus[(i * per_worker + j) % len(cpus)] for j in range(per_worker)]
+        for i in range(num_workers)
+    ]
+
+
+def _training_worker(
+    shard: List[Tuple[str, str]],
+    cpus: List[int],
+    base_model_name: str,
+    resume_flags: Dict[str, bool],
+    events
+):
+    """Worker process: pin to CPUs, load the base model once, train the shard"""
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    os.environ["OMP_NUM_THREADS"] = str(len(cpus))
+    os.environ["MKL_NUM_THREADS"] = str(len(cpus))
+
+    import torch
+    torch.set_num_threads(len(cpus))
+
+    orchestrator = FineTuningOrchestrator()
+    orchestrator.base_model_name = base_model_name
+    base_model, tokenizer = orchestrator.load_base_model()
+
+    for agent_id, person_name in shard:
+        events.put(("started", agent_id))
+        result = asyncio.run(orchestrator.fine_tune_agent(
+            person_name,
+            agent_id,
+            resume_from_checkpoint=resume_flags.get(agent_id, False),
+            base_model=base_model,
+            tokenizer=tokenizer
+        ))
+        events.put(("finished", agent_id, result))
@@ -241,7 +241,17 @@ class DataNormalizer:
         return data.get('messages', [])
     
     def load_message_data(self, filepath: str) -> List[Dict[str, Any]]:
-        """Load processed message JSON"""
+        """Load processed message JSON, or a JSONL/Parquet shard from the vectorized path"""
+        suffix = Path(filepath).suffix.lower()
+        
+        if suffix == '.parquet':
+            import pandas as pd
+            return pd.read_parquet(filepath).to_dict('records')
+        
+        if suffix == '.jsonl':
+            with open(filepath, 'r', encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        
         with open(filepath, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
@@ -369,7 +379,7 @@ def main():
     parser.add_argument(
         '--message-dir',
         type=str,
-        help='Directory containing processed message JSON files'
+        help='Directory containing processed message JSON files or JSONL/Parquet shards'
     )
     parser.add_argument(
         '--synthetic-dir',
@@ -423,6 +433,23 @@ def main():
         default='data/training',
         help='Output directory for training data'
     )
+    parser.add_argument(
+        '--no-dedup',
+        action='store_true',
+        help='Disable exact/near-duplicate removal'
+    )
+    parser.add_argument(
+        '--dedup-threshold',
+        type=float,
+        default=0.85,
+        help='MinHash Jaccard similarity at which outputs count as near-duplicates'
+    )
+    parser.add_argument(
+        '--dedup-index',
+        type=str,
+        default='data/dedup/lsh_index.sqlite',
+        help='On-disk LSH index reused across incremental runs'
+    )
     
     args = parser.parse_args()
     
@@ -438,7 +465,8 @@ def main():
         gmail_files.extend(args.gmail_files)
     
     if args.message_dir:
-        message_files.extend(glob.glob(str(Path(args.message_dir) / "*.json")))
+        for pattern in ("*.json", "*.jsonl", "*.parquet"):
+            message_files.extend(glob.glob(str(Path(args.message_dir) / pattern)))
     
     if args.message_files:
         message_files.extend(args.message_files)
@@ -472,6 +500,17 @@ def main():
         print("❌ No examples generated")
         return
     
+    # Remove repeated assistant outputs (quoted replies, forwards, templated turns)
+    if not args.no_dedup:
+        from deduplication import TrainingDeduplicator, print_dedup_report
+        with TrainingDeduplicator(args.dedup_index, threshold=args.dedup_threshold) as deduplicator:
+            examples, report = deduplicator.deduplicate(
+                examples,
+                text_fn=lambda ex: ex.get('output', ''),
+                source_fn=lambda ex: ex.get('metadata', {}).get('source', 'unknown')
+            )
+        print_dedup_report(report)
+    
     # Split train/valid
     train_examples, valid_examples = normalizer.split_train_valid(
         examples,
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Training Data Deduplication
+Removes exact and near-duplicate examples across Gmail, message and synthetic
+sources using content hashes plus MinHash-LSH over normalized assistant outputs.
+The LSH index lives on disk (SQLite) so incremental runs only hash and compare
+records that have not been seen before.
+"""
+import re
+import json
+import sqlite3
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+import numpy as np
+
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_QUOTED_LINE = re.compile(r'^\s*>.*$', re.MULTILINE)
+_REPLY_HEADER = re.compile(r'^\s*on\b.{0,200}?\bwrote:.*', re.IGNORECASE | re.DOTALL | re.MULTILINE)
+_FORWARD_HEADER = re.compile(r'-{2,}\s*forwarded message\s*-{2,}.*', re.IGNORECASE | re.DOTALL)
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop quoted reply/forward tails and punctuation, collapse whitespace"""
+    text = _QUOTED_LINE.sub(' ', text)
+    text = _REPLY_HEADER.sub(' ', text)
+    text = _FORWARD_HEADER.sub(' ', text)
+    return ' '.join(_NON_WORD.sub(' ', text.lower()).split())
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) so the LSH S-curve crosses 0.5 closest to the threshold"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        crossover = (1 / bands) ** (1 / rows)
+        score = abs(crossover - threshold)
+        if best is None or score < best[0]:
+            best = (score, bands, rows)
+    return best[1], best[2]
+
+
+class TrainingDeduplicator:
+    """Exact + MinHash-LSH near-duplicate filter backed by an on-disk index"""
+
+    def __init__(
+        self,
+        index_path: str = "data/dedup/lsh_index.sqlite",
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        seed: int = 1
+    ):
+        """
+        Initialize deduplicator
+
+        Args:
+            index_path: SQLite file holding signatures and LSH buckets
+            threshold: Estimated Jaccard similarity at or above which records are duplicates
+            num_perm: Number of MinHash permutations
+            shingle_size: Words per shingle
+            seed: Seed for the permutation parameters
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+
+        generator = np.random.RandomState(seed)
+        self._perm_a = generator.randint(1, np.iinfo(np.uint32).max, size=num_perm, dtype=np.uint64)
+        self._perm_b = generator.randint(0, np.iinfo(np.uint32).max, size=num_perm, dtype=np.uint64)
+
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.index_path))
+        self._init_schema(seed)
+
+    def _init_schema(self, seed: int):
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS records (
+                hash TEXT PRIMARY KEY,
+                source TEXT,
+                status TEXT,
+                signature BLOB
+            );
+            CREATE TABLE IF NOT EXISTS buckets (band INTEGER, bucket TEXT, hash TEXT);
+            CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (band, bucket);
+        ''')
+
+        params = json.dumps({
+            'num_perm': self.num_perm,
+            'bands': self.bands,
+            'shingle_size': self.shingle_size,
+            'seed': seed,
+        }, sort_keys=True)
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'params'").fetchone()
+        if row is None:
+            self.db.execute("INSERT INTO meta (key, value) VALUES ('params', ?)", (params,))
+            self.db.commit()
+        elif row[0] != params:
+            raise ValueError(
+                f"Dedup index {self.index_path} was built with {row[0]}; "
+                f"current settings are {params}. Use a new --dedup-index path."
+            )
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _signature(self, normalized: str) -> np.ndarray:
+        """MinHash signature over word shingles"""
+        words = normalized.split()
+        if len(words) <= self.shingle_size:
+            shingles = {normalized}
+        else:
+            shingles = {
+                ' '.join(words[i:i + self.shingle_size])
+                for i in range(len(words) - self.shingle_size + 1)
+            }
+
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little') for s in shingles],
+            dtype=np.uint64
+        )
+        # Universal hashing (a*x + b) mod p, truncated to 32 bits; one column per permutation
+        permuted = (np.outer(hashes, self._perm_a) + self._perm_b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[str]:
+        return [
+            hashlib.blake2b(signature[i * self.rows:(i + 1) * self.rows].tobytes(), digest_size=8).hexdigest()
+            for i in range(self.bands)
+        ]
+
+    def _find_near_duplicate(self, signature: np.ndarray, band_keys: List[str]) -> Optional[str]:
+        candidates = set()
+        for band, bucket in enumerate(band_keys):
+            for (candidate,) in self.db.execute(
+                "SELECT hash FROM buckets WHERE band = ? AND bucket = ?", (band, bucket)
+            ):
+                candidates.add(candidate)
+
+        for candidate in candidates:
+            row = self.db.execute("SELECT signature FROM records WHERE hash = ?", (candidate,)).fetchone()
+            other = np.frombuffer(row[0], dtype=np.uint64)
+            if np.mean(signature == other) >= self.threshold:
+                return candidate
+        return None
+
+    def deduplicate(
+        self,
+        examples: List[Dict[str, Any]],
+        text_fn: Callable[[Dict[str, Any]], str],
+        source_fn: Callable[[Dict[str, Any]], str]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, int]]]:
+        """
+        Drop exact and near-duplicate examples
+
+        Records already kept by a previous run are kept again without being
+        compared; records removed by a previous run are removed again.
+
+        Args:
+            examples: Training examples
+            text_fn: Returns the assistant output to compare
+            source_fn: Returns the example's source name for the report
+
+        Returns:
+            (kept examples, per-source report of input/exact/near/kept counts)
+        """
+        kept = []
+        report: Dict[str, Dict[str, int]] = {}
+        seen_this_run = set()
+
+        for example in examples:
+            source = source_fn(example) or 'unknown'
+            counts = report.setdefault(source, {'input': 0, 'exact': 0, 'near': 0, 'kept': 0})
+            counts['input'] += 1
+
+            normalized = normalize_text(text_fn(example) or '')
+            if not normalized:
+                counts['kept'] += 1
+                kept.append(example)
+                continue
+
+            digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+            if digest in seen_this_run:
+                counts['exact'] += 1
+                continue
+            seen_this_run.add(digest)
+
+            row = self.db.execute("SELECT status FROM records WHERE hash = ?", (digest,)).fetchone()
+            if row is not None:
+                if row[0] == 'kept':
+                    counts['kept'] += 1
+                    kept.append(example)
+                else:
+                    counts['near'] += 1
+                continue
+
+            signature = self._signature(normalized)
+            band_keys = self._band_keys(signature)
+
+            if self._find_near_duplicate(signature, band_keys):
+                self.db.execute(
+                    "INSERT INTO records (hash, source, status, signature) VALUES (?, ?, 'near_duplicate', NULL)",
+                    (digest, source)
+                )
+                counts['near'] += 1
+                continue
+
+            self.db.execute(
+                "INSERT INTO records (hash, source, status, signature) VALUES (?, ?, 'kept', ?)",
+                (digest, source, signature.tobytes())
+            )
+            self.db.executemany(
+                "INSERT INTO buckets (band, bucket, hash) VALUES (?, ?, ?)",
+                [(band, bucket, digest) for band, bucket in enumerate(band_keys)]
+            )
+            counts['kept'] += 1
+            kept.append(example)
+
+        self.db.commit()
+        return kept, report
+
+
+def print_dedup_report(report: Dict[str, Dict[str, int]]):
+    """Print examples removed per source"""
+    print("\n🧹 Deduplication report:")
+    for source, counts in sorted(report.items()):
+        removed = counts['exact'] + counts['near']
+        print(
+            f"   {source}: {counts['input']} in, {removed} removed "
+            f"({counts['exact']} exact, {counts['near']} near-duplicate), {counts['kept']} kept"
+        )
@@ -5,6 +5,7 @@ Tests persona fidelity with held-out prompts
 """
 import os
 import json
+import time
 import torch
 from pathlib import Path
 from typing import List, Dict, Any
@@ -72,6 +73,10 @@ class ModelEvaluator:
         
         print("✅ Model loaded")
     
+    def format_prompt(self, prompt: str) -> str:
+        """Wrap a user prompt in the persona framing used for training"""
+        return f"SYSTEM: You are {self.persona_name}. Respond as {self.persona_name} would in a professional workplace context.\nUSER: {prompt}\nASSISTANT:"
+    
     def generate_response(
         self,
         prompt: str,
@@ -82,7 +87,7 @@ class ModelEvaluator:
     ) -> str:
         """Generate response to prompt"""
         # Format prompt with persona
-        full_prompt = f"SYSTEM: You are {self.persona_name}. Respond as {self.persona_name} would in a professional workplace context.\nUSER: {prompt}\nASSISTANT:"
+        full_prompt = self.format_prompt(prompt)
         
         # Tokenize
         inputs = self.tokenizer(
@@ -115,10 +120,65 @@ class ModelEvaluator:
         
         return response
     
+    def generate_batch(
+        self,
+        prompts: List[str],
+        max_new_tokens: int = 256,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        do_sample: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate responses for several prompts in one forward pass
+        
+        Returns one dict per prompt with the response, the number of generated
+        tokens, its share of the batch time (latency_s, the batch latency
+        divided by the batch size) and the wall-clock latency of the batch.
+        """
+        full_prompts = [self.format_prompt(p) for p in prompts]
+        
+        # Decoder-only models need left padding so generation starts right after each prompt
+        self.tokenizer.padding_side = "left"
+        inputs = self.tokenizer(
+            full_prompts,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=1024
+        ).to(self.model.device)
+        
+        start = time.perf_counter()
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                do_sample=do_sample,
+                pad_token_id=self.tokenizer.pad_token_id,
+                eos_token_id=self.tokenizer.eos_token_id,
+            )
+        latency = time.perf_counter() - start
+        
+        new_tokens = outputs[:, inputs["input_ids"].shape[1]:]
+        responses = self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+        token_counts = (new_tokens != self.tokenizer.pad_token_id).sum(dim=1).tolist()
+        
+        return [
+            {
+                'response': response.strip(),
+                'completion_tokens': count,
+                'latency_s': latency / len(prompts),
+                'batch_latency_s': latency,
+            }
+            for response, count in zip(responses, token_counts)
+        ]
+    
     def evaluate_prompts(
         self,
         prompts: List[Dict[str, Any]],
-        save_results: bool = True
+        save_results: bool = True,
+        batch_size: int = 8
     ) -> Dict[str, Any]:
         """
         Evaluate model on list of prompts
@@ -126,36 +186,44 @@ class ModelEvaluator:
         Args:
             prompts: List of prompt dictionaries with 'prompt' and optional 'expected_topic'
             save_results: Whether to save results to file
+            batch_size: Number of prompts generated per forward pass
         """
-        print(f"🔍 Evaluating {len(prompts)} prompts...")
+        print(f"🔍 Evaluating {len(prompts)} prompts (batch size {batch_size})...")
         
         results = []
         
-        for i, prompt_data in enumerate(prompts):
-            prompt = prompt_data.get('prompt', prompt_data) if isinstance(prompt_data, dict) else prompt_data
-            expected_topic = prompt_data.get('expected_topic', '') if isinstance(prompt_data, dict) else ''
-            
-            print(f"\n⏳ [{i+1}/{len(prompts)}] Prompt: {prompt[:60]}...")
+        for batch_start in range(0, len(prompts), batch_size):
+            batch = prompts[batch_start:batch_start + batch_size]
+            texts = [p.get('prompt', '') if isinstance(p, dict) else p for p in batch]
+            topics = [p.get('expected_topic', '') if isinstance(p, dict) else '' for p in batch]
             
-            response = self.generate_response(prompt)
+            print(f"\n⏳ [{batch_start + 1}-{batch_start + len(batch)}/{len(prompts)}] Generating batch...")
             
-            result = {
-                'prompt': prompt,
-                'expected_topic': expected_topic,
-                'response': response,
-                'response_length': len(response),
-            }
+            generations = self.generate_batch(texts)
             
-            results.append(result)
+            for prompt, expected_topic, generation in zip(texts, topics, generations):
+                response = generation['response']
+                latency = generation['latency_s']
+                results.append({
+                    'prompt': prompt,
+                    'expected_topic': expected_topic,
+                    'response': response,
+                    'response_length': len(response),
+                    'completion_tokens': generation['completion_tokens'],
+                    'latency_s': latency,
+                    'tokens_per_s': generation['completion_tokens'] / latency if latency > 0 else 0.0,
+                })
             
-            print(f"✅ Generated response ({len(response)} chars)")
+            print(f"✅ Generated {len(batch)} responses in {generations[0]['batch_latency_s']:.2f}s")
         
         # Summary
         avg_length = sum(r['response_length'] for r in results) / len(results)
+        avg_tokens_per_s = sum(r['tokens_per_s'] for r in results) / len(results)
         
         summary = {
             'total_prompts': len(prompts),
             'average_response_length': avg_length,
+            'average_tokens_per_s': avg_tokens_per_s,
             'results': results
         }
         
@@ -261,6 +329,12 @@ def main():
         type=int,
         help='Number of prompts to evaluate (if using default)'
     )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=8,
+        help='Prompts generated per forward pass'
+    )
     
     args = parser.parse_args()
     
@@ -283,11 +357,12 @@ def main():
     evaluator.load_model()
     
     # Evaluate
-    results = evaluator.evaluate_prompts(prompts)
+    results = evaluator.evaluate_prompts(prompts, batch_size=args.batch_size)
     
     print(f"\n✅ Evaluation complete!")
     print(f"📊 Evaluated {results['total_prompts']} prompts")
     print(f"📊 Average response length: {results['average_response_length']:.0f} characters")
+    print(f"📊 Average throughput: {results['average_tokens_per_s']:.1f} tokens/s")
 
 
 if __name__ == '__main__':
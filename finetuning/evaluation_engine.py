@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Evaluation Engine for Fine-tuned Personas
+Batched local generation, concurrent API calls, on-disk response caching,
+per-prompt latency/throughput/cost and a promotion report across adapters
+"""
+import os
+import csv
+import json
+import time
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable
+from dataclasses import dataclass, asdict
+
+
+@dataclass
+class GenerationParams:
+    """Generation parameters (part of the cache key)"""
+    max_new_tokens: int = 256
+    temperature: float = 0.7
+    top_p: float = 0.9
+    system_message: str = "You are Ryan Lin. Respond as Ryan Lin would in a professional workplace context."
+
+
+@dataclass
+class PromotionGate:
+    """Thresholds an adapter must meet to be promoted"""
+    min_quality: Optional[float] = None
+    max_p95_latency_s: Optional[float] = None
+    min_tokens_per_s: Optional[float] = None
+    max_cost_usd: Optional[float] = None
+
+
+RESULT_COLUMNS = [
+    'model', 'prompt', 'expected_topic', 'response', 'response_length',
+    'prompt_tokens', 'completion_tokens', 'latency_s', 'batch_latency_s', 'tokens_per_s',
+    'cost_usd', 'quality', 'cached', 'error',
+]
+
+
+class ResponseCache:
+    """Append-only JSONL cache of responses keyed by (model, prompt, params)"""
+
+    def __init__(self, cache_file: str = "data/eval_cache/responses.jsonl"):
+        self.cache_file = Path(cache_file)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+        if self.cache_file.exists():
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry['key']] = entry['result']
+
+    @staticmethod
+    def make_key(model: str, prompt: str, params: GenerationParams) -> str:
+        payload = json.dumps(
+            {'model': model, 'prompt': prompt, 'params': asdict(params)},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def put_many(self, items: Dict[str, Dict[str, Any]]):
+        if not items:
+            return
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_file, 'a', encoding='utf-8') as f:
+            for key, result in items.items():
+                self.entries[key] = result
+                f.write(json.dumps({'key': key, 'result': result}, ensure_ascii=False) + '\n')
+
+
+def token_f1(response: str, reference: str) -> float:
+    """Unigram F1 between a response and a reference answer"""
+    response_tokens = response.lower().split()
+    reference_tokens = reference.lower().split()
+    if not response_tokens or not reference_tokens:
+        return 0.0
+
+    remaining = {}
+    for token in reference_tokens:
+        remaining[token] = remaining.get(token, 0) + 1
+    overlap = 0
+    for token in response_tokens:
+        if remaining.get(token, 0) > 0:
+            overlap += 1
+            remaining[token] -= 1
+
+    if overlap == 0:
+        return 0.0
+    precision = overlap / len(response_tokens)
+    recall = overlap / len(reference_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def default_quality(prompt_data: Dict[str, Any], response: str) -> Optional[float]:
+    """Score against a 'reference' answer or 'expected_keywords' when the prompt has one"""
+    if prompt_data.get('reference'):
+        return token_f1(response, prompt_data['reference'])
+    keywords = prompt_data.get('expected_keywords')
+    if keywords:
+        lowered = response.lower()
+        return sum(1 for kw in keywords if kw.lower() in lowered) / len(keywords)
+    return None
+
+
+def adapter_fingerprint(adapter_path: str) -> str:
+    """Short hash of the adapter files' names, sizes and modification times"""
+    digest = hashlib.sha256()
+    path = Path(adapter_path)
+    files = sorted(path.glob("adapter_*")) if path.is_dir() else [path]
+    for file in files:
+        if file.is_file():
+            stat = file.stat()
+            digest.update(f"{file.name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+class LocalBatchBackend:
+    """Generate with a local base model + LoRA adapter in batches"""
+
+    def __init__(
+        self,
+        base_model_name: str,
+        adapter_path: str,
+        persona_name: str = "Ryan Lin",
+        batch_size: int = 8,
+        cost_per_hour: float = 0.0
+    ):
+        from evaluation import ModelEvaluator
+
+        # The adapter fingerprint keeps cached responses of an adapter retrained in place from being reused
+        self.model_id = f"{base_model_name}+{adapter_path}@{adapter_fingerprint(adapter_path)}"
+        self.batch_size = batch_size
+        self.cost_per_hour = cost_per_hour
+        self.evaluator = ModelEvaluator(base_model_name, adapter_path, persona_name)
+        self._loaded = False
+
+    async def generate(self, prompts: List[str], params: GenerationParams) -> List[Dict[str, Any]]:
+        if not self._loaded:
+            self.evaluator.load_model()
+            self._loaded = True
+
+        results = []
+        for start in range(0, len(prompts), self.batch_size):
+            batch = prompts[start:start + self.batch_size]
+            generations = self.evaluator.generate_batch(
+                batch,
+                max_new_tokens=params.max_new_tokens,
+                temperature=params.temperature,
+                top_p=params.top_p,
+            )
+            # GPU time for the batch is shared evenly between its prompts (latency_s is that share)
+            for generation in generations:
+                results.append({
+                    **generation,
+                    'prompt_tokens': None,
+                    'cost_usd': self.cost_per_hour * generation['latency_s'] / 3600,
+                })
+        return results
+
+
+class OpenAIBackend:
+    """Call a (fine-tuned) OpenAI chat model concurrently under a limit"""
+
+    def __init__(
+        self,
+        model: str,
+        concurrency: int = 8,
+        input_price_per_1m: float = 0.0,
+        output_price_per_1m: float = 0.0
+    ):
+        from openai import AsyncOpenAI
+
+        api_key = os.environ.get('OPENAI_API_KEY')
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable not set")
+
+        self.client = AsyncOpenAI(api_key=api_key)
+        self.model_id = model
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.input_price_per_1m = input_price_per_1m
+        self.output_price_per_1m = output_price_per_1m
+
+    async def _generate_one(self, prompt: str, params: GenerationParams) -> Dict[str, Any]:
+        async with self.semaphore:
+            start = time.perf_counter()
+            try:
+                response = await self.client.chat.completions.create(
+                    model=self.model_id,
+                    messages=[
+                        {"role": "system", "content": params.system_message},
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=params.temperature,
+                    top_p=params.top_p,
+                    max_tokens=params.max_new_tokens,
+                )
+            except Exception as e:
+                latency = time.perf_counter() - start
+                return {'error': str(e), 'latency_s': latency, 'batch_latency_s': latency}
+            latency = time.perf_counter() - start
+
+        usage = response.usage
+        cost = (
+            usage.prompt_tokens * self.input_price_per_1m
+            + usage.completion_tokens * self.output_price_per_1m
+        ) / 1_000_000
+        return {
+            'response': response.choices[0].message.content or '',
+            'prompt_tokens': usage.prompt_tokens,
+            'completion_tokens': usage.completion_tokens,
+            'latency_s': latency,
+            'batch_latency_s': latency,
+            'cost_usd': cost,
+        }
+
+    async def generate(self, prompts: List[str], params: GenerationParams) -> List[Dict[str, Any]]:
+        return await asyncio.gather(*(self._generate_one(p, params) for p in prompts))
+
+
+class EvaluationEngine:
+    """Evaluate prompts against a backend, reusing cached responses"""
+
+    def __init__(
+        self,
+        cache: Optional[ResponseCache] = None,
+        params: Optional[GenerationParams] = None,
+        quality_fn: Callable[[Dict[str, Any], str], Optional[float]] = default_quality
+    ):
+        self.cache = cache or ResponseCache()
+        self.params = params or GenerationParams()
+        self.quality_fn = quality_fn
+
+    async def evaluate(self, backend, prompts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return one result row per prompt; only uncached prompts are generated"""
+        prompts = [p if isinstance(p, dict) else {'prompt': str(p)} for p in prompts]
+        keys = [ResponseCache.make_key(backend.model_id, p['prompt'], self.params) for p in prompts]
+
+        misses = [i for i, key in enumerate(keys) if self.cache.get(key) is None]
+        print(f"🔍 {backend.model_id}: {len(prompts)} prompts, {len(prompts) - len(misses)} cached, {len(misses)} to generate")
+
+        errors = {}
+        if misses:
+            generations = await backend.generate([prompts[i]['prompt'] for i in misses], self.params)
+            fresh = {}
+            for i, generation in zip(misses, generations):
+                if 'error' in generation:
+                    print(f"❌ {prompts[i]['prompt'][:60]}...: {generation['error']}")
+                    errors[i] = generation
+                else:
+                    fresh[keys[i]] = generation
+            self.cache.put_many(fresh)
+
+        miss_set = set(misses)
+        return [
+            self._make_row(backend.model_id, prompt_data, errors.get(i) or self.cache.get(key) or {}, i not in miss_set)
+            for i, (prompt_data, key) in enumerate(zip(prompts, keys))
+        ]
+
+    def _make_row(self, model_id: str, prompt_data: Dict[str, Any], generation: Dict[str, Any], cached: bool) -> Dict[str, Any]:
+        response = generation.get('response', '')
+        latency = generation.get('latency_s') or 0.0
+        completion_tokens = generation.get('completion_tokens') or 0
+        return {
+            'model': model_id,
+            'prompt': prompt_data['prompt'],
+            'expected_topic': prompt_data.get('expected_topic', ''),
+            'response': response,
+            'response_length': len(response),
+            'prompt_tokens': generation.get('prompt_tokens'),
+            'completion_tokens': completion_tokens,
+            'latency_s': latency,
+            'batch_latency_s': generation.get('batch_latency_s') or latency,
+            'tokens_per_s': completion_tokens / latency if latency > 0 else 0.0,
+            'cost_usd': generation.get('cost_usd', 0.0),
+            'quality': self.quality_fn(prompt_data, response) if response else None,
+            'cached': cached,
+            'error': generation.get('error'),
+        }
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(rows: List[Dict[str, Any]], gate: Optional[PromotionGate] = None) -> Dict[str, Any]:
+    """Aggregate result rows for one model and apply the promotion gate"""
+    ok = [r for r in rows if not r['error']]
+    latencies = [r['latency_s'] for r in ok]
+    batch_latencies = [r['batch_latency_s'] for r in ok]
+    qualities = [r['quality'] for r in ok if r['quality'] is not None]
+
+    summary = {
+        'model': rows[0]['model'] if rows else '',
+        'prompts': len(rows),
+        'errors': len(rows) - len(ok),
+        'quality': sum(qualities) / len(qualities) if qualities else None,
+        'p50_latency_s': _percentile(latencies, 50),
+        'p95_latency_s': _percentile(latencies, 95),
+        # What a request actually waits: the whole batch for local generation
+        'p95_batch_latency_s': _percentile(batch_latencies, 95),
+        'tokens_per_s': sum(r['tokens_per_s'] for r in ok) / len(ok) if ok else 0.0,
+        'cost_usd': sum(r['cost_usd'] or 0.0 for r in ok),
+        'average_response_length': sum(r['response_length'] for r in ok) / len(ok) if ok else 0.0,
+    }
+
+    failures = []
+    if gate:
+        if summary['errors']:
+            failures.append(f"{summary['errors']} errors")
+        if gate.min_quality is not None and (summary['quality'] is None or summary['quality'] < gate.min_quality):
+            failures.append(f"quality {summary['quality']} < {gate.min_quality}")
+        if gate.max_p95_latency_s is not None and summary['p95_batch_latency_s'] > gate.max_p95_latency_s:
+            failures.append(f"p95 batch latency {summary['p95_batch_latency_s']:.2f}s > {gate.max_p95_latency_s}s")
+        if gate.min_tokens_per_s is not None and summary['tokens_per_s'] < gate.min_tokens_per_s:
+            failures.append(f"{summary['tokens_per_s']:.1f} tokens/s < {gate.min_tokens_per_s}")
+        if gate.max_cost_usd is not None and summary['cost_usd'] > gate.max_cost_usd:
+            failures.append(f"cost ${summary['cost_usd']:.4f} > ${gate.max_cost_usd}")
+    summary['promote'] = not failures if gate else None
+    summary['gate_failures'] = failures
+    return summary
+
+
+def write_report(
+    all_rows: Dict[str, List[Dict[str, Any]]],
+    output_dir: str,
+    gate: Optional[PromotionGate] = None
+) -> List[Dict[str, Any]]:
+    """Write per-prompt CSV, summary JSON and a markdown comparison table"""
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    with open(output_path / "results.csv", 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        for rows in all_rows.values():
+            writer.writerows(rows)
+
+    summaries = [summarize(rows, gate) for rows in all_rows.values()]
+    with open(output_path / "summary.json", 'w', encoding='utf-8') as f:
+        json.dump({'gate': asdict(gate) if gate else None, 'models': summaries}, f, indent=2)
+
+    lines = [
+        "| Model | Quality | p50 latency (s) | p95 latency (s) | p95 batch latency (s) | Tokens/s | Cost ($) | Errors | Promote |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for s in summaries:
+        quality = f"{s['quality']:.3f}" if s['quality'] is not None else "n/a"
+        promote = {True: "✅", False: "❌ " + "; ".join(s['gate_failures']), None: "-"}[s['promote']]
+        lines.append(
+            f"| {s['model']} | {quality} | {s['p50_latency_s']:.2f} | {s['p95_latency_s']:.2f} | {s['p95_batch_latency_s']:.2f} "
+            f"| {s['tokens_per_s']:.1f} | {s['cost_usd']:.4f} | {s['errors']} | {promote} |"
+        )
+    (output_path / "comparison.md").write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+    return summaries
+
+
+def main():
+    """Evaluate one or more adapters/models and write a comparison report"""
+    import argparse
+    from dotenv import load_dotenv
+    from evaluation import load_evaluation_prompts, create_default_prompts
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Batched evaluation of fine-tuned personas')
+    parser.add_argument('--backend', choices=['local', 'openai'], default='local', help='Generation backend')
+    parser.add_argument('--base-model', type=str, default='unsloth/gpt-oss-20b', help='Base model (local backend)')
+    parser.add_argument('--adapter', type=str, action='append', default=[], help='LoRA adapter path (repeatable)')
+    parser.add_argument('--model', type=str, action='append', default=[], help='OpenAI model ID (repeatable)')
+    parser.add_argument('--persona-name', type=str, default='Ryan Lin', help='Persona name')
+    parser.add_argument('--prompts-file', type=str, help='JSON file with evaluation prompts')
+    parser.add_argument('--batch-size', type=int, default=8, help='Local generation batch size')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent API requests')
+    parser.add_argument('--max-new-tokens', type=int, default=256, help='Maximum generated tokens')
+    parser.add_argument('--temperature', type=float, default=0.7, help='Sampling temperature')
+    parser.add_argument('--cost-per-hour', type=float, default=0.0, help='Local GPU cost in $/hour')
+    parser.add_argument('--input-price', type=float, default=0.0, help='API $ per 1M input tokens')
+    parser.add_argument('--output-price', type=float, default=0.0, help='API $ per 1M output tokens')
+    parser.add_argument('--cache-file', type=str, default='data/eval_cache/responses.jsonl', help='Response cache')
+    parser.add_argument('--output-dir', type=str, default='data/eval_reports', help='Report directory')
+    parser.add_argument('--min-quality', type=float, help='Promotion gate: minimum mean quality')
+    parser.add_argument('--max-p95-latency', type=float, help='Promotion gate: maximum p95 batch (request) latency (s)')
+    parser.add_argument('--min-tokens-per-s', type=float, help='Promotion gate: minimum mean tokens/s')
+
+    args = parser.parse_args()
+
+    if args.prompts_file and Path(args.prompts_file).exists():
+        prompts = load_evaluation_prompts(args.prompts_file)
+    else:
+        prompts = create_default_prompts()
+
+    params = GenerationParams(
+        max_new_tokens=args.max_new_tokens,
+        temperature=args.temperature,
+        system_message=f"You are {args.persona_name}. Respond as {args.persona_name} would in a professional workplace context.",
+    )
+    gate = PromotionGate(
+        min_quality=args.min_quality,
+        max_p95_latency_s=args.max_p95_latency,
+        min_tokens_per_s=args.min_tokens_per_s,
+    )
+    engine = EvaluationEngine(ResponseCache(args.cache_file), params)
+
+    if args.backend == 'local':
+        if not args.adapter:
+            parser.error("--adapter is required for the local backend")
+        backends = [
+            LocalBatchBackend(args.base_model, adapter, args.persona_name, args.batch_size, args.cost_per_hour)
+            for adapter in args.adapter
+        ]
+    else:
+        if not args.model:
+            parser.error("--model is required for the openai backend")
+        backends = [
+            OpenAIBackend(model, args.concurrency, args.input_price, args.output_price)
+            for model in args.model
+        ]
+
+    async def run_all():
+        all_rows = {}
+        for backend in backends:
+            all_rows[backend.model_id] = await engine.evaluate(backend, prompts)
+            # Free the local model before loading the next adapter
+            if isinstance(backend, LocalBatchBackend):
+                backend.evaluator.model = None
+        return all_rows
+
+    all_rows = asyncio.run(run_all())
+    summaries = write_report(all_rows, args.output_dir, gate)
+
+    print(f"\n📊 Report written to {args.output_dir}")
+    print((Path(args.output_dir) / "comparison.md").read_text(encoding='utf-8'))
+
+    if any(s['promote'] is False for s in summaries):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
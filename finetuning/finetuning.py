@@ -5,6 +5,8 @@ Optimized for cloud GPU deployment (24GB+ VRAM)
 """
 import os
 import json
+import hashlib
+import shutil
 import torch
 from pathlib import Path
 from typing import Optional
@@ -24,7 +26,9 @@ try:
         prepare_model_for_kbit_training,
         TaskType
     )
-    from datasets import load_dataset
+    from transformers import default_data_collator
+    from transformers.utils import is_flash_attn_2_available
+    from datasets import Dataset, load_dataset, load_from_disk
     import bitsandbytes as bnb
 except ImportError as e:
     print(f"❌ Missing dependency: {e}")
@@ -81,6 +85,10 @@ class TrainingConfig:
     # Sequence
     max_seq_length: int = 1024
     padding_side: str = "right"
+    packing: bool = True  # Pack several short examples into each max_seq_length window
+    attn_implementation: Optional[str] = None  # None: flash_attention_2 when packing, model default otherwise (packing falls back off for others)
+    tokenize_num_proc: int = 4
+    tokenized_cache_dir: str = "data/tokenized_cache"
     
     # Optimization
     gradient_checkpointing: bool = True
@@ -127,6 +135,21 @@ class FineTuner:
             self.tokenizer.pad_token = self.tokenizer.eos_token
             self.tokenizer.pad_token_id = self.tokenizer.eos_token_id
         
+        # Packed windows rely on flash-attention varlen kernels (driven by
+        # position_ids) to keep examples from attending to each other; without
+        # them (e.g. on CPU) fall back to one dynamically padded example per sequence
+        attn_implementation = self.config.attn_implementation
+        if self.config.packing:
+            if attn_implementation not in (None, "flash_attention_2"):
+                print(f"⚠️  Packing requires attn_implementation='flash_attention_2', got {attn_implementation!r}; training without packing")
+                self.config.packing = False
+            elif not is_flash_attn_2_available():
+                print("⚠️  Packing requires flash-attention 2 (pip install flash-attn, CUDA only); training without packing")
+                self.config.packing = False
+            else:
+                attn_implementation = "flash_attention_2"
+        model_kwargs = {"attn_implementation": attn_implementation} if attn_implementation else {}
+        
         # Load model with 4-bit quantization
         if self.config.load_in_4bit:
             print("🔧 Loading model in 4-bit (QLoRA)...")
@@ -142,6 +165,7 @@ class FineTuner:
                     "bnb_4bit_use_double_quant": self.config.bnb_4bit_use_double_quant,
                 },
                 torch_dtype=compute_dtype,
+                **model_kwargs,
             )
         elif self.config.load_in_8bit:
             print("🔧 Loading model in 8-bit...")
@@ -150,6 +174,7 @@ class FineTuner:
                 trust_remote_code=self.config.trust_remote_code,
                 load_in_8bit=True,
                 device_map="auto",
+                **model_kwargs,
             )
         else:
             print("🔧 Loading model in full precision (requires >40GB VRAM)...")
@@ -158,6 +183,7 @@ class FineTuner:
                 trust_remote_code=self.config.trust_remote_code,
                 device_map="auto",
                 torch_dtype=torch.bfloat16 if self.config.bf16 else torch.float16,
+                **model_kwargs,
             )
         
         # Prepare model for k-bit training
@@ -228,28 +254,80 @@ class FineTuner:
         
         return prompt
     
-    def tokenize_dataset(self, examples: list):
-        """Tokenize dataset"""
-        print("🔤 Tokenizing dataset...")
+    def tokenize_dataset(self, examples: list, split: str = "train") -> "Dataset":
+        """Tokenize dataset (batched, optionally packed, cached on disk)"""
+        cache_path = self._tokenized_cache_path(examples, split)
+        if cache_path.exists():
+            print(f"♻️  Loading cached tokenized {split} dataset from {cache_path}")
+            return load_from_disk(str(cache_path))
         
-        # Tokenize each example
-        tokenized_list = []
-        for ex in examples:
-            # Tokenize single example
-            tokenized = self.tokenizer(
-                ex,
-                truncation=True,
-                max_length=self.config.max_seq_length,
-                padding="max_length",
-                return_tensors=None,
+        print(f"🔤 Tokenizing {split} dataset ({len(examples)} examples)...")
+        # Worker start-up outweighs the gain on small splits
+        num_proc = self.config.tokenize_num_proc if len(examples) >= 1000 else None
+        
+        dataset = Dataset.from_dict({"text": examples})
+        dataset = dataset.map(
+            _tokenize_batch,
+            batched=True,
+            num_proc=num_proc,
+            remove_columns=["text"],
+            fn_kwargs={
+                "tokenizer": self.tokenizer,
+                "max_length": self.config.max_seq_length,
+                "append_eos": self.config.packing,
+            },
+            desc="Tokenizing",
+        )
+        
+        if self.config.packing:
+            # Packing is done per map batch, so larger batches waste less tail space
+            dataset = dataset.map(
+                _pack_batch,
+                batched=True,
+                batch_size=1000,
+                num_proc=num_proc,
+                remove_columns=dataset.column_names,
+                fn_kwargs={
+                    "max_length": self.config.max_seq_length,
+                    "pad_token_id": self.tokenizer.pad_token_id,
+                },
+                desc="Packing",
             )
-            
-            # Labels are same as input_ids for causal LM
-            tokenized["labels"] = tokenized["input_ids"].copy()
-            
-            tokenized_list.append(tokenized)
+            print(f"   Packed {len(examples)} examples into {len(dataset)} windows of {self.config.max_seq_length} tokens")
         
-        return tokenized_list
+        # Write to a temporary sibling and rename it into place, so an
+        # interrupted run never leaves a partial cache that later runs load
+        tmp_path = cache_path.with_name(f"{cache_path.name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        dataset.save_to_disk(str(tmp_path))
+        try:
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # Another run cached the same dataset first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not cache_path.exists():
+                raise
+        dataset = load_from_disk(str(cache_path))
+        print(f"💾 Cached tokenized {split} dataset to {cache_path}")
+        return dataset
+    
+    def _tokenized_cache_path(self, examples: list, split: str) -> Path:
+        """Cache location keyed by tokenizer, tokenization settings and data hash"""
+        digest = hashlib.sha256()
+        tokenizer_id = {
+            "name_or_path": self.tokenizer.name_or_path,
+            "vocab_size": len(self.tokenizer),
+            "eos_token_id": self.tokenizer.eos_token_id,
+            "pad_token_id": self.tokenizer.pad_token_id,
+            "max_seq_length": self.config.max_seq_length,
+            "packing": self.config.packing,
+            "packed_format": 3,  # windows delimited by position_ids, boundary labels masked
+        }
+        digest.update(json.dumps(tokenizer_id, sort_keys=True).encode("utf-8"))
+        for ex in examples:
+            digest.update(ex.encode("utf-8"))
+            digest.update(b"\0")
+        return Path(self.config.tokenized_cache_dir) / f"{split}-{digest.hexdigest()[:16]}"
     
     def train(self):
         """Run training"""
@@ -262,17 +340,9 @@ class FineTuner:
         # Load dataset
         train_data, valid_data = self.load_dataset()
         
-        # Tokenize
-        train_tokenized = self.tokenize_dataset(train_data)
-        valid_tokenized = self.tokenize_dataset(valid_data)
-        
-        # Convert to dataset format compatible with Trainer
-        # Trainer can work with list of dicts, but we'll ensure proper format
-        from datasets import Dataset
-        
-        # Convert list of dicts to Dataset
-        train_dataset = Dataset.from_list(train_tokenized)
-        eval_dataset = Dataset.from_list(valid_tokenized)
+        # Tokenize (reuses the on-disk cache when data and tokenizer are unchanged)
+        train_dataset = self.tokenize_dataset(train_data, split="train")
+        eval_dataset = self.tokenize_dataset(valid_data, split="valid")
         
         # Training arguments
         training_args = TrainingArguments(
@@ -306,10 +376,16 @@ class FineTuner:
         )
         
         # Data collator
-        data_collator = DataCollatorForLanguageModeling(
-            tokenizer=self.tokenizer,
-            mlm=False,  # Causal LM, not masked LM
-        )
+        if self.config.packing:
+            # Packed windows are fixed-length and carry labels and position_ids;
+            # without an attention_mask, flash-attention splits them by position_ids
+            data_collator = default_data_collator
+        else:
+            # Pads each batch dynamically and builds causal LM labels
+            data_collator = DataCollatorForLanguageModeling(
+                tokenizer=self.tokenizer,
+                mlm=False,  # Causal LM, not masked LM
+            )
         
         # Create trainer
         self.trainer = Trainer(
@@ -338,6 +414,60 @@ class FineTuner:
         print(f"📊 Final metrics: {train_result.metrics}")
 
 
+def _tokenize_batch(batch: dict, tokenizer, max_length: int, append_eos: bool) -> dict:
+    """Tokenize a batch of formatted examples without padding"""
+    tokenized = tokenizer(
+        batch["text"],
+        truncation=True,
+        max_length=max_length - 1 if append_eos else max_length,
+        padding=False,
+        return_tensors=None,
+    )
+    if append_eos:
+        # EOS marks the example boundary inside a packed window
+        tokenized["input_ids"] = [ids + [tokenizer.eos_token_id] for ids in tokenized["input_ids"]]
+        tokenized["attention_mask"] = [mask + [1] for mask in tokenized["attention_mask"]]
+    return tokenized
+
+
+def _pack_batch(batch: dict, max_length: int, pad_token_id: int) -> dict:
+    """Greedily pack tokenized examples into fixed-length windows.
+    
+    Examples are never split across windows. position_ids restart at 0 for
+    every packed example, and the windows carry no attention_mask: with
+    flash_attention_2, transformers then runs variable-length attention over
+    the position_ids segments, so examples never attend to each other. Other
+    attention implementations would attend across the whole window, which is
+    why packing requires flash_attention_2. The first token of every example
+    after the first is labelled -100, so the previous example's EOS is not
+    trained to predict it (labels are shifted after attention, as in
+    DataCollatorWithFlattening). Padding forms its own trailing segment and
+    is excluded from the loss.
+    """
+    packed = {"input_ids": [], "labels": [], "position_ids": []}
+    window_ids, window_labels, window_pos = [], [], []
+    
+    def flush():
+        if not window_ids:
+            return
+        pad = max_length - len(window_ids)
+        packed["input_ids"].append(window_ids + [pad_token_id] * pad)
+        packed["labels"].append(window_labels + [-100] * pad)
+        packed["position_ids"].append(window_pos + list(range(pad)))
+    
+    for ids in batch["input_ids"]:
+        ids = ids[:max_length]
+        if len(window_ids) + len(ids) > max_length:
+            flush()
+            window_ids, window_labels, window_pos = [], [], []
+        window_labels.extend(([-100] + ids[1:]) if window_ids else ids)
+        window_ids.extend(ids)
+        window_pos.extend(range(len(ids)))
+    flush()
+    
+    return packed
+
+
 def main():
     """Main training function"""
     import argparse
@@ -416,9 +546,34 @@ def main():
     )
     parser.add_argument(
         '--8bit',
+        dest='use_8bit',
         action='store_true',
         help='Use 8-bit quantization instead of 4-bit'
     )
+    parser.add_argument(
+        '--max-seq-length',
+        type=int,
+        default=1024,
+        help='Maximum sequence length (packed window size)'
+    )
+    parser.add_argument(
+        '--no-packing',
+        action='store_true',
+        help='Disable sequence packing (one example per sequence, dynamic padding); '
+             'packing requires flash-attention 2 and is disabled without it'
+    )
+    parser.add_argument(
+        '--tokenize-num-proc',
+        type=int,
+        default=4,
+        help='Worker processes for dataset tokenization'
+    )
+    parser.add_argument(
+        '--tokenized-cache-dir',
+        type=str,
+        default='data/tokenized_cache',
+        help='Directory for cached tokenized datasets'
+    )
     
     args = parser.parse_args()
     
@@ -435,8 +590,12 @@ def main():
         gradient_accumulation_steps=args.gradient_accumulation_steps,
         max_steps=args.max_steps,
         num_train_epochs=args.num_epochs,
-        load_in_4bit=not args.no_4bit and not args.8bit,
-        load_in_8bit=args.8bit,
+        load_in_4bit=not args.no_4bit and not args.use_8bit,
+        load_in_8bit=args.use_8bit,
+        max_seq_length=args.max_seq_length,
+        packing=not args.no_packing,
+        tokenize_num_proc=args.tokenize_num_proc,
+        tokenized_cache_dir=args.tokenized_cache_dir,
     )
     
     # Create trainer and run
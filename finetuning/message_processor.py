@@ -12,6 +12,35 @@ from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = None
+    pd = None
+
+
+# Column-name aliases, resolved once per file (first match wins)
+DATE_COLUMNS = ['date', 'Date', 'timestamp', 'Timestamp', 'time']
+SENDER_COLUMNS = ['sender', 'Sender', 'from', 'From', 'author']
+CONTENT_COLUMNS = ['message', 'Message', 'text', 'Text', 'body', 'Body', 'content']
+
+DATE_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M:%SZ',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S.%fZ',
+    '%Y/%m/%d %H:%M:%S',
+    '%d/%m/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M:%S',
+    '%Y-%m-%d',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+]
+
+WHATSAPP_PATTERN = r'^\[(\d{1,2}/\d{1,2}/\d{4}),\s*(\d{1,2}:\d{2}:\d{2})\]\s*(.+?):\s*(.+)'
+
 
 class MessageProcessor:
     """Process exported message data from various platforms"""
@@ -19,6 +48,11 @@ class MessageProcessor:
     def __init__(self, output_dir: str = "data/processed"):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Last date format that parsed successfully; exports use one format throughout
+        self._date_format_hint: Optional[str] = None
+        # Detected date format per file for the vectorized path
+        self._file_date_formats: Dict[str, Optional[str]] = {}
     
     def process_imessage_export(self, filepath: str) -> List[Dict[str, Any]]:
         """
@@ -267,26 +301,19 @@ class MessageProcessor:
         
         date_str = str(date_str).strip()
         
-        # Common formats
-        formats = [
-            '%Y-%m-%d %H:%M:%S',
-            '%Y-%m-%dT%H:%M:%S',
-            '%Y-%m-%dT%H:%M:%SZ',
-            '%Y-%m-%dT%H:%M:%S.%f',
-            '%Y-%m-%dT%H:%M:%S.%fZ',
-            '%Y/%m/%d %H:%M:%S',
-            '%d/%m/%Y %H:%M:%S',
-            '%m/%d/%Y %H:%M:%S',
-            '%Y-%m-%d',
-            '%d/%m/%Y',
-            '%m/%d/%Y',
-        ]
-        
-        for fmt in formats:
+        if self._date_format_hint:
+            try:
+                return datetime.strptime(date_str, self._date_format_hint)
+            except ValueError:
+                pass
+        
+        for fmt in DATE_FORMATS:
             try:
-                return datetime.strptime(date_str, fmt)
-            except:
+                parsed = datetime.strptime(date_str, fmt)
+            except ValueError:
                 continue
+            self._date_format_hint = fmt
+            return parsed
         
         # Try timestamp
         try:
@@ -314,6 +341,195 @@ class MessageProcessor:
         except:
             return datetime.now().isoformat()
     
+    # ------------------------------------------------------------------
+    # Vectorized import path (pandas): columns and date format are resolved
+    # once per file and timestamps are parsed in bulk
+    # ------------------------------------------------------------------
+    
+    def process_imessage_export_vectorized(self, filepath: str) -> "pd.DataFrame":
+        """Columnar equivalent of process_imessage_export"""
+        filepath = self._require_vectorized(filepath, "iMessage export")
+        
+        with open(filepath, 'r', encoding='utf-8') as f:
+            delimiter = csv.Sniffer().sniff(f.read(1024)).delimiter
+        
+        df = pd.read_csv(filepath, sep=delimiter, dtype=str, keep_default_na=False)
+        frame = self._normalize_frame(df, str(filepath), platform='imessage')
+        print(f"✅ Processed {len(frame)} iMessage messages")
+        return frame
+    
+    def process_json_export_vectorized(self, filepath: str) -> "pd.DataFrame":
+        """Columnar equivalent of process_json_export (JSON list or JSON Lines)"""
+        filepath = self._require_vectorized(filepath, "JSON export")
+        
+        if filepath.suffix.lower() == '.jsonl':
+            df = pd.read_json(filepath, lines=True, dtype=False)
+        else:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                data = data.get('messages', data.get('data', data.get('items', [data])))
+            df = pd.DataFrame.from_records([item for item in data if isinstance(item, dict)])
+        
+        frame = self._normalize_frame(df, str(filepath), platform=None)
+        print(f"✅ Processed {len(frame)} messages from JSON")
+        return frame
+    
+    def process_whatsapp_export_vectorized(self, filepath: str) -> "pd.DataFrame":
+        """Columnar equivalent of process_whatsapp_export"""
+        filepath = self._require_vectorized(filepath, "WhatsApp export")
+        
+        with open(filepath, 'r', encoding='utf-8') as f:
+            lines = pd.Series(f.read().split('\n'))
+        
+        parts = lines.str.extract(WHATSAPP_PATTERN)
+        is_header = parts[0].notna()
+        
+        # Continuation lines belong to the most recent header line
+        message_id = is_header.cumsum()
+        body = lines.str.strip().where(~is_header, parts[3])
+        body = body[message_id > 0]
+        content = body.groupby(message_id[message_id > 0]).agg('\n'.join).str.strip()
+        
+        headers = parts[is_header].set_axis(content.index)
+        timestamps = pd.to_datetime(headers[0] + ' ' + headers[1], format='%d/%m/%Y %H:%M:%S', errors='coerce')
+        
+        frame = pd.DataFrame({
+            'platform': 'whatsapp',
+            'sender': headers[2].fillna('Unknown').to_numpy(),
+            'content': content.to_numpy(),
+            'timestamp': self._format_timestamps(timestamps).to_numpy(),
+            'message_type': 'text',
+        })
+        frame = frame[frame['content'] != ''].reset_index(drop=True)
+        print(f"✅ Processed {len(frame)} WhatsApp messages")
+        return frame
+    
+    def _require_vectorized(self, filepath: str, label: str) -> Path:
+        if pd is None:
+            raise ImportError("pandas is required for the vectorized import path. Run: pip install pandas pyarrow")
+        filepath = Path(filepath)
+        if not filepath.exists():
+            raise FileNotFoundError(f"{label} not found: {filepath}")
+        return filepath
+    
+    @staticmethod
+    def _resolve_column(columns, candidates: List[str]) -> Optional[str]:
+        for name in candidates:
+            if name in columns:
+                return name
+        return None
+    
+    def _normalize_frame(self, df: "pd.DataFrame", file_key: str, platform: Optional[str]) -> "pd.DataFrame":
+        """Map raw export columns onto the processed message schema"""
+        content_col = self._resolve_column(df.columns, CONTENT_COLUMNS)
+        if content_col is None or df.empty:
+            return pd.DataFrame(columns=['platform', 'sender', 'content', 'timestamp', 'message_type'])
+        
+        sender_col = self._resolve_column(df.columns, SENDER_COLUMNS)
+        date_col = self._resolve_column(df.columns, DATE_COLUMNS)
+        
+        content = df[content_col].fillna('').astype(str).str.strip()
+        keep = content != ''
+        df = df[keep]
+        content = content[keep]
+        
+        if platform is None:
+            platform_values = df['platform'].fillna('unknown') if 'platform' in df.columns else 'unknown'
+        else:
+            platform_values = platform
+        
+        frame = pd.DataFrame({
+            'platform': platform_values,
+            'sender': df[sender_col].fillna('').astype(str).replace('', 'Unknown') if sender_col else 'Unknown',
+            'content': content,
+            'timestamp': self._parse_dates_bulk(df[date_col], file_key) if date_col else datetime.now().isoformat(),
+            'message_type': df['message_type'].fillna('text') if 'message_type' in df.columns else 'text',
+        })
+        
+        # Remaining export columns travel along as metadata columns
+        used = {content_col, sender_col, date_col, 'platform', 'message_type'}
+        for column in df.columns:
+            if column not in used:
+                frame[f"meta_{column}"] = df[column]
+        
+        return frame.reset_index(drop=True)
+    
+    def _detect_date_format(self, values: "pd.Series", file_key: str) -> Optional[str]:
+        """Detect (and cache per file) the date format from a sample of values"""
+        if file_key in self._file_date_formats:
+            return self._file_date_formats[file_key]
+        
+        sample = values[values.astype(str).str.strip() != ''].head(200).astype(str).str.strip()
+        detected = None
+        if not sample.empty:
+            if pd.to_numeric(sample, errors='coerce').notna().all():
+                detected = 'epoch'
+            else:
+                for fmt in DATE_FORMATS:
+                    if pd.to_datetime(sample, format=fmt, errors='coerce').notna().all():
+                        detected = fmt
+                        break
+        
+        self._file_date_formats[file_key] = detected
+        return detected
+    
+    def _parse_dates_bulk(self, values: "pd.Series", file_key: str) -> "pd.Series":
+        """Parse a whole date column at once using the file's detected format"""
+        fmt = self._detect_date_format(values, file_key)
+        
+        if fmt == 'epoch':
+            numeric = pd.to_numeric(values, errors='coerce')
+            # Same heuristic as _parse_date: values above 1e10 are milliseconds
+            seconds = numeric.where(numeric <= 1e10, numeric / 1000)
+            parsed = pd.to_datetime(seconds, unit='s', errors='coerce')
+        elif fmt:
+            parsed = pd.to_datetime(values.astype(str).str.strip(), format=fmt, errors='coerce')
+        else:
+            parsed = pd.to_datetime(values, errors='coerce', format='mixed')
+        
+        return self._format_timestamps(parsed)
+    
+    @staticmethod
+    def _format_timestamps(parsed: "pd.Series") -> "pd.Series":
+        """ISO strings, falling back to now for unparseable values (as the row path does)"""
+        if getattr(parsed.dt, 'tz', None) is not None:
+            parsed = parsed.dt.tz_localize(None)
+        values = parsed.fillna(pd.Timestamp(datetime.now())).to_numpy(dtype='datetime64[s]')
+        # numpy's ISO formatting runs in C; Series.dt.strftime is per-element Python
+        return pd.Series(np.datetime_as_string(values, unit='s'), index=parsed.index)
+    
+    def save_shards(
+        self,
+        frame: "pd.DataFrame",
+        prefix: Optional[str] = None,
+        shard_size: int = 250_000,
+        shard_format: str = 'parquet'
+    ) -> List[str]:
+        """Write processed messages as Parquet or JSONL shards instead of one JSON list"""
+        if prefix is None:
+            prefix = f"processed_messages_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        if shard_format == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                print("⚠️  pyarrow not installed, writing JSONL shards instead")
+                shard_format = 'jsonl'
+        
+        paths = []
+        for index, start in enumerate(range(0, max(len(frame), 1), shard_size)):
+            shard = frame.iloc[start:start + shard_size]
+            path = self.output_dir / f"{prefix}-{index:05d}.{shard_format}"
+            if shard_format == 'parquet':
+                shard.to_parquet(path, index=False)
+            else:
+                shard.to_json(path, orient='records', lines=True, force_ascii=False)
+            paths.append(str(path))
+        
+        print(f"💾 Saved {len(frame)} processed messages to {len(paths)} {shard_format} shard(s) in {self.output_dir}")
+        return paths
+    
     def save_processed(self, messages: List[Dict[str, Any]], filename: Optional[str] = None) -> str:
         """Save processed messages to JSON"""
         if filename is None:
@@ -358,6 +574,24 @@ def main():
         default='data/processed',
         help='Output directory'
     )
+    parser.add_argument(
+        '--vectorized',
+        action='store_true',
+        help='Use the pandas columnar import path and write sharded output (large exports)'
+    )
+    parser.add_argument(
+        '--shard-size',
+        type=int,
+        default=250_000,
+        help='Messages per output shard (vectorized path)'
+    )
+    parser.add_argument(
+        '--shard-format',
+        type=str,
+        choices=['parquet', 'jsonl'],
+        default='parquet',
+        help='Output shard format (vectorized path)'
+    )
     
     args = parser.parse_args()
     
@@ -372,7 +606,7 @@ def main():
             args.format = 'imessage'
         elif ext == '.txt':
             args.format = 'whatsapp'
-        elif ext == '.json':
+        elif ext in ('.json', '.jsonl'):
             args.format = 'json'
         elif ext == '.xml':
             args.format = 'xml'
@@ -381,6 +615,27 @@ def main():
             print("   Trying JSON format...")
             args.format = 'json'
     
+    if args.vectorized:
+        readers = {
+            'imessage': processor.process_imessage_export_vectorized,
+            'whatsapp': processor.process_whatsapp_export_vectorized,
+            'json': processor.process_json_export_vectorized,
+        }
+        if args.format not in readers:
+            print(f"❌ No vectorized reader for format: {args.format}")
+            return
+        try:
+            frame = readers[args.format](args.input_file)
+            if len(frame):
+                processor.save_shards(frame, shard_size=args.shard_size, shard_format=args.shard_format)
+                print("\n✅ Message processing complete!")
+                print(f"📊 Processed {len(frame)} messages")
+            else:
+                print("⚠️  No messages processed")
+        except Exception as e:
+            print(f"❌ Error: {e}")
+        return
+    
     # Process based on format
     messages = []
     try:
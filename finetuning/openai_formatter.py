@@ -12,6 +12,27 @@ import re
 class OpenAIFormatter:
     """Format data for OpenAI fine-tuning"""
     
+    def __init__(self, deduplicator=None):
+        """
+        Args:
+            deduplicator: Optional deduplication.TrainingDeduplicator applied before writing
+        """
+        self.deduplicator = deduplicator
+    
+    def _deduplicate(self, examples: List[Dict[str, Any]], source: str) -> List[Dict[str, Any]]:
+        """Drop examples whose assistant reply repeats one already seen"""
+        if self.deduplicator is None:
+            return examples
+        
+        from deduplication import print_dedup_report
+        kept, report = self.deduplicator.deduplicate(
+            examples,
+            text_fn=lambda ex: ex['messages'][-1]['content'],
+            source_fn=lambda ex: source
+        )
+        print_dedup_report(report)
+        return kept
+    
     def format_synthetic_to_openai(
         self,
         synthetic_file: str,
@@ -92,7 +113,7 @@ class OpenAIFormatter:
         if skipped_count > 0:
             print(f"⚠️  Skipped {skipped_count} examples that didn't end with assistant message")
         
-        formatted_examples = validated_examples
+        formatted_examples = self._deduplicate(validated_examples, 'synthetic')
         
         # Write to JSONL
         output_path = Path(output_file)
@@ -301,6 +322,8 @@ class OpenAIFormatter:
                         formatted_examples.append({"messages": messages})
                         processed_pairs.add(pair_key)
         
+        formatted_examples = self._deduplicate(formatted_examples, 'gmail')
+        
         # Write to JSONL
         output_path = Path(output_file)
         output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -528,10 +551,18 @@ def main():
     parser.add_argument('--output-file', type=str, required=True, help='Output JSONL file')
     parser.add_argument('--system-message', type=str, 
                        default="You are Ryan Lin. Respond as Ryan Lin would in a professional workplace context.")
+    parser.add_argument('--dedup', action='store_true', help='Remove exact/near-duplicate assistant replies')
+    parser.add_argument('--dedup-threshold', type=float, default=0.85, help='Near-duplicate Jaccard threshold')
+    parser.add_argument('--dedup-index', type=str, default='data/dedup/lsh_index.sqlite', help='On-disk LSH index')
     
     args = parser.parse_args()
     
-    formatter = OpenAIFormatter()
+    deduplicator = None
+    if args.dedup:
+        from deduplication import TrainingDeduplicator
+        deduplicator = TrainingDeduplicator(args.dedup_index, threshold=args.dedup_threshold)
+    
+    formatter = OpenAIFormatter(deduplicator=deduplicator)
     
     if args.synthetic_file:
         formatter.format_synthetic_to_openai(
@@ -546,6 +577,9 @@ def main():
             args.output_file,
             args.system_message
         )
+    
+    if deduplicator:
+        deduplicator.close()
 
 
 if __name__ == '__main__':
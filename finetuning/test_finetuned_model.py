@@ -6,6 +6,7 @@ Tests the fine-tuned assistant model with various prompts
 import os
 import json
 import sys
+import time
 from pathlib import Path
 from typing import List, Dict, Any
 from dotenv import load_dotenv
@@ -94,12 +95,14 @@ class FineTunedModelTester:
             messages.append({"role": "user", "content": user_message})
             
             # Call Chat Completions API
+            start = time.perf_counter()
             response = self.client.chat.completions.create(
                 model=model,
                 messages=messages,
                 temperature=0.7,
                 max_tokens=500
             )
+            latency = time.perf_counter() - start
             
             # Extract response
             assistant_response = response.choices[0].message.content
@@ -109,6 +112,8 @@ class FineTunedModelTester:
                 'user_message': user_message,
                 'assistant_response': assistant_response,
                 'model': model,
+                'latency_s': latency,
+                'tokens_per_s': response.usage.completion_tokens / latency if latency > 0 else 0.0,
                 'usage': {
                     'prompt_tokens': response.usage.prompt_tokens,
                     'completion_tokens': response.usage.completion_tokens,
@@ -356,6 +361,10 @@ class FineTunedModelTester:
             print(f"\n  {i}. Prompt: {result.get('user_message', result.get('prompt', ''))[:80]}...")
             print(f"     Response: {result.get('assistant_response', '')[:120]}...")
         
+        latencies = sorted(r['latency_s'] for r in successful if 'latency_s' in r)
+        if latencies:
+            print(f"\n⏱️  Latency: p50 {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s")
+        
         # Save detailed results
         output_file = Path("test_results.json")
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Tests for sequence packing in finetuning.py
+Run with: pytest finetuning/test_packing.py
+"""
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("peft")
+pytest.importorskip("datasets")
+pytest.importorskip("bitsandbytes")
+
+from finetuning import _pack_batch
+
+PAD = 0
+
+
+def test_pack_batch_masks_labels_at_segment_boundaries():
+    batch = {"input_ids": [[11, 12, 2], [21, 22, 23, 2], [31, 2], [41, 42, 43, 44, 2]]}
+    packed = _pack_batch(batch, max_length=10, pad_token_id=PAD)
+
+    # Examples are never split: the last one starts a new window
+    assert packed["input_ids"] == [
+        [11, 12, 2, 21, 22, 23, 2, 31, 2, PAD],
+        [41, 42, 43, 44, 2, PAD, PAD, PAD, PAD, PAD],
+    ]
+    assert packed["position_ids"] == [
+        [0, 1, 2, 0, 1, 2, 3, 0, 1, 0],
+        [0, 1, 2, 3, 4, 0, 1, 2, 3, 4],
+    ]
+    # The first token of every example after the first in a window is not a
+    # target, so no EOS learns to predict the start of an unrelated example
+    assert packed["labels"] == [
+        [11, 12, 2, -100, 22, 23, 2, -100, 2, -100],
+        [41, 42, 43, 44, 2, -100, -100, -100, -100, -100],
+    ]
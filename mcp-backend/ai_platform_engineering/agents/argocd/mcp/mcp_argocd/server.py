@@ -15,6 +15,7 @@ import os
 from dotenv import load_dotenv
 from fastmcp import FastMCP
 
+from mcp_argocd.api.client import client_lifespan
 from mcp_argocd.tools import api_v1_account_can_i_resource_action_subresource
 
 # Due to the fact that the token/password may be read by LLM,
@@ -66,7 +67,7 @@ def main():
     load_dotenv()
 
     # Configure logging
-    logging.basicConfig(level=logging.DEBUG)
+    logging.basicConfig(level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO))
 
     # Suppress DEBUG level messages from sse_starlette.sse
     logging.getLogger("sse_starlette.sse").setLevel(logging.INFO)
@@ -89,9 +90,9 @@ def main():
 
     # Create server instance
     if MCP_MODE.lower() in ["sse", "http"]:
-        mcp = FastMCP(f"{SERVER_NAME} MCP Server", host=MCP_HOST, port=MCP_PORT)
+        mcp = FastMCP(f"{SERVER_NAME} MCP Server", host=MCP_HOST, port=MCP_PORT, lifespan=client_lifespan)
     else:
-        mcp = FastMCP(f"{SERVER_NAME} MCP Server")
+        mcp = FastMCP(f"{SERVER_NAME} MCP Server", lifespan=client_lifespan)
 
     # Checks if the current account has permission to perform a specified action on a resource.
     mcp.tool()(api_v1_account_can_i_resource_action_subresource.account_service__can_i)
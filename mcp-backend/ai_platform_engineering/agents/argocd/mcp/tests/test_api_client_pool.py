@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test the shared HTTP client and retry behaviour of the API client against a local mock API
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the mcp_argocd directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+os.environ.setdefault("ARGOCD_API_URL", "http://127.0.0.1")
+os.environ.setdefault("ARGOCD_API_TOKEN", "test-token")
+
+from mcp_argocd.api import client  # noqa: E402
+from mcp_argocd.api.client import client_lifespan, make_api_request  # noqa: E402
+
+client.HTTP_RETRY_BACKOFF = 0.01
+
+
+class MockArgoCD:
+    """Serves /api/v1/* and records the client port of every request (one per TCP connection)."""
+
+    def __init__(self):
+        self.ports = []
+        self.failures = []  # status codes to answer with before succeeding
+        self.retry_after = None
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                api.ports.append(self.client_address[1])
+                status = api.failures.pop(0) if api.failures else 200
+                body = json.dumps({"items": []} if status == 200 else {"error": "unavailable"}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status != 200 and api.retry_after is not None:
+                    self.send_header("Retry-After", api.retry_after)
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def with_api(test):
+    def run():
+        api = MockArgoCD()
+        client.API_URL = api.url
+        try:
+            asyncio.run(test(api))
+        finally:
+            api.close()
+    run.__name__ = test.__name__
+    return run
+
+
+@with_api
+async def test_lifespan_reuses_connections(api):
+    print("\nTesting connection reuse inside the server lifespan...")
+    async with client_lifespan():
+        for _ in range(10):
+            success, _ = await make_api_request("/api/v1/applications")
+            assert success
+    assert len(api.ports) == 10
+    assert len(set(api.ports)) == 1, f"Expected one pooled connection, got {len(set(api.ports))}"
+    assert client._shared_client is None, "Shared client should be closed with the lifespan"
+
+    api.ports.clear()
+    for _ in range(3):
+        success, _ = await make_api_request("/api/v1/applications")
+        assert success
+    assert len(set(api.ports)) == 3, "Outside the lifespan every request gets its own client"
+    print("✓ One connection for 10 calls inside the lifespan, one per call outside")
+
+
+@with_api
+async def test_throttled_request_is_retried(api):
+    print("\nTesting retry on 429 with Retry-After...")
+    api.failures = [429, 429]
+    api.retry_after = "0"
+    success, data = await make_api_request("/api/v1/applications")
+    assert success, data
+    assert len(api.ports) == 3
+    print("✓ 429 responses retried until success")
+
+
+@with_api
+async def test_server_errors_retry_idempotent_requests_only(api):
+    print("\nTesting retry on 5xx...")
+    api.failures = [503] * (client.HTTP_MAX_RETRIES + 1)
+    success, data = await make_api_request("/api/v1/applications")
+    assert not success
+    assert "503" in data["error"]
+    assert len(api.ports) == client.HTTP_MAX_RETRIES + 1
+
+    api.ports.clear()
+    api.failures = [503]
+    success, data = await make_api_request("/api/v1/applications", method="POST", data={"name": "app"})
+    assert not success
+    assert len(api.ports) == 1, "POST must not be retried on a 5xx"
+    print("✓ GET retried up to HTTP_MAX_RETRIES, POST not retried")
+
+
+def test_retry_delay_honours_retry_after():
+    print("\nTesting Retry-After parsing...")
+    assert client._retry_delay("2", 0) == 2.0
+    assert client._retry_delay("3600", 0) == client.HTTP_MAX_RETRY_DELAY
+    assert client._retry_delay("Wed, 21 Oct 2015 07:28:00 GMT", 0) == 0.0
+    assert 0 < client._retry_delay(None, 1) <= client.HTTP_RETRY_BACKOFF * 2 * 1.5
+    print("✓ Retry-After seconds and HTTP dates honoured, backoff otherwise")
+
+
+if __name__ == "__main__":
+    test_lifespan_reuses_connections()
+    test_throttled_request_is_retried()
+    test_server_errors_retry_idempotent_requests_only()
+    test_retry_delay_honours_retry_after()
+    print("\n✅ All API client pool tests passed!")
@@ -6,6 +6,11 @@
 
 import os
 import logging
+import asyncio
+import email.utils
+import random
+import time
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Tuple, Any
 import httpx
 
@@ -18,11 +23,122 @@ if not API_URL:
 if not API_TOKEN:
   raise ValueError("BACKSTAGE_TOKEN environment variable is not set.")
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging - use LOG_LEVEL from environment or default to INFO
+log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+logging.basicConfig(level=getattr(logging, log_level, logging.INFO))
 logger = logging.getLogger("mcp_backstage")
 
 
+# Shared HTTP client. The MCP server opens one pooled client for its lifetime
+# (see client_lifespan) so tool calls reuse connections; outside the server,
+# e.g. when make_api_request is called from a script, each request gets a
+# short-lived client instead.
+HTTP_TIMEOUT = float(os.getenv("MCP_HTTP_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("MCP_HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("MCP_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("MCP_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("MCP_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_MAX_RETRIES = int(os.getenv("MCP_HTTP_MAX_RETRIES", "3"))
+HTTP_RETRY_BACKOFF = float(os.getenv("MCP_HTTP_RETRY_BACKOFF", "0.5"))
+HTTP_MAX_RETRY_DELAY = float(os.getenv("MCP_HTTP_MAX_RETRY_DELAY", "30"))
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_shared_client = None
+
+
+def _http2_enabled() -> bool:
+  """HTTP/2 is used unless MCP_HTTP2=false, provided the h2 package is installed."""
+  if os.getenv("MCP_HTTP2", "true").lower() == "false":
+    return False
+  try:
+    import h2  # noqa: F401
+  except ImportError:
+    return False
+  return True
+
+
+def _retry_delay(retry_after, attempt: int) -> float:
+  """Seconds to wait before the next attempt, honouring a Retry-After header."""
+  if retry_after:
+    try:
+      return min(max(float(retry_after), 0.0), HTTP_MAX_RETRY_DELAY)
+    except (TypeError, ValueError):
+      pass
+    try:
+      retry_at = email.utils.parsedate_to_datetime(retry_after).timestamp()
+      return min(max(retry_at - time.time(), 0.0), HTTP_MAX_RETRY_DELAY)
+    except (TypeError, ValueError):
+      pass
+  return min(HTTP_RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5), HTTP_MAX_RETRY_DELAY)
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+  """Retries 429 responses, and 5xx responses to idempotent requests, with jittered backoff."""
+
+  def __init__(self, transport: httpx.AsyncBaseTransport, max_retries: int = HTTP_MAX_RETRIES):
+    self._transport = transport
+    self.max_retries = max_retries
+
+  @staticmethod
+  def _should_retry(request: httpx.Request, response: httpx.Response) -> bool:
+    if response.status_code == 429:
+      return True
+    return response.status_code in RETRYABLE_STATUS_CODES and request.method in IDEMPOTENT_METHODS
+
+  async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+    for attempt in range(self.max_retries):
+      response = await self._transport.handle_async_request(request)
+      if not self._should_retry(request, response):
+        return response
+      delay = _retry_delay(response.headers.get("Retry-After"), attempt)
+      await response.aclose()
+      logger.warning(f"{request.method} {request.url.path} returned {response.status_code}, retrying in {delay:.2f}s")
+      await asyncio.sleep(delay)
+    return await self._transport.handle_async_request(request)
+
+  async def aclose(self) -> None:
+    await self._transport.aclose()
+
+
+def _new_client(timeout: float = HTTP_TIMEOUT) -> httpx.AsyncClient:
+  transport = httpx.AsyncHTTPTransport(
+    http2=_http2_enabled(),
+    limits=httpx.Limits(
+      max_connections=HTTP_MAX_CONNECTIONS,
+      max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+      keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    ),
+  )
+  return httpx.AsyncClient(
+    transport=RetryTransport(transport),
+    timeout=httpx.Timeout(timeout, connect=HTTP_CONNECT_TIMEOUT),
+  )
+
+
+@asynccontextmanager
+async def client_lifespan(server=None):
+  """MCP server lifespan: opens the shared client on startup and closes it on shutdown."""
+  global _shared_client
+  async with _new_client() as client:
+    _shared_client = client
+    logger.info(f"Shared HTTP client opened (http2={_http2_enabled()}, max_connections={HTTP_MAX_CONNECTIONS})")
+    try:
+      yield
+    finally:
+      _shared_client = None
+
+
+@asynccontextmanager
+async def get_client(timeout: float = HTTP_TIMEOUT):
+  """The shared client while the server is running, otherwise a client for this request only."""
+  if _shared_client is not None:
+    yield _shared_client
+  else:
+    async with _new_client(timeout) as client:
+      yield client
+
+
 
 def assemble_nested_body(flat_body: Dict[str, Any]) -> Dict[str, Any]:
   """Convert a flat dict with underscore‐separated keys into a nested dictionary."""
@@ -81,7 +197,7 @@ async def make_api_request(
     if data:
       logger.debug(f"Request data: {data}")
 
-    async with httpx.AsyncClient(timeout=timeout) as client:
+    async with get_client(timeout) as client:
       if "api/catalog" not in API_URL:
           url = f"{API_URL}/api/catalog{path}"
       else:
@@ -15,6 +15,7 @@ import os
 from dotenv import load_dotenv
 from fastmcp import FastMCP
 
+from mcp_backstage.api.client import client_lifespan
 from mcp_backstage.tools import entities_by_query
 from mcp_backstage.tools import techdocs_metadata
 from mcp_backstage.tools import techdocs_content
@@ -26,7 +27,7 @@ def main():
   load_dotenv()
 
   # Configure logging
-  logging.basicConfig(level=logging.DEBUG)
+  logging.basicConfig(level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO))
 
   # Get MCP configuration from environment variables
   MCP_MODE = os.getenv("MCP_MODE", "STDIO")
@@ -45,9 +46,9 @@ def main():
 
   # Create server instance
   if MCP_MODE.lower() in ["sse", "http"]:
-    mcp = FastMCP(f"{SERVER_NAME} MCP Server", host=MCP_HOST, port=MCP_PORT)
+    mcp = FastMCP(f"{SERVER_NAME} MCP Server", host=MCP_HOST, port=MCP_PORT, lifespan=client_lifespan)
   else:
-    mcp = FastMCP(f"{SERVER_NAME} MCP Server")
+    mcp = FastMCP(f"{SERVER_NAME} MCP Server", lifespan=client_lifespan)
 
   mcp.tool()(entities_by_query.get_entities_by_query)
 
@@ -11,6 +11,7 @@ from dotenv import load_dotenv
 from fastmcp import FastMCP
 
 # Import tools
+from mcp_jira.api.client import client_lifespan
 from mcp_jira.tools.jira import attachments
 from mcp_jira.tools.jira import issues
 from mcp_jira.tools.jira import users
@@ -24,7 +25,7 @@ def main():
     load_dotenv()
 
     # Configure logging
-    logging.basicConfig(level=logging.DEBUG)
+    logging.basicConfig(level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO))
 
     # Get MCP configuration from environment variables
     MCP_MODE = os.getenv("MCP_MODE", "STDIO")
@@ -43,9 +44,9 @@ def main():
 
     # Create server instance
     if MCP_MODE.lower() in ["sse", "http"]:
-        mcp = FastMCP(f"{SERVER_NAME} MCP Server", host=MCP_HOST, port=MCP_PORT)
+        mcp = FastMCP(f"{SERVER_NAME} MCP Server", host=MCP_HOST, port=MCP_PORT, lifespan=client_lifespan)
     else:
-        mcp = FastMCP(f"{SERVER_NAME} MCP Server")
+        mcp = FastMCP(f"{SERVER_NAME} MCP Server", lifespan=client_lifespan)
 
     # Register Jira tools
     mcp.tool()(attachments.upload_attachment)
@@ -2,11 +2,10 @@
 
 import logging
 import json
-import httpx
 import base64
 from typing import List, Optional, Dict, Any, Annotated
 from pydantic import Field
-from mcp_jira.api.client import make_api_request
+from mcp_jira.api.client import get_client, make_api_request
 from mcp_jira.models.jira.search import JiraSearchResult
 
 # Configure logging
@@ -93,7 +92,7 @@ async def search(
         print(f"Headers: {headers}")
         print(f"Payload: {payload}")
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with get_client(30.0) as client:
             response = await client.post(
                 url,
                 data=payload,  # Use data=payload like the example
@@ -16,6 +16,7 @@ from dotenv import load_dotenv
 from fastmcp import FastMCP
 
 
+from mcp_komodor.api.client import client_lifespan
 from mcp_komodor.tools import api_v2_services_search
 
 from mcp_komodor.tools import api_v2_jobs_search
@@ -114,7 +115,7 @@ def main():
     load_dotenv()
 
     # Configure logging
-    logging.basicConfig(level=logging.DEBUG)
+    logging.basicConfig(level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO))
 
     # Get MCP configuration from environment variables
     MCP_MODE = os.getenv("MCP_MODE", "STDIO")
@@ -133,9 +134,9 @@ def main():
 
     # Create server instance
     if MCP_MODE.lower() in ["sse", "http"]:
-        mcp = FastMCP(f"{SERVER_NAME} MCP Server", host=MCP_HOST, port=MCP_PORT)
+        mcp = FastMCP(f"{SERVER_NAME} MCP Server", host=MCP_HOST, port=MCP_PORT, lifespan=client_lifespan)
     else:
-        mcp = FastMCP(f"{SERVER_NAME} MCP Server")
+        mcp = FastMCP(f"{SERVER_NAME} MCP Server", lifespan=client_lifespan)
 
     # Register api_v2_services_search tools
 
@@ -10,6 +10,7 @@ import logging
 from dotenv import load_dotenv
 from fastmcp import FastMCP
 
+from mcp_pagerduty.api.client import client_lifespan
 from mcp_pagerduty.tools import (
   incidents,
   services,
@@ -28,7 +29,7 @@ def main():
     load_dotenv()
 
     # Configure logging
-    logging.basicConfig(level=logging.DEBUG)
+    logging.basicConfig(level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO))
 
     # Get MCP configuration from environment variables
     MCP_MODE = os.getenv("MCP_MODE", "STDIO")
@@ -47,9 +48,9 @@ def main():
 
     # Create server instance
     if MCP_MODE.lower() in ["sse", "http"]:
-        mcp = FastMCP(f"{SERVER_NAME} MCP Server", host=MCP_HOST, port=MCP_PORT)
+        mcp = FastMCP(f"{SERVER_NAME} MCP Server", host=MCP_HOST, port=MCP_PORT, lifespan=client_lifespan)
     else:
-        mcp = FastMCP(f"{SERVER_NAME} MCP Server")
+        mcp = FastMCP(f"{SERVER_NAME} MCP Server", lifespan=client_lifespan)
 
 
     # Register incident tools
@@ -16,6 +16,7 @@ from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 
 
+from agent_petstore.protocol_bindings.mcp_server.mcp_petstore.api.client import client_lifespan
 from agent_petstore.protocol_bindings.mcp_server.mcp_petstore.tools import pet
 
 from agent_petstore.protocol_bindings.mcp_server.mcp_petstore.tools import pet_findByStatus as pet_findbystatus
@@ -48,7 +49,7 @@ def main():
     load_dotenv()
 
     # Configure logging
-    logging.basicConfig(level=logging.DEBUG)
+    logging.basicConfig(level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO))
 
     # Get MCP configuration from environment variables
     MCP_MODE = os.getenv("MCP_MODE", "STDIO")
@@ -65,9 +66,9 @@ def main():
 
     # Create server instance
     if MCP_MODE == "SSE":
-        mcp = FastMCP(f"{AGENT_NAME} MCP Server", host=MCP_HOST, port=MCP_PORT)
+        mcp = FastMCP(f"{AGENT_NAME} MCP Server", host=MCP_HOST, port=MCP_PORT, lifespan=client_lifespan)
     else:
-        mcp = FastMCP("PETSTORE MCP Server")
+        mcp = FastMCP("PETSTORE MCP Server", lifespan=client_lifespan)
 
     # Register pet tools
 
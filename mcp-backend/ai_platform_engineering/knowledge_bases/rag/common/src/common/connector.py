@@ -1,5 +1,11 @@
+import asyncio
+import contextlib
+import gzip
+import json
 import os
-from typing import List
+import time
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional
+import httpx
 import requests
 from common.constants import PRIMARY_ID_KEY
 from common.models.graph import Entity, Relation, EntityIdentifier
@@ -46,7 +52,7 @@ class Connector:
             "fresh_until": fresh_until
         }
         json_str = utils.json_encode(request_body)
-        print(json_str)
+        logger.debug(f"Sending {len(entities)} entities of type {entity_type} ({len(json_str)} bytes)")
         resp = requests.post(url=f"{self.server_addr}/v1/graph/ingest/entities",
                       headers={'Content-Type': 'application/json'},
                       data=json_str)
@@ -119,3 +125,402 @@ class Connector:
         resp = requests.get(url=f"{self.server_addr}/healthz")
         resp.raise_for_status()
         return resp.json()
+
+
+class _Batch:
+    """Serialized entities of one type to be sent together"""
+    def __init__(self, entity_type: str, first_index: int):
+        """
+        :param entity_type: the type of the entities
+        :param first_index: position of the first entity of the batch in the synced entities
+        """
+        self.entity_type = entity_type
+        self.first_index = first_index
+        self.entities: List[bytes] = []
+        self.size = 0
+
+
+class AsyncConnector:
+    """
+    Asynchronous bindings for graph entities and relations, for connectors syncing many entities.
+
+    Entities are streamed to the server in gzipped batches of one entity type (as the ingest endpoint
+    takes them) and up to `max_batch_bytes` of JSON, over one pooled HTTP client, with up to
+    `max_in_flight` batches in flight. A 429 from the server halves the number of batches in flight and
+    the batch is sent again after Retry-After; it grows back by one for each window's worth of accepted batches.
+
+    With a checkpoint file, a sync with a `sync_id` saves the position up to which all its entities were
+    accepted, and a sync with the same `sync_id` (after a failure, or a restart) resumes from there.
+    The server answers a batch once it is stored (a 503 when some of its entities could not be, which is
+    retried like other server errors), so a checkpoint never skips entities lost by the server, and
+    entities deleted after a sync returned are deleted after they were stored.
+    """
+    def __init__(self,
+                 name: Optional[str] = None,
+                 server_addr: Optional[str] = None,
+                 max_batch_bytes: int = 4 * 1024 * 1024,
+                 max_batch_entities: int = 5000,
+                 max_in_flight: int = 4,
+                 compress_level: int = 6,
+                 max_retries: int = 5,
+                 timeout: float = 120,
+                 checkpoint_path: Optional[str] = None,
+                 checkpoint_interval: float = 1.0):
+        """
+        :param name: connector name, CONNECTOR_NAME by default
+        :param server_addr: server address, SERVER_ADDR by default
+        :param max_batch_bytes: maximum size of a batch of entities, as JSON before compression
+        :param max_batch_entities: maximum number of entities in a batch
+        :param max_in_flight: maximum number of batches sent concurrently
+        :param compress_level: gzip level of the batches, 0 to send them uncompressed
+        :param max_retries: retries of a batch after a connection error or 5xx (429s are always retried)
+        :param timeout: timeout of a request in seconds
+        :param checkpoint_path: file the progress of syncs is saved to, CONNECTOR_CHECKPOINT_PATH by default
+        :param checkpoint_interval: minimum seconds between two checkpoint writes
+        """
+        self.server_addr = server_addr or os.getenv("SERVER_ADDR", "http://localhost:9446")
+        self.name = name or os.getenv("CONNECTOR_NAME")
+        if not self.name:
+            raise ValueError("CONNECTOR_NAME environment variable is not set")
+        # API key is currently not used by the server, but kept for future compatibility
+        self.api_key = os.environ.get("API_KEY", "")
+        self.max_batch_bytes = max_batch_bytes
+        self.max_batch_entities = max_batch_entities
+        self.max_in_flight = max_in_flight
+        self.compress_level = compress_level
+        self.max_retries = max_retries
+        self.checkpoint_path = checkpoint_path or os.getenv("CONNECTOR_CHECKPOINT_PATH")
+        self.checkpoint_interval = checkpoint_interval
+        self.window = float(max_in_flight) # requests allowed in flight, halved by 429s
+        self._window_epoch = 0 # incremented when the window is halved
+        self._sending = 0
+        self._requests = asyncio.Condition()
+        self.client = httpx.AsyncClient(
+            base_url=self.server_addr,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_in_flight + 1, max_keepalive_connections=max_in_flight + 1),
+        )
+
+    async def __aenter__(self) -> "AsyncConnector":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self, retries: int = 10, delay: float = 10):
+        """
+        Wait for the server to be healthy
+        :param retries: number of health checks
+        :param delay: seconds between health checks
+        """
+        for attempt in range(1, retries + 1):
+            try:
+                await self.health_check()
+                return
+            except Exception as e:
+                if attempt >= retries:
+                    raise
+                logger.warning(f"Server not ready (attempt {attempt}/{retries}): {e}, retrying in {delay}s")
+                await asyncio.sleep(delay)
+
+    async def close(self):
+        """Close the HTTP client"""
+        await self.client.aclose()
+
+    async def update_entity(self, entity_type: str, entities: List[Entity], fresh_until: int = 0):
+        """
+        Update entities, create them if they do not exist
+        :param entity_type: the type of the entities
+        :param entities: the entities to update/create
+        :param fresh_until: fresh until timestamp
+        """
+        mismatched = [entity.entity_type for entity in entities if entity.entity_type != entity_type]
+        if mismatched:
+            raise ValueError(f"Entities of type {mismatched[0]} are not of type {entity_type}")
+        await self.sync_entities(entities, fresh_until=fresh_until)
+
+    async def sync_entities(self, entities: Iterable[Entity] | AsyncIterable[Entity], fresh_until: int = 0,
+                            sync_id: Optional[str] = None) -> int:
+        """
+        Update entities of any types, create them if they do not exist. The entities are read as they are sent.
+        :param entities: the entities, in the same order every time when syncs are resumed
+        :param fresh_until: fresh until timestamp (a resumed sync keeps the one it started with)
+        :param sync_id: identifies the sync in the checkpoint file, None to not save checkpoints
+        :return: number of entities sent
+        """
+        if fresh_until == 0:
+            fresh_until = utils.get_default_fresh_until()
+        offset = 0
+        checkpoint = self.load_checkpoint(sync_id)
+        if checkpoint:
+            offset, fresh_until = checkpoint["offset"], checkpoint["fresh_until"]
+            logger.info(f"Resuming sync {sync_id} after {offset} entities")
+
+        upload = _EntityUpload(self, fresh_until, sync_id, offset)
+        completed = False
+        try:
+            index = 0
+            if isinstance(entities, AsyncIterable):
+                async for entity in entities:
+                    if index >= offset:
+                        await upload.add(entity)
+                    index += 1
+            else:
+                for entity in entities:
+                    if index >= offset:
+                        await upload.add(entity)
+                    index += 1
+            await upload.finish()
+            completed = True
+        finally:
+            await upload.close(completed)
+        logger.info(f"Sent {upload.next_index - offset} entities in {upload.batches} batches")
+        return upload.next_index - offset
+
+    async def post_batch(self, batch: _Batch, fresh_until: int):
+        """
+        Send a batch of entities, retrying it after 429s (and shrinking the window) and server errors
+        :param batch: the batch
+        :param fresh_until: fresh until timestamp
+        """
+        body = b"".join([
+            b'{"entity_type":', json.dumps(batch.entity_type).encode(),
+            b',"connector_name":', json.dumps(self.name).encode(),
+            b',"fresh_until":', str(fresh_until).encode(),
+            b',"entities":[', b",".join(batch.entities), b"]}",
+        ])
+        await self._post("/v1/graph/ingest/entities", body, f"{len(batch.entities)} entities of type {batch.entity_type}")
+
+    async def delete_entities(self, entity_type: str, primary_keys: List[str]):
+        """
+        Delete entities that were removed at the source
+        :param entity_type: the type of the entities
+        :param primary_keys: the primary keys of the entities
+        """
+        for start in range(0, len(primary_keys), self.max_batch_entities):
+            keys = primary_keys[start:start + self.max_batch_entities]
+            body = json.dumps({"entity_type": entity_type, "connector_name": self.name, "primary_keys": keys}).encode()
+            await self._post("/v1/graph/ingest/entities/delete", body, f"deletion of {len(keys)} entities of type {entity_type}")
+
+    async def _post(self, path: str, body: bytes, description: str):
+        """
+        Post a JSON body, retrying it after 429s (and shrinking the window) and server errors
+        :param path: the endpoint
+        :param body: the JSON body, gzipped here
+        :param description: what is sent, for logs
+        """
+        headers = {"Content-Type": "application/json"}
+        if self.compress_level:
+            body = await asyncio.to_thread(gzip.compress, body, self.compress_level)
+            headers["Content-Encoding"] = "gzip"
+
+        errors = 0
+        while True:
+            async with self._request_slot() as epoch:
+                try:
+                    resp = await self.client.post(path, content=body, headers=headers)
+                except httpx.TransportError as e:
+                    resp, error = None, e
+            if resp is None:
+                errors += 1
+                if errors > self.max_retries:
+                    raise error
+                logger.warning(f"Error sending {description}: {error!r}")
+            elif resp.status_code == 429:
+                if epoch == self._window_epoch: # halved once for all the requests sent with the same window
+                    self.window = max(1.0, self.window / 2)
+                    self._window_epoch += 1
+                delay = _retry_after(resp)
+                logger.debug(f"Server busy, {int(self.window)} requests in flight, retrying in {delay}s")
+                await asyncio.sleep(delay)
+                continue
+            elif resp.status_code < 500 or errors >= self.max_retries:
+                resp.raise_for_status()
+                self.window = min(float(self.max_in_flight), self.window + 1 / self.window)
+                return
+            else:
+                errors += 1
+                logger.warning(f"Error sending {description}: {resp.status_code} {resp.text[:200]}")
+            await asyncio.sleep(min(30, 0.5 * 2 ** (errors - 1)))
+
+    @contextlib.asynccontextmanager
+    async def _request_slot(self) -> AsyncIterator[int]:
+        """Wait until fewer requests than the window are in flight, yields the window's epoch"""
+        async with self._requests:
+            await self._requests.wait_for(lambda: self._sending < int(self.window))
+            self._sending += 1
+        try:
+            yield self._window_epoch
+        finally:
+            async with self._requests:
+                self._sending -= 1
+                self._requests.notify_all()
+
+    async def find_entity(self, entity_type: str, props: dict[str, str]) -> List[Entity]:
+        """
+        Find an entity by type and properties
+        :param entity_type: the type of the entity
+        :param props: the properties of the entity
+        """
+        resp = await self.client.request("GET", f"/v1/graph/explore/data/entity/{entity_type}", json=props)
+        resp.raise_for_status()
+        return [Entity.model_validate(entity_raw) for entity_raw in resp.json()]
+
+    async def get_entity(self, entity: EntityIdentifier) -> (Entity|None):
+        """
+        Fetches a single entity
+        :param entity: the entity to fetch
+        :return:
+        """
+        entities = await self.find_entity(entity.entity_type, {
+            PRIMARY_ID_KEY: entity.primary_key
+        })
+        if len(entities) == 0:
+            return None
+        return entities[0]
+
+    async def health_check(self) -> dict:
+        """
+        Check API health status
+        :return: Health status response
+        """
+        resp = await self.client.get("/healthz")
+        resp.raise_for_status()
+        return resp.json()
+
+    def _read_checkpoints(self) -> Dict[str, dict]:
+        """Unfinished syncs of this connector in the checkpoint file, by sync ID"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as f:
+            checkpoints = json.load(f)
+        if checkpoints.get("connector_name") != self.name:
+            return {}
+        return checkpoints.get("syncs", {})
+
+    def _write_checkpoints(self, syncs: Dict[str, dict]):
+        """Write the checkpoint file (to a temporary file, then renamed), or remove it if no sync is left"""
+        if not syncs:
+            if os.path.exists(self.checkpoint_path):
+                os.remove(self.checkpoint_path)
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"connector_name": self.name, "syncs": syncs}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def load_checkpoint(self, sync_id: Optional[str]) -> Optional[dict]:
+        """
+        Progress of an unfinished sync
+        :param sync_id: the sync
+        :return: its offset and fresh_until, None if there is no checkpoint of it
+        """
+        if sync_id is None:
+            return None
+        return self._read_checkpoints().get(sync_id)
+
+    def save_checkpoint(self, sync_id: str, offset: int, fresh_until: int):
+        """
+        Save the progress of a sync
+        :param sync_id: the sync
+        :param offset: position in the synced entities before which all of them were accepted by the server
+        :param fresh_until: fresh until timestamp of the sync
+        """
+        if not self.checkpoint_path:
+            return
+        syncs = self._read_checkpoints()
+        syncs[sync_id] = {"offset": offset, "fresh_until": fresh_until}
+        self._write_checkpoints(syncs)
+
+    def clear_checkpoint(self, sync_id: str):
+        """
+        Drop the checkpoint of a sync, after it completed
+        :param sync_id: the sync
+        """
+        if not self.checkpoint_path:
+            return
+        syncs = self._read_checkpoints()
+        if syncs.pop(sync_id, None) is not None:
+            self._write_checkpoints(syncs)
+
+
+class _EntityUpload:
+    """Batches of one AsyncConnector.sync_entities call, buffered per entity type and in flight"""
+    def __init__(self, connector: AsyncConnector, fresh_until: int, sync_id: Optional[str], offset: int):
+        self.connector = connector
+        self.fresh_until = fresh_until
+        self.sync_id = sync_id
+        self.next_index = offset # position of the next entity
+        self.buffers: Dict[str, _Batch] = {}
+        self.in_flight: Dict[asyncio.Task, _Batch] = {}
+        self.batches = 0
+        self.saved_offset = offset
+        self.saved_at = time.monotonic()
+
+    async def add(self, entity: Entity):
+        data = entity.model_dump_json(fallback=str).encode()
+        batch = self.buffers.get(entity.entity_type)
+        if batch and (batch.size + len(data) > self.connector.max_batch_bytes or len(batch.entities) >= self.connector.max_batch_entities):
+            await self.send(batch)
+            batch = None
+        if batch is None:
+            batch = self.buffers[entity.entity_type] = _Batch(entity.entity_type, self.next_index)
+        batch.entities.append(data)
+        batch.size += len(data) + 1
+        self.next_index += 1
+
+    async def send(self, batch: _Batch):
+        # The batch stays buffered until it is in flight, so the checkpoint stays before it
+        while len(self.in_flight) >= self.connector.max_in_flight:
+            await self.wait()
+        del self.buffers[batch.entity_type]
+        self.in_flight[asyncio.create_task(self.connector.post_batch(batch, self.fresh_until))] = batch
+        self.batches += 1
+
+    async def wait(self):
+        """Wait for a batch in flight to be accepted, raise its error if it failed"""
+        done, _ = await asyncio.wait(self.in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result() # a failed batch stays in flight, so the checkpoint stays before it
+            del self.in_flight[task]
+        self.checkpoint()
+
+    async def finish(self):
+        """Send the partial batches and wait for all of them"""
+        for entity_type in list(self.buffers):
+            await self.send(self.buffers[entity_type])
+        while self.in_flight:
+            await self.wait()
+
+    def offset(self) -> int:
+        """Position before which all entities were accepted"""
+        pending = [batch.first_index for batch in self.buffers.values()] + [batch.first_index for batch in self.in_flight.values()]
+        return min(pending, default=self.next_index)
+
+    def checkpoint(self, force: bool = False):
+        if self.sync_id is None:
+            return
+        offset = self.offset()
+        if offset > self.saved_offset and (force or time.monotonic() - self.saved_at >= self.connector.checkpoint_interval):
+            self.connector.save_checkpoint(self.sync_id, offset, self.fresh_until)
+            self.saved_offset, self.saved_at = offset, time.monotonic()
+
+    async def close(self, completed: bool):
+        if completed:
+            if self.sync_id is not None:
+                self.connector.clear_checkpoint(self.sync_id)
+            return
+        tasks = list(self.in_flight)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.checkpoint(force=True)
+
+
+def _retry_after(resp: httpx.Response, default: float = 1.0) -> float:
+    """Seconds to wait from the Retry-After header of a response"""
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After", default)))
+    except ValueError:
+        return default
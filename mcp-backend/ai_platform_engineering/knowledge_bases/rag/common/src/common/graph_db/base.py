@@ -140,6 +140,16 @@ class GraphDB(ABC):
         """
         raise NotImplementedError("Subclasses must implement this method.")
 
+    @abstractmethod
+    async def remove_entities(self, entity_type: str, primary_keys: List[str], client_name: str):
+        """
+        Batch remove entities of a type by primary key, if they were last updated by the client
+        :param entity_type: type of the entities to remove
+        :param primary_keys: primary keys of the entities to remove
+        :param client_name: name of the client removing the entities
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
+
     @abstractmethod
     async def remove_relation(self, relation_name: Optional[str], properties: (dict| None) = None):
         """
@@ -699,6 +699,27 @@ class Neo4jDB(GraphDB):
             await session.run(query, params) # type: ignore
 
 
+    async def remove_entities(self, entity_type: str, primary_keys: List[str], client_name: str):
+        """
+        Remove a list of entities by primary key using a batch query.
+        Only entities last updated by the client are removed.
+
+        :param entity_type: The primary label of the entities.
+        :param primary_keys: The primary keys of the entities to remove.
+        :param client_name: The name of the client removing the entities.
+        """
+        logger.info(f"Removing {len(primary_keys)} entities of type '{entity_type}' for client='{client_name}'")
+        if not primary_keys:
+            return
+        query = f"""
+        MATCH (n:{self._escape_label(entity_type)})
+        WHERE n.`{PRIMARY_ID_KEY}` IN $primary_keys AND n.`{UPDATED_BY_KEY}` = $client_name
+        DETACH DELETE n
+        """
+        logger.debug(query)
+        async with self.driver.session(database=self.database) as session:
+            await session.run(query, {"primary_keys": primary_keys, "client_name": client_name}) # type: ignore
+
     async def remove_relation(self, relation_name: str, properties: (dict| None) = None):
         """
         Removes a relation from the graph database
@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import redis.asyncio as redis
 import redis.exceptions as redis_exceptions
 from common.utils import get_logger
@@ -28,40 +28,115 @@ class JobInfo(BaseModel):
     total: Optional[int] = Field(description="Total items to process")
     errors: Optional[List[str]] = Field(description="Error messages if any")
 
+# Applies an update to a job hash in one round trip. Counters are incremented in place, and a job
+# in a terminal status keeps it: a status change out of it is rejected (returns 0) and nothing is applied.
+# KEYS: job hash, errors stream
+# ARGV: job_id, now, status ("" for none), max errors, processed increment, failed increment,
+#       number of fields to set, then the field/value pairs, then the errors to append
+_UPDATE_JOB_SCRIPT = """
+local job_key, errors_key = KEYS[1], KEYS[2]
+local job_id, now, status = ARGV[1], ARGV[2], ARGV[3]
+local max_errors = tonumber(ARGV[4])
+local processed_increment, failed_increment = tonumber(ARGV[5]), tonumber(ARGV[6])
+local fields_end = 7 + tonumber(ARGV[7]) * 2
+local terminal = {completed = true, completed_with_errors = true, failed = true, terminated = true}
+
+local current = redis.call('HGET', job_key, 'status')
+if not current then
+    current = 'pending'
+    redis.call('HSET', job_key, 'job_id', job_id, 'status', current, 'message', '', 'created_at', now,
+               'processed_counter', 0, 'failed_counter', 0, 'total', 0)
+end
+if status ~= '' and status ~= current then
+    if terminal[current] then
+        return 0
+    end
+    redis.call('HSET', job_key, 'status', status)
+    if terminal[status] then
+        redis.call('HSET', job_key, 'completed_at', now)
+    end
+end
+for i = 8, fields_end, 2 do
+    redis.call('HSET', job_key, ARGV[i], ARGV[i + 1])
+end
+if processed_increment ~= 0 then
+    redis.call('HINCRBY', job_key, 'processed_counter', processed_increment)
+end
+if failed_increment ~= 0 then
+    redis.call('HINCRBY', job_key, 'failed_counter', failed_increment)
+end
+for i = fields_end + 1, #ARGV do
+    redis.call('XADD', errors_key, 'MAXLEN', '~', max_errors, '*', 'error', ARGV[i])
+end
+return 1
+"""
+
 class JobManager:
-    """Manages job status updates in Redis with locking to prevent race conditions."""
+    """
+    Manages job state in Redis.
+
+    A job is a hash (status, message, counters, timestamps) plus a capped stream of its error
+    messages. Every update is applied by a server-side script in a single round trip: counters
+    are incremented atomically without a lock, and a job that reached a terminal status
+    (completed, failed, terminated) cannot be moved out of it.
 
-    def __init__(self, redis_client: redis.Redis):
+    Progress-only updates (increments, errors and a progress message), which ingestion sends
+    for every URL, are coalesced in memory and flushed on a timer. Any other update, and
+    get_job, first flushes the pending progress of the job, so they always see it.
+    """
+
+    def __init__(self, redis_client: redis.Redis, progress_flush_interval: float = 0.5, max_errors: int = 1000):
         """
         Initializes the JobManager with a Redis client.
 
         :param redis_client: An asynchronous Redis client instance.
+        :param progress_flush_interval: Seconds progress-only updates are coalesced for (0 to write them immediately).
+        :param max_errors: Approximate number of error messages kept per job; older ones are trimmed.
         """
         self.redis_client = redis_client
-        self._job_key_prefix = "job_info"
-        self._lock_key_prefix = "job_lock"
+        self.progress_flush_interval = progress_flush_interval
+        self.max_errors = max_errors
+        self._job_key_prefix = "job"
+        self._errors_key_prefix = "job_errors"
+        self._update_script = None # Registered on first use
+        self._pending: Dict[str, Dict[str, Any]] = {} # job_id -> coalesced progress not yet written
+        self._flush_task: Optional[asyncio.Task] = None
 
     def _get_job_key(self, job_id: str) -> str:
-        """Constructs the Redis key for storing job information."""
+        """Constructs the Redis key of the job hash."""
         return f"{self._job_key_prefix}:{job_id}"
 
-    def _get_lock_key(self, job_id: str) -> str:
-        """Constructs the Redis key for the job's lock."""
-        return f"{self._lock_key_prefix}:{job_id}"
+    def _get_errors_key(self, job_id: str) -> str:
+        """Constructs the Redis key of the job's error stream."""
+        return f"{self._errors_key_prefix}:{job_id}"
 
     async def get_job(self, job_id: str) -> Optional[JobInfo]:
         """Retrieves a job's information from Redis."""
-        job_data = await self.redis_client.get(self._get_job_key(job_id))
+        if job_id in self._pending:
+            await self.flush(job_id)
+        job_data, error_entries = await (self.redis_client.pipeline(transaction=False)
+            .hgetall(self._get_job_key(job_id))
+            .xrange(self._get_errors_key(job_id))
+            .execute())
         if not job_data:
             return None
-        return JobInfo.model_validate_json(job_data)
+        fields = {_decode(key): _decode(value) for key, value in job_data.items()}
+        return JobInfo(
+            job_id=fields.get("job_id", job_id),
+            status=JobStatus(fields["status"]),
+            message=fields.get("message"),
+            processed_counter=int(fields.get("processed_counter", 0)),
+            failed_counter=int(fields.get("failed_counter", 0)),
+            created_at=datetime.datetime.fromisoformat(fields["created_at"]),
+            completed_at=datetime.datetime.fromisoformat(fields["completed_at"]) if fields.get("completed_at") else None,
+            total=int(fields.get("total", 0)),
+            errors=[_decode(error) for _, entry in error_entries for error in entry.values()],
+        )
     
     async def is_job_terminated(self, job_id: str) -> bool:
         """Checks if a job is in a terminated state."""
-        job_info = await self.get_job(job_id)
-        if not job_info:
-            return False
-        return job_info.status == JobStatus.TERMINATED
+        job_status = await self.redis_client.hget(self._get_job_key(job_id), "status")
+        return job_status is not None and _decode(job_status) == JobStatus.TERMINATED.value
 
     async def update_job(
         self,
@@ -77,11 +152,10 @@ class JobManager:
         errors: Optional[List[str]] = None,
     ) -> bool:
         """
-        Atomically updates a job's information in Redis.
+        Atomically updates a job's information in Redis, creating the job if it does not exist.
 
-        This method acquires a lock for the job ID, fetches the current job data,
-        applies the updates, and writes the data back to Redis. The lock
-        prevents concurrent modifications from corrupting the job state.
+        Progress-only updates (message, increments and errors) are coalesced and written within
+        progress_flush_interval. Other updates are written immediately, after the job's pending progress.
 
         :param job_id: The ID of the job to update.
         :param status: The new status of the job.
@@ -90,85 +164,92 @@ class JobManager:
         :param processed_increment: The increment for the counter. If provided, the processed_counter is incremented by this value.
         :param failed_counter: The failed counter for the job (absolute value).
         :param failed_increment: The increment for the counter. If provided, the failed_counter is incremented by this value.
-        :param errors: A list of error messages if the job failed.
-        :return: True if the update was successful, False otherwise.
+        :param errors: A list of error messages to append to the job's errors.
+        :return: True if the update was applied (or queued), False if the job is in a terminal status the update would leave.
         """
-        lock_key = self._get_lock_key(job_id)
-        job_key = self._get_job_key(job_id)
+        if all(value is None for value in (status, message, processed_counter, processed_increment,
+                                           failed_counter, failed_increment, total, errors)):
+            logger.warning(f"update_job called for job {job_id} with no fields to update.")
+            return True # No update was needed, but not an error state
+
+        if status is None and processed_counter is None and failed_counter is None and total is None \
+                and self.progress_flush_interval > 0:
+            self._queue_progress(job_id, message, processed_increment or 0, failed_increment or 0, errors or [])
+            return True
 
-        # Construct a dictionary of updates from the provided arguments
-        updates = {}
-        if status is not None:
-            updates["status"] = status
+        if job_id in self._pending:
+            await self.flush(job_id)
+        fields: Dict[str, Any] = {}
         if message is not None:
-            updates["message"] = message
+            fields["message"] = message
         if processed_counter is not None:
-            updates["processed_counter"] = processed_counter
+            fields["processed_counter"] = processed_counter
         if failed_counter is not None:
-            updates["failed_counter"] = failed_counter
+            fields["failed_counter"] = failed_counter
         if total is not None:
-            updates["total"] = total
-
-        if status is not None and (status == JobStatus.COMPLETED or status == JobStatus.FAILED):
-            updates["completed_at"] = datetime.datetime.now()
-
-        if not updates:
-            logger.warning(f"update_job called for job {job_id} with no fields to update.")
-            return True # No update was needed, but not an error state
-
-        for attempt in range(10):
+            fields["total"] = total
+        applied = await self._apply(job_id, status, fields, processed_increment or 0, failed_increment or 0, errors or [])
+        if not applied:
+            logger.info(f"Job {job_id} is already finished; not changing its status to {status}.")
+        else:
+            logger.debug(f"Successfully updated job {job_id} with: status={status}, {fields}")
+        return applied
+
+    async def flush(self, job_id: Optional[str] = None):
+        """
+        Writes the coalesced progress of a job (or of all jobs) to Redis now.
+        Progress that cannot be written is kept and retried on the next flush.
+        """
+        job_ids = [job_id] if job_id is not None else list(self._pending)
+        for pending_job_id in job_ids:
+            pending = self._pending.pop(pending_job_id, None)
+            if pending is None:
+                continue
             try:
-                # Acquire a lock with a timeout to prevent deadlocks
-                async with self.redis_client.lock(lock_key, timeout=10, blocking_timeout=5):
-                    job_data = await self.redis_client.get(job_key)
-                    
-                    # Job does not exist
-                    if not job_data:
-                        logger.warning(f"Job {job_id} not found in Redis. Creating new job.")
-                        
-                        job_info = JobInfo(
-                            job_id=job_id,
-                            status=JobStatus.PENDING,
-                            created_at=datetime.datetime.now(datetime.timezone.utc),
-                            completed_at=None,
-                            errors=[],
-                            processed_counter=0,
-                            failed_counter=0,
-                            total=0,
-                            message=""
-                        )
-                        await self.redis_client.set(job_key, job_info.model_dump_json())
-                    else:
-                        job_info = JobInfo.model_validate_json(job_data)
-
-                    # Apply the valid updates
-                    updated_job_info = job_info.model_copy(update=updates)
-
-                    # Apply the incrementors
-                    if processed_increment is not None:
-                        if updated_job_info.processed_counter is None:
-                            updated_job_info.processed_counter = 0
-                        updated_job_info.processed_counter += processed_increment
-                    if failed_increment is not None:
-                        if updated_job_info.failed_counter is None:
-                            updated_job_info.failed_counter = 0
-                        updated_job_info.failed_counter += failed_increment
-
-                    # Increment errors
-                    if errors:
-                        if updated_job_info.errors is None:
-                            updated_job_info.errors = []
-                        updated_job_info.errors.extend(errors)
-
-                    # Write the updated data back to Redis
-                    await self.redis_client.set(job_key, updated_job_info.model_dump_json())
-
-                    logger.debug(f"Successfully updated job {job_id} with: {updates}")
-                    return True
-
-            except redis_exceptions.LockError:
-                logger.debug(f"Could not acquire lock for job {job_id}. Will retry in 1 second... (Attempt {attempt + 1}/30)")
-                await asyncio.sleep(1)
-
-        logger.warning(f"Failed to acquire lock for job {job_id} after 30 attempts. Update skipped.")
-        return False
\ No newline at end of file
+                await self._apply(pending_job_id, None, {"message": pending["message"]} if pending["message"] is not None else {},
+                                  pending["processed_increment"], pending["failed_increment"], pending["errors"])
+            except redis_exceptions.RedisError as e:
+                logger.warning(f"Failed to write progress of job {pending_job_id}, will retry: {e}")
+                # Put it back under any progress queued meanwhile, whose message is newer
+                newer = self._pending.get(pending_job_id)
+                if newer is not None:
+                    self._queue_progress(pending_job_id, None, pending["processed_increment"], pending["failed_increment"], [])
+                    newer["errors"] = (pending["errors"] + newer["errors"])[-self.max_errors:]
+                else:
+                    self._queue_progress(pending_job_id, pending["message"], pending["processed_increment"],
+                                         pending["failed_increment"], pending["errors"])
+
+    def _queue_progress(self, job_id: str, message: Optional[str], processed_increment: int, failed_increment: int, errors: List[str]):
+        """Adds a progress-only update to the job's pending progress and makes sure a flush is scheduled."""
+        pending = self._pending.setdefault(job_id, {"message": None, "processed_increment": 0, "failed_increment": 0, "errors": []})
+        if message is not None:
+            pending["message"] = message
+        pending["processed_increment"] += processed_increment
+        pending["failed_increment"] += failed_increment
+        pending["errors"] = (pending["errors"] + errors)[-self.max_errors:]
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_after_interval())
+
+    async def _flush_after_interval(self):
+        # Keep going while progress is pending: progress queued, or put back, during a flush finds this task
+        # still running and does not schedule another one
+        while self._pending:
+            await asyncio.sleep(self.progress_flush_interval)
+            await self.flush()
+
+    async def _apply(self, job_id: str, status: Optional[JobStatus], fields: Dict[str, Any],
+                     processed_increment: int, failed_increment: int, errors: List[str]) -> bool:
+        """Runs the update script; returns False if it was rejected because the job is already finished."""
+        if self._update_script is None:
+            self._update_script = self.redis_client.register_script(_UPDATE_JOB_SCRIPT)
+        args: List[Any] = [job_id, datetime.datetime.now(datetime.timezone.utc).isoformat(), status.value if status else "",
+                           self.max_errors, processed_increment, failed_increment, len(fields)]
+        for field, value in fields.items():
+            args += [field, value]
+        args += errors
+        result = await self._update_script(keys=[self._get_job_key(job_id), self._get_errors_key(job_id)], args=args)
+        return bool(int(result))
+
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
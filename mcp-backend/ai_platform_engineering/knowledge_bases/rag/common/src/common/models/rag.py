@@ -91,6 +91,11 @@ class DocumentInfo(BaseModel):
     chunk_overlap: int = Field(2000, description="Chunk overlap used for this document")
     created_at: datetime.datetime = Field(..., description="When the document was processed")
     metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata")
+    etag: Optional[str] = Field(None, description="ETag header of the page when it was last fetched")
+    last_modified: Optional[str] = Field(None, description="Last-Modified header of the page when it was last fetched")
+    sitemap_lastmod: Optional[str] = Field(None, description="Sitemap <lastmod> of the page when it was last fetched")
+    content_hash: Optional[str] = Field(None, description="Hash of the whitespace-normalized document content")
+    chunk_hashes: List[str] = Field(default_factory=list, description="Hash of each chunk's content, in chunk order")
 
     @staticmethod
     def generate_id_from_url(datasource_id: str, url: str) -> str:
@@ -1,6 +1,6 @@
 import asyncio
 import traceback
-from typing import Coroutine
+from typing import AsyncIterable, Coroutine
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,4 +32,42 @@ class TaskScheduler:
         :param coroutines: A list of coroutines to run.
         """
         tasks = [self._worker(coro) for coro in coroutines]
-        await asyncio.gather(*tasks)
\ No newline at end of file
+        await asyncio.gather(*tasks)
+
+    async def run_stream(self, coroutines: AsyncIterable[Coroutine]):
+        """
+        Runs coroutines as they come out of an async iterable, respecting the max concurrency limit.
+        The iterable is only advanced once a task slot is free, so a producer (e.g. a sitemap being
+        read) is paced by the tasks, and finished tasks are not kept around.
+
+        :param coroutines: An async iterable of coroutines to run.
+        """
+        iterator = aiter(coroutines)
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                await self._semaphore.acquire()
+                try:
+                    coro = await anext(iterator, None)
+                except BaseException:
+                    self._semaphore.release()
+                    raise
+                if coro is None:
+                    self._semaphore.release()
+                    break
+                task = asyncio.create_task(self._run_acquired(coro))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        finally:
+            if pending:
+                await asyncio.gather(*pending)
+
+    async def _run_acquired(self, coro: Coroutine):
+        """Runs a coroutine started by run_stream and releases the semaphore it acquired."""
+        try:
+            await coro
+        except Exception as e:
+            logger.error(traceback.format_exc())
+            logger.error(f"Task failed with an exception: {e}", exc_info=True)
+        finally:
+            self._semaphore.release()
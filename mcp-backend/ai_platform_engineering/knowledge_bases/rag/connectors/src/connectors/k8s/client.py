@@ -1,10 +1,12 @@
 import asyncio
 import logging
 import os
+from typing import AsyncIterator, List
 
-from core import utils
-from core.models import Entity
-from clients.common import Client
+from common import utils
+from common.connector import AsyncConnector
+from common.models.graph import Entity
+from connectors.k8s.watch import K8sWatchSync, list_pages
 from kubernetes import dynamic
 from kubernetes import config as kconfig
 from kubernetes.dynamic.exceptions import NotFoundError
@@ -16,6 +18,14 @@ SYNC_INTERVAL = int(os.getenv("SYNC_INTERVAL", 60 * 15))  # sync every 15 minute
 cluster_name = os.environ.get('CLUSTER_NAME')
 EXIT_AFTER_SYNC = os.getenv("EXIT_AFTER_SYNC", "false").lower() == "true"
 
+# "full" lists every resource on each sync, "watch" lists once and then sends changes as they happen
+SYNC_MODE = os.getenv("SYNC_MODE", "full").lower()
+WATCH_DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", 2))
+WATCH_MAX_DELAY_SECONDS = float(os.getenv("WATCH_MAX_DELAY_SECONDS", 10))
+WATCH_TIMEOUT_SECONDS = int(os.getenv("WATCH_TIMEOUT_SECONDS", 300))
+WATCH_RESYNC_INTERVAL = int(os.getenv("WATCH_RESYNC_INTERVAL", 60 * 60 * 24))  # list again daily, entities are fresh for a week
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", 500))
+
 # default_ignore_resource_list = (
 #     "CustomResourceDefinition,ComponentStatus,ConfigMap,ControllerRevision,"
 #     "ClusterRoleBinding,RoleBinding,Event,Lease,MutatingWebhookConfiguration,"
@@ -38,134 +48,157 @@ LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
 logging.basicConfig(level=LOG_LEVEL)
 
 
-def sync_all_k8s_resources(c: Client):
+def cluster_entity(cluster_name: str) -> Entity:
+    return Entity(
+        entity_type="K8sCluster",
+        primary_key_properties=["name"],
+        all_properties={
+            "name": cluster_name,
+        }
+    )
+
+
+def k8s_entity(resource: Resource, obj: dict, cluster_name: str) -> Entity:
     """
-    Uses the dynamic client to list all Kubernetes resources (both standard and custom resources)
-    dynamically without hardcoding types.
+    Converts a Kubernetes object (as returned by the API) to its entity
     """
+    # list items come without their kind, watch events with it
+    obj = dict(obj, apiVersion=obj.get("apiVersion") or resource.group_version, kind=obj.get("kind") or resource.kind)
+    all_properties = utils.flatten_dict(obj)
+    all_properties_clean = {}
+    # remove any ignored fields
+    for field in all_properties.keys():
+        ignore = False
+        for ig_field in ignore_field_list:
+            if field.startswith(ig_field):
+                ignore = True
+                logging.debug(f"Ignoring field: {field} (prefix: {ig_field})")
+                break
+        if not ignore:
+            all_properties_clean[field] = all_properties[field]
+
+    all_properties_clean["cluster_name"] = cluster_name
+
+    if "metadata.namespace" in all_properties_clean:
+        primary_key_properties = ["cluster_name", "metadata.namespace", "metadata.name"]
+    else:
+        primary_key_properties = ["cluster_name", "metadata.name"]
+
+    return Entity(
+        entity_type="K8s"+str(resource.kind),
+        primary_key_properties=primary_key_properties,
+        all_properties=all_properties_clean
+    )
+
+
+def load_dynamic_client() -> dynamic.DynamicClient:
     # Load kubeconfig from the default location (~/.kube/config)
     logging.info("Loading Kubernetes configuration...")
     kconfig.load_kube_config()
     logging.info("Kubernetes configuration loaded successfully.")
+    return dynamic.DynamicClient(kconfig.new_client_from_config())
 
-    # Check if the cluster name is set
-    if not cluster_name:
-        logging.error("CLUSTER_NAME environment variable is not set. Please set it to the name of your Kubernetes cluster.")
-        return
 
-    # Check if the cluster exists in the database
-    clusters = c.find_entity(entity_type="K8sCluster", props={"name": cluster_name})
-    if len(clusters) == 0:
-        c.update_entity(entity=Entity(
-            entity_type="K8sCluster",
-            primary_key_properties=["name"],
-            all_properties={
-                "name": cluster_name,
-            }
-        ))
-
-    # Initialize the dynamic client
-    dyn_client = dynamic.DynamicClient(kconfig.new_client_from_config())
-
-    # try:
-    # Discover all available API resources
-    api_resources = dyn_client.resources
-
-    # Iterate through all resources and fetch their details
-    for resource in api_resources:
-        # print(resource)
-        # continue
+def list_resources(dyn_client: dynamic.DynamicClient) -> List[Resource]:
+    """
+    Uses the dynamic client to discover the Kubernetes resources (both standard and custom resources)
+    in RESOURCE_LIST, without hardcoding types.
+    """
+    resources = []
+    for resource in dyn_client.resources:
+        resource = resource[0]
+        if not isinstance(resource, Resource):
+            logging.info("Skipping non-resource")
+            continue
+        if resource.kind is None:
+            logging.info("Skipping resource with no kind")
+            continue
+        # Skip ignored resources
+        if resource.kind.lower() not in resource_list:
+            logging.info(f"Skipping ignored resource: {resource.kind}")
+            continue
+        logging.info(f"Resource: {resource.kind} (API Group/Version: {resource.group_version})")
+        resources.append(resource)
+    return resources
+
+
+async def k8s_entities(dyn_client: dynamic.DynamicClient) -> AsyncIterator[Entity]:
+    """
+    Lists all objects of the resources, a page at a time
+    """
+    yield cluster_entity(cluster_name)
+    for resource in list_resources(dyn_client):
         try:
-            # List all objects for the resource
-            resource: Resource = resource[0]
-            if not isinstance(resource, Resource):
-                logging.info("Skipping non-resource")
-                continue
-            if resource.kind is None:
-                logging.info("Skipping resource with no kind")
-                continue
-            # Skip ignored resources
-            if resource.kind.lower() not in resource_list:
-                logging.info(f"Skipping ignored resource: {resource.kind}")
-                continue
-            logging.info(f"Resource: {resource.kind} (API Group/Version: {resource.group}/{resource.api_version})")
-            resource_name = resource.kind
-            resource_group_version = f"{resource.group}/{resource.api_version}" if resource.group else resource.api_version
-            logging.info(f"Fetching {resource_name} (API Group/Version: {resource_group_version})")
-
-            # Fetch the resources for the current type
-            objects = resource.get()
-            # print(type(objects))
-
-            for obj in objects.items:
-                id_val =  str(cluster_name) + "/" + str(resource_group_version) +"/"+ str(resource.kind) + "/" + obj.metadata.get("namespace", "") + "/"+ obj.metadata.name
-                logging.debug(f"Processing {resource_name} object: {id_val}")
-                all_properties = utils.flatten_dict(obj.to_dict())
-                all_properties_clean = {}
-                # remove any ignored fields
-                for field in all_properties.keys():
-                    ignore = False
-                    for ig_field in ignore_field_list:
-                        if field.startswith(ig_field):
-                            ignore = True
-                            logging.debug(f"Ignoring field: {field} (prefix: {ig_field})")
-                            break
-                    if not ignore:
-                        all_properties_clean[field] = all_properties[field]
-
-
-                all_properties_clean["cluster_name"] = cluster_name
-
-                if "metadata.namespace" in all_properties_clean:
-                    primary_key_properties = ["cluster_name", "metadata.namespace", "metadata.name"]
-                else:
-                    primary_key_properties = ["cluster_name", "metadata.name"]
-
-                c.update_entity(entity=Entity(
-                    entity_type="K8s"+str(resource.kind),
-                    primary_key_properties=primary_key_properties,
-                    all_properties=all_properties_clean
-                ))
-
-            logging.info(f"  Found {len(objects.items)} {resource_name} resources.")
+            logging.info(f"Fetching {resource.kind} (API Group/Version: {resource.group_version})")
+            count = 0
+            async for page in list_pages(resource, LIST_PAGE_SIZE):
+                for obj in page.get("items") or []:
+                    entity = k8s_entity(resource, obj, cluster_name)
+                    logging.debug(f"Processing {resource.kind} object: {entity.generate_primary_key()}")
+                    yield entity
+                    count += 1
+            logging.info(f"  Found {count} {resource.kind} resources.")
         except NotFoundError:
             # Ignore resources that may not be accessible
             logging.info(f"  Resource {resource.kind} not found or not accessible.")
 
 
-def sync(c: Client):
+async def sync_all_k8s_resources(c: AsyncConnector, dyn_client: dynamic.DynamicClient):
     """
-    Periodically sync entities
+    Lists all Kubernetes resources and streams them to the server
     """
-    # Fetch all Kubernetes objects
-    # get_cluster_metadata()
-    logging.info("Syncing Kubernetes resources...")
-    sync_all_k8s_resources(c)
+    count = await c.sync_entities(k8s_entities(dyn_client))
+    logging.info(f"Synced {count} entities")
+
+
+async def watch_k8s_resources(c: AsyncConnector, dyn_client: dynamic.DynamicClient):
+    """
+    Lists the Kubernetes resources once, then keeps them in sync from their watch events
+    """
+    watch_sync = K8sWatchSync(
+        c, dyn_client, list_resources(dyn_client),
+        to_entity=lambda resource, obj: k8s_entity(resource, obj, cluster_name),
+        debounce=WATCH_DEBOUNCE_SECONDS,
+        max_delay=WATCH_MAX_DELAY_SECONDS,
+        watch_timeout=WATCH_TIMEOUT_SECONDS,
+        resync_interval=WATCH_RESYNC_INTERVAL,
+        page_size=LIST_PAGE_SIZE,
+    )
+    await watch_sync.run(initial=[cluster_entity(cluster_name)])
+
 
 async def run():
+    # Check if the cluster name is set
+    if not cluster_name:
+        logging.error("CLUSTER_NAME environment variable is not set. Please set it to the name of your Kubernetes cluster.")
+        return
+
     #  create a plugin object
-    c = Client(CLIENT_NAME)
+    async with AsyncConnector(name=CLIENT_NAME) as c:
+        dyn_client = load_dynamic_client()
 
-    # sync periodically
-    async def periodic_sync():
+        if SYNC_MODE == "watch":
+            logging.info("Watching Kubernetes resources...")
+            await watch_k8s_resources(c, dyn_client)
+            return
+
+        # sync periodically
         while True:
-            logging.info("syncing...")
-            sync(c)
-            logging.info("syncing... done")
+            logging.info("Syncing Kubernetes resources...")
+            try:
+                await sync_all_k8s_resources(c, dyn_client)
+                logging.info("syncing... done")
+            except Exception as e:
+                logging.error(f"Sync failed: {e}")
             if EXIT_AFTER_SYNC:
                 logging.info("Exiting after sync as per configuration.")
-                exit(0)
+                return
             logging.info(f"Next sync in {SYNC_INTERVAL} seconds")
             await asyncio.sleep(SYNC_INTERVAL)
 
-    # run the plugin in asyncio loop
-    await asyncio.gather(
-        periodic_sync(),
-    )
-
 if __name__ == "__main__":
     try:
         logging.info(f"Running client {CLIENT_NAME}...")
         asyncio.run(run())
     except KeyboardInterrupt:
-        logging.info("Client execution interrupted")
\ No newline at end of file
+        logging.info("Client execution interrupted")
@@ -0,0 +1,288 @@
+"""
+Incremental sync of Kubernetes resources: each resource type is listed once, then watched from the
+resourceVersion of the list. Watch events become entity upserts (ADDED, MODIFIED) and deletes (DELETED),
+so the load on the server follows the rate of change of the cluster rather than its size.
+"""
+import asyncio
+import functools
+import logging
+import socket
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+from kubernetes.dynamic import DynamicClient, Resource
+from kubernetes.dynamic.exceptions import ForbiddenError, NotFoundError
+
+from common.connector import AsyncConnector
+from common.models.graph import Entity
+
+HTTP_GONE = 410
+
+
+async def list_pages(resource: Resource, page_size: int) -> AsyncIterator[dict]:
+    """
+    Lists the objects of a resource type a page at a time (a consistent snapshot, at the resourceVersion of the pages)
+    """
+    token = None
+    while True:
+        page = await asyncio.to_thread(resource.get, limit=page_size, _continue=token)
+        page = page.to_dict()
+        yield page
+        token = (page.get("metadata") or {}).get("continue")
+        if not token:
+            return
+
+
+def is_gone(e: Exception) -> bool:
+    """Whether the resourceVersion (or continue token) of a request expired"""
+    return isinstance(e, ApiException) and e.status == HTTP_GONE
+
+
+class StoppableWatch(watch.Watch):
+    """
+    A watch that stop() also disconnects, so that the thread reading it returns right away
+    rather than at its next event (or when the API server ends the watch)
+    """
+    def __init__(self):
+        super().__init__()
+        self._resp = None
+        self._stopped = False # stream() resets the flag of stop()
+
+    def stream(self, func, *args, **kwargs):
+        @functools.wraps(func) # the watch reads the return type and watch argument from the docstring of func
+        def request(*args, **kwargs):
+            self._resp = func(*args, **kwargs)
+            if self._stopped: # stopped while connecting
+                self._disconnect()
+            return self._resp
+        return super().stream(request, *args, **kwargs)
+
+    def stop(self):
+        self._stopped = True
+        super().stop()
+        self._disconnect()
+
+    def _disconnect(self):
+        sock = getattr(getattr(self._resp, "connection", None), "sock", None)
+        if sock is not None:
+            try:
+                # Closing the response from another thread does not wake up a blocked read, shutting down its socket does
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class K8sWatchSync:
+    """
+    Keeps the entities of Kubernetes resources in sync with list+watch.
+
+    Events are coalesced per entity (the last state wins) and flushed once no event arrived for
+    `debounce` seconds, `max_delay` seconds after the first at the latest, or when `max_pending`
+    entities are waiting. A watch that ends is resumed from the last resourceVersion seen; when that
+    resourceVersion has expired (410 Gone), the resource type is listed again and entities seen in the
+    previous list but not in this one are deleted. Every `resync_interval` seconds the resource types
+    are listed again anyway, which also refreshes fresh_until of the entities that did not change.
+    """
+    def __init__(self,
+                 connector: AsyncConnector,
+                 dyn_client: DynamicClient,
+                 resources: List[Resource],
+                 to_entity: Callable[[Resource, dict], Entity],
+                 debounce: float = 2.0,
+                 max_delay: float = 10.0,
+                 max_pending: int = 5000,
+                 watch_timeout: int = 300,
+                 resync_interval: float = 24 * 60 * 60,
+                 page_size: int = 500,
+                 retry_delay: float = 5.0):
+        """
+        :param connector: connector the entities are sent with
+        :param dyn_client: Kubernetes dynamic client
+        :param resources: resource types to watch
+        :param to_entity: converts an object of a resource type to its entity
+        :param debounce: seconds without events before the pending changes are sent
+        :param max_delay: maximum seconds a change waits before it is sent
+        :param max_pending: number of pending changes that are sent right away
+        :param watch_timeout: seconds after which the API server ends a watch (which is then resumed)
+        :param resync_interval: seconds between two lists of a resource type
+        :param page_size: objects per page when listing
+        :param retry_delay: seconds before a failed watch or flush is retried
+        """
+        self.connector = connector
+        self.dyn_client = dyn_client
+        self.resources = resources
+        self.to_entity = to_entity
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.watch_timeout = watch_timeout
+        self.resync_interval = resync_interval
+        self.page_size = page_size
+        self.retry_delay = retry_delay
+        self.pending: Dict[Tuple[str, str], Optional[Entity]] = {} # (entity type, primary key) -> entity, None to delete
+        self.known: Dict[str, Set[str]] = {} # resource type -> primary keys of its objects
+        self.entity_types: Dict[str, str] = {} # resource type -> entity type of its objects
+        self.upserted = 0
+        self.deleted = 0
+        self.relists = 0
+        self._changed = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._watchers: Set[StoppableWatch] = set()
+        self._stopped = False
+        # watches block a thread each, until watch_timeout or stop()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(resources)), thread_name_prefix="k8s-watch")
+
+    async def run(self, initial: Optional[List[Entity]] = None):
+        """
+        Sync until cancelled
+        :param initial: entities sent along with the first lists, such as the cluster
+        """
+        for entity in initial or []:
+            self.pending[(entity.entity_type, entity.generate_primary_key())] = entity
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._flush_loop())
+                for resource in self.resources:
+                    tg.create_task(self._sync_resource(resource))
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop the watches, their threads are disconnected and end right away"""
+        self._stopped = True
+        for watcher in list(self._watchers):
+            watcher.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def flush(self):
+        """
+        Send the pending changes, the ones that fail are pending again. The server answers once the entities
+        are stored, and flushes do not overlap, so the writes of an entity are stored in the order of its events.
+        """
+        async with self._flush_lock:
+            changes, self.pending = self.pending, {}
+            if not changes:
+                return
+            upserts = [entity for entity in changes.values() if entity is not None]
+            deletes: Dict[str, List[str]] = defaultdict(list)
+            for (entity_type, primary_key), entity in changes.items():
+                if entity is None:
+                    deletes[entity_type].append(primary_key)
+            try:
+                if upserts:
+                    await self.connector.sync_entities(upserts)
+                for entity_type, primary_keys in deletes.items():
+                    await self.connector.delete_entities(entity_type, primary_keys)
+            except Exception:
+                for key, entity in changes.items(): # unless they changed again since
+                    self.pending.setdefault(key, entity)
+                raise
+            self.upserted += len(upserts)
+            self.deleted += len(changes) - len(upserts)
+            logging.info(f"Sent {len(upserts)} updated and {len(changes) - len(upserts)} deleted entities")
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._changed.wait()
+            deadline = loop.time() + self.max_delay
+            while len(self.pending) < self.max_pending and loop.time() < deadline:
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), min(self.debounce, deadline - loop.time()))
+                except TimeoutError:
+                    break
+            self._changed.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Failed to send {len(self.pending)} changes, retrying in {self.retry_delay}s: {e}")
+                await asyncio.sleep(self.retry_delay)
+                self._changed.set()
+
+    async def _sync_resource(self, resource: Resource):
+        """List and watch a resource type"""
+        loop = asyncio.get_running_loop()
+        resource_version, listed_at = None, 0.0
+        while not self._stopped:
+            try:
+                if resource_version is None or time.monotonic() - listed_at >= self.resync_interval:
+                    resource_version = await self._relist(resource)
+                    listed_at = time.monotonic()
+                resource_version = await loop.run_in_executor(self._executor, self._watch, resource, resource_version, loop)
+            except (NotFoundError, ForbiddenError):
+                logging.info(f"Resource {resource.kind} not found or not accessible, not watching it")
+                return
+            except Exception as e:
+                if is_gone(e):
+                    logging.info(f"Resource version {resource_version} of {resource.kind} expired, listing again")
+                    resource_version = None
+                    continue
+                logging.error(f"Error watching {resource.kind}, retrying in {self.retry_delay}s: {e}")
+                await asyncio.sleep(self.retry_delay)
+
+    async def _relist(self, resource: Resource) -> str:
+        """List a resource type, upsert its objects and delete the ones that are gone, returns the resourceVersion to watch from"""
+        keys: Set[str] = set()
+        resource_version = ""
+        async for page in list_pages(resource, self.page_size):
+            resource_version = (page.get("metadata") or {}).get("resourceVersion", resource_version)
+            for obj in page.get("items") or []:
+                entity = self.to_entity(resource, obj)
+                primary_key = entity.generate_primary_key()
+                keys.add(primary_key)
+                self.entity_types[self._resource_key(resource)] = entity.entity_type
+                self.pending[(entity.entity_type, primary_key)] = entity
+            if len(self.pending) >= self.max_pending:
+                await self.flush()
+
+        previous_keys = self.known.get(self._resource_key(resource), set())
+        for primary_key in previous_keys - keys:
+            self.pending[(self.entity_types[self._resource_key(resource)], primary_key)] = None
+        self.known[self._resource_key(resource)] = keys
+        self.relists += 1
+        self._changed.set()
+        logging.info(f"Listed {len(keys)} {resource.kind} at resource version {resource_version}, {len(previous_keys - keys)} gone")
+        return resource_version
+
+    def _watch(self, resource: Resource, resource_version: str, loop: asyncio.AbstractEventLoop) -> str:
+        """Watch a resource type (in a thread) until the API server ends the watch, returns the last resourceVersion seen"""
+        watcher = StoppableWatch()
+        self._watchers.add(watcher)
+        try:
+            for event in self.dyn_client.watch(resource, resource_version=resource_version, timeout=self.watch_timeout,
+                                               watcher=watcher, allow_watch_bookmarks=True):
+                obj = event["raw_object"]
+                resource_version = (obj.get("metadata") or {}).get("resourceVersion", resource_version)
+                if event["type"] != "BOOKMARK":
+                    loop.call_soon_threadsafe(self._on_event, resource, event["type"], obj)
+                if self._stopped:
+                    watcher.stop()
+        except Exception:
+            if not self._stopped: # else stop() disconnected it
+                raise
+        finally:
+            self._watchers.discard(watcher)
+        return resource_version
+
+    def _on_event(self, resource: Resource, event_type: str, obj: dict):
+        entity = self.to_entity(resource, obj)
+        primary_key = entity.generate_primary_key()
+        keys = self.known.setdefault(self._resource_key(resource), set())
+        self.entity_types[self._resource_key(resource)] = entity.entity_type
+        if event_type == "DELETED":
+            keys.discard(primary_key)
+            self.pending[(entity.entity_type, primary_key)] = None
+        else:
+            keys.add(primary_key)
+            self.pending[(entity.entity_type, primary_key)] = entity
+        self._changed.set()
+
+    @staticmethod
+    def _resource_key(resource: Resource) -> str:
+        return f"{resource.group_version}/{resource.kind}"
+
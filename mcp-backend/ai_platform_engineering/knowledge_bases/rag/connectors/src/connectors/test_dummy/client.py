@@ -2,9 +2,9 @@ import asyncio
 import logging
 import os
 import json
-from collections import defaultdict
+from typing import Iterator
 
-from common.connector import Connector
+from common.connector import AsyncConnector
 from common.models.graph import Entity
 
 """
@@ -20,64 +20,84 @@ LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
 logging.basicConfig(level=LOG_LEVEL)
 
 
-def sync_entities_from_file(p: Connector, file_path: str):
+def entities_from_file(file_path: str) -> Iterator[Entity]:
     # load entities from json file
     with open(file_path, "r") as f:
         data = json.load(f)
-        
-        # Group entities by entity_type
-        grouped_entities = defaultdict(list)
-        for entity_data in data["entities"]:
-            entity = Entity(
-                entity_type=entity_data["entity_type"],
-                additional_labels=entity_data.get("additional_labels", []),
-                primary_key_properties=entity_data["primary_key_properties"],
-                additional_key_properties=entity_data.get("additional_key_properties", []),
-                all_properties=entity_data["all_properties"]
-            )
-            grouped_entities[entity.entity_type].append(entity)
 
-        # Batch update entities for each type
-        for entity_type, entities in grouped_entities.items():
-            logging.info(f"Creating {len(entities)} entities of type {entity_type}...")
-            p.update_entity(entity_type=entity_type, entities=entities)
+    for entity_data in data["entities"]:
+        yield Entity(
+            entity_type=entity_data["entity_type"],
+            additional_labels=entity_data.get("additional_labels", []),
+            primary_key_properties=entity_data["primary_key_properties"],
+            additional_key_properties=entity_data.get("additional_key_properties", []),
+            all_properties=entity_data["all_properties"]
+        )
 
-def sync(p: Connector):
+def generate_dummy_entities(count: int, skip: int = 0) -> Iterator[Entity]:
     """
-    Periodically sync entities
+    Generates `count` dummy entities of a few types, starting at `skip`
     """
-    logging.info("Syncing entities...")
-    # logging.info("Syncing entities...")
-    # generate_dummy_entity(p, int(os.getenv("ENTITY_COUNT", 1000)), int(os.getenv("SKIP", 0)))
+    entity_types = ["DummyService", "DummyHost", "DummyTeam"]
+    for i in range(skip, skip + count):
+        yield Entity(
+            entity_type=entity_types[i % len(entity_types)],
+            primary_key_properties=["id"],
+            all_properties={
+                "id": f"dummy-{i}",
+                "name": f"Dummy entity {i}",
+                "owner": f"team-{i % 97}",
+                "region": ["us-east-1", "eu-west-1", "ap-south-1"][i % 3],
+                "tags": [f"tag-{i % 7}", f"tag-{i % 11}"],
+            }
+        )
 
-    # sync entities from file
+async def sync(p: AsyncConnector):
+    """
+    Sync entities, generated (ENTITY_COUNT) or from a file
+    """
+    logging.info("Syncing entities...")
+    entity_count = int(os.getenv("ENTITY_COUNT", 0))
+    skip = int(os.getenv("SKIP", 0))
     file_path = os.getenv("DUMMY_ENTITIES_FILE", "entities_dummy.json")
-    sync_entities_from_file(p, file_path)
+    # The sync ID names the input, so that a sync that failed is resumed from its checkpoint
+    # (CONNECTOR_CHECKPOINT_PATH) only while the entities, and their order, are the same
+    if entity_count:
+        entities = generate_dummy_entities(entity_count, skip)
+        sync_id = f"generated:{entity_count}:{skip}"
+    else:
+        entities = entities_from_file(file_path)
+        sync_id = f"file:{file_path}:{os.path.getmtime(file_path)}"
+
+    count = await p.sync_entities(entities, sync_id=sync_id)
+    logging.info(f"Synced {count} entities")
 
 
 async def run():
     #  create a plugin object
-    p = Connector()
-
-    init_delay = os.getenv("INIT_DELAY_SECONDS", 0)
-    if init_delay:
-        logging.info(f"Sleeping for {init_delay} seconds before starting the plugin...")
-        await asyncio.sleep(int(init_delay))
+    async with AsyncConnector() as p:
+        init_delay = os.getenv("INIT_DELAY_SECONDS", 0)
+        if init_delay:
+            logging.info(f"Sleeping for {init_delay} seconds before starting the plugin...")
+            await asyncio.sleep(int(init_delay))
 
-    # sync periodically
-    async def periodic_sync():
-        while True:
-            logging.info("syncing...")
-            sync(p)
-            await asyncio.sleep(SYNC_INTERVAL)
+        # sync periodically
+        async def periodic_sync():
+            while True:
+                logging.info("syncing...")
+                try:
+                    await sync(p)
+                except Exception as e:
+                    logging.error(f"Sync failed: {e}")
+                await asyncio.sleep(SYNC_INTERVAL)
 
-    # run the plugin in asyncio loop
-    async with asyncio.TaskGroup() as tg:
-        tg.create_task(periodic_sync())
+        # run the plugin in asyncio loop
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(periodic_sync())
 
 if __name__ == "__main__":
     try:
         logging.info(f"Running client {CONNECTOR_NAME}...")
         asyncio.run(run())
     except KeyboardInterrupt:
-        logging.info("Client execution interrupted")
\ No newline at end of file
+        logging.info("Client execution interrupted")
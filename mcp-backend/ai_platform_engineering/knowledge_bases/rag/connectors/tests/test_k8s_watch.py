@@ -0,0 +1,340 @@
+"""
+Tests for the watch-driven sync of the k8s connector, against a fake Kubernetes API server
+(discovery, paginated lists, and watches streaming events from a resourceVersion) with no real cluster.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import pytest_asyncio
+from kubernetes import client as kclient
+from kubernetes.dynamic import DynamicClient
+
+from common.constants import PROP_DELIMITER
+from connectors.k8s.client import k8s_entity, list_resources
+from connectors.k8s.watch import K8sWatchSync
+
+RESOURCES = {
+    "/api/v1": [
+        {"name": "namespaces", "kind": "Namespace", "namespaced": False},
+        {"name": "services", "kind": "Service", "namespaced": True},
+    ],
+    "/apis/apps/v1": [
+        {"name": "deployments", "kind": "Deployment", "namespaced": True},
+    ],
+}
+
+
+class FakeCluster:
+    """
+    Kubernetes API server keeping objects and their event log. Watches stream the events after their
+    resourceVersion and wait for new ones; a resourceVersion older than the compacted log gets 410 Gone.
+    """
+
+    def __init__(self, page_size=2):
+        self.page_size = page_size
+        self.objects = {} # path -> name -> object
+        self.events = [] # (resourceVersion, path, type, object)
+        self.compacted = 0
+        self.generation = 0 # bumped to end the open watches
+        self.paused = False # watches wait while the API server is unreachable
+        self.lists = 0
+        self.expired_watches = 0
+        self.condition = threading.Condition()
+        cluster = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path == "/version":
+                    return self.respond({"major": "1", "minor": "33", "gitVersion": "v1.33.0"})
+                if url.path == "/apis":
+                    return self.respond({"kind": "APIGroupList", "groups": [{
+                        "name": "apps", "versions": [{"groupVersion": "apps/v1", "version": "v1"}],
+                        "preferredVersion": {"groupVersion": "apps/v1", "version": "v1"}}]})
+                if url.path in RESOURCES:
+                    return self.respond({"kind": "APIResourceList", "groupVersion": url.path.split("/", 2)[-1],
+                                         "resources": [dict(resource, verbs=["get", "list", "watch"]) for resource in RESOURCES[url.path]]})
+                if url.path.rsplit("/", 1)[0] in RESOURCES:
+                    if query.get("watch", "").lower() == "true":
+                        return self.watch(url.path, int(query.get("resourceVersion") or 0), float(query.get("timeoutSeconds", 5)))
+                    return self.list(url.path, int(query.get("limit", 0)), int(query.get("continue") or 0))
+                self.send_error(404)
+
+            def list(self, path, limit, start):
+                with cluster.condition:
+                    cluster.lists += 1
+                    items = sorted(cluster.objects.get(path, {}).values(), key=lambda obj: obj["metadata"]["name"])
+                    resource_version = cluster.resource_version()
+                end = start + min(limit or len(items), cluster.page_size)
+                metadata = {"resourceVersion": str(resource_version)}
+                if end < len(items):
+                    metadata["continue"] = str(end)
+                self.respond({"kind": "List", "apiVersion": "v1", "metadata": metadata,
+                              "items": [{key: value for key, value in obj.items() if key not in ("kind", "apiVersion")} for obj in items[start:end]]})
+
+            def watch(self, path, resource_version, timeout):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked") # events are read as they arrive
+                self.end_headers()
+                try:
+                    self.stream_events(path, resource_version, timeout)
+                finally:
+                    self.wfile.write(b"0\r\n\r\n")
+
+            def stream_events(self, path, resource_version, timeout):
+                deadline = time.monotonic() + timeout
+                with cluster.condition:
+                    cluster.condition.wait_for(lambda: not cluster.paused)
+                    generation = cluster.generation
+                    if resource_version < cluster.compacted:
+                        cluster.expired_watches += 1
+                        self.write_event("ERROR", {"kind": "Status", "code": 410, "reason": "Expired", "message": "too old resource version"})
+                        return
+                    while cluster.generation == generation and time.monotonic() < deadline:
+                        for event_version, event_path, event_type, obj in cluster.events:
+                            if event_path == path and event_version > resource_version:
+                                self.write_event(event_type, obj)
+                                resource_version = event_version
+                        cluster.condition.wait(deadline - time.monotonic())
+
+            def write_event(self, event_type, obj):
+                line = json.dumps({"type": event_type, "object": obj}).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+
+            def respond(self, content):
+                data = json.dumps(content).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def resource_version(self):
+        return self.events[-1][0] if self.events else self.compacted
+
+    def apply(self, path, name, namespace=None, **spec):
+        with self.condition:
+            objects = self.objects.setdefault(path, {})
+            event_type = "MODIFIED" if name in objects else "ADDED"
+            resource_version = self.resource_version() + 1
+            kind = next(resource["kind"] for group, resources in RESOURCES.items() for resource in resources if path == f"{group}/{resource['name']}")
+            metadata = {"name": name, "resourceVersion": str(resource_version)}
+            if namespace:
+                metadata["namespace"] = namespace
+            objects[name] = {"kind": kind, "apiVersion": "apps/v1" if "apps" in path else "v1", "metadata": metadata, "spec": spec}
+            self.events.append((resource_version, path, event_type, objects[name]))
+            self.condition.notify_all()
+
+    def delete(self, path, name):
+        with self.condition:
+            obj = self.objects[path].pop(name)
+            resource_version = self.resource_version() + 1
+            obj = dict(obj, metadata=dict(obj["metadata"], resourceVersion=str(resource_version)))
+            self.events.append((resource_version, path, "DELETED", obj))
+            self.condition.notify_all()
+
+    def compact(self):
+        """Forget the events so far, watches resuming from before get 410 Gone"""
+        with self.condition:
+            self.compacted = self.resource_version()
+            self.events.clear()
+
+    def disconnect(self, paused=False):
+        """End the open watches, as the API server does after their timeout, and hold new ones while paused"""
+        with self.condition:
+            self.generation += 1
+            self.paused = paused
+            self.condition.notify_all()
+
+    def close(self):
+        self.disconnect()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class RecordingConnector:
+    def __init__(self):
+        self.upserts = []
+        self.deletes = []
+        self.flushes = 0
+
+    async def sync_entities(self, entities, fresh_until=0, sync_id=None):
+        self.flushes += 1
+        self.upserts.extend(entities)
+        return len(self.upserts)
+
+    async def delete_entities(self, entity_type, primary_keys):
+        self.flushes += 1
+        self.deletes.extend((entity_type, key) for key in primary_keys)
+
+    def upserted(self, entity_type):
+        return [entity.all_properties["metadata.name"] for entity in self.upserts if entity.entity_type == entity_type]
+
+
+class StoringConnector(RecordingConnector):
+    """Answers once the entities are stored, after `delay` seconds, as the server does"""
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.sending = [] # primary keys of the upserts sent so far
+        self.stored = {} # (entity type, primary key) -> entity
+        self.writes = [] # ("upsert" or "delete", entity type, primary key), in the order they were stored
+
+    async def sync_entities(self, entities, fresh_until=0, sync_id=None):
+        entities = list(entities)
+        self.sending.extend(entity.generate_primary_key() for entity in entities)
+        await asyncio.sleep(self.delay)
+        for entity in entities:
+            self.stored[(entity.entity_type, entity.generate_primary_key())] = entity
+            self.writes.append(("upsert", entity.entity_type, entity.generate_primary_key()))
+        return await super().sync_entities(entities, fresh_until, sync_id)
+
+    async def delete_entities(self, entity_type, primary_keys):
+        for primary_key in primary_keys:
+            self.stored.pop((entity_type, primary_key), None)
+            self.writes.append(("delete", entity_type, primary_key))
+        await super().delete_entities(entity_type, primary_keys)
+
+
+@pytest.fixture
+def cluster(tmp_path):
+    cluster = FakeCluster()
+    cluster.apply("/api/v1/namespaces", "default")
+    for name in ("web", "api", "db"):
+        cluster.apply("/api/v1/services", name, "default", port=80)
+    cluster.apply("/apis/apps/v1/deployments", "web", "default", replicas=2)
+    configuration = kclient.Configuration()
+    configuration.host = cluster.url
+    cluster.dyn_client = DynamicClient(kclient.ApiClient(configuration), cache_file=str(tmp_path / "discovery.json"))
+    yield cluster
+    cluster.close()
+
+
+def key(*parts):
+    return PROP_DELIMITER.join(("test-cluster",) + parts)
+
+
+async def eventually(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+@pytest.fixture
+def connector():
+    return RecordingConnector()
+
+
+@pytest_asyncio.fixture
+async def watch_sync(cluster, connector):
+    resources = [resource for resource in list_resources(cluster.dyn_client) if resource.kind in ("Namespace", "Service", "Deployment")]
+    watch_sync = K8sWatchSync(connector, cluster.dyn_client, resources, to_entity=lambda resource, obj: k8s_entity(resource, obj, "test-cluster"),
+                              debounce=0.2, max_delay=1, watch_timeout=30, retry_delay=0.1)
+    task = asyncio.create_task(watch_sync.run())
+    yield watch_sync
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_watch_events_become_debounced_upserts_and_deletes(cluster, watch_sync):
+    connector = watch_sync.connector
+    await eventually(lambda: len(connector.upserts) == 5)
+    assert sorted(connector.upserted("K8sService")) == ["api", "db", "web"]
+    assert cluster.lists == 4 # namespaces, services (two pages), deployments, then only watches
+    deployment = next(entity for entity in connector.upserts if entity.entity_type == "K8sDeployment")
+    assert deployment.generate_primary_key() == key("default", "web")
+    assert deployment.all_properties["kind"] == "Deployment" and deployment.all_properties["spec.replicas"] == 2
+
+    # A burst of changes to one object is sent once, in its last state
+    connector.upserts.clear()
+    flushes = connector.flushes
+    for replicas in range(3, 13):
+        cluster.apply("/apis/apps/v1/deployments", "web", "default", replicas=replicas)
+    await eventually(lambda: connector.upserts)
+    await asyncio.sleep(0.3)
+    assert [entity.all_properties["spec.replicas"] for entity in connector.upserts] == [12]
+    assert connector.flushes == flushes + 1
+
+    # Deleted objects are deleted, an object deleted right after it was created is not sent at all
+    connector.upserts.clear()
+    cluster.delete("/api/v1/services", "db")
+    cluster.apply("/api/v1/services", "tmp", "default", port=81)
+    cluster.delete("/api/v1/services", "tmp")
+    await eventually(lambda: len(connector.deletes) == 2)
+    assert sorted(connector.deletes) == [("K8sService", key("default", "db")), ("K8sService", key("default", "tmp"))]
+    assert connector.upserts == []
+    assert cluster.lists == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("connector", [StoringConnector(delay=0.5)])
+async def test_delete_in_the_next_flush_is_stored_after_the_upsert(cluster, connector, watch_sync):
+    await eventually(lambda: len(connector.stored) == 5)
+    connector.writes.clear()
+
+    # The object is deleted while the flush sending it is still being stored, its delete goes in the next flush
+    cluster.apply("/api/v1/services", "tmp", "default", port=81)
+    await eventually(lambda: key("default", "tmp") in connector.sending)
+    cluster.delete("/api/v1/services", "tmp")
+    await eventually(lambda: len(connector.writes) == 2)
+    assert connector.writes == [("upsert", "K8sService", key("default", "tmp")), ("delete", "K8sService", key("default", "tmp"))]
+    assert ("K8sService", key("default", "tmp")) not in connector.stored
+
+
+@pytest.mark.asyncio
+async def test_stop_disconnects_the_watches(cluster, watch_sync):
+    await eventually(lambda: len(watch_sync._watchers) == 3)
+    started = time.monotonic()
+    watch_sync.stop()
+    # The watch threads end well before the watches' 30 seconds timeout, they would otherwise hold up the process exit
+    await eventually(lambda: not watch_sync._watchers, timeout=5)
+    await asyncio.to_thread(watch_sync._executor.shutdown, wait=True)
+    assert time.monotonic() - started < 5
+
+
+@pytest.mark.asyncio
+async def test_expired_watch_falls_back_to_relist(cluster, watch_sync):
+    connector = watch_sync.connector
+    await eventually(lambda: len(connector.upserts) == 5)
+    connector.upserts.clear()
+    lists = cluster.lists
+
+    # Changes missed while the watches were down, and the events that had them compacted away
+    cluster.disconnect(paused=True)
+    cluster.delete("/api/v1/services", "api")
+    cluster.apply("/api/v1/services", "cache", "default", port=6379)
+    cluster.compact()
+    cluster.disconnect()
+    await eventually(lambda: cluster.expired_watches >= 3 and connector.deletes)
+
+    # Each resource type is listed again, the missing object is deleted and the others are sent again
+    await eventually(lambda: sorted(connector.upserted("K8sService")) == ["cache", "db", "web"])
+    assert connector.deletes == [("K8sService", key("default", "api"))]
+    assert cluster.lists == lists + 4
+    assert watch_sync.relists == 6
+
+    # Then the new watches pick up the changes that follow
+    connector.upserts.clear()
+    cluster.apply("/api/v1/services", "queue", "default", port=5672)
+    await eventually(lambda: connector.upserted("K8sService") == ["queue"])
@@ -0,0 +1,179 @@
+# This file contains the batched ingestion of graph entities used by the RAG server
+import asyncio
+import traceback
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from langchain_milvus import Milvus
+
+from common import utils
+from common.graph_db.base import GraphDB
+from common.models.graph import Entity
+from common.models.rag import DocTypeGraphEntity, VectorDBGraphMetadata
+from server.models import EntityIngestOutcome, EntityIngestResult
+from server.query_service import quote_string
+
+logger = utils.get_logger(__name__)
+
+
+class GraphEntityIngestor:
+    """
+    Ingests graph entities into the vector store and the data graph, a batch at a time:
+    one bulk fetch of the stored hashes of the batch, then one vector store write of the entities
+    that are new or changed, and one data graph update of all of them (which also refreshes
+    fresh_until of the unchanged ones). Every entity gets an outcome, a failed one does not stop the rest.
+    """
+    def __init__(self, vector_db: VectorStore, graph_db: GraphDB, batch_size: int = 1000):
+        """
+        Args:
+            vector_db (VectorStore): The documents vector store, entities are stored with their hash.
+            graph_db (GraphDB): The data graph database.
+            batch_size (int): Number of entities fetched and written per round trip.
+        """
+        self.vector_db = vector_db
+        self.graph_db = graph_db
+        self.batch_size = batch_size
+
+    async def ingest(self, connector_name: str, entity_type: str, entities: List[Entity], fresh_until: int) -> EntityIngestResult:
+        """
+        Ingest entities of `entity_type` submitted by a connector.
+
+        Args:
+            connector_name (str): Name of the connector, also the datasource ID of the entity documents.
+            entity_type (str): Type of the entities, entities of another type fail.
+            entities (List[Entity]): The entities to create or update.
+            fresh_until (int): Fresh until timestamp of the entities in the data graph.
+        Returns:
+            EntityIngestResult: The outcome of each entity, in the order they were submitted.
+        """
+        outcomes: List[EntityIngestOutcome] = []
+        for start in range(0, len(entities), self.batch_size):
+            outcomes.extend(await self._ingest_batch(connector_name, entity_type, entities[start:start + self.batch_size], fresh_until))
+        return EntityIngestResult(connector_name=connector_name, entity_type=entity_type, outcomes=outcomes)
+
+    async def delete(self, connector_name: str, entity_type: str, primary_keys: List[str]):
+        """
+        Delete entities of `entity_type` that a connector reported as removed at the source,
+        from the vector store and (if the connector last updated them) from the data graph.
+
+        Args:
+            connector_name (str): Name of the connector.
+            entity_type (str): Type of the entities.
+            primary_keys (List[str]): Primary keys of the entities, unknown ones are ignored.
+        """
+        primary_keys = list(dict.fromkeys(primary_keys))
+        for start in range(0, len(primary_keys), self.batch_size):
+            batch = primary_keys[start:start + self.batch_size]
+            deletes = [self.graph_db.remove_entities(entity_type, batch, client_name=connector_name)]
+            if not (isinstance(self.vector_db, Milvus) and self.vector_db.col is None): # created with the first documents
+                deletes.append(self.vector_db.adelete(ids=batch))
+            await asyncio.gather(*deletes)
+
+    async def fetch_entity_hashes(self, ids: Sequence[str]) -> Dict[str, Optional[str]]:
+        """
+        Fetch the stored hash of the entities with these IDs, in one request.
+        IDs that are not stored are left out.
+        """
+        if not ids:
+            return {}
+        if isinstance(self.vector_db, Milvus):
+            if self.vector_db.col is None: # created with the first documents
+                return {}
+            # langchain's Milvus does not implement get_by_ids, and only the hash is needed
+            primary_field = self.vector_db._primary_field
+            rows = await self.vector_db.aclient.query(
+                self.vector_db.collection_name,
+                filter=f"{primary_field} in [{', '.join(quote_string(key) for key in ids)}]",
+                output_fields=[primary_field, "graph_entity_hash"],
+            )
+            return {row[primary_field]: row.get("graph_entity_hash") for row in rows}
+        return {doc.id or doc.metadata.get("id"): doc.metadata.get("graph_entity_hash") for doc in await self.vector_db.aget_by_ids(ids)}
+
+    async def _ingest_batch(self, connector_name: str, entity_type: str, entities: List[Entity], fresh_until: int) -> List[EntityIngestOutcome]:
+        outcomes: List[EntityIngestOutcome] = []
+        documents: Dict[str, Document] = {} # primary key -> entity document (the last submitted wins)
+        valid_entities: Dict[str, Entity] = {} # primary key -> entity (the last submitted wins, as for its document)
+        for entity in entities:
+            outcome = EntityIngestOutcome(entity_type=entity.entity_type, status="failed")
+            outcomes.append(outcome)
+            if entity.entity_type != entity_type:
+                outcome.error = f"Mismatched entity type: expected {entity_type}, got {entity.entity_type}"
+                continue
+            try:
+                primary_key = entity.generate_primary_key()
+                documents[primary_key] = self._entity_document(connector_name, entity, primary_key)
+            except Exception as e:
+                outcome.error = f"Invalid entity: {e!r}"
+                continue
+            outcome.primary_key = primary_key
+            valid_entities[primary_key] = entity
+        if not documents:
+            return outcomes
+
+        try:
+            stored_hashes = await self.fetch_entity_hashes(list(documents))
+            created = [key for key in documents if key not in stored_hashes]
+            updated = [key for key in documents if key in stored_hashes and stored_hashes[key] != documents[key].metadata["graph_entity_hash"]]
+        except Exception as e:
+            # Replace them all, as any of them may be stored
+            logger.warning(f"Could not fetch stored entities, rewriting all {len(documents)}: {e}")
+            created, updated = [], list(documents)
+
+        vector_result, graph_result = await asyncio.gather(
+            self._write_documents(created, updated, documents),
+            self.graph_db.update_entity(entity_type, list(valid_entities.values()), fresh_until=fresh_until, client_name=connector_name),
+            return_exceptions=True,
+        )
+        for name, result in (("vector store", vector_result), ("data graph", graph_result)):
+            if isinstance(result, BaseException):
+                logger.error("".join(traceback.format_exception(result)))
+                logger.error(f"Error writing {len(documents)} entities of type {entity_type} to the {name}: {result}")
+
+        created_keys, updated_keys = set(created), set(updated)
+        for outcome in outcomes:
+            if outcome.error:
+                continue
+            if isinstance(vector_result, BaseException) and (outcome.primary_key in created_keys or outcome.primary_key in updated_keys):
+                outcome.error = f"Error writing to the vector store: {vector_result}"
+            elif isinstance(graph_result, BaseException):
+                outcome.error = f"Error writing to the data graph: {graph_result}"
+            else:
+                outcome.status = "created" if outcome.primary_key in created_keys else "updated" if outcome.primary_key in updated_keys else "unchanged"
+        return outcomes
+
+    async def _write_documents(self, created: List[str], updated: List[str], documents: Dict[str, Document]):
+        """
+        Write the new and changed entity documents, replacing the stored documents of changed ones in place,
+        so a changed entity is never missing from the vector store (nor lost if the write fails)
+        """
+        ids = created + updated
+        if not ids:
+            return
+        batch = [documents[key] for key in ids]
+        if isinstance(self.vector_db, Milvus) and self.vector_db.col is not None:
+            # Milvus inserts do not replace rows with the same primary key, upserts do
+            await self.vector_db.aupsert(ids=ids, documents=batch)
+        else:
+            # Vector stores replace documents added with an existing ID (Milvus creates its collection here)
+            await self.vector_db.aadd_documents(batch, ids=ids)
+
+    @staticmethod
+    def _entity_document(connector_name: str, entity: Entity, primary_key: str) -> Document:
+        """The vector store document of an entity: its properties as JSON, and its hash for change detection"""
+        entity_properties = entity.get_external_properties()
+        entity_properties["entity_type"] = entity.entity_type
+        return Document(
+            page_content=utils.json_encode(entity_properties),
+            metadata=VectorDBGraphMetadata(
+                doc_type=DocTypeGraphEntity,
+                chunk_index=0,
+                total_chunks=1,
+                datasource_id=connector_name, # use connector_id as datasource_id
+                id=primary_key,
+                graph_entity_hash=entity.get_hash(),
+                graph_connector_id=connector_name,
+                graph_entity_type=entity.entity_type,
+                graph_entity_primary_key=primary_key
+            ).model_dump()
+        )
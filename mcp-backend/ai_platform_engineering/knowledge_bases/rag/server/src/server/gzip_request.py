@@ -0,0 +1,37 @@
+# This file contains the route class decompressing gzipped request bodies, as sent by graph connectors
+import zlib
+from typing import Callable
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+
+
+class GzipRequest(Request):
+    """Request whose body is decompressed if it was sent with Content-Encoding: gzip"""
+    max_body_size = 512 * 1024 * 1024 # decompressed
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                try:
+                    body = decompressor.decompress(body, self.max_body_size)
+                except zlib.error as e:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid gzip body: {e}")
+                if decompressor.unconsumed_tail:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                        detail=f"Request body larger than {self.max_body_size} bytes")
+            self._body = body
+        return self._body
+
+
+class GzipRoute(APIRoute):
+    """API route accepting gzipped request bodies"""
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def gzip_route_handler(request: Request) -> Response:
+            return await original_route_handler(GzipRequest(request.scope, request.receive))
+
+        return gzip_route_handler
@@ -1,20 +1,25 @@
+import asyncio
 import gc
+import time
 from common.models.rag import DocumentInfo
 from common import utils
 from server.loader.url.docsaurus_scraper import scrape_docsaurus
 from server.loader.url.mkdocs_scraper import scrape_mkdocs
+from server.loader.url import lxml_extractor
+from server.loader.url.sitemap_reader import SitemapEntry, SitemapReader
 import aiohttp
 from bs4 import BeautifulSoup
-import gzip
 import os
-from typing import List
+from typing import AsyncIterator, List, Optional, Set
 from aiofile import async_open
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from typing import Tuple, Dict, Any
 import uuid
 import datetime
+import hashlib
 from server.metadata_storage import MetadataStorage
+from server.loader.pipeline import ChunkTask, IngestionPipeline, PageTask, PipelineConfig
 from common.job_manager import JobManager, JobStatus
 from common.models.rag import DataSourceInfo, VectorDBTextMetadata, DocTypeText
 from common.utils import get_logger
@@ -24,7 +29,8 @@ from langchain_core.vectorstores import VectorStore
 from urllib.parse import urlparse
 
 class Loader:
-    def __init__(self, vstore: VectorStore, metadata_storage: MetadataStorage, datasourceinfo: DataSourceInfo, jobmanager: JobManager, max_concurrency: int):
+    def __init__(self, vstore: VectorStore, metadata_storage: MetadataStorage, datasourceinfo: DataSourceInfo, jobmanager: JobManager, max_concurrency: int,
+                 pipeline_config: Optional[PipelineConfig] = None):
         """
         Initialize the loader with the given vstore, logger, metadata storage, and datasource.
 
@@ -32,6 +38,8 @@ class Loader:
             vstore (VectorStore): The vector storage to use for storing documents.
             metadata_storage (MetadataStorage): The metadata storage to use for storing metadata.
             datasourceinfo (DataSourceInfo): The datasource configuration to use for loading documents.
+            max_concurrency (int): Maximum number of URLs fetched concurrently.
+            pipeline_config (PipelineConfig): Stage concurrency and batch sizes of the ingestion pipeline.
         """
         self.session = None
         self.vstore = vstore
@@ -42,17 +50,23 @@ class Loader:
         self.datasourceinfo = datasourceinfo
         self.jobmanager = jobmanager
         self.max_concurrency = max_concurrency
+        self.pipeline_config = pipeline_config or PipelineConfig()
+        self.pipeline: Optional[IngestionPipeline] = None # Set while load_url is running
+        self.site_generator: Optional[str] = None # <meta name="generator"> of the site, detected once per datasource
+        self.sitemap_lastmod: Dict[str, str] = {} # page URL -> <lastmod> from the sitemap, until the page is processed
+        # Sitemaps are streamed at the pace pages are ingested, so there is no total timeout; the read
+        # timeout is paused while the loader is not reading and only catches a stalled server
+        self.sitemap_timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=30)
+        self.sitemap_chunk_size = 64 * 1024
+        self.job_total_update_interval = 500 # URLs found between updates of the job total
+        self.stats = {"unchanged_urls": 0, "embedded_chunks": 0, "reused_chunks": 0, "removed_documents": 0}
 
         # Chrome user agent for better web scraping compatibility
         self.user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
-        # Initialize text splitter for chunking large documents
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", "? ", "! ", " ", ""]
-        )
+        # Text splitters are reused for every document with the same chunking config
+        self.text_splitters: Dict[Tuple[int, int], RecursiveCharacterTextSplitter] = {}
+        self.text_splitter = self.get_text_splitter(self.chunk_size, self.chunk_overlap)
 
     async def __aenter__(self):
         self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10), headers={"User-Agent": self.user_agent}) # 10 seconds timeout
@@ -66,23 +80,32 @@ class Loader:
         """Update chunking configuration and recreate text splitter"""
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", "? ", "! ", " ", ""]
-        )
+        self.text_splitter = self.get_text_splitter(chunk_size, chunk_overlap)
         self.logger.debug(f"Updated chunking config: size={chunk_size}, overlap={chunk_overlap}")
 
-    async def get_sitemaps(self, url: str) -> List[str]:
+    def get_text_splitter(self, chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+        """Return the text splitter for the given chunking config, creating it on first use"""
+        key = (chunk_size, chunk_overlap)
+        if key not in self.text_splitters:
+            self.text_splitters[key] = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=len,
+                separators=["\n\n", "\n", ". ", "? ", "! ", " ", ""]
+            )
+        return self.text_splitters[key]
+
+    async def get_sitemaps(self, url: str, errors: Optional[List[str]] = None) -> List[str]:
         """Return a list of sitemap URLs for the given site.
 
         Order of checks:
         1) robots.txt for one or more Sitemap: entries
         2) <given_url>/sitemap.xml (or the URL itself if it already ends with sitemap.xml)
         3) <scheme>://<netloc>/sitemap.xml
+
+        Checks that failed (request error or server error status), rather than finding nothing, are added to `errors`.
         """
+        errors = [] if errors is None else errors
         if self.session is None:
             raise Exception("Session is not initialized")
         sitemaps: List[str] = []
@@ -106,9 +129,12 @@ class Loader:
                                 sitemaps.append(sitemap_url)
                 else:
                     self.logger.debug(f"robots.txt not found or not accessible: {robots_url} (status {resp.status})")
+                    if resp.status >= 500:
+                        errors.append(f"{robots_url} could not be fetched: HTTP {resp.status}")
         except Exception as e:
             self.logger.error(traceback.format_exc())
             self.logger.debug(f"Error fetching robots.txt {robots_url}: {e}")
+            errors.append(f"{robots_url} could not be fetched: {type(e).__name__}: {e}")
 
         if sitemaps:
             self.logger.debug(f"Found sitemaps: {sitemaps}")
@@ -127,9 +153,12 @@ class Loader:
             async with self.session.get(candidate, allow_redirects=True) as resp:
                 if resp.status == 200:
                     sitemaps.append(str(resp.url))
+                elif resp.status >= 500:
+                    errors.append(f"{candidate} could not be fetched: HTTP {resp.status}")
         except Exception as e:
             self.logger.warning(traceback.format_exc())
             self.logger.debug(f"Error checking sitemap at {candidate}: {e}")
+            errors.append(f"{candidate} could not be fetched: {type(e).__name__}: {e}")
 
         if sitemaps:
             self.logger.debug(f"Found sitemaps: {sitemaps}")
@@ -142,9 +171,12 @@ class Loader:
             async with self.session.get(base_sitemap, allow_redirects=True) as resp:
                 if resp.status == 200:
                     sitemaps.append(str(resp.url))
+                elif resp.status >= 500:
+                    errors.append(f"{base_sitemap} could not be fetched: HTTP {resp.status}")
         except Exception as e:
             self.logger.warning(traceback.format_exc())
             self.logger.debug(f"Error checking base sitemap at {base_sitemap}: {e}")
+            errors.append(f"{base_sitemap} could not be fetched: {type(e).__name__}: {e}")
 
         if sitemaps:
             self.logger.debug(f"Found sitemaps: {sitemaps}")
@@ -208,7 +240,11 @@ class Loader:
     async def process_url(self, url: str, job_id: str):
         """
         Process a URL, fetching the document and splitting into chunks if necessary.
+
+        While load_url is running, the fetched page is handed to the ingestion pipeline,
+        which parses, splits, embeds and stores it and then updates the job.
         """
+        handed_off = False
         try:
             self.logger.info(f"Processing URL {url}")
             
@@ -217,21 +253,63 @@ class Loader:
                 self.logger.debug(f"Job {job_id} is terminated. Stopping processing of URL {url}.")
                 return
             
+            sitemap_lastmod = self.sitemap_lastmod.pop(url, None)
+
             # Sanitize URL
             url = utils.sanitize_url(url)
             self.logger.debug(f"Processing sanitized URL {url}")
             if self.session is None:
                 raise Exception("Session is not initialized")
-            
-            # Fetch the URL content
-            async with self.session.get(url, allow_redirects=True, max_redirects=10) as resp:
+
+            # Look up what was stored the last time this page was ingested
+            document_id = DocumentInfo.generate_id_from_url(self.datasourceinfo.datasource_id, url)
+            previous = await self.metadata_storage.get_document_info(document_id)
+            # A page can only be skipped if its chunks were produced with the current chunking config
+            reusable = previous is not None and self.is_same_chunking(previous)
+
+            if reusable and sitemap_lastmod and previous.sitemap_lastmod == sitemap_lastmod: # type: ignore
+                self.logger.debug(f"Skipping {url}: unchanged since {sitemap_lastmod} according to the sitemap")
+                self.stats["unchanged_urls"] += 1
+                return
+
+            # Fetch the URL content, conditionally if we have validators from the last fetch
+            headers = self.conditional_headers(previous) if reusable else {}
+            async with self.session.get(url, headers=headers, allow_redirects=True, max_redirects=10) as resp:
                 self.logger.debug(f"Received response: {resp.status} for URL: {url}")
+                if resp.status == 304 and reusable:
+                    self.logger.debug(f"Skipping {url}: not modified")
+                    self.stats["unchanged_urls"] += 1
+                    if sitemap_lastmod and previous.sitemap_lastmod != sitemap_lastmod: # type: ignore
+                        previous.sitemap_lastmod = sitemap_lastmod # type: ignore
+                        await self.metadata_storage.store_document_info(previous) # type: ignore
+                    return
                 resp.raise_for_status()
-                html_content = await resp.text()
-                soup = BeautifulSoup(html_content, 'html.parser')
-                content, metadata = await self.custom_parser(soup, url)
-                doc = Document(id=uuid.uuid4().hex, page_content=content, metadata=metadata)
-                await self.process_document(doc, self.datasourceinfo.default_chunk_size, self.datasourceinfo.default_chunk_overlap)
+                # Keep the raw bytes: the page is decoded by the HTML parser, not copied into a string first
+                content = await resp.read()
+                page = PageTask(url, job_id, content, resp.get_encoding(),
+                    previous=previous,
+                    etag=resp.headers.get("ETag"),
+                    last_modified=resp.headers.get("Last-Modified"),
+                    sitemap_lastmod=sitemap_lastmod,
+                )
+
+            if self.pipeline is not None:
+                # The pipeline reports the outcome of the page to the job once it is stored
+                await self.pipeline.submit(page)
+                handed_off = True
+                return
+
+            doc = await self.parse_page(page)
+            try:
+                await self.process_document(doc, self.datasourceinfo.default_chunk_size, self.datasourceinfo.default_chunk_overlap,
+                    previous=previous,
+                    etag=page.etag,
+                    last_modified=page.last_modified,
+                    sitemap_lastmod=page.sitemap_lastmod,
+                )
+            except Exception:
+                await self.invalidate_document(previous)
+                raise
         except aiohttp.TooManyRedirects as e:
             self.logger.error(f"TooManyRedirects error: {e}")
             # Print redirect history for debugging
@@ -253,21 +331,139 @@ class Loader:
                 errors=[f"Failed to process URL {url} : {type(e).__name__} {e} "]
             )
         finally:
-            await self.jobmanager.update_job(job_id,
-                message=f"Processed URL {url}",
+            if not handed_off:
+                await self.jobmanager.update_job(job_id,
+                    message=f"Processed URL {url}",
+                    processed_increment=1,
+                )
+                self.logger.debug(f"DONE Processing URL {url}")
+
+    async def parse_page(self, page: PageTask) -> Document:
+        """
+        Parse a fetched page into a Document with the lxml extractor, falling back to BeautifulSoup
+        (custom_parser) if lxml cannot parse it. Parsing runs in a worker thread to keep the event loop free for fetching.
+        """
+        try:
+            content, metadata = await asyncio.to_thread(self.extract_page, page)
+        except Exception as e:
+            self.logger.warning(f"Fast HTML extraction failed for {page.url}, falling back to BeautifulSoup: {e}")
+            html_content = page.content.decode(page.encoding or "utf-8", errors="replace")
+            soup = await asyncio.to_thread(BeautifulSoup, html_content, 'html.parser')
+            content, metadata = await self.custom_parser(soup, page.url)
+        return Document(id=uuid.uuid4().hex, page_content=content, metadata=metadata)
+
+    def extract_page(self, page: PageTask) -> Tuple[str, Dict[str, Any]]:
+        """Returns (content, metadata) of a fetched page, detecting the site generator on the first page that has one"""
+        root = lxml_extractor.parse_html(page.content, page.encoding)
+        if self.site_generator is None and root is not None:
+            self.site_generator = lxml_extractor.detect_generator(root)
+            if self.site_generator:
+                self.logger.info(f"Detected site generator: {self.site_generator}")
+        return lxml_extractor.extract(root, page.url, self.site_generator)
+
+    async def split_page(self, page: PageTask) -> List[ChunkTask]:
+        """Split a parsed page, returning the chunks that need (re-)embedding"""
+        page.document_info, chunks = await self.split_document(page.document, # type: ignore
+            self.datasourceinfo.default_chunk_size, self.datasourceinfo.default_chunk_overlap,
+            previous=page.previous,
+            etag=page.etag,
+            last_modified=page.last_modified,
+            sitemap_lastmod=page.sitemap_lastmod,
+        )
+        return [ChunkTask(page, chunk_id, chunk) for chunk_id, chunk in chunks]
+
+    async def finish_page(self, page: PageTask, error: Optional[Exception]):
+        """Store the document info of a page whose chunks are all written, or record its failure"""
+        try:
+            if error is None:
+                await self.metadata_storage.store_document_info(page.document_info) # type: ignore
+            else:
+                await self.invalidate_document(page.previous)
+                await self.jobmanager.update_job(page.job_id,
+                    message=f"Failed to process URL {page.url}",
+                    failed_increment=1,
+                    errors=[f"Failed to process URL {page.url} : {type(error).__name__} {error} "]
+                )
+        except Exception as e:
+            self.logger.error(traceback.format_exc())
+            self.logger.error(f"Failed to finish URL {page.url}: {e}")
+        finally:
+            await self.jobmanager.update_job(page.job_id,
+                message=f"Processed URL {page.url}",
                 processed_increment=1,
             )
-            self.logger.debug(f"DONE Processing URL {url}")
-
+            self.logger.debug(f"DONE Processing URL {page.url}")
 
-    async def process_document(self, doc: Document, chunk_size: int = 10000, chunk_overlap: int = 2000):
+    async def invalidate_document(self, previous: Optional[DocumentInfo]):
+        """
+        Forget the validators and hashes of a document whose update failed part way, so the
+        next crawl fetches and embeds it in full instead of trusting chunks that may be gone.
+        """
+        if previous is None:
+            return
+        await self.metadata_storage.store_document_info(previous.model_copy(update={
+            "etag": None, "last_modified": None, "sitemap_lastmod": None, "content_hash": None, "chunk_hashes": [],
+        }))
+
+
+    def is_same_chunking(self, document_info: DocumentInfo) -> bool:
+        """Whether a stored document was chunked with the datasource's current chunking config."""
+        return (document_info.chunk_size == self.datasourceinfo.default_chunk_size
+                and document_info.chunk_overlap == self.datasourceinfo.default_chunk_overlap)
+
+    @staticmethod
+    def conditional_headers(document_info: Optional[DocumentInfo]) -> Dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified for a previously fetched page."""
+        headers = {}
+        if document_info and document_info.etag:
+            headers["If-None-Match"] = document_info.etag
+        if document_info and document_info.last_modified:
+            headers["If-Modified-Since"] = document_info.last_modified
+        return headers
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """Hash of the content with whitespace normalized, so reflowed markup does not count as a change."""
+        return hashlib.sha256(" ".join(content.split()).encode()).hexdigest()
+
+    async def process_document(self, doc: Document, chunk_size: int = 10000, chunk_overlap: int = 2000,
+                               previous: Optional[DocumentInfo] = None,
+                               etag: Optional[str] = None,
+                               last_modified: Optional[str] = None,
+                               sitemap_lastmod: Optional[str] = None):
         """
         Process a document, splitting into chunks if necessary, with proper ID management.
+
+        If `previous` (the stored info from the last ingest of the same document) is given,
+        only chunks whose content changed are re-embedded, and chunks that no longer exist
+        are deleted from the vector store.
         """
         if not self.datasourceinfo:
             self.logger.error("No sourceinfo set for document processing")
             return
 
+        document_info, chunks = await self.split_document(doc, chunk_size, chunk_overlap, previous, etag, last_modified, sitemap_lastmod)
+
+        # Add chunks to vector store
+        if chunks:
+            self.logger.debug(f"Adding {len(chunks)} of {document_info.chunk_count} document chunks to vector store")
+            await self.vstore.aadd_documents([chunk for _, chunk in chunks], ids=[chunk_id for chunk_id, _ in chunks])
+            self.stats["embedded_chunks"] += len(chunks)
+
+        # Store document info in Redis
+        await self.metadata_storage.store_document_info(document_info)
+
+    async def split_document(self, doc: Document, chunk_size: int, chunk_overlap: int,
+                             previous: Optional[DocumentInfo] = None,
+                             etag: Optional[str] = None,
+                             last_modified: Optional[str] = None,
+                             sitemap_lastmod: Optional[str] = None) -> Tuple[DocumentInfo, List[Tuple[str, Document]]]:
+        """
+        Split a document into chunks and delete its outdated chunks from the vector store.
+
+        Returns the document info to store once the chunks are written, and the (chunk ID, chunk)
+        pairs that need (re-)embedding.
+        """
         source = doc.metadata.get("source", "<unknown>")
         content = doc.page_content
 
@@ -290,24 +486,30 @@ class Loader:
             chunk_overlap=chunk_overlap,
             chunk_count=0,
             created_at=current_time,
-            metadata=doc.metadata
+            metadata=doc.metadata,
+            etag=etag,
+            last_modified=last_modified,
+            sitemap_lastmod=sitemap_lastmod,
+            content_hash=self.content_hash(content),
         )
 
+        same_chunking = previous is not None and previous.chunk_size == chunk_size and previous.chunk_overlap == chunk_overlap
+        if same_chunking and previous.content_hash == document_info.content_hash: # type: ignore
+            # Content is unchanged; keep the stored chunks and only refresh the fetch metadata
+            self.logger.debug(f"Content unchanged, skipping embedding: {source}")
+            document_info.chunk_count = previous.chunk_count # type: ignore
+            document_info.chunk_hashes = previous.chunk_hashes # type: ignore
+            self.stats["unchanged_urls"] += 1
+            self.stats["reused_chunks"] += previous.chunk_count # type: ignore
+            return document_info, []
+
         chunks: List[Document] = []
         chunk_ids: List[str] = []
         
         # Check if document needs chunking
         if len(content) > chunk_size:
             self.logger.debug("Document exceeds chunk size, splitting into chunks using RecursiveCharacterTextSplitter")
-            # Create document-specific text splitter
-            document_text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap,
-                length_function=len,
-                separators=["\n\n", "\n", ". ", "? ", "! ", " ", ""]
-            )
-            
-            doc_chunks = document_text_splitter.split_documents([doc])
+            doc_chunks = self.get_text_splitter(chunk_size, chunk_overlap).split_documents([doc])
             document_info.chunk_count = len(doc_chunks)
 
             self.logger.debug(f"Split document into {len(doc_chunks)} chunks for: {document_id}")
@@ -345,75 +547,197 @@ class Loader:
 
             chunk_ids.append(chunk_id)
             chunks.append(doc)
-        
-        # Add chunks to vector store
-        self.logger.debug(f"Adding {len(chunks)} document chunks to vector store")
-        await self.vstore.aadd_documents(chunks, ids=chunk_ids)
-        
-        # Store document info in Redis
-        await self.metadata_storage.store_document_info(document_info)
+
+        document_info.chunk_hashes = [self.content_hash(chunk.page_content) for chunk in chunks]
+
+        # Work out which chunks need (re-)embedding and which stored chunks must go
+        changed = list(range(len(chunks)))
+        stale_ids: List[str] = []
+        if previous is not None:
+            if same_chunking:
+                old_hashes = previous.chunk_hashes
+                changed = [i for i, h in enumerate(document_info.chunk_hashes) if i >= len(old_hashes) or old_hashes[i] != h]
+            # Chunks being replaced are deleted first, so the vector store never holds two copies of an ID
+            stale_ids = [chunk_ids[i] for i in changed if i < previous.chunk_count]
+            stale_ids += [f"{document_id}_chunk_{i}" for i in range(len(chunks), previous.chunk_count)]
+            self.stats["reused_chunks"] += len(chunks) - len(changed)
+
+        if stale_ids:
+            self.logger.debug(f"Deleting {len(stale_ids)} outdated chunks of {document_id}")
+            await self.vstore.adelete(ids=stale_ids)
+
+        return document_info, [(chunk_ids[i], chunks[i]) for i in changed]
 
     async def get_urls_from_sitemap(self, sitemap_url: str) -> List[str]:
         """
-        Fetch a sitemap (or sitemap index) and return a list of page URLs using BeautifulSoup.
-        Supports .xml and .xml.gz. Recurses into sitemap indexes. Namespace-safe.
+        Fetch a sitemap (or sitemap index) and return its page URLs, deduplicated, in order.
+        Reads the whole sitemap; load_url streams it with iter_sitemap_urls instead.
+        """
+        urls: List[str] = []
+        seen: Set[str] = set()
+        async for entry in self.iter_sitemap_urls(sitemap_url):
+            if entry.loc in seen:
+                continue
+            seen.add(entry.loc)
+            urls.append(entry.loc)
+            if entry.lastmod:
+                self.sitemap_lastmod[entry.loc] = entry.lastmod
+        return urls
+
+    async def iter_sitemap_urls(self, sitemap_url: str, seen_sitemaps: Optional[Set[str]] = None,
+                                failed: Optional[List[str]] = None) -> AsyncIterator[SitemapEntry]:
+        """
+        Stream the page entries (URL and <lastmod>) of a sitemap or sitemap index as they are read.
+        Supports .xml and .xml.gz. Recurses into sitemap indexes once the index itself is read. Namespace-safe.
+        Stopping the iteration closes the sitemap being read and fetches no further ones.
+        Sitemaps that could not be fetched or read to the end are added to `failed`.
         """
         if self.session is None:
             raise Exception("Session is not initialized")
+        seen_sitemaps = set() if seen_sitemaps is None else seen_sitemaps
+        failed = [] if failed is None else failed
+        if sitemap_url in seen_sitemaps: # Indexes listing themselves (or each other)
+            return
+        seen_sitemaps.add(sitemap_url)
+
         self.logger.info(f"Fetching sitemap: {sitemap_url}")
-        async with self.session.get(sitemap_url, allow_redirects=True) as resp:
-            if resp.status != 200:
-                self.logger.warning(f"Failed to fetch sitemap {sitemap_url}: HTTP {resp.status}")
-                return []
-
-            raw = await resp.read()
-            content_type = resp.headers.get("Content-Type", "").lower()
-            if sitemap_url.endswith(".gz") or "gzip" in content_type:
-                try:
-                    xml_bytes = gzip.decompress(raw)
-                except Exception:
-                    self.logger.warning(traceback.format_exc())
-                    self.logger.warning(f"Failed to decompress sitemap {sitemap_url}, using raw content")
-                    # Some servers send gzip content without actual compression
-                    xml_bytes = raw
-            else:
-                xml_bytes = raw
-
-        # Parse XML via BeautifulSoup with XML parser
-        soup = BeautifulSoup(xml_bytes, "xml")
-
-        # Determine if this is a sitemap index
-        root = soup.find(True)  # first tag
-        root_name = root.name.lower() if root else "" # type: ignore
-
-        def find_all_locs(s: BeautifulSoup) -> List[str]:
-            locs: List[str] = []
-            for tag in s.find_all(lambda t: isinstance(t.name, str) and t.name.lower().endswith("loc")):
-                text = tag.get_text(strip=True)
-                if text:
-                    locs.append(text)
-            return locs
-
-        if root_name.endswith("sitemapindex"):
-            # Recurse into child sitemaps
-            child_sitemaps = find_all_locs(soup)
-            self.logger.info(f"Found {len(child_sitemaps)} child sitemaps in index")
-            urls: List[str] = []
-            for child in child_sitemaps:
-                urls.extend(await self.get_urls_from_sitemap(child))
-            # Deduplicate preserving order
-            seen = set()
-            deduped: List[str] = []
-            for u in urls:
-                if u not in seen:
-                    deduped.append(u)
-                    seen.add(u)
-            return deduped
+        child_sitemaps: List[str] = []
+        url_count = 0
+        try:
+            async with self.session.get(sitemap_url, allow_redirects=True, timeout=self.sitemap_timeout) as resp:
+                if resp.status != 200:
+                    self.logger.warning(f"Failed to fetch sitemap {sitemap_url}: HTTP {resp.status}")
+                    failed.append(sitemap_url)
+                    return
+
+                content_type = resp.headers.get("Content-Type", "").lower()
+                reader = SitemapReader(gzipped=sitemap_url.endswith(".gz") or "gzip" in content_type)
+                async for chunk in resp.content.iter_chunked(self.sitemap_chunk_size):
+                    for entry in reader.feed(chunk):
+                        if entry.is_sitemap:
+                            child_sitemaps.append(entry.loc)
+                        else:
+                            url_count += 1
+                            yield entry
+                for entry in reader.close():
+                    if entry.is_sitemap:
+                        child_sitemaps.append(entry.loc)
+                    else:
+                        url_count += 1
+                        yield entry
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Keep what was read so far; one broken sitemap should not fail the whole datasource
+            self.logger.warning(f"Failed to read sitemap {sitemap_url}: {type(e).__name__}: {e}")
+            failed.append(sitemap_url)
+
+        if child_sitemaps:
+            self.logger.info(f"Found {len(child_sitemaps)} child sitemaps in index {sitemap_url}")
         else:
-            # Regular urlset sitemap
-            urls = find_all_locs(soup)
-            self.logger.info(f"Extracted {len(urls)} URLs from sitemap")
-            return urls
+            self.logger.info(f"Extracted {url_count} URLs from sitemap {sitemap_url}")
+        for child in child_sitemaps:
+            async for entry in self.iter_sitemap_urls(child, seen_sitemaps, failed):
+                yield entry
+
+    async def discover_urls(self, url: str, sitemaps: List[str], job_id: str, sitemap_max_urls: int, seen: Set[int],
+                            incomplete: Optional[List[str]] = None, failed_sitemaps: Optional[List[str]] = None) -> AsyncIterator[str]:
+        """
+        Stream the page URLs to ingest: those of the sitemaps as they are read (or `url` itself if there are none),
+        deduplicated, up to sitemap_max_urls (0 for no limit). The document key of each URL is added to `seen`,
+        and the job total follows the number of URLs found. The reasons discovery did not cover all of the
+        sitemaps (sitemap failed, limit reached, job terminated) are added to `incomplete`, and the sitemaps
+        that could not be read to the end to `failed_sitemaps`.
+        """
+        incomplete = [] if incomplete is None else incomplete
+        failed_sitemaps = [] if failed_sitemaps is None else failed_sitemaps
+        if not sitemaps:
+            self.logger.info(f"No sitemaps, processing the URL directly: {url}")
+            seen.add(self.document_key(url))
+            await self.jobmanager.update_job(job_id, message="Found 1 URL to process", total=1)
+            yield url
+            return
+
+        limit_reached = False
+        for sitemap_url in sitemaps:
+            self.logger.info(f"Loading sitemap: {sitemap_url}")
+            await self.jobmanager.update_job(job_id,
+                message=f"Getting URLs from sitemap: {sitemap_url}..."
+            )
+            entries = self.iter_sitemap_urls(sitemap_url, failed=failed_sitemaps)
+            try:
+                async for entry in entries:
+                    key = self.document_key(entry.loc)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    if entry.lastmod:
+                        self.sitemap_lastmod[entry.loc] = entry.lastmod
+                    if len(seen) % self.job_total_update_interval == 0:
+                        if await self.jobmanager.is_job_terminated(job_id):
+                            self.logger.info(f"Job {job_id} is terminated. Stopping reading sitemaps.")
+                            incomplete.append("job terminated")
+                            return
+                        await self.jobmanager.update_job(job_id, message=f"Found {len(seen)} URLs so far...", total=len(seen))
+                    yield entry.loc
+
+                    # Respect maximum URLs limit if set
+                    if sitemap_max_urls > 0 and len(seen) >= sitemap_max_urls:
+                        self.logger.info(f"Reached maximum URLs limit from sitemap: {sitemap_max_urls}")
+                        incomplete.append(f"limit of {sitemap_max_urls} URLs reached")
+                        limit_reached = True
+                        break
+            finally:
+                await entries.aclose() # Closes the sitemap response if the iteration stopped early
+            if limit_reached:
+                break
+        incomplete.extend(f"sitemap {sitemap_url} could not be read" for sitemap_url in failed_sitemaps)
+
+        await self.jobmanager.update_job(job_id, message=f"Found {len(seen)} URLs to process", total=len(seen))
+
+    def document_key(self, url: str) -> int:
+        """
+        Compact key of the document a page URL is stored as: the URL hash of its document ID, as an int.
+        Used to dedupe URLs and to find vanished documents without keeping every URL in memory.
+        """
+        try:
+            url = utils.sanitize_url(url)
+        except ValueError:
+            pass # Such URLs fail in process_url; they still count as found
+        document_id = DocumentInfo.generate_id_from_url(self.datasourceinfo.datasource_id, url)
+        return int(document_id.rpartition("_")[2], 16)
+
+    async def has_documents_besides(self, url: str) -> bool:
+        """Whether this datasource has documents (generated from a URL) other than the document of `url`"""
+        key = self.document_key(url)
+        for document_id in await self.metadata_storage.fetch_document_ids(self.datasourceinfo.datasource_id):
+            try:
+                if int(document_id.rpartition("_")[2], 16) != key:
+                    return True
+            except ValueError:
+                continue
+        return False
+
+    async def remove_vanished_documents(self, current_keys: Set[int]):
+        """
+        Delete the documents of this datasource, and their chunks in the vector store,
+        whose document key is not in `current_keys` (e.g. pages removed from the sitemap).
+        """
+        if not current_keys:
+            # Nothing was found (e.g. the sitemap could not be fetched); never treat that as "everything vanished"
+            return
+        datasource_id = self.datasourceinfo.datasource_id
+        for document_id in await self.metadata_storage.fetch_document_ids(datasource_id):
+            try:
+                if int(document_id.rpartition("_")[2], 16) in current_keys:
+                    continue
+            except ValueError:
+                continue # Not a document ID generated from a URL; leave it alone
+            document_info = await self.metadata_storage.get_document_info(document_id)
+            chunk_count = document_info.chunk_count if document_info else 0
+            self.logger.info(f"Removing vanished document {document_id} ({document_info.path if document_info else 'unknown path'})")
+            if chunk_count:
+                await self.vstore.adelete(ids=[f"{document_id}_chunk_{i}" for i in range(chunk_count)])
+            await self.metadata_storage.delete_document_info(datasource_id, document_id)
+            self.stats["removed_documents"] += 1
 
     async def load_url(self, url: str, job_id: str, check_for_site_map: bool = False, sitemap_max_urls: int = 0):
         """
@@ -427,7 +751,8 @@ class Loader:
             message="Loading URL..."
         )
         try:
-            urls = [] # URLs to process
+            incomplete: List[str] = [] # Why URL discovery did not cover the whole source, if it did not
+            discovery_errors: List[str] = [] # The failures among them, reported in the job errors
             if check_for_site_map:
                 # Check if the URL has sitemap
                 await self.jobmanager.update_job(job_id,
@@ -435,42 +760,56 @@ class Loader:
                     message="Checking for sitemaps..."
                 )
                 self.logger.info(f"Checking for sitemaps at: {url}")
-                sitemaps = await self.get_sitemaps(url)
+                sitemap_errors: List[str] = []
+                sitemaps = await self.get_sitemaps(url, sitemap_errors)
                 self.logger.debug(f"Found {len(sitemaps)} sitemaps")
+                # Without its sitemaps, only the URL itself is found: unless that is all the datasource ever had,
+                # its other documents must not be taken as vanished
+                if (sitemap_errors or not sitemaps) and await self.has_documents_besides(url):
+                    discovery_errors.extend(sitemap_errors or [f"No sitemap found at {url}, only the URL itself was crawled"])
+                    incomplete.extend(sitemap_errors or ["no sitemap found"])
                 
             else:
                 self.logger.info("Skipping sitemap check as per request")
                 sitemaps = []
 
-            if not sitemaps: # If no sitemaps found, process the URL directly
-                self.logger.info(f"No sitemaps, processing the URL directly: {url}")
-                urls = [url]
-            else: # If sitemaps found, get URLs from sitemaps
-                # Load documents from URLs with streaming processing
-                for sitemap_url in sitemaps:
-                    self.logger.info(f"Loading sitemap: {sitemap_url}")
-                    await self.jobmanager.update_job(job_id,
-                        message=f"Getting URLs from sitemap: {sitemap_url}..."
-                    )
-                    urls.extend(await self.get_urls_from_sitemap(sitemap_url))
-
-                    # Respect maximum URLs limit if set
-                    if sitemap_max_urls > 0 and len(urls) >= sitemap_max_urls:
-                        self.logger.info(f"Reached maximum URLs limit from sitemap: {sitemap_max_urls}")
-                        urls = urls[:sitemap_max_urls]
-                        break
-            
             await self.jobmanager.update_job(job_id,
-                message=f"Found {len(urls)} URLs to process",
                 processed_counter=0,
                 failed_counter=0,
-                total=len(urls))
-            
-            # Process URLs concurrently with max concurrency (to avoid overloading the system and memory)
-            self.logger.info(f"Processing {len(urls)} URLs with max concurrency {self.max_concurrency}")
-            tasks = [self.process_url(url, job_id) for url in urls]
+                total=0)
+
+            # URLs are processed as they are read from the sitemaps, with max concurrency (to avoid overloading
+            # the system and memory); sitemaps are only read as fast as tasks free up. Fetched pages are handed
+            # to the ingestion pipeline for parsing, chunking, embedding and storage
+            self.logger.info(f"Processing URLs with max concurrency {self.max_concurrency}")
+            seen: Set[int] = set() # Document keys of the URLs found
+            failed_sitemaps: List[str] = []
+            started = time.perf_counter()
+            tasks = (self.process_url(page_url, job_id)
+                     async for page_url in self.discover_urls(url, sitemaps, job_id, sitemap_max_urls, seen, incomplete, failed_sitemaps))
             scheduler = TaskScheduler(max_parallel_tasks=self.max_concurrency)
-            await scheduler.run(tasks) # Run tasks concurrently # type: ignore
+            if self.pipeline_config.enabled:
+                async with IngestionPipeline(self.vstore, self.pipeline_config, self.parse_page, self.split_page, self.finish_page, self.logger) as pipeline:
+                    self.pipeline = pipeline
+                    try:
+                        await scheduler.run_stream(tasks) # Run tasks concurrently # type: ignore
+                    finally:
+                        self.pipeline = None
+                self.stats["embedded_chunks"] += pipeline.embedded_chunks
+            else:
+                await scheduler.run_stream(tasks) # Run tasks concurrently # type: ignore
+            elapsed = time.perf_counter() - started
+            self.sitemap_lastmod.clear() # Entries of URLs that were never processed (e.g. terminated job)
+            discovery_errors.extend(f"Sitemap {sitemap_url} could not be read, the URLs after the error were not crawled"
+                                    for sitemap_url in failed_sitemaps)
+
+            # Drop pages that are no longer part of the source, only after a pass that found all of its URLs
+            if incomplete:
+                self.logger.info(f"Keeping documents not found in this pass, URL discovery was incomplete: {'; '.join(incomplete)}")
+            elif not await self.jobmanager.is_job_terminated(job_id):
+                await self.remove_vanished_documents(seen)
+            self.logger.info(f"Ingestion stats: {self.stats}, {len(seen)} URLs in {elapsed:.1f}s "
+                             f"({len(seen) / max(elapsed, 1e-9):.1f} pages/s, {self.stats['embedded_chunks'] / max(elapsed, 1e-9):.1f} chunks/s)")
 
             # Invoke garbage collection to free up memory
             gc.collect()
@@ -502,12 +841,18 @@ class Loader:
             elif job_info.failed_counter == job_info.total:
                 await self.jobmanager.update_job(job_id,
                     status=JobStatus.FAILED,
+                    errors=discovery_errors,
                     message=f"All {job_info.total} URLs failed to process",
                 )
-            elif job_info.failed_counter > 0:
+            elif job_info.failed_counter > 0 or discovery_errors:
+                # A sitemap that failed leaves the datasource partly crawled, even if every URL found was processed
+                message = f"Processed {job_info.processed_counter} URLs with {job_info.failed_counter} failures"
+                if discovery_errors:
+                    message += f", URL discovery was incomplete ({len(discovery_errors)} errors)"
                 await self.jobmanager.update_job(job_id,
                     status=JobStatus.COMPLETED_WITH_ERRORS,
-                    message=f"Processed {job_info.processed_counter} URLs with {job_info.failed_counter} failures",
+                    errors=discovery_errors,
+                    message=message,
                 )
             else:
                 await self.jobmanager.update_job(job_id,
@@ -0,0 +1,234 @@
+# This file contains the staged ingestion pipeline used by the Loader
+import asyncio
+import traceback
+from typing import Any, Awaitable, Callable, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from pydantic import BaseModel, Field
+
+from common.models.rag import DocumentInfo
+from common.utils import get_logger
+
+
+class PipelineConfig(BaseModel):
+    enabled: bool = Field(True, description="Whether to use the staged pipeline, otherwise each page is embedded on its own")
+    parse_concurrency: int = Field(4, description="Number of pages parsed concurrently", ge=1)
+    split_concurrency: int = Field(4, description="Number of documents split into chunks concurrently", ge=1)
+    embed_concurrency: int = Field(4, description="Number of embedding requests in flight", ge=1)
+    embed_batch_size: int = Field(64, description="Number of chunks per embedding request", ge=1)
+    upsert_concurrency: int = Field(2, description="Number of vector store writes in flight", ge=1)
+    upsert_batch_size: int = Field(256, description="Number of chunks per vector store write", ge=1)
+    queue_size: int = Field(64, description="Capacity of the queue in front of each stage", ge=1)
+    flush_interval: float = Field(0.05, description="Seconds to wait for more chunks before sending a partial batch", gt=0)
+
+
+class PageTask:
+    """A fetched page, and what is known about it, as it moves through the pipeline."""
+
+    def __init__(self, url: str, job_id: str, content: bytes,
+                 encoding: Optional[str] = None,
+                 previous: Optional[DocumentInfo] = None,
+                 etag: Optional[str] = None,
+                 last_modified: Optional[str] = None,
+                 sitemap_lastmod: Optional[str] = None):
+        self.url = url
+        self.job_id = job_id
+        self.content = content # Raw response body
+        self.encoding = encoding # Charset the response was served with
+        self.previous = previous
+        self.etag = etag
+        self.last_modified = last_modified
+        self.sitemap_lastmod = sitemap_lastmod
+        self.document: Optional[Document] = None
+        self.document_info: Optional[DocumentInfo] = None
+        self.pending_chunks = 0
+        self.done = False
+
+
+class ChunkTask:
+    """A chunk of a page that needs to be embedded and written to the vector store."""
+
+    def __init__(self, page: PageTask, chunk_id: str, document: Document):
+        self.page = page
+        self.chunk_id = chunk_id
+        self.document = document
+        self.embedding: Optional[Any] = None
+
+
+_CLOSE = object() # Queue sentinel, one per worker of the next stage
+
+
+class IngestionPipeline:
+    """
+    Staged ingestion of fetched pages: parse -> split -> embed -> upsert.
+
+    Stages are connected by bounded queues, so a slow embedding model or vector store
+    back-pressures the fetchers instead of buffering pages in memory. Chunks from many pages
+    are packed into fixed-size embedding batches, and vector store writes are grouped.
+
+    Embedding and upserting are separate stages when the vector store can add precomputed
+    embeddings (`add_embeddings`, e.g. Milvus). Otherwise the embed stage only batches, and
+    chunks are embedded by `aadd_documents` in the upsert stage.
+    """
+
+    def __init__(self, vstore: VectorStore, config: PipelineConfig,
+                 parse: Callable[[PageTask], Awaitable[Document]],
+                 split: Callable[[PageTask], Awaitable[List[ChunkTask]]],
+                 finish: Callable[[PageTask, Optional[Exception]], Awaitable[None]],
+                 logger=None):
+        """
+        Args:
+            vstore (VectorStore): The vector store chunks are written to.
+            config (PipelineConfig): Concurrency and batch sizes of each stage.
+            parse: Turns a fetched page into a Document (sets `page.document`).
+            split: Returns the chunks of a parsed page that need (re-)embedding.
+            finish: Called once per page when all its chunks are written, or it failed.
+        """
+        self.vstore = vstore
+        self.config = config
+        self.parse = parse
+        self.split = split
+        self.finish = finish
+        self.logger = logger or get_logger("ingestion_pipeline")
+        self.precompute_embeddings = hasattr(vstore, "add_embeddings") and vstore.embeddings is not None
+        self.parse_queue: asyncio.Queue = asyncio.Queue(config.queue_size)
+        self.split_queue: asyncio.Queue = asyncio.Queue(config.queue_size)
+        self.embed_queue: asyncio.Queue = asyncio.Queue(config.queue_size * config.embed_batch_size)
+        self.upsert_queue: asyncio.Queue = asyncio.Queue(config.queue_size)
+        self.stages: List[List[asyncio.Task]] = []
+        self.embedded_chunks = 0
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.join()
+
+    def start(self):
+        """Start the workers of every stage."""
+        stages = [
+            (self.parse_worker, self.parse_queue, self.config.parse_concurrency),
+            (self.split_worker, self.split_queue, self.config.split_concurrency),
+            (self.embed_worker, self.embed_queue, self.config.embed_concurrency),
+            (self.upsert_worker, self.upsert_queue, self.config.upsert_concurrency),
+        ]
+        self.stages = [[asyncio.create_task(worker(queue)) for _ in range(count)] for worker, queue, count in stages]
+
+    async def submit(self, page: PageTask):
+        """Queue a fetched page. Waits while the pipeline is full."""
+        await self.parse_queue.put(page)
+
+    async def join(self):
+        """Wait until every submitted page is finished, then stop the workers, one stage at a time."""
+        queues = [self.parse_queue, self.split_queue, self.embed_queue, self.upsert_queue]
+        for queue, workers in zip(queues, self.stages):
+            for _ in workers:
+                await queue.put(_CLOSE)
+            await asyncio.gather(*workers)
+        self.stages = []
+
+    async def fail(self, page: PageTask, error: Exception):
+        if page.done:
+            return
+        page.done = True
+        self.logger.error(f"Failed to process {page.url}: {type(error).__name__} {error}")
+        await self.finish(page, error)
+
+    async def parse_worker(self, queue: asyncio.Queue):
+        while (page := await queue.get()) is not _CLOSE:
+            try:
+                page.document = await self.parse(page)
+                page.content = b"" # Free the raw HTML as early as possible
+                await self.split_queue.put(page)
+            except Exception as e:
+                self.logger.debug(traceback.format_exc())
+                await self.fail(page, e)
+
+    async def split_worker(self, queue: asyncio.Queue):
+        while (page := await queue.get()) is not _CLOSE:
+            try:
+                chunks = await self.split(page)
+                if not chunks:
+                    page.done = True
+                    await self.finish(page, None)
+                    continue
+                page.pending_chunks = len(chunks)
+                for chunk in chunks:
+                    await self.embed_queue.put(chunk)
+            except Exception as e:
+                self.logger.debug(traceback.format_exc())
+                await self.fail(page, e)
+
+    async def next_batch(self, queue: asyncio.Queue, size: int, count=len):
+        """
+        Collect items from the queue until `size` is reached, the queue stays empty for
+        `flush_interval`, or the stage is closed. Returns (batch, closed).
+        """
+        batch: List[Any] = []
+        item = await queue.get()
+        while item is not _CLOSE:
+            batch.append(item)
+            if count(batch) >= size:
+                return batch, False
+            try:
+                item = await asyncio.wait_for(queue.get(), self.config.flush_interval)
+            except asyncio.TimeoutError:
+                return batch, False
+        return batch, True
+
+    async def embed_worker(self, queue: asyncio.Queue):
+        closed = False
+        while not closed:
+            batch, closed = await self.next_batch(queue, self.config.embed_batch_size)
+            batch = [chunk for chunk in batch if not chunk.page.done]
+            if not batch:
+                continue
+            if self.precompute_embeddings:
+                try:
+                    embeddings = await self.vstore.embeddings.aembed_documents([chunk.document.page_content for chunk in batch]) # type: ignore
+                    for chunk, embedding in zip(batch, embeddings):
+                        chunk.embedding = embedding
+                except Exception as e:
+                    self.logger.debug(traceback.format_exc())
+                    for chunk in batch:
+                        await self.fail(chunk.page, e)
+                    continue
+            await self.upsert_queue.put(batch)
+
+    async def upsert_worker(self, queue: asyncio.Queue):
+        closed = False
+        while not closed:
+            batches, closed = await self.next_batch(queue, self.config.upsert_batch_size,
+                                                    count=lambda batches: sum(len(batch) for batch in batches))
+            chunks = [chunk for batch in batches for chunk in batch if not chunk.page.done]
+            if not chunks:
+                continue
+            try:
+                await self.upsert(chunks)
+            except Exception as e:
+                self.logger.debug(traceback.format_exc())
+                for chunk in chunks:
+                    await self.fail(chunk.page, e)
+                continue
+            self.embedded_chunks += len(chunks)
+            for chunk in chunks:
+                page = chunk.page
+                page.pending_chunks -= 1
+                if page.pending_chunks == 0 and not page.done:
+                    page.done = True
+                    await self.finish(page, None)
+
+    async def upsert(self, chunks: List[ChunkTask]):
+        ids = [chunk.chunk_id for chunk in chunks]
+        if self.precompute_embeddings:
+            await asyncio.to_thread(
+                self.vstore.add_embeddings, # type: ignore
+                texts=[chunk.document.page_content for chunk in chunks],
+                embeddings=[chunk.embedding for chunk in chunks],
+                metadatas=[chunk.document.metadata for chunk in chunks],
+                ids=ids,
+            )
+        else:
+            await self.vstore.aadd_documents([chunk.document for chunk in chunks], ids=ids)
@@ -0,0 +1,84 @@
+"""
+Fast text extraction from HTML pages with lxml.
+
+Produces the same (content, metadata) as Loader.custom_parser with scrape_docsaurus /
+scrape_mkdocs over BeautifulSoup's html.parser, in a fraction of the time:
+
+- the page is parsed once, straight from the response bytes, so it is never held
+  as a decoded string and a tree at the same time
+- text is collected by a single XPath pass (in C) that also drops boilerplate
+  (script/style/template always, nav/header for sites without a known generator)
+
+Known differences from BeautifulSoup: CDATA sections are dropped, and unterminated
+entity references (e.g. "&foo;") are kept verbatim.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+import lxml.html
+from lxml import etree
+
+# Strings BeautifulSoup's get_text() skips: their text is Script/Stylesheet/TemplateString, not NavigableString
+_NOT_TEXT = "ancestor::script or ancestor::style or ancestor::template"
+
+_TEXT = etree.XPath(f".//text()[not({_NOT_TEXT})]")
+_TEXT_WITHOUT_BOILERPLATE = etree.XPath(f".//text()[not({_NOT_TEXT} or ancestor::nav or ancestor::header)]")
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_GENERATOR = etree.XPath("//meta[@name='generator']")
+_DESCRIPTION = etree.XPath("//meta[@name='description']")
+_TITLE = etree.XPath("//title")
+_ARTICLE = etree.XPath("//article")
+_MKDOCS_CONTENT = etree.XPath(f"//main[{_has_class('md-main')}]//div[{_has_class('md-content')}]")
+
+
+def parse_html(content: bytes, encoding: Optional[str] = None) -> Optional[lxml.html.HtmlElement]:
+    """
+    Parse an HTML page from its raw bytes. `encoding` is the charset the response was
+    served with; without it, lxml detects it from the document. Returns None for an empty page.
+    """
+    parser = lxml.html.HTMLParser(encoding=encoding)
+    return etree.fromstring(content, parser) if content.strip() else None
+
+
+def detect_generator(root: lxml.html.HtmlElement) -> Optional[str]:
+    """Return the content of the page's <meta name="generator"> tag, if any."""
+    tags = _GENERATOR(root)
+    return tags[0].get("content") if tags else None
+
+
+def get_text(element: lxml.html.HtmlElement, strip_boilerplate: bool = False) -> str:
+    """Equivalent of BeautifulSoup's element.get_text(separator='\\n', strip=True)."""
+    texts = (_TEXT_WITHOUT_BOILERPLATE if strip_boilerplate else _TEXT)(element)
+    return "\n".join(text for text in (t.strip() for t in texts) if text)
+
+
+def extract(root: Optional[lxml.html.HtmlElement], url: str, generator: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Extract the text content and metadata (source, title, description, language) of a parsed page.
+    `generator` selects the scraper, as the page's <meta name="generator"> would.
+    """
+    metadata: Dict[str, Any] = {"source": url, "title": "", "description": "", "language": ""}
+    if root is None:
+        return "", metadata
+
+    generator = (generator or "").lower()
+    content_root, strip_boilerplate = root, False
+    if "docusaurus" in generator:
+        content_root = next(iter(_ARTICLE(root)), root)
+    elif "mkdocs" in generator:
+        content_root = next(iter(_MKDOCS_CONTENT(root)), root)
+    else:
+        strip_boilerplate = True
+    content = get_text(content_root, strip_boilerplate)
+
+    if titles := _TITLE(root):
+        metadata["title"] = "".join(_TEXT(titles[0]))
+    if descriptions := _DESCRIPTION(root):
+        metadata["description"] = descriptions[0].get("content", "")
+    if root.tag == "html":
+        metadata["language"] = root.get("lang", "")
+    return content, metadata
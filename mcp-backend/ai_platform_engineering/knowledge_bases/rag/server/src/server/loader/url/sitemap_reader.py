@@ -0,0 +1,101 @@
+"""
+Incremental sitemap parsing.
+
+A sitemap (or sitemap index) is fed to SitemapReader chunk by chunk as it is read
+off the socket, and its entries come out as soon as their closing tag is seen, so:
+
+- ingestion of the first pages starts while the rest of the sitemap is still downloading
+- memory stays constant however many URLs the sitemap lists: gzip is inflated
+  chunk by chunk and every entry is dropped from the tree once it has been read
+- stopping early (e.g. at sitemap_max_urls) means the rest is never downloaded
+
+Entries are matched on local names, so any (or no) namespace works. Only the <loc>
+directly under <url>/<sitemap> is read, not the ones of extensions like <image:loc>.
+"""
+import zlib
+from typing import List, NamedTuple, Optional
+
+from lxml import etree
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+class SitemapEntry(NamedTuple):
+    loc: str
+    lastmod: Optional[str]
+    is_sitemap: bool # True for the <sitemap> entries of a sitemap index, False for the <url> entries of a urlset
+
+
+def _localname(tag) -> str:
+    return tag.rpartition("}")[2].lower() if isinstance(tag, str) else ""
+
+
+class SitemapReader:
+    """Parses a sitemap fed as raw (optionally gzip compressed) response chunks."""
+
+    def __init__(self, gzipped: bool = False):
+        """
+        Args:
+            gzipped (bool): The body may be gzip compressed (.gz URL or gzip content type). It is only
+                inflated if it actually starts with the gzip magic number, as some servers send it uncompressed.
+        """
+        self.gzipped = gzipped
+        self.decompressor = None
+        self.head = b"" # First bytes, kept until there are enough to check for the gzip magic number
+        self.parser = etree.XMLPullParser(events=("end",), recover=True, resolve_entities=False, no_network=True)
+
+    def feed(self, chunk: bytes) -> List[SitemapEntry]:
+        """Feed the next chunk of the response body and return the entries it completed."""
+        if self.head is not None:
+            self.head += chunk
+            if len(self.head) < len(_GZIP_MAGIC):
+                return []
+            chunk, self.head = self.head, None
+            if self.gzipped and chunk.startswith(_GZIP_MAGIC):
+                self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.decompressor is not None:
+            chunk = self.inflate(chunk)
+        self.parser.feed(chunk)
+        return self.read_entries()
+
+    def close(self) -> List[SitemapEntry]:
+        """Signal the end of the response body and return the remaining entries."""
+        if self.head:
+            self.parser.feed(self.head)
+        if self.decompressor is not None:
+            self.parser.feed(self.decompressor.flush())
+        try:
+            self.parser.close()
+        except etree.XMLSyntaxError:
+            pass # Empty or hopelessly broken document; whatever could be read was already returned
+        return self.read_entries()
+
+    def inflate(self, chunk: bytes) -> bytes:
+        data = self.decompressor.decompress(chunk) # type: ignore
+        # Concatenated gzip members are valid gzip; start over on the next one
+        while self.decompressor.eof and self.decompressor.unused_data: # type: ignore
+            rest = self.decompressor.unused_data # type: ignore
+            self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            data += self.decompressor.decompress(rest)
+        return data
+
+    def read_entries(self) -> List[SitemapEntry]:
+        entries: List[SitemapEntry] = []
+        for _, element in self.parser.read_events():
+            name = _localname(element.tag)
+            if name not in ("url", "sitemap"):
+                continue
+            loc, lastmod = None, None
+            for child in element:
+                child_name = _localname(child.tag)
+                if child_name == "loc":
+                    loc = (child.text or "").strip()
+                elif child_name == "lastmod":
+                    lastmod = (child.text or "").strip() or None
+            if loc:
+                entries.append(SitemapEntry(loc, lastmod, name == "sitemap"))
+            # Drop the entry, and anything before it, from the tree so it never grows
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        return entries
@@ -1,105 +1,123 @@
 # This file contains metadata storage class for the RAG server
+import asyncio
 import datetime
 import json
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Set, Tuple
 import redis.asyncio as redis
 from common.models.rag import DataSourceInfo, DocumentInfo, GraphConnectorInfo
 
+DATASOURCE_PREFIX = "rag/datasource:"
+GRAPHCONNECTOR_PREFIX = "graph_rag/graphconnector:"
+# Sorted sets (all scores 0, so ordered by ID) indexing the stored IDs, for listing without KEYS/SCAN over the keyspace
+DATASOURCE_INDEX = "rag/datasource_ids"
+GRAPHCONNECTOR_INDEX = "graph_rag/graphconnector_ids"
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
 class MetadataStorage:
     """
     Metadata storage class for the RAG server.
+
+    Datasources and graph connectors are JSON values, one key each, listed through an index of their
+    IDs, a page at a time: ZRANGEBYLEX for the IDs of a page, then one MGET for their values.
     """
-    def __init__(self, redis_client: redis.Redis):
+    def __init__(self, redis_client: redis.Redis, page_size: int = 1000):
+        """
+        Args:
+            redis_client (redis.Redis): The Redis client to use.
+            page_size (int): Number of entries read per round trip when listing everything, or scanning keys.
+        """
         self.redis_client = redis_client
+        self.page_size = page_size
+        self._indexed: Set[str] = set() # Indexes known to be complete (backfilled) in this process
+        self._index_lock = asyncio.Lock()
 
     async def setup(self):
         """Initialize the metadata storage"""
         # Ping the redis server to check if it is ready
         await self.redis_client.ping()
-    
+
     async def store_datasource_info(self, source_info: DataSourceInfo, ttl: int = 0):
         """Store datasource information in Redis"""
-        if ttl > 0:
-            await self.redis_client.setex(
-                f"rag/datasource:{source_info.datasource_id}",
-                ttl,
-                json.dumps(source_info.model_dump(), default=str)
-            )
-        else:
-            await self.redis_client.set(
-                f"rag/datasource:{source_info.datasource_id}",
-                json.dumps(source_info.model_dump(), default=str)
-            )
+        await self._store(DATASOURCE_INDEX, DATASOURCE_PREFIX, source_info.datasource_id,
+                          json.dumps(source_info.model_dump(), default=str), ttl)
 
     async def get_datasource_info(self, datasource_id: str) -> Optional[DataSourceInfo]:
         """Retrieve datasource information from Redis"""
-        source_data = await self.redis_client.get(f"rag/datasource:{datasource_id}")
+        source_data = await self.redis_client.get(f"{DATASOURCE_PREFIX}{datasource_id}")
         if source_data:
-            data = json.loads(source_data)
-            data['created_at'] = datetime.datetime.fromisoformat(data['created_at'])
-            data['last_updated'] = datetime.datetime.fromisoformat(data['last_updated'])
-            return DataSourceInfo(**data)
+            return self._parse_datasource_info(source_data)
         return None
-    
 
+    @staticmethod
+    def _parse_datasource_info(source_data) -> DataSourceInfo:
+        data = json.loads(source_data)
+        data['created_at'] = datetime.datetime.fromisoformat(data['created_at'])
+        data['last_updated'] = datetime.datetime.fromisoformat(data['last_updated'])
+        return DataSourceInfo(**data)
 
     async def fetch_all_datasource_ids(self) -> List[str]:
         """List all stored datasource IDs"""
-        keys = await self.redis_client.keys("rag/datasource:*")
-        return [key.replace("rag/datasource:", "") for key in keys]
+        return await self._fetch_all_ids(DATASOURCE_INDEX, DATASOURCE_PREFIX)
 
     async def fetch_all_datasource_info(self) -> List[DataSourceInfo]:
         """List all stored datasource information"""
-        keys = await self.redis_client.keys("rag/datasource:*")
-        return [DataSourceInfo(**json.loads(await self.redis_client.get(key))) for key in keys]
-    
+        values = await self._fetch_all(DATASOURCE_INDEX, DATASOURCE_PREFIX)
+        return [self._parse_datasource_info(value) for value in values]
+
+    async def list_datasource_info(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[DataSourceInfo], Optional[str]]:
+        """
+        List a page of up to `limit` datasources, ordered by ID, starting after `cursor`.
+        Returns the page and the cursor of the next page (None on the last page).
+        """
+        values, next_cursor = await self._list_page(DATASOURCE_INDEX, DATASOURCE_PREFIX, limit, cursor)
+        return [self._parse_datasource_info(value) for value in values], next_cursor
+
     # Graph connector management methods
     async def store_graphconnector_info(self, connector_info: GraphConnectorInfo, ttl: int = 0):
         """Store graph connector information in Redis"""
-        if ttl > 0:
-            await self.redis_client.setex(
-                f"graph_rag/graphconnector:{connector_info.connector_id}",
-                ttl,
-                json.dumps(connector_info.model_dump(), default=str)
-            )
-        else:
-            await self.redis_client.set(
-                f"graph_rag/graphconnector:{connector_info.connector_id}",
-                json.dumps(connector_info.model_dump(), default=str)
-            )
+        await self._store(GRAPHCONNECTOR_INDEX, GRAPHCONNECTOR_PREFIX, connector_info.connector_id,
+                          json.dumps(connector_info.model_dump(), default=str), ttl)
 
     async def get_graphconnector_info(self, connector_id: str) -> Optional[GraphConnectorInfo]:
         """Retrieve graph connector information from Redis"""
-        connector_data = await self.redis_client.get(f"graph_rag/graphconnector:{connector_id}")
+        connector_data = await self.redis_client.get(f"{GRAPHCONNECTOR_PREFIX}{connector_id}")
         if connector_data:
-            data = json.loads(connector_data)
-            if data.get('last_seen'):
-                data['last_seen'] = datetime.datetime.fromisoformat(data['last_seen'])
-            return GraphConnectorInfo(**data)
+            return self._parse_graphconnector_info(connector_data)
         return None
 
+    @staticmethod
+    def _parse_graphconnector_info(connector_data) -> GraphConnectorInfo:
+        data = json.loads(connector_data)
+        if data.get('last_seen'):
+            data['last_seen'] = datetime.datetime.fromisoformat(data['last_seen'])
+        return GraphConnectorInfo(**data)
+
     async def fetch_all_graphconnector_ids(self) -> List[str]:
         """List all stored graph connector IDs"""
-        keys = await self.redis_client.keys("graph_rag/graphconnector:*")
-        return [key.replace("graph_rag/graphconnector:", "") for key in keys]
+        return await self._fetch_all_ids(GRAPHCONNECTOR_INDEX, GRAPHCONNECTOR_PREFIX)
 
     async def fetch_all_graphconnector_info(self) -> List[GraphConnectorInfo]:
         """List all stored graph connector information"""
-        keys = await self.redis_client.keys("graph_rag/graphconnector:*")
-        result = []
-        for key in keys:
-            connector_data = await self.redis_client.get(key)
-            if connector_data:
-                data = json.loads(connector_data)
-                if data.get('last_seen'):
-                    data['last_seen'] = datetime.datetime.fromisoformat(data['last_seen'])
-                result.append(GraphConnectorInfo(**data))
-        return result
+        values = await self._fetch_all(GRAPHCONNECTOR_INDEX, GRAPHCONNECTOR_PREFIX)
+        return [self._parse_graphconnector_info(value) for value in values]
+
+    async def list_graphconnector_info(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[GraphConnectorInfo], Optional[str]]:
+        """
+        List a page of up to `limit` graph connectors, ordered by ID, starting after `cursor`.
+        Returns the page and the cursor of the next page (None on the last page).
+        """
+        values, next_cursor = await self._list_page(GRAPHCONNECTOR_INDEX, GRAPHCONNECTOR_PREFIX, limit, cursor)
+        return [self._parse_graphconnector_info(value) for value in values], next_cursor
 
     async def delete_graphconnector_info(self, connector_id: str):
         """Delete graph connector information from Redis"""
-        await self.redis_client.delete(f"graph_rag/graphconnector:{connector_id}")
-    
+        await (self.redis_client.pipeline(transaction=True)
+            .delete(f"{GRAPHCONNECTOR_PREFIX}{connector_id}")
+            .zrem(GRAPHCONNECTOR_INDEX, connector_id)
+            .execute())
+
     # Redis helper functions for document management
     async def store_document_info(self, document_info: DocumentInfo):
         """Store document information in Redis"""
@@ -119,39 +137,113 @@ class MetadataStorage:
             return DocumentInfo(**data)
         return None
 
+    async def fetch_document_ids(self, datasource_id: str) -> List[str]:
+        """List the IDs of all documents stored for a datasource"""
+        return [_decode(document_id) for document_id in await self.redis_client.smembers(f"rag/datasource_documents:{datasource_id}")] # type: ignore
+
+    async def delete_document_info(self, datasource_id: str, document_id: str):
+        """Delete document information and remove it from the source's document list"""
+        await self.redis_client.delete(f"rag/document:{document_id}")
+        await self.redis_client.srem(f"rag/datasource_documents:{datasource_id}", document_id) # type: ignore
+
     # Redis helper functions for statistics
     async def update_source_stats(self, datasource_id: str):
         """Update source statistics (document and chunk counts)"""
         source_info = await self.get_datasource_info(datasource_id)
-        total_documents = 0
         if source_info:
             # Count documents
-            document_ids = await self.redis_client.smembers(f"rag/datasource_documents:{datasource_id}") # type: ignore
-            total_documents = len(document_ids)
-            
-            # Update source info
-            source_info.total_documents = total_documents
+            source_info.total_documents = await self.redis_client.scard(f"rag/datasource_documents:{datasource_id}") # type: ignore
             source_info.last_updated = datetime.datetime.now(datetime.timezone.utc)
-        
+
             await self.store_datasource_info(source_info)
 
     # Redis cleanup functions
     async def delete_datasource_info(self, datasource_id: str):
         """Clear all data for a specific source"""
-        keys = []
-        keys.extend(await self.redis_client.keys(f"rag/datasource:{datasource_id}*"))
-        keys.extend(await self.redis_client.keys(f"rag/datasource_documents:{datasource_id}*"))
-        keys.extend(await self.redis_client.keys(f"rag/document:{datasource_id}*"))
-        if keys:
-            await self.redis_client.delete(*keys)
+        documents_key = f"rag/datasource_documents:{datasource_id}"
+        document_keys = []
+        async for document_id in self.redis_client.sscan_iter(documents_key, count=self.page_size):
+            document_keys.append(f"rag/document:{_decode(document_id)}")
+            if len(document_keys) >= self.page_size:
+                await self.redis_client.delete(*document_keys)
+                document_keys = []
+        await (self.redis_client.pipeline(transaction=True)
+            .delete(f"{DATASOURCE_PREFIX}{datasource_id}", documents_key, *document_keys)
+            .zrem(DATASOURCE_INDEX, datasource_id)
+            .execute())
 
     async def clear_all_data(self):
         """Clear all Redis data"""
-        datasource_keys = await self.redis_client.keys("rag/datasource:*")
-        document_keys = await self.redis_client.keys("rag/document:*")
-        relation_keys = await self.redis_client.keys("rag/datasource_documents:*")
-        graphconnector_keys = await self.redis_client.keys("graph_rag/graphconnector:*")
-        
-        all_keys = datasource_keys + document_keys + relation_keys + graphconnector_keys
-        if all_keys:
-            await self.redis_client.delete(*all_keys)
+        for pattern in (f"{DATASOURCE_PREFIX}*", "rag/document:*", "rag/datasource_documents:*", f"{GRAPHCONNECTOR_PREFIX}*"):
+            keys = []
+            async for key in self.redis_client.scan_iter(match=pattern, count=self.page_size):
+                keys.append(key)
+                if len(keys) >= self.page_size:
+                    await self.redis_client.delete(*keys)
+                    keys = []
+            if keys:
+                await self.redis_client.delete(*keys)
+        await self.redis_client.delete(DATASOURCE_INDEX, GRAPHCONNECTOR_INDEX)
+        self._indexed.clear()
+
+    # Index helpers
+    async def _store(self, index_key: str, key_prefix: str, entry_id: str, value: str, ttl: int):
+        """Store a value and add its ID to the index, atomically"""
+        await (self.redis_client.pipeline(transaction=True)
+            .set(f"{key_prefix}{entry_id}", value, ex=ttl if ttl > 0 else None)
+            .zadd(index_key, {entry_id: 0})
+            .execute())
+
+    async def _ensure_index(self, index_key: str, key_prefix: str):
+        """
+        Add the IDs of keys stored before the index existed to it (SCAN), unless that was done already
+        (marked by the <index>:backfilled key). Checked at most once per process and index.
+        """
+        if index_key in self._indexed:
+            return
+        async with self._index_lock:
+            if index_key in self._indexed:
+                return
+            if not await self.redis_client.exists(f"{index_key}:backfilled"):
+                entry_ids: Dict[str, int] = {}
+                async for key in self.redis_client.scan_iter(match=f"{key_prefix}*", count=self.page_size):
+                    entry_ids[_decode(key)[len(key_prefix):]] = 0
+                    if len(entry_ids) >= self.page_size:
+                        await self.redis_client.zadd(index_key, entry_ids)
+                        entry_ids = {}
+                if entry_ids:
+                    await self.redis_client.zadd(index_key, entry_ids)
+                await self.redis_client.set(f"{index_key}:backfilled", 1)
+            self._indexed.add(index_key)
+
+    async def _fetch_all_ids(self, index_key: str, key_prefix: str) -> List[str]:
+        await self._ensure_index(index_key, key_prefix)
+        return [_decode(entry_id) for entry_id in await self.redis_client.zrange(index_key, 0, -1)]
+
+    async def _fetch_all(self, index_key: str, key_prefix: str) -> List[Any]:
+        values: List[Any] = []
+        cursor = None
+        while True:
+            page, cursor = await self._list_page(index_key, key_prefix, self.page_size, cursor)
+            values.extend(page)
+            if cursor is None:
+                return values
+
+    async def _list_page(self, index_key: str, key_prefix: str, limit: int, cursor: Optional[str]) -> Tuple[List[Any], Optional[str]]:
+        """
+        Read the values of up to `limit` IDs of the index after `cursor`, in one MGET.
+        IDs whose value is gone (expired) are dropped from the index.
+        """
+        await self._ensure_index(index_key, key_prefix)
+        # One extra ID tells whether there is a next page
+        entry_ids = [_decode(entry_id) for entry_id in
+                     await self.redis_client.zrangebylex(index_key, f"({cursor}" if cursor else "-", "+", start=0, num=limit + 1)]
+        next_cursor = entry_ids[limit - 1] if len(entry_ids) > limit else None
+        entry_ids = entry_ids[:limit]
+        if not entry_ids:
+            return [], None
+        values = await self.redis_client.mget([f"{key_prefix}{entry_id}" for entry_id in entry_ids])
+        expired = [entry_id for entry_id, value in zip(entry_ids, values) if value is None]
+        if expired:
+            await self.redis_client.zrem(index_key, *expired)
+        return [value for value in values if value is not None], next_cursor
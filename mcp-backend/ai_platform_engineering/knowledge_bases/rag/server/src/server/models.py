@@ -43,6 +43,29 @@ class EntityIngest(BaseModel):
     entities: List[Entity] = Field(..., description="List of entities to ingest")
     fresh_until: int = Field(0, description="Fresh until timestamp")
 
+class EntityDelete(BaseModel):
+    entity_type: str = Field(..., description="Type of the entities")
+    connector_name: str = Field(..., description="Name of the connector deleting the entities")
+    primary_keys: List[str] = Field(..., description="Primary keys of the entities to delete")
+
+class EntityIngestOutcome(BaseModel):
+    entity_type: str = Field(..., description="Type of the entity")
+    primary_key: Optional[str] = Field(None, description="Primary key of the entity, if it could be generated")
+    status: str = Field(..., description="'created', 'updated', 'unchanged' (same hash as stored) or 'failed'")
+    error: Optional[str] = Field(None, description="Why the entity failed")
+
+class EntityIngestResult(BaseModel):
+    connector_name: str = Field(..., description="Name of the connector that submitted the entities")
+    entity_type: str = Field(..., description="Type of the entities")
+    outcomes: List[EntityIngestOutcome] = Field(..., description="Outcome of each entity, in the order submitted")
+
+    def counts(self) -> Dict[str, int]:
+        """Number of entities per status"""
+        counts: Dict[str, int] = {}
+        for outcome in self.outcomes:
+            counts[outcome.status] = counts.get(outcome.status, 0) + 1
+        return counts
+
 class ExploreDataEntityRequest(BaseModel):
     entity_type: str = Field(..., description="Type of the entity to fetch")
     entity_pk: str = Field(..., description="Primary key of the entity to fetch")
@@ -63,7 +86,7 @@ class QueryRequest(BaseModel):
     limit: int = Field(3, description="Maximum number of results to return", ge=1, le=100)
     similarity_threshold: float = Field(0.3, description="Minimum similarity score", ge=0.0, le=1.0)
     filters: Optional[Dict[str, str]] = Field(None, description="Additional filters as key-value pairs")
-    ranker_type: str = Field("weighted", description="Type of ranker to use")
+    ranker_type: str = Field("weighted", description="Type of ranker to use: 'weighted' (dense and keyword scores, by ranker_params.weights) or 'rrf' (reciprocal rank fusion, ranker_params.k)")
     ranker_params: Optional[Dict[str, Any]] = Field({"weights": [0.7, 0.3]}, description="Parameters for the ranker")
 
 class QueryResult(BaseModel):
@@ -1,24 +1,164 @@
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import time
 import traceback
 from common.utils import get_logger
 from server.models import QueryResult, QueryResults
+from langchain_core.embeddings import Embeddings
 from langchain_milvus import Milvus
 from common.models.rag import valid_metadata_keys, doc_types
 
 logger = get_logger(__name__)
 
+def normalize_query(query: str) -> str:
+    """Collapse whitespace, so that queries differing only in spacing share cache entries"""
+    return " ".join(query.split())
+
+def quote_string(value: str) -> str:
+    """Quote a string literal for a Milvus filter expression"""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Embeddings wrapper for the vector store: query embeddings are cached (LRU, keyed by normalized query),
+    and queries embedded concurrently are sent to the model together, in one request per `batch_window`.
+    Document embeddings (ingestion) are passed through.
+
+    Batches are embedded with `aembed_documents`, which for OpenAI embeddings is what `aembed_query` does.
+    """
+    def __init__(self, embeddings: Embeddings, cache_size: int = 4096, batch_window: float = 0.005, max_batch_size: int = 64):
+        """
+        :param embeddings: The embeddings model.
+        :param cache_size: Number of query embeddings kept.
+        :param batch_window: Seconds a query waits for others to be embedded with it (0 embeds each query on its own).
+        :param max_batch_size: Number of queries embedded in one request at most.
+        """
+        self.embeddings = embeddings
+        self.cache_size = cache_size
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._cache: OrderedDict[str, List[float]] = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {} # queries being embedded, so concurrent duplicates wait for the same result
+        self._batch: List[str] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        vector = self._cached(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(key)
+            self._remember(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        vector = self._cached(key)
+        if vector is not None:
+            return vector
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            self._batch.append(key)
+            if self.batch_window <= 0 or len(self._batch) >= self.max_batch_size:
+                self._flush_batch()
+            elif self._batch_timer is None:
+                self._batch_timer = asyncio.get_running_loop().call_later(self.batch_window, self._flush_batch)
+        # Shielded: the future is shared with the other callers waiting for this query
+        return await asyncio.shield(future)
+
+    def _cached(self, key: str) -> Optional[List[float]]:
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+        return vector
+
+    def _remember(self, key: str, vector: List[float]):
+        self._cache[key] = vector
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _flush_batch(self):
+        if self._batch_timer:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        batch, self._batch = self._batch, []
+        if batch:
+            task = asyncio.ensure_future(self._embed_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _embed_batch(self, batch: List[str]):
+        try:
+            if len(batch) == 1:
+                vectors = [await self.embeddings.aembed_query(batch[0])]
+            else:
+                vectors = await self.embeddings.aembed_documents(batch)
+        except Exception as e:
+            self._fail_batch(batch, e)
+            return
+        except asyncio.CancelledError:
+            self._fail_batch(batch, None)
+            raise
+        for key, vector in zip(batch, vectors):
+            self._remember(key, vector)
+            future = self._in_flight.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(vector)
+
+    def _fail_batch(self, batch: List[str], error: Optional[Exception]):
+        for key in batch:
+            future = self._in_flight.pop(key, None)
+            if future is not None and not future.done():
+                if error is None:
+                    future.cancel()
+                else:
+                    future.set_exception(error)
+
 class VectorDBQueryService:
-    def __init__(self, vector_db: Milvus):
+    """
+    Hybrid (dense + BM25) search over the documents collection, with the two result lists fused by
+    the ranker: 'weighted' scores, or 'rrf' (reciprocal rank fusion) - see QueryRequest.
+
+    Results are cached for `result_cache_ttl` seconds, per normalized query, filters and search parameters.
+    The cache is per process: `invalidate` is called when a datasource is ingested or deleted here, other
+    replicas see the change when their entries expire.
+    """
+    def __init__(self, vector_db: Milvus, result_cache_ttl: float = 60, result_cache_size: int = 1024,
+                 fetch_k: int = 20, fused_searches: int = 2):
+        """
+        :param vector_db: The documents vector store.
+        :param result_cache_ttl: Seconds query results are cached for (0 disables the cache).
+        :param result_cache_size: Number of query results cached.
+        :param fetch_k: Candidates fetched from each search before fusion (at least `limit`).
+        :param fused_searches: Number of searches fused (dense and BM25), to scale RRF scores to 0-1.
+        """
         self.vector_db = vector_db
+        self.result_cache_ttl = result_cache_ttl
+        self.result_cache_size = result_cache_size
+        self.fetch_k = fetch_k
+        self.fused_searches = fused_searches
+        self.valid_filter_keys = valid_metadata_keys()
+        self._filter_exprs: OrderedDict[frozenset, str] = OrderedDict() # validated filters -> filter expression
+        # (query, filter expression, search parameters) -> (expiry, datasource_id filter, results)
+        self._results: OrderedDict[Tuple, Tuple[float, Optional[str], QueryResults]] = OrderedDict()
 
     async def validate_filter_keys(self, filters: Dict[str, str]):
         """Validate filter keys and values"""
-        valid_filter_keys = valid_metadata_keys()
         for filter_name, filter_value in filters.items():
-            if filter_name not in valid_filter_keys:
+            if filter_name not in self.valid_filter_keys:
                 logger.warning(f"Invalid filter key: {filter_name}")
-                raise ValueError(f"Invalid filter key: {filter_name}, must be one of {valid_filter_keys}")
-            
+                raise ValueError(f"Invalid filter key: {filter_name}, must be one of {self.valid_filter_keys}")
+
             # Add additional validation for filter values if needed
             if not isinstance(filter_value, str):
                 logger.warning(f"Invalid filter value for {filter_name}: {filter_value}, must be a string")
@@ -28,10 +168,41 @@ class VectorDBQueryService:
                 logger.warning(f"Invalid doc_type filter value: {filter_value}")
                 raise ValueError(f"Invalid doc_type filter value: {filter_value}, must be one of {doc_types}")
 
-    async def query(self, 
+    async def build_filter_expr(self, filters: Optional[Dict[str, str]]) -> Optional[str]:
+        """
+        Validate the filters and build their filter expression, e.g. datasource_id == 'src_x' AND doc_type == 'text'.
+        Expressions of filters seen before are reused.
+        """
+        if not filters:
+            return None
+        try:
+            cache_key = frozenset(filters.items())
+        except TypeError: # unhashable value, rejected by the validation
+            cache_key = None
+        filter_expr = self._filter_exprs.get(cache_key) if cache_key is not None else None
+        if filter_expr is None:
+            await self.validate_filter_keys(filters)
+            filter_expr = " AND ".join(f"{key} == {quote_string(value)}" for key, value in sorted(filters.items()))
+            self._filter_exprs[cache_key] = filter_expr
+            if len(self._filter_exprs) > self.result_cache_size:
+                self._filter_exprs.popitem(last=False)
+        return filter_expr
+
+    def invalidate(self, datasource_id: Optional[str] = None):
+        """
+        Drop cached query results that may change with the contents of `datasource_id`
+        (all but those filtered to another datasource), or all of them.
+        """
+        if datasource_id is None:
+            self._results.clear()
+            return
+        for key in [key for key, (_, filtered_to, _) in self._results.items() if filtered_to in (None, datasource_id)]:
+            del self._results[key]
+
+    async def query(self,
         query: str,
         filters: Optional[Dict[str, str]] = None,
-        limit: int = 5, 
+        limit: int = 5,
         similarity_threshold: float = 0.3,
         ranker: str = "",
         ranker_params: Optional[Dict[str, Any]] = None) -> QueryResults:
@@ -42,28 +213,28 @@ class VectorDBQueryService:
                         graph_entity_type).
         :param limit: Number of results to return.
         :param similarity_threshold: Minimum similarity score to include a result.
-        :param ranker: Type of ranker to use ('weighted', 'recency', etc.).
+        :param ranker: Type of ranker to use ('weighted', 'rrf'). RRF scores are scaled to 0-1
+                       (1 is the top result of every search) for the threshold.
         :param ranker_params: Parameters for the ranker.
         :return: QueryResults containing the results and their scores.
         """
+        normalized_query = normalize_query(query)
+        filter_expr = await self.build_filter_expr(filters)
 
-        # Validate filters
-        if filters:
-            await self.validate_filter_keys(filters)
-        
-            # Build filter expressions for filtering if specified
-            filter_expr_parts = []
-            for key, value in (filters or {}).items():
-                filter_expr_parts.append(f"{key} == '{value}'")
-            filter_expr = " AND ".join(filter_expr_parts)
-        else:
-            filter_expr = None # No filters
+        cache_key = (normalized_query, filter_expr, limit, similarity_threshold, ranker,
+                     json.dumps(ranker_params, sort_keys=True, default=str))
+        if self.result_cache_ttl > 0:
+            cached = self._results.get(cache_key)
+            if cached and cached[0] > time.monotonic():
+                self._results.move_to_end(cache_key)
+                return cached[2].model_copy(update={"query": query})
 
         logger.info(f"Searching docs vector db with filters - {filter_expr}, query: {query}")
         try:
             results = await self.vector_db.asimilarity_search_with_score(
-                query,
+                normalized_query,
                 k=limit,
+                fetch_k=max(limit, self.fetch_k),
                 ranker_type=ranker,
                 ranker_params=ranker_params,
                 expr=filter_expr
@@ -76,9 +247,14 @@ class VectorDBQueryService:
                 results=[],
             )
 
+        # RRF scores are sums of 1/(k + rank), at most fused_searches/(k + 1)
+        rrf_scale = (((ranker_params or {}).get("k") or 60) + 1) / self.fused_searches
+
         # Format results for response
         query_results: List[QueryResult] = []
         for doc, score in results:
+            if ranker == "rrf":
+                score = min(score * rrf_scale, 1.0)
             if score < similarity_threshold: # filter out based on similarity threshold
                 continue
             query_results.append(
@@ -87,7 +263,14 @@ class VectorDBQueryService:
                     score=score
                 )
             )
-        return QueryResults(
+        response = QueryResults(
                 query=query,
                 results=query_results,
             )
+
+        if self.result_cache_ttl > 0:
+            self._results[cache_key] = (time.monotonic() + self.result_cache_ttl, (filters or {}).get("datasource_id"), response)
+            self._results.move_to_end(cache_key)
+            if len(self._results) > self.result_cache_size:
+                self._results.popitem(last=False)
+        return response
@@ -9,16 +9,17 @@ from fastapi.encoders import jsonable_encoder
 from fastmcp import FastMCP
 from server.tools import AgentTools
 from server.loader.loader import Loader
+from server.loader.pipeline import PipelineConfig
 from starlette.requests import Request
-from starlette.responses import StreamingResponse
+from starlette.responses import Response, StreamingResponse
 from starlette.background import BackgroundTask
 from typing import List, Optional
 import logging
 from langchain_core.documents import Document
 from server.metadata_storage import MetadataStorage
 from common.job_manager import JobManager, JobStatus
-from server.models import ExploreDataEntityRequest, ExploreEntityRequest, ExploreRelationsRequest, QueryRequest, IngestResponse, QueryResults, UrlIngest, FileIngest, EntityIngest
-from common.models.rag import DataSourceInfo, GraphConnectorInfo, VectorDBGraphMetadata, DocTypeGraphEntity, doc_types, valid_metadata_keys
+from server.models import ExploreDataEntityRequest, ExploreEntityRequest, ExploreRelationsRequest, QueryRequest, IngestResponse, QueryResults, UrlIngest, FileIngest, EntityIngest, EntityIngestResult, EntityDelete
+from common.models.rag import DataSourceInfo, GraphConnectorInfo, doc_types, valid_metadata_keys
 from common.models.graph import Entity
 from common.graph_db.neo4j.graph_db import Neo4jDB
 from common.graph_db.base import GraphDB
@@ -29,14 +30,18 @@ from langchain_milvus import BM25BuiltInFunction, Milvus
 from pymilvus import MilvusClient
 import os
 import httpx
-from server.query_service import VectorDBQueryService
+from server.query_service import CachedQueryEmbeddings, VectorDBQueryService
+from server.graph_ingestion import GraphEntityIngestor
+from server.gzip_request import GzipRoute
 from langchain.globals import set_verbose as set_langchain_verbose
 
 metadata_storage: Optional[MetadataStorage] = None
 vector_db: Optional[Milvus] = None
 jobmanager: Optional[JobManager] = None
+vector_db_query_service: Optional[VectorDBQueryService] = None
 data_graph_db: Optional[GraphDB] = None
 ontology_graph_db: Optional[GraphDB] = None
+pending_graph_entity_ingestions = 0
 
 # Initialize logger
 logger = utils.get_logger(__name__)
@@ -56,6 +61,24 @@ neo4j_addr = os.getenv("NEO4J_ADDR", "bolt://localhost:7687")
 ontology_neo4j_addr = os.getenv("NEO4J_ONTOLOGY_ADDR", "bolt://localhost:7688")
 skip_init_tests = os.getenv("SKIP_INIT_TESTS", "false").lower() in ("true", "1", "yes") # used when debugging to skip connection tests
 max_ingestion_concurrency = int(os.getenv("MAX_INGESTION_CONCURRENCY", 30)) # max concurrent tasks during ingestion for one datasource
+ingestion_pipeline_config = PipelineConfig( # stages after fetching, see server/loader/pipeline.py
+    enabled=os.getenv("INGESTION_PIPELINE_ENABLED", "true").lower() in ("true", "1", "yes"),
+    parse_concurrency=int(os.getenv("INGESTION_PARSE_CONCURRENCY", 4)),
+    split_concurrency=int(os.getenv("INGESTION_SPLIT_CONCURRENCY", 4)),
+    embed_concurrency=int(os.getenv("EMBEDDING_CONCURRENCY", 4)),
+    embed_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", 64)),
+    upsert_concurrency=int(os.getenv("UPSERT_CONCURRENCY", 2)),
+    upsert_batch_size=int(os.getenv("UPSERT_BATCH_SIZE", 256)),
+    queue_size=int(os.getenv("INGESTION_QUEUE_SIZE", 64)),
+)
+job_progress_flush_interval = float(os.getenv("JOB_PROGRESS_FLUSH_INTERVAL", 0.5)) # seconds per-URL job progress is coalesced for
+job_max_errors = int(os.getenv("JOB_MAX_ERRORS", 1000)) # error messages kept per job
+max_page_limit = 1000 # largest page of the paginated listing endpoints
+query_result_cache_ttl = float(os.getenv("QUERY_RESULT_CACHE_TTL", 60)) # seconds query results are cached for, 0 to disable
+query_embedding_cache_size = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 4096)) # query embeddings kept in memory
+query_embedding_batch_window = float(os.getenv("QUERY_EMBEDDING_BATCH_WINDOW", 0.005)) # seconds concurrent query embeddings are batched for
+graph_ingest_batch_size = int(os.getenv("GRAPH_INGEST_BATCH_SIZE", 1000)) # graph entities fetched and written per round trip
+graph_ingest_max_pending = int(os.getenv("GRAPH_INGEST_MAX_PENDING", 8)) # entity ingestion requests running before answering 429
 ui_url = os.getenv("UI_URL", "http://localhost:9447")
 mcp_enabled = os.getenv("ENABLE_MCP", "true").lower() in ("true", "1", "yes")
 
@@ -90,7 +113,7 @@ async def app_lifespan(app: FastAPI):
 
     redis_client = redis.from_url(redis_url)
     metadata_storage = MetadataStorage(redis_client=redis_client)
-    jobmanager = JobManager(redis_client=redis_client)
+    jobmanager = JobManager(redis_client=redis_client, progress_flush_interval=job_progress_flush_interval, max_errors=job_max_errors)
     embeddings = AzureOpenAIEmbeddings(model=embeddings_model)
 
     if not skip_init_tests:
@@ -104,7 +127,7 @@ async def app_lifespan(app: FastAPI):
 
     # Setup vector db for document data
     vector_db = Milvus(
-        embedding_function=embeddings,
+        embedding_function=CachedQueryEmbeddings(embeddings, cache_size=query_embedding_cache_size, batch_window=query_embedding_batch_window),
         collection_name=default_collection_name_docs,
         connection_args=milvus_connection_args,
         index_params=[dense_index_params, sparse_index_params],
@@ -126,7 +149,7 @@ async def app_lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Could not pre-load Milvus collection: {e}")
 
-    vector_db_query_service = VectorDBQueryService(vector_db=vector_db)
+    vector_db_query_service = VectorDBQueryService(vector_db=vector_db, result_cache_ttl=query_result_cache_ttl)
 
     if graph_rag_enabled:
         # Setup graph dbs
@@ -139,6 +162,8 @@ async def app_lifespan(app: FastAPI):
     yield
     # Shutdown
     logging.info("Shutting down the app...")
+    if jobmanager:
+        await jobmanager.flush() # Write job progress still being coalesced
 
 if mcp_enabled:
     # Initialize MCP server
@@ -185,6 +210,7 @@ else:
         version="2.0.0",
         lifespan=combined_lifespan,
     )
+app.router.route_class = GzipRoute # connectors send entities gzipped
 
 # ============================================================================
 # Datasources Endpoints
@@ -223,21 +249,39 @@ async def delete_datasource(datasource_id: str):
 
     await vector_db.adelete(expr=f"datasource_id == '{datasource_id}'")
     await metadata_storage.delete_datasource_info(datasource_id) # remove metadata
+    if vector_db_query_service:
+        vector_db_query_service.invalidate(datasource_id)
 
     return status.HTTP_200_OK
 
+def check_page_limit(limit: Optional[int]):
+    """Validate the page size of a paginated listing"""
+    if limit is not None and not 1 <= limit <= max_page_limit:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {max_page_limit}")
+
 @app.get("/v1/datasources")
-async def list_datasources():
-    """List all stored datasources"""
+async def list_datasources(response: Response, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """
+    List stored datasources: all of them, or, with `limit`, a page ordered by ID starting after `cursor`.
+    The cursor of the next page is returned as `next_cursor` (and the X-Next-Cursor header); it is null on the last page.
+    """
     if not metadata_storage:
         raise HTTPException(status_code=500, detail="Server not initialized")
+    check_page_limit(limit)
     try:
-        datasources = await metadata_storage.fetch_all_datasource_info()
+        next_cursor = None
+        if limit is None and cursor is None:
+            datasources = await metadata_storage.fetch_all_datasource_info()
+        else:
+            datasources, next_cursor = await metadata_storage.list_datasource_info(limit or max_page_limit, cursor)
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
 
         return {
             "success": True,
             "datasources": datasources,
-            "count": len(datasources)
+            "count": len(datasources),
+            "next_cursor": next_cursor,
         }
     except Exception as e:
         logger.error(f"Failed to list datasources: {e}")
@@ -307,19 +351,33 @@ async def reload_datasource(datasource_id: str, background_tasks: BackgroundTask
 
     # Re-ingest based on original source type
     if datasource_info.source_type == "web":
-        # Delete the existing datasource
-        await delete_datasource(datasource_id)
-        url_ingest_request = UrlIngest(
-            url=datasource_info.path,
-            description=datasource_info.description,
-            default_chunk_size=datasource_info.default_chunk_size,
-            default_chunk_overlap=datasource_info.default_chunk_overlap,
-            check_for_site_map=datasource_info.check_for_site_map,
-            sitemap_max_urls=datasource_info.sitemap_max_urls
+        if datasource_info.job_id:
+            job_info = await jobmanager.get_job(datasource_info.job_id)
+            if job_info and job_info.status in (JobStatus.PENDING, JobStatus.IN_PROGRESS):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Ingestion for this datasource is already in progress (Job ID: {datasource_info.job_id})."
+                )
+
+        # Re-crawl in place: the loader skips unchanged pages, re-embeds only changed chunks
+        # and removes pages that are no longer part of the source
+        job_id = str(uuid.uuid4())
+        await jobmanager.update_job(job_id, status=JobStatus.PENDING, message="Starting reload...")
+        datasource_info.job_id = job_id
+        await metadata_storage.store_datasource_info(datasource_info)
+
+        background_tasks.add_task(
+            run_url_ingestion_with_progress,
+            datasource_info.path,
+            job_id,
+            datasource_info.description,
+            datasource_info.default_chunk_size,
+            datasource_info.default_chunk_overlap,
+            datasource_info.check_for_site_map,
+            datasource_info.sitemap_max_urls
         )
-        return await ingest_datasource_url(
-            url_ingest_request,
-            background_tasks
+        return IngestResponse(
+            job_id=job_id,
         )
 
 
@@ -369,7 +427,9 @@ async def terminate_job(job_id: str):
     if job_info.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.TERMINATED):
         raise HTTPException(status_code=400, detail="Job is already completed or terminated")
 
-    await jobmanager.update_job(job_id, status=JobStatus.TERMINATED, message="Job has been terminated by user.")
+    if not await jobmanager.update_job(job_id, status=JobStatus.TERMINATED, message="Job has been terminated by user."):
+        # Finished between the check above and the update
+        raise HTTPException(status_code=400, detail="Job is already completed or terminated")
     logger.info(f"Job {job_id} has been terminated.")
     return {"message": f"Job {job_id} has been terminated."}
 
@@ -405,15 +465,23 @@ async def query_documents(query_request: QueryRequest):
 # ============================================================================
 
 @app.get("/v1/graph/connectors")
-async def list_graph_connectors():
+async def list_graph_connectors(limit: Optional[int] = None, cursor: Optional[str] = None):
     """
-    Lists all graph connectors in the database
+    Lists all graph connectors in the database, or, with `limit`, a page ordered by ID starting after `cursor`.
+    The cursor of the next page is returned in the X-Next-Cursor header, which is absent on the last page.
     """
     if not metadata_storage:
         raise HTTPException(status_code=500, detail="Server not initialized, or graph RAG is disabled")
+    check_page_limit(limit)
     logger.debug("Listing graph connectors")
-    connectors = await metadata_storage.fetch_all_graphconnector_info()
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(connectors))
+    headers = {}
+    if limit is None and cursor is None:
+        connectors = await metadata_storage.fetch_all_graphconnector_info()
+    else:
+        connectors, next_cursor = await metadata_storage.list_graphconnector_info(limit or max_page_limit, cursor)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(connectors), headers=headers)
 
 @app.delete("/v1/graph/connector/delete")
 async def delete_graph_connector(connector_id: str):
@@ -427,6 +495,8 @@ async def delete_graph_connector(connector_id: str):
     logger.info(f"Deleting graph connector: {connector_id}")
     await data_graph_db.remove_entity(None, {UPDATED_BY_KEY: connector_id}) # remove from graph db
     await vector_db.adelete(expr=f"graph_connector_id == '{connector_id}'") # remove from vector db
+    if vector_db_query_service:
+        vector_db_query_service.invalidate(connector_id)
     await metadata_storage.delete_graphconnector_info(connector_id) # remove metadata
 
 
@@ -506,17 +576,45 @@ async def explore_ontology_relations(explore_relations_request: ExploreRelations
 
 
 @app.post("/v1/graph/ingest/entities")
-async def ingest_entities(entity_ingest_request: EntityIngest, background_tasks: BackgroundTasks):
-    """Updates/Ingests entities to the database"""
+async def ingest_entities(entity_ingest_request: EntityIngest):
+    """
+    Updates/Ingests entities to the database, and returns once they are stored, so a connector's
+    checkpoints and deletes never get ahead of its entities.
+    Entities that could not be written (but may be retried) make it answer 503.
+    """
     if not data_graph_db or not ontology_graph_db:
         raise HTTPException(status_code=500, detail="Server not initialized, or graph RAG is disabled")
+    global pending_graph_entity_ingestions
     logger.debug(f"Updating entities: {entity_ingest_request.connector_name}, type={entity_ingest_request.entity_type}, count={len(entity_ingest_request.entities)}, fresh_until={entity_ingest_request.fresh_until}")
+    if pending_graph_entity_ingestions >= graph_ingest_max_pending:
+        # Back-pressure: connectors retry after Retry-After, with fewer requests in flight
+        return JSONResponse(status_code=status.HTTP_429_TOO_MANY_REQUESTS, content={"message": "Too many pending entity ingestions"},
+                            headers={"Retry-After": "1"})
+    pending_graph_entity_ingestions += 1
     try:
-        background_tasks.add_task(run_graph_entity_ingestion, entity_ingest_request.connector_name, entity_ingest_request.entity_type, entity_ingest_request.entities, entity_ingest_request.fresh_until)
+        result = await run_graph_entity_ingestion(entity_ingest_request.connector_name, entity_ingest_request.entity_type, entity_ingest_request.entities, entity_ingest_request.fresh_until)
     except ValueError as ve:
         return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"message": str(ve)})
-    return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Entity created/updated successfully"})
-
+    finally:
+        pending_graph_entity_ingestions -= 1
+    counts = result.counts()
+    # Entities failing with a primary key failed to be written, the others are invalid (and retrying them would not help)
+    if any(outcome.status == "failed" and outcome.primary_key is not None for outcome in result.outcomes):
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"message": "Some entities could not be stored", "counts": counts})
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Entity created/updated successfully", "counts": counts})
+
+
+@app.post("/v1/graph/ingest/entities/delete")
+async def delete_entities(entity_delete_request: EntityDelete):
+    """Deletes entities that a connector reports as removed at the source"""
+    if not vector_db or not data_graph_db:
+        raise HTTPException(status_code=500, detail="Server not initialized, or graph RAG is disabled")
+    logger.debug(f"Deleting entities: {entity_delete_request.connector_name}, type={entity_delete_request.entity_type}, count={len(entity_delete_request.primary_keys)}")
+    ingestor = GraphEntityIngestor(vector_db, data_graph_db, batch_size=graph_ingest_batch_size)
+    await ingestor.delete(entity_delete_request.connector_name, entity_delete_request.entity_type, entity_delete_request.primary_keys)
+    if vector_db_query_service:
+        vector_db_query_service.invalidate(entity_delete_request.connector_name)
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Entities deleted successfully"})
 
 async def _reverse_proxy(request: Request):
     """Reverse proxy to ontology agent service, which runs a separate FastAPI instance, and is responsible for handling ontology related requests."""
@@ -654,9 +752,9 @@ async def run_url_ingestion_with_progress(url: str, job_id: str, description: st
     """Function to run ingestion with proper job tracking and ID management"""
     if not vector_db or not metadata_storage or not jobmanager:
         raise HTTPException(status_code=500, detail="Server not initialized")
+    # Generate the datasource id from the url
+    datasource_id = DataSourceInfo.generate_id_from_url(url)
     try:
-        # Generate the datasource id from the url
-        datasource_id = DataSourceInfo.generate_id_from_url(url)
         logger.info(f"Ingesting datasource: url={url}, datasource_id={datasource_id}")
 
         # Get or create datasource configuration
@@ -687,7 +785,7 @@ async def run_url_ingestion_with_progress(url: str, job_id: str, description: st
 
         # Create a new loader and run ingestion
         logger.debug(f"Creating loader for datasource: datasource_id={datasource_id}")
-        async with Loader(vector_db, metadata_storage, datasource_info, jobmanager, max_ingestion_concurrency) as loader:
+        async with Loader(vector_db, metadata_storage, datasource_info, jobmanager, max_ingestion_concurrency, ingestion_pipeline_config) as loader:
             await loader.load_url(url, job_id, check_for_site_map, sitemap_max_urls)
 
         # Update source statistics after ingestion
@@ -697,59 +795,27 @@ async def run_url_ingestion_with_progress(url: str, job_id: str, description: st
         logger.error(traceback.format_exc())
         logger.error(f"Ingestion failed for job {job_id}: {e}")
         await jobmanager.update_job(job_id, status=JobStatus.FAILED, message="Error ingesting data", errors=[f"Error ingesting data: {e}"])
+    finally:
+        # Cached query results may predate the ingested documents (while ingesting, they expire after QUERY_RESULT_CACHE_TTL)
+        if vector_db_query_service:
+            vector_db_query_service.invalidate(datasource_id)
 
-async def run_graph_entity_ingestion(connector_name: str, entity_type: str, entities: List[Entity], fresh_until: int):
-    """Function to ingest a graph entity"""
+async def run_graph_entity_ingestion(connector_name: str, entity_type: str, entities: List[Entity], fresh_until: int) -> EntityIngestResult:
+    """Function to ingest graph entities, in batches"""
     if not vector_db or not metadata_storage or not ontology_graph_db or not data_graph_db:
         raise HTTPException(status_code=500, detail="Server not initialized")
     connector_id = connector_name
     current_time = datetime.datetime.now(datetime.timezone.utc)
 
-    documents : List[Document] = []
-    ids : List[str] = []
-    for entity in entities:
-        entity_hash = entity.get_hash()
-        primary_key = entity.generate_primary_key()
-
-        # Check if the entity with the same primary key already exists
-        try:
-            existing_data = await vector_db.aget_by_ids([primary_key])
-            if existing_data:
-                # If it exists, check the hash
-                if existing_data[0].metadata.get("hash") == entity_hash:
-                    logger.debug(f"Entity {primary_key} has not changed. Skipping ingestion.")
-                    return
-        except Exception:
-            # If aget fails, it's likely because the document doesn't exist, so we can proceed
-            pass
-
-        # Create a document from the entity properties
-        entity_properties = entity.get_external_properties()
-        entity_properties["entity_type"] = entity.entity_type
-        entity_text = utils.json_encode(entity_properties)
-        document = Document(
-            page_content=entity_text,
-            metadata=VectorDBGraphMetadata(
-                doc_type=DocTypeGraphEntity,
-                chunk_index=0,
-                total_chunks=1,
-                datasource_id=connector_id, # use connector_id as datasource_id
-                id=primary_key,
-                graph_entity_hash=entity_hash,
-                graph_connector_id=connector_id,
-                graph_entity_type=entity.entity_type,
-                graph_entity_primary_key=primary_key
-            ).model_dump()
-        )
-        documents.append(document)
-        ids.append(primary_key)
-
-    # Add the document to the vector database
-    await vector_db.aadd_documents(documents, ids=ids)
-    logger.info(f"Successfully ingested {len(entities)} entities into the vector database.")
-
-    # Update data graph with the new entities
-    await data_graph_db.update_entity(entity_type, entities, fresh_until=fresh_until, client_name=connector_name)
+    ingestor = GraphEntityIngestor(vector_db, data_graph_db, batch_size=graph_ingest_batch_size)
+    result = await ingestor.ingest(connector_name, entity_type, entities, fresh_until=fresh_until)
+    counts = result.counts()
+    logger.info(f"Ingested {len(entities)} entities of type {entity_type} from {connector_name}: {counts}")
+    for outcome in result.outcomes:
+        if outcome.status == "failed":
+            logger.warning(f"Failed to ingest entity {outcome.entity_type} {outcome.primary_key}: {outcome.error}")
+    if vector_db_query_service and (counts.get("created") or counts.get("updated")):
+        vector_db_query_service.invalidate(connector_id)
 
     # Get or create graph connector configuration
     connector_info = await metadata_storage.get_graphconnector_info(connector_id)
@@ -766,6 +832,7 @@ async def run_graph_entity_ingestion(connector_name: str, entity_type: str, enti
         connector_info.last_seen = current_time
 
     await metadata_storage.store_graphconnector_info(connector_info, ttl=utils.DURATION_DAY)
+    return result
 
 
 async def init_tests(logger: logging.Logger,
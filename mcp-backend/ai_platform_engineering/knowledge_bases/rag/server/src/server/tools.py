@@ -25,6 +25,11 @@ if search_tool_keyword_bias < 0.0 or search_tool_keyword_bias > 1.0:
     logger.warning(f"Invalid SEARCH_TOOL_KEYWORD_BIAS value: {search_tool_keyword_bias}, must be between 0.0 and 1.0. Using default value 0.3")
     search_tool_keyword_bias = 0.3
 
+search_tool_ranker = os.getenv("SEARCH_TOOL_RANKER", "weighted") # weighted (by SEARCH_TOOL_KEYWORD_BIAS) or rrf (reciprocal rank fusion)
+if search_tool_ranker not in ("weighted", "rrf"):
+    logger.warning(f"Invalid SEARCH_TOOL_RANKER value: {search_tool_ranker}, must be 'weighted' or 'rrf'. Using default value 'weighted'")
+    search_tool_ranker = "weighted"
+
 class AgentTools:
     def __init__(self, redis_client: Redis, vector_db_query_service: VectorDBQueryService, data_graph_db: Optional[GraphDB] = None, ontology_graph_db: Optional[GraphDB] = None):
         self.redis_client = redis_client
@@ -100,8 +105,8 @@ class AgentTools:
                 filters=filters,
                 limit=limit,
                 similarity_threshold=similarity_threshold,
-                ranker="weighted",
-                ranker_params={"weights": weights} # More weight to dense (semantic) score
+                ranker=search_tool_ranker,
+                ranker_params={"weights": weights} if search_tool_ranker == "weighted" else None # More weight to dense (semantic) score
             )
         except Exception as e:
             logger.error(f"Traceback: {traceback.format_exc()}")
@@ -0,0 +1,188 @@
+"""
+Tests for AsyncConnector, the asynchronous graph connector client, against a local HTTP server
+standing in for /v1/graph/ingest/entities, and for the server's gzip request route.
+"""
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from common.connector import AsyncConnector
+from common.models.graph import Entity
+from server.gzip_request import GzipRequest, GzipRoute
+from server.models import EntityIngest
+
+
+class IngestServer:
+    """
+    Accepts entity batches (HTTP/1.1, keep-alive) and records them. Requests beyond `capacity`
+    concurrent ones get a 429; `fail_after` accepted batches, the following ones get a 400.
+    """
+
+    def __init__(self, capacity=100, delay=0.01, fail_after=None):
+        self.capacity = capacity
+        self.delay = delay
+        self.fail_after = fail_after
+        self.batches = []
+        self.throttled = 0
+        self.active = 0
+        self.max_active = 0
+        self.connections = set()
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self.respond(200, {"status": "healthy"})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                with server.lock:
+                    server.connections.add(self.client_address)
+                    if server.active >= server.capacity:
+                        server.throttled += 1
+                        self.respond(429, {"message": "busy"}, {"Retry-After": "0.02"})
+                        return
+                    if server.fail_after is not None and len(server.batches) >= server.fail_after:
+                        self.respond(400, {"message": "rejected"})
+                        return
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+                time.sleep(server.delay)
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                with server.lock:
+                    server.batches.append(EntityIngest.model_validate_json(body))
+                    server.active -= 1
+                self.respond(200, {"message": "ok"})
+
+            def respond(self, code, content, headers={}):
+                data = json.dumps(content).encode()
+                self.send_response(code)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def received(self):
+        return [entity.all_properties["id"] for batch in self.batches for entity in batch.entities]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def ingest_server():
+    servers = []
+
+    def start(**options):
+        servers.append(IngestServer(**options))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def entities(count, types=("Service", "Host", "Team")):
+    for i in range(count):
+        yield Entity(entity_type=types[i % len(types)], primary_key_properties=["id"],
+                     all_properties={"id": i, "name": f"entity {i}", "labels": {"tier": "web"}})
+
+
+@pytest.mark.asyncio
+async def test_entities_are_streamed_in_gzipped_batches_per_type(ingest_server):
+    server = ingest_server()
+    async with AsyncConnector(name="test", server_addr=server.url, max_batch_entities=100, max_in_flight=4) as connector:
+        assert await connector.sync_entities(entities(3000)) == 3000
+
+    assert sorted(server.received()) == list(range(3000))
+    assert all(len(batch.entities) <= 100 and {entity.entity_type for entity in batch.entities} == {batch.entity_type}
+               for batch in server.batches)
+    assert {batch.connector_name for batch in server.batches} == {"test"}
+    assert 1 < server.max_active <= 4
+    assert len(server.connections) <= 5 # pooled
+
+    # Batches are also bounded by their JSON size
+    server.batches.clear()
+    async with AsyncConnector(name="test", server_addr=server.url, max_batch_bytes=4096, compress_level=0) as connector:
+        await connector.sync_entities(entities(300))
+    assert len(server.batches) > 10 and all(len(batch.model_dump_json()) < 6000 for batch in server.batches)
+
+
+@pytest.mark.asyncio
+async def test_throttled_batches_are_retried_with_fewer_in_flight(ingest_server):
+    server = ingest_server(capacity=2, delay=0.02)
+    async with AsyncConnector(name="test", server_addr=server.url, max_batch_entities=50, max_in_flight=8) as connector:
+        await connector.sync_entities(entities(2000))
+
+    # The window shrinks to what the server takes, instead of 6 of 8 requests being turned away
+    assert 0 < server.throttled < len(server.batches) / 2
+    assert sorted(server.received()) == list(range(2000))
+
+
+@pytest.mark.asyncio
+async def test_failed_sync_resumes_from_checkpoint(ingest_server, tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    server = ingest_server(fail_after=10)
+    connector = AsyncConnector(name="test", server_addr=server.url, max_batch_entities=100, max_in_flight=2,
+                               checkpoint_path=checkpoint_path, checkpoint_interval=0)
+    with pytest.raises(httpx.HTTPStatusError):
+        await connector.sync_entities(entities(3000), fresh_until=1234, sync_id="sync-1")
+    await connector.close()
+    checkpoint = connector.load_checkpoint("sync-1")
+    assert checkpoint["fresh_until"] == 1234
+    assert 0 < checkpoint["offset"] < 3000
+    # Every entity before the checkpoint was accepted
+    assert set(range(checkpoint["offset"])) <= set(server.received())
+
+    first_run = len(server.batches)
+    server.fail_after = None
+    async with AsyncConnector(name="test", server_addr=server.url, max_batch_entities=100,
+                              checkpoint_path=checkpoint_path) as connector:
+        # Another sync does not resume it
+        assert await connector.sync_entities(entities(10), sync_id="sync-2") == 10
+        server.batches = server.batches[:first_run]
+        assert await connector.sync_entities(entities(3000), sync_id="sync-1") == 3000 - checkpoint["offset"]
+
+    resumed = server.batches[first_run:]
+    assert min(entity.all_properties["id"] for batch in resumed for entity in batch.entities) == checkpoint["offset"]
+    assert {batch.fresh_until for batch in resumed} == {1234}
+    assert set(server.received()) == set(range(3000))
+    assert not (tmp_path / "checkpoint.json").exists()
+
+
+def test_gzip_route_decompresses_request_bodies(monkeypatch):
+    app = FastAPI()
+    app.router.route_class = GzipRoute
+
+    @app.post("/ingest")
+    async def ingest(request: EntityIngest):
+        return {"count": len(request.entities)}
+
+    client = TestClient(app)
+    body = EntityIngest(entity_type="Service", connector_name="test", entities=list(entities(50, types=("Service",)))).model_dump_json().encode()
+    assert client.post("/ingest", content=body, headers={"Content-Type": "application/json"}).json() == {"count": 50}
+    gzipped = gzip.compress(body)
+    assert client.post("/ingest", content=gzipped, headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}).json() == {"count": 50}
+    assert client.post("/ingest", content=b"not gzip", headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}).status_code == 400
+
+    monkeypatch.setattr(GzipRequest, "max_body_size", 1024)
+    assert client.post("/ingest", content=gzipped, headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}).status_code == 413
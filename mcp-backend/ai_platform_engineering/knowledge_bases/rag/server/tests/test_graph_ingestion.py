@@ -0,0 +1,168 @@
+"""
+Tests for GraphEntityIngestor, with an in-memory vector store (and Milvus Lite where available),
+a deterministic fake embedding and a graph database that records its updates.
+"""
+import uuid
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from common.constants import PROP_DELIMITER
+from common.models.graph import Entity
+from server.graph_ingestion import GraphEntityIngestor
+
+
+class RecordingGraphDB:
+    def __init__(self):
+        self.updates = []
+        self.removals = []
+        self.fail = False
+
+    async def update_entity(self, entity_type, entities, client_name, fresh_until):
+        if self.fail:
+            raise RuntimeError("graph database unavailable")
+        self.updates.append((entity_type, [entity.generate_primary_key() for entity in entities], fresh_until))
+
+    async def remove_entities(self, entity_type, primary_keys, client_name):
+        self.removals.append((entity_type, primary_keys, client_name))
+
+
+class CountingVectorStore(InMemoryVectorStore):
+    def __init__(self):
+        super().__init__(DeterministicFakeEmbedding(size=16))
+        self.fetches = 0
+        self.writes = []
+        self.fail_writes = False
+
+    async def aget_by_ids(self, ids, /):
+        self.fetches += 1
+        return await super().aget_by_ids(ids)
+
+    async def aadd_documents(self, documents, **kwargs):
+        if self.fail_writes:
+            raise RuntimeError("vector store unavailable")
+        self.writes.append(kwargs["ids"])
+        return await super().aadd_documents(documents, **kwargs)
+
+
+def pod(n, image="nginx:1.25", entity_type="Pod"):
+    return Entity(entity_type=entity_type, all_properties={"namespace": "default", "name": f"pod-{n}", "image": image},
+                  primary_key_properties=["namespace", "name"])
+
+
+def key(n):
+    return f"default{PROP_DELIMITER}pod-{n}"
+
+
+def statuses(result):
+    return [outcome.status for outcome in result.outcomes]
+
+
+@pytest.mark.asyncio
+async def test_entities_are_fetched_and_written_per_batch():
+    vector_db, graph_db = CountingVectorStore(), RecordingGraphDB()
+    ingestor = GraphEntityIngestor(vector_db, graph_db, batch_size=100)
+
+    result = await ingestor.ingest("k8s", "Pod", [pod(n) for n in range(250)], fresh_until=1000)
+    assert statuses(result) == ["created"] * 250
+    assert (vector_db.fetches, [len(ids) for ids in vector_db.writes]) == (3, [100, 100, 50])
+    assert [len(keys) for _, keys, _ in graph_db.updates] == [100, 100, 50]
+
+    # Unchanged entities do not stop the rest of the batch, and are only refreshed in the graph
+    vector_db.writes.clear()
+    graph_db.updates.clear()
+    entities = [pod(n) for n in range(250)]
+    entities[10] = pod(10, image="nginx:1.27")
+    entities[240] = pod(240, image="nginx:1.27")
+    entities.insert(20, pod(999, entity_type="Deployment"))
+    result = await ingestor.ingest("k8s", "Pod", entities, fresh_until=2000)
+    assert result.counts() == {"unchanged": 248, "updated": 2, "failed": 1}
+    assert (result.outcomes[10].status, result.outcomes[20].status, result.outcomes[241].status) == ("updated", "failed", "updated")
+    assert "Mismatched entity type" in result.outcomes[20].error
+    assert vector_db.writes == [[key(10)], [key(240)]]
+    assert sum(len(keys) for _, keys, _ in graph_db.updates) == 250
+    assert {fresh_until for _, _, fresh_until in graph_db.updates} == {2000}
+
+    [stored] = await vector_db.aget_by_ids([key(10)])
+    assert "nginx:1.27" in stored.page_content
+    assert stored.metadata["graph_entity_hash"] == pod(10, image="nginx:1.27").get_hash()
+
+
+@pytest.mark.asyncio
+async def test_failures_are_reported_per_entity():
+    vector_db, graph_db = CountingVectorStore(), RecordingGraphDB()
+    ingestor = GraphEntityIngestor(vector_db, graph_db, batch_size=10)
+    await ingestor.ingest("k8s", "Pod", [pod(n) for n in range(10)], fresh_until=1000)
+
+    # A failed vector store write fails the changed entities, unchanged ones are still refreshed
+    vector_db.fail_writes = True
+    result = await ingestor.ingest("k8s", "Pod", [pod(0, image="nginx:1.27"), pod(1), pod(10)], fresh_until=2000)
+    assert statuses(result) == ["failed", "unchanged", "failed"]
+    assert "vector store unavailable" in result.outcomes[0].error
+
+    # A failed graph update fails its batch only
+    vector_db.fail_writes = False
+    graph_db.fail = True
+    broken = Entity(entity_type="Pod", all_properties={"name": "x"}, primary_key_properties=["namespace", "name"])
+    result = await ingestor.ingest("k8s", "Pod", [pod(11), broken], fresh_until=3000)
+    assert statuses(result) == ["failed", "failed"]
+    assert "graph database unavailable" in result.outcomes[0].error
+    assert result.outcomes[1].primary_key is None and "Invalid entity" in result.outcomes[1].error
+
+
+@pytest.mark.asyncio
+async def test_duplicate_entities_in_a_batch_are_written_once():
+    vector_db, graph_db = CountingVectorStore(), RecordingGraphDB()
+    ingestor = GraphEntityIngestor(vector_db, graph_db)
+
+    result = await ingestor.ingest("k8s", "Pod", [pod(0), pod(1), pod(0, image="nginx:1.27")], fresh_until=1000)
+    assert statuses(result) == ["created", "created", "created"]
+    assert vector_db.writes == [[key(0), key(1)]]
+    assert graph_db.updates == [("Pod", [key(0), key(1)], 1000)]
+
+    # The last submitted state wins in both stores
+    [stored] = await vector_db.aget_by_ids([key(0)])
+    assert stored.metadata["graph_entity_hash"] == pod(0, image="nginx:1.27").get_hash()
+
+
+@pytest.mark.asyncio
+async def test_deleted_entities_are_removed_from_both_stores():
+    vector_db, graph_db = CountingVectorStore(), RecordingGraphDB()
+    ingestor = GraphEntityIngestor(vector_db, graph_db, batch_size=2)
+    await ingestor.ingest("k8s", "Pod", [pod(n) for n in range(5)], fresh_until=1000)
+
+    await ingestor.delete("k8s", "Pod", [key(1), key(3), key(3), key(4), "missing"])
+    assert graph_db.removals == [("Pod", [key(1), key(3)], "k8s"), ("Pod", [key(4), "missing"], "k8s")]
+    assert sorted(doc.id for doc in await vector_db.aget_by_ids([key(n) for n in range(5)])) == [key(0), key(2)]
+
+    # A deleted entity that comes back is created again
+    result = await ingestor.ingest("k8s", "Pod", [pod(1), pod(2)], fresh_until=2000)
+    assert statuses(result) == ["created", "unchanged"]
+
+
+@pytest.mark.asyncio
+async def test_milvus_entities_are_replaced_when_they_change(tmp_path):
+    pytest.importorskip("milvus_lite")
+    from langchain_milvus import BM25BuiltInFunction, Milvus
+
+    vector_db = Milvus(
+        embedding_function=DeterministicFakeEmbedding(size=16),
+        collection_name=f"rag_{uuid.uuid4().hex}",
+        connection_args={"uri": str(tmp_path / "milvus.db")},
+        index_params=[{"index_type": "FLAT", "metric_type": "COSINE"}, {"index_type": "SPARSE_INVERTED_INDEX", "metric_type": "BM25"}],
+        builtin_function=BM25BuiltInFunction(output_field_names="sparse"),
+        vector_field=["dense", "sparse"],
+        enable_dynamic_field=True,
+    )
+    ingestor = GraphEntityIngestor(vector_db, RecordingGraphDB())
+    assert statuses(await ingestor.ingest("k8s", "Pod", [pod(0), pod(1)], fresh_until=1000)) == ["created", "created"]
+    result = await ingestor.ingest("k8s", "Pod", [pod(0, image="nginx:1.27"), pod(1), pod(2)], fresh_until=2000)
+    assert statuses(result) == ["updated", "unchanged", "created"]
+
+    rows = await vector_db.aclient.query(vector_db.collection_name, filter="pk like 'default%'", output_fields=["pk", "graph_entity_hash"])
+    assert sorted(row["pk"] for row in rows) == [key(0), key(1), key(2)]
+    assert await ingestor.fetch_entity_hashes([key(0), "missing"]) == {key(0): pod(0, image="nginx:1.27").get_hash()}
+
+    await ingestor.delete("k8s", "Pod", [key(1)])
+    assert await ingestor.fetch_entity_hashes([key(0), key(1), key(2)]) == {key(0): pod(0, image="nginx:1.27").get_hash(), key(2): pod(2).get_hash()}
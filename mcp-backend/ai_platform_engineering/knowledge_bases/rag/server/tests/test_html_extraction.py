@@ -0,0 +1,76 @@
+"""
+Parity tests for the lxml HTML extractor against the BeautifulSoup scrapers (Loader.custom_parser).
+"""
+import datetime
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from common.job_manager import JobManager
+from common.models.rag import DataSourceInfo
+from server.loader.loader import Loader
+from server.loader.url import lxml_extractor
+from server.metadata_storage import MetadataStorage
+
+FIXTURES = Path(__file__).parent / "fixtures" / "html"
+PAGES = sorted(FIXTURES.glob("*.html"))
+
+
+async def bs4_extract(loader, content: bytes, encoding: str, url: str):
+    soup = BeautifulSoup(content.decode(encoding), "html.parser")
+    return await loader.custom_parser(soup, url)
+
+
+def lxml_extract(content: bytes, encoding: str, url: str):
+    root = lxml_extractor.parse_html(content, encoding)
+    return lxml_extractor.extract(root, url, lxml_extractor.detect_generator(root) if root is not None else None)
+
+
+@pytest.fixture
+def loader(mock_vector_db, mock_redis):
+    now = datetime.datetime.now()
+    datasource = DataSourceInfo(datasource_id="ds_test", description="", source_type="web", path="https://example.com",
+                                created_at=now, last_updated=now)
+    return Loader(mock_vector_db, MetadataStorage(redis_client=mock_redis), datasource, JobManager(redis_client=mock_redis), 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("page", PAGES, ids=[page.stem for page in PAGES])
+async def test_parity_with_beautifulsoup(loader, page):
+    content = page.read_bytes()
+    url = f"https://example.com/{page.name}"
+
+    expected = await bs4_extract(loader, content, "utf-8", url)
+    assert expected[0]  # the fixture has text
+
+    assert lxml_extract(content, "utf-8", url) == expected
+
+
+@pytest.mark.asyncio
+async def test_parity_with_non_utf8_charset(loader):
+    content = "<html lang='fr'><head><title>Crème brûlée</title></head><body><p>Déjà vu — «ça»</p></body></html>".encode("cp1252")
+
+    expected = await bs4_extract(loader, content, "cp1252", "https://example.com/fr")
+
+    assert lxml_extract(content, "cp1252", "https://example.com/fr") == expected
+    assert expected[0] == "Crème brûlée\nDéjà vu — «ça»"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("html", ["", "   \n", "<html><body></body></html>"])
+async def test_parity_on_empty_pages(loader, html):
+    expected = await bs4_extract(loader, html.encode(), "utf-8", "https://example.com")
+    assert lxml_extract(html.encode(), "utf-8", "https://example.com") == expected
+
+
+def test_detected_generator_selects_the_scraper():
+    root = lxml_extractor.parse_html((FIXTURES / "docusaurus.html").read_bytes(), "utf-8")
+    assert lxml_extractor.detect_generator(root) == "Docusaurus v3.5.2"
+
+    content, _ = lxml_extractor.extract(root, "https://example.com", "Docusaurus v3.5.2")
+    assert "The platform runs a" in content  # the <article> only
+    assert "Agentic Platform" not in content and "Built with Docusaurus" not in content
+
+    content, _ = lxml_extractor.extract(root, "https://example.com", None)
+    assert "Skip to main content" in content and "Blog" not in content  # whole page, without <nav>
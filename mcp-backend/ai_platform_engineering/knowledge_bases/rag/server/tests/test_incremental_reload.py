@@ -0,0 +1,358 @@
+"""
+Tests for incremental re-crawls of a web datasource.
+
+A local static HTTP site (sitemap.xml plus HTML pages, with ETag and
+Last-Modified validators) is ingested, then reloaded with a fresh Loader, the
+way /v1/datasource/reload does. Embedding calls are counted on the vector
+store's embedding model.
+"""
+import datetime
+import hashlib
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from common.job_manager import JobInfo, JobManager, JobStatus
+from common.models.rag import DataSourceInfo, DocumentInfo
+from server.loader.loader import Loader
+from common.utils import sanitize_url
+from server.metadata_storage import MetadataStorage
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: int = 0
+    texts: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        return super().embed_documents(texts)
+
+
+class InMemoryRedis:
+    """The subset of redis.asyncio.Redis used by MetadataStorage."""
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value):
+        self.values[key] = value
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(members)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.sets.pop(key, None)
+
+
+class StaticSite:
+    """Serves /sitemap.xml and HTML pages, honouring If-None-Match and If-Modified-Since."""
+
+    LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+    def __init__(self):
+        self.pages = {}    # path -> HTML
+        self.lastmod = {}  # path -> sitemap <lastmod>
+        self.requests = []
+        self.not_modified = 0
+        self.truncate_sitemap = False # drop the connection halfway through the sitemap
+        self.fail_sitemap_lookup = False # drop the connection of robots.txt and sitemap requests
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append(self.path)
+                if site.fail_sitemap_lookup and self.path in ("/robots.txt", "/sitemap.xml"):
+                    self.close_connection = True
+                    return
+                if self.path == "/sitemap.xml":
+                    body = site.sitemap().encode()
+                    if site.truncate_sitemap:
+                        self.send_response(200)
+                        self.send_header("Content-Type", "application/xml")
+                        self.send_header("Content-Length", str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body[:len(body) // 2])
+                        self.close_connection = True
+                        return
+                    return self.send(body, "application/xml")
+                if self.path not in site.pages:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = site.pages[self.path].encode()
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    site.not_modified += 1
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send(body, "text/html", {"ETag": etag, "Last-Modified": site.LAST_MODIFIED})
+
+            def send(self, body, content_type, headers={}):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def sitemap(self):
+        entries = []
+        for path in self.pages:
+            lastmod = f"<lastmod>{self.lastmod[path]}</lastmod>" if path in self.lastmod else ""
+            entries.append(f"<url><loc>{self.url}{path}</loc>{lastmod}</url>")
+        return ('<?xml version="1.0" encoding="UTF-8"?>'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">' + "".join(entries) + "</urlset>")
+
+    def page_requests(self):
+        return [path for path in self.requests if path.endswith(".html")]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def html(title, paragraphs):
+    body = "".join(f"<p>{p}</p>" for p in paragraphs)
+    return f"<html lang='en'><head><title>{title}</title></head><body><nav>Menu</nav>{body}</body></html>"
+
+
+def paragraphs(page, count=6):
+    return [f"Paragraph {i} of {page}. " + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 3 for i in range(count)]
+
+
+@pytest.fixture
+def site():
+    site = StaticSite()
+    for name in ("intro", "install", "usage"):
+        site.pages[f"/docs/{name}.html"] = html(name, paragraphs(name))
+        site.lastmod[f"/docs/{name}.html"] = "2025-01-01"
+    yield site
+    site.close()
+
+
+@pytest.fixture
+def embeddings():
+    return CountingEmbeddings(size=8)
+
+
+@pytest.fixture
+def vstore(embeddings):
+    return InMemoryVectorStore(embedding=embeddings)
+
+
+@pytest.fixture
+def metadata_storage():
+    return MetadataStorage(redis_client=InMemoryRedis()) # type: ignore
+
+
+@pytest.fixture
+def datasource_info(site):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return DataSourceInfo(
+        datasource_id=DataSourceInfo.generate_id_from_url(site.url),
+        description="Fixture site",
+        source_type="web",
+        path=site.url,
+        check_for_site_map=True,
+        default_chunk_size=300,
+        default_chunk_overlap=0,
+        created_at=now,
+        last_updated=now,
+    )
+
+
+@pytest.fixture
+def crawl(site, vstore, metadata_storage, datasource_info):
+    """Run one full ingestion pass with a fresh Loader, as a reload does."""
+    async def crawl(**options):
+        jobmanager = MagicMock(spec=JobManager)
+        jobmanager.update_job = AsyncMock(return_value=True)
+        jobmanager.is_job_terminated = AsyncMock(return_value=False)
+        jobmanager.get_job = AsyncMock(return_value=JobInfo(
+            job_id="job", status=JobStatus.IN_PROGRESS, message="", processed_counter=len(site.pages),
+            failed_counter=0, created_at=datetime.datetime.now(), completed_at=None, total=len(site.pages), errors=[]))
+        site.requests.clear()
+        async with Loader(vstore, metadata_storage, datasource_info, jobmanager, max_concurrency=4) as loader:
+            await loader.load_url(site.url, f"job_{uuid.uuid4().hex}", check_for_site_map=True, **options)
+        crawl.final_update = jobmanager.update_job.await_args.kwargs
+        return loader.stats
+    return crawl
+
+
+def chunk_ids(vstore):
+    return set(vstore.store)
+
+
+@pytest.mark.asyncio
+async def test_unchanged_reload_makes_no_embedding_calls(crawl, site, embeddings, vstore):
+    await crawl()
+    assert embeddings.calls > 0
+    ingested = chunk_ids(vstore)
+    calls = embeddings.calls
+
+    stats = await crawl()
+
+    assert embeddings.calls == calls
+    assert chunk_ids(vstore) == ingested
+    assert stats["unchanged_urls"] == len(site.pages)
+    assert site.page_requests() == []  # sitemap <lastmod> unchanged, pages not even fetched
+
+
+@pytest.mark.asyncio
+async def test_conditional_fetch_without_sitemap_lastmod(crawl, site, embeddings):
+    site.lastmod.clear()
+    await crawl()
+    calls = embeddings.calls
+
+    stats = await crawl()
+
+    assert embeddings.calls == calls
+    assert site.not_modified == len(site.pages)
+    assert stats["unchanged_urls"] == len(site.pages)
+
+
+@pytest.mark.asyncio
+async def test_same_content_with_new_validators_is_not_embedded(crawl, site, embeddings):
+    await crawl()
+    calls = embeddings.calls
+    # Only whitespace in the markup changes: new ETag and lastmod, same normalized text
+    site.pages["/docs/usage.html"] = site.pages["/docs/usage.html"].replace("<p>", "<p>\n   ")
+    site.lastmod["/docs/usage.html"] = "2025-02-01"
+
+    stats = await crawl()
+
+    assert site.page_requests() == ["/docs/usage.html"]
+    assert embeddings.calls == calls
+    assert stats["unchanged_urls"] == len(site.pages)
+
+
+@pytest.mark.asyncio
+async def test_changed_page_reembeds_only_changed_chunks(crawl, site, embeddings, vstore, metadata_storage, datasource_info):
+    await crawl()
+    texts = embeddings.texts
+    before = {doc_id: doc["text"] for doc_id, doc in vstore.store.items()}
+
+    changed = paragraphs("install")
+    changed[-1] = changed[-1].replace("Lorem", "Rewritten", 1)
+    site.pages["/docs/install.html"] = html("install", changed)
+    site.lastmod["/docs/install.html"] = "2025-02-01"
+
+    stats = await crawl()
+
+    assert embeddings.texts - texts == 1
+    assert stats["embedded_chunks"] == 1
+    assert stats["reused_chunks"] > 0
+    after = {doc_id: doc["text"] for doc_id, doc in vstore.store.items()}
+    assert set(after) == set(before)
+    assert [doc_id for doc_id in after if after[doc_id] != before[doc_id]] == [
+        next(doc_id for doc_id, text in after.items() if "Rewritten" in text)]
+
+
+@pytest.mark.asyncio
+async def test_shrunk_page_drops_trailing_chunks(crawl, site, vstore, metadata_storage, datasource_info):
+    await crawl()
+    site.pages["/docs/intro.html"] = html("intro", paragraphs("intro", count=2))
+    site.lastmod["/docs/intro.html"] = "2025-02-01"
+
+    await crawl()
+
+    document_id = DocumentInfo.generate_id_from_url(datasource_info.datasource_id, sanitize_url(f"{site.url}/docs/intro.html"))
+    info = await metadata_storage.get_document_info(document_id)
+    assert info is not None and info.chunk_count < 6
+    stored = sorted(i for i in chunk_ids(vstore) if i.startswith(document_id))
+    assert stored == [f"{document_id}_chunk_{i}" for i in range(info.chunk_count)]
+
+
+@pytest.mark.asyncio
+async def test_vanished_page_is_removed(crawl, site, vstore, metadata_storage, datasource_info):
+    await crawl()
+    documents = set(await metadata_storage.fetch_document_ids(datasource_info.datasource_id))
+    del site.pages["/docs/usage.html"]
+
+    stats = await crawl()
+
+    remaining = set(await metadata_storage.fetch_document_ids(datasource_info.datasource_id))
+    assert len(remaining) == len(documents) - 1
+    removed = (documents - remaining).pop()
+    assert await metadata_storage.get_document_info(removed) is None
+    assert not any(i.startswith(removed) for i in chunk_ids(vstore))
+    assert stats["removed_documents"] == 1
+
+
+@pytest.mark.asyncio
+async def test_documents_beyond_url_limit_are_kept(crawl, site, vstore, metadata_storage, datasource_info):
+    await crawl()
+    documents = set(await metadata_storage.fetch_document_ids(datasource_info.datasource_id))
+    ingested = chunk_ids(vstore)
+
+    stats = await crawl(sitemap_max_urls=1)
+
+    # Pages past the limit were not seen, not removed from the source
+    assert set(await metadata_storage.fetch_document_ids(datasource_info.datasource_id)) == documents
+    assert chunk_ids(vstore) == ingested
+    assert stats["removed_documents"] == 0
+    assert crawl.final_update["status"] == JobStatus.COMPLETED # the limit was asked for, it is not an error
+
+
+@pytest.mark.asyncio
+async def test_documents_are_kept_when_sitemap_fails(crawl, site, vstore, metadata_storage, datasource_info):
+    await crawl()
+    documents = set(await metadata_storage.fetch_document_ids(datasource_info.datasource_id))
+    ingested = chunk_ids(vstore)
+    site.truncate_sitemap = True
+
+    stats = await crawl()
+
+    # Only the pages read before the sitemap broke off were seen; the others are still part of the source
+    assert site.page_requests() == []
+    assert set(await metadata_storage.fetch_document_ids(datasource_info.datasource_id)) == documents
+    assert chunk_ids(vstore) == ingested
+    assert stats["removed_documents"] == 0
+    # And the job says the datasource was only partly crawled
+    assert crawl.final_update["status"] == JobStatus.COMPLETED_WITH_ERRORS
+    assert [error.split(" could not")[0] for error in crawl.final_update["errors"]] == [f"Sitemap {site.url}/sitemap.xml"]
+
+
+@pytest.mark.asyncio
+async def test_documents_are_kept_when_sitemap_lookup_fails(crawl, site, vstore, metadata_storage, datasource_info):
+    await crawl()
+    documents = set(await metadata_storage.fetch_document_ids(datasource_info.datasource_id))
+    ingested = chunk_ids(vstore)
+    site.fail_sitemap_lookup = True
+
+    stats = await crawl()
+
+    # Only the site URL itself was found, which does not make the pages of the sitemap vanished
+    assert "/robots.txt" in site.requests and "/sitemap.xml" in site.requests
+    assert set(await metadata_storage.fetch_document_ids(datasource_info.datasource_id)) == documents
+    assert chunk_ids(vstore) == ingested
+    assert stats["removed_documents"] == 0
+    assert crawl.final_update["status"] == JobStatus.COMPLETED_WITH_ERRORS
+    assert crawl.final_update["errors"] and all("could not be fetched" in error for error in crawl.final_update["errors"])
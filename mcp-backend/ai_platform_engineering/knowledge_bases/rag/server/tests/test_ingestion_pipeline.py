@@ -0,0 +1,143 @@
+"""
+Tests for the staged ingestion pipeline (parse -> split -> embed -> upsert) used by Loader.load_url.
+"""
+import datetime
+import math
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from common.job_manager import JobInfo, JobManager, JobStatus
+from common.models.rag import DataSourceInfo
+from server.loader.loader import Loader
+from server.loader.pipeline import PipelineConfig
+from server.metadata_storage import MetadataStorage
+from tests.test_incremental_reload import CountingEmbeddings, InMemoryRedis, StaticSite, html, paragraphs
+
+PAGES = 12
+
+
+class BatchRecordingEmbeddings(CountingEmbeddings):
+    batches: list = []
+    fail: bool = False
+
+    def embed_documents(self, texts):
+        if self.fail:
+            raise RuntimeError("embedding service unavailable")
+        self.batches = self.batches + [len(texts)]
+        return super().embed_documents(texts)
+
+
+class PrecomputedVectorStore(InMemoryVectorStore):
+    """An in-memory store that, like Milvus, can write precomputed embeddings."""
+
+    def __init__(self, embedding):
+        super().__init__(embedding=embedding)
+        self.upserts = []
+
+    def add_embeddings(self, texts, embeddings, metadatas=None, ids=None, **kwargs):
+        self.upserts.append(len(texts))
+        for id_, text, vector, metadata in zip(ids, texts, embeddings, metadatas):
+            self.store[id_] = {"id": id_, "vector": vector, "text": text, "metadata": metadata}
+        return ids
+
+
+@pytest.fixture
+def site():
+    site = StaticSite()
+    for n in range(PAGES):
+        site.pages[f"/docs/page-{n}.html"] = html(f"page {n}", paragraphs(f"page {n}", count=3 + n % 4))
+    yield site
+    site.close()
+
+
+def make_datasource(site):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return DataSourceInfo(
+        datasource_id=DataSourceInfo.generate_id_from_url(site.url),
+        description="Fixture site",
+        source_type="web",
+        path=site.url,
+        check_for_site_map=True,
+        default_chunk_size=300,
+        default_chunk_overlap=0,
+        created_at=now,
+        last_updated=now,
+    )
+
+
+def make_jobmanager(total):
+    jobmanager = MagicMock(spec=JobManager)
+    jobmanager.update_job = AsyncMock(return_value=True)
+    jobmanager.is_job_terminated = AsyncMock(return_value=False)
+    jobmanager.get_job = AsyncMock(return_value=JobInfo(
+        job_id="job", status=JobStatus.IN_PROGRESS, message="", processed_counter=total,
+        failed_counter=0, created_at=datetime.datetime.now(), completed_at=None, total=total, errors=[]))
+    return jobmanager
+
+
+async def ingest(site, vstore, config, metadata_storage=None, jobmanager=None):
+    metadata_storage = metadata_storage or MetadataStorage(redis_client=InMemoryRedis()) # type: ignore
+    jobmanager = jobmanager or make_jobmanager(len(site.pages))
+    async with Loader(vstore, metadata_storage, make_datasource(site), jobmanager, 8, pipeline_config=config) as loader:
+        await loader.load_url(site.url, f"job_{uuid.uuid4().hex}", check_for_site_map=True)
+    return loader
+
+
+def increments(jobmanager, name):
+    return sum(call.kwargs.get(name, 0) for call in jobmanager.update_job.call_args_list)
+
+
+@pytest.mark.asyncio
+async def test_chunks_from_many_pages_are_packed_into_fixed_size_batches(site):
+    embeddings = BatchRecordingEmbeddings(size=8)
+    vstore = PrecomputedVectorStore(embeddings)
+    config = PipelineConfig(embed_concurrency=1, embed_batch_size=16, upsert_concurrency=1, upsert_batch_size=32, flush_interval=5)
+
+    loader = await ingest(site, vstore, config)
+
+    total = len(vstore.store)
+    assert total > config.embed_batch_size * 2
+    assert sum(embeddings.batches) == total
+    assert embeddings.batches[:-1] == [config.embed_batch_size] * (len(embeddings.batches) - 1)
+    assert len(embeddings.batches) == math.ceil(total / config.embed_batch_size) < PAGES
+    assert vstore.upserts[:-1] == [config.upsert_batch_size] * (len(vstore.upserts) - 1)
+    assert loader.stats["embedded_chunks"] == total
+
+
+@pytest.mark.asyncio
+async def test_pipeline_stores_the_same_chunks_as_per_page_ingestion(site):
+    pipelined = PrecomputedVectorStore(CountingEmbeddings(size=8))
+    per_page = InMemoryVectorStore(embedding=CountingEmbeddings(size=8))
+    pipelined_metadata = MetadataStorage(redis_client=InMemoryRedis()) # type: ignore
+    per_page_metadata = MetadataStorage(redis_client=InMemoryRedis()) # type: ignore
+
+    await ingest(site, pipelined, PipelineConfig(), pipelined_metadata)
+    await ingest(site, per_page, PipelineConfig(enabled=False), per_page_metadata)
+
+    assert {k: (v["text"], v["vector"]) for k, v in pipelined.store.items()} == \
+           {k: (v["text"], v["vector"]) for k, v in per_page.store.items()}
+    datasource_id = make_datasource(site).datasource_id
+    document_ids = sorted(await pipelined_metadata.fetch_document_ids(datasource_id))
+    assert document_ids == sorted(await per_page_metadata.fetch_document_ids(datasource_id))
+    for document_id in document_ids:
+        stored = (await pipelined_metadata.get_document_info(document_id)).model_dump(exclude={"created_at", "metadata"})
+        expected = (await per_page_metadata.get_document_info(document_id)).model_dump(exclude={"created_at", "metadata"})
+        assert stored == expected
+
+
+@pytest.mark.asyncio
+async def test_failed_embedding_fails_the_pages_and_stores_nothing(site):
+    embeddings = BatchRecordingEmbeddings(size=8, fail=True)
+    vstore = PrecomputedVectorStore(embeddings)
+    metadata_storage = MetadataStorage(redis_client=InMemoryRedis()) # type: ignore
+    jobmanager = make_jobmanager(len(site.pages))
+
+    await ingest(site, vstore, PipelineConfig(embed_batch_size=8), metadata_storage, jobmanager)
+
+    assert vstore.store == {}
+    assert await metadata_storage.fetch_document_ids(make_datasource(site).datasource_id) == []
+    assert increments(jobmanager, "failed_increment") == PAGES
+    assert increments(jobmanager, "processed_increment") == PAGES
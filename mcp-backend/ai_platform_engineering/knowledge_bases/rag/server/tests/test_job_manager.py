@@ -0,0 +1,129 @@
+"""
+Tests for JobManager over an in-memory Redis (fakeredis, with Lua for the update script).
+"""
+import asyncio
+
+import fakeredis
+import pytest
+
+from common.job_manager import JobManager, JobStatus
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def job_manager(server, **kwargs):
+    jobmanager = JobManager(redis_client=fakeredis.aioredis.FakeRedis(server=server), **kwargs)
+    writes = []
+    apply = jobmanager._apply
+    async def counting_apply(*args):
+        writes.append(args)
+        return await apply(*args)
+    jobmanager._apply = counting_apply # type: ignore
+    return jobmanager, writes
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("flush_interval", [0, 0.05])
+async def test_concurrent_progress_is_counted_exactly(server, flush_interval):
+    jobmanager, _ = job_manager(server, progress_flush_interval=flush_interval)
+    await jobmanager.update_job("job", status=JobStatus.IN_PROGRESS, total=640)
+
+    async def worker(worker_id):
+        for i in range(10):
+            failed = (worker_id + i) % 4 == 0
+            await jobmanager.update_job("job", message=f"Processed URL {worker_id}/{i}",
+                                        failed_increment=1 if failed else None,
+                                        errors=[f"Failed {worker_id}/{i}"] if failed else None)
+            await jobmanager.update_job("job", processed_increment=1)
+            await asyncio.sleep(0)
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(64)))
+
+    job = await jobmanager.get_job("job")
+    assert job is not None
+    assert (job.status, job.total, job.processed_counter, job.failed_counter) == (JobStatus.IN_PROGRESS, 640, 640, 160)
+    assert len(job.errors or []) == 160
+
+
+@pytest.mark.asyncio
+async def test_progress_is_coalesced_and_flushed_before_other_updates(server):
+    jobmanager, writes = job_manager(server, progress_flush_interval=0.05)
+    other = JobManager(redis_client=fakeredis.aioredis.FakeRedis(server=server))
+    await jobmanager.update_job("job", status=JobStatus.IN_PROGRESS)
+
+    for i in range(100):
+        await jobmanager.update_job("job", message=f"Processed URL {i}", processed_increment=1)
+    assert len(writes) == 1
+    assert (await other.get_job("job")).processed_counter == 0 # type: ignore
+
+    await asyncio.sleep(0.1)
+    assert len(writes) == 2
+    job = await other.get_job("job")
+    assert (job.processed_counter, job.message) == (100, "Processed URL 99") # type: ignore
+
+    await jobmanager.update_job("job", message="Processed URL 100", processed_increment=1)
+    await jobmanager.update_job("job", status=JobStatus.COMPLETED, message="Processed: 101 URLs")
+    job = await other.get_job("job")
+    assert (job.status, job.processed_counter, job.message) == (JobStatus.COMPLETED, 101, "Processed: 101 URLs") # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_terminal_status_is_kept(server):
+    jobmanager, _ = job_manager(server)
+    assert not await jobmanager.is_job_terminated("job")
+    await jobmanager.update_job("job", status=JobStatus.IN_PROGRESS, message="Loading URL...")
+    assert (await jobmanager.get_job("job")).completed_at is None # type: ignore
+
+    assert await jobmanager.update_job("job", status=JobStatus.TERMINATED, message="Job has been terminated by user.")
+    assert await jobmanager.is_job_terminated("job")
+    assert not await jobmanager.update_job("job", status=JobStatus.COMPLETED, message="Processed: 10 URLs")
+    assert not await jobmanager.update_job("job", status=JobStatus.IN_PROGRESS)
+
+    job = await jobmanager.get_job("job")
+    assert (job.status, job.message) == (JobStatus.TERMINATED, "Job has been terminated by user.") # type: ignore
+    assert job.completed_at is not None # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_errors_are_capped(server):
+    jobmanager, _ = job_manager(server, progress_flush_interval=0, max_errors=20)
+    for i in range(200):
+        await jobmanager.update_job("job", failed_increment=1, errors=[f"error {i}"])
+    job = await jobmanager.get_job("job")
+    assert job.failed_counter == 200 # type: ignore
+    assert 20 <= len(job.errors) < 200 # type: ignore
+    assert job.errors[-1] == "error 199" # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_progress_is_kept_while_redis_is_unavailable(server):
+    jobmanager, _ = job_manager(server, progress_flush_interval=0.05)
+    await jobmanager.update_job("job", status=JobStatus.IN_PROGRESS)
+
+    server.connected = False
+    await jobmanager.update_job("job", processed_increment=3, message="Processed URL a")
+    await asyncio.sleep(0.1)
+    await jobmanager.update_job("job", processed_increment=2, message="Processed URL b")
+    server.connected = True
+
+    await jobmanager.flush()
+    job = await jobmanager.get_job("job")
+    assert (job.processed_counter, job.message) == (5, "Processed URL b") # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_progress_put_back_by_a_failed_flush_is_flushed_later(server):
+    jobmanager, _ = job_manager(server, progress_flush_interval=0.05)
+    await jobmanager.update_job("job", status=JobStatus.IN_PROGRESS)
+
+    server.connected = False
+    await jobmanager.update_job("job", processed_increment=3, message="Processed URL a")
+    await asyncio.sleep(0.08) # the scheduled flush fails and keeps the progress
+    server.connected = True
+    await asyncio.sleep(0.1) # no further update, the flush task retries on its own
+
+    other = JobManager(redis_client=fakeredis.aioredis.FakeRedis(server=server)) # reads without flushing
+    job = await other.get_job("job")
+    assert (job.processed_counter, job.message) == (3, "Processed URL a") # type: ignore
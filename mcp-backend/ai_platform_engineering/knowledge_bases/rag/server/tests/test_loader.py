@@ -7,7 +7,10 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import uuid
 import datetime
 
+import fakeredis
+
 from server.loader.loader import Loader, MetadataStorage
+from server.loader.url.sitemap_reader import SitemapEntry
 from common.job_manager import JobManager
 from common.models.rag import DataSourceInfo
 
@@ -34,9 +37,9 @@ class TestLoader:
         return MetadataStorage(redis_client=mock_redis)
 
     @pytest.fixture
-    def mock_job_manager(self, mock_redis):
-        """Mock JobManager for testing."""
-        return JobManager(redis_client=mock_redis)
+    def mock_job_manager(self):
+        """JobManager over an in-memory Redis (its update script needs Lua)."""
+        return JobManager(redis_client=fakeredis.aioredis.FakeRedis())
 
     @pytest.fixture
     def mock_datasource_info(self):
@@ -188,8 +191,12 @@ class TestLoader:
         sitemap_urls = ["https://example.com/sitemap.xml"]
         page_urls = ["https://example.com/page1", "https://example.com/page2"]
 
+        async def sitemap_entries(sitemap_url, failed=None):
+            for page_url in page_urls:
+                yield SitemapEntry(page_url, None, False)
+
         with patch.object(loader, 'get_sitemaps', return_value=sitemap_urls), \
-             patch.object(loader, 'get_urls_from_sitemap', return_value=page_urls), \
+             patch.object(loader, 'iter_sitemap_urls', side_effect=sitemap_entries), \
              patch.object(loader, 'process_url', new_callable=AsyncMock) as mock_process_url:
 
             await loader.load_url(url, mock_datasource_info.job_id, check_for_site_map=True)
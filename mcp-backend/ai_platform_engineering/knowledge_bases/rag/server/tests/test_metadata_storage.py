@@ -0,0 +1,116 @@
+"""
+Tests for MetadataStorage listing over an in-memory Redis (fakeredis, which like
+the server's client returns bytes).
+"""
+import asyncio
+import datetime
+import json
+
+import fakeredis
+import pytest
+
+from common.models.rag import DataSourceInfo, DocumentInfo, GraphConnectorInfo
+from server.metadata_storage import MetadataStorage
+
+
+def datasource(i):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return DataSourceInfo(datasource_id=f"src_{i:05d}", description=f"Datasource {i}", source_type="web",
+                          path=f"https://example.com/{i}", created_at=now, last_updated=now)
+
+
+def connector(i):
+    return GraphConnectorInfo(connector_id=f"connector_{i:03d}", name=f"Connector {i}",
+                              last_seen=datetime.datetime.now(datetime.timezone.utc))
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.aioredis.FakeRedis()
+
+
+@pytest.fixture
+def storage(redis_client):
+    return MetadataStorage(redis_client=redis_client, page_size=100)
+
+
+@pytest.mark.asyncio
+async def test_list_datasources_in_pages(storage, redis_client):
+    for i in reversed(range(250)):
+        await storage.store_datasource_info(datasource(i))
+    expected = [f"src_{i:05d}" for i in range(250)]
+
+    assert [ds.datasource_id for ds in await storage.fetch_all_datasource_info()] == expected
+    assert await storage.fetch_all_datasource_ids() == expected
+
+    listed, cursor, pages = [], None, 0
+    while True:
+        page, cursor = await storage.list_datasource_info(limit=60, cursor=cursor)
+        listed += [ds.datasource_id for ds in page]
+        pages += 1
+        if cursor is None:
+            break
+    assert (listed, pages) == (expected, 5)
+    page, cursor = await storage.list_datasource_info(limit=50, cursor="src_00199")
+    assert ([ds.datasource_id for ds in page], cursor) == (expected[200:], None)
+
+    await storage.delete_datasource_info("src_00010")
+    assert "src_00010" not in await storage.fetch_all_datasource_ids()
+
+
+@pytest.mark.asyncio
+async def test_datasources_stored_before_the_index_are_listed(redis_client):
+    for i in range(30):
+        await redis_client.set(f"rag/datasource:src_{i:05d}", json.dumps(datasource(i).model_dump(), default=str))
+    await redis_client.set("rag/datasource_documents:src_00000", "not a datasource")
+
+    storages = [MetadataStorage(redis_client=redis_client, page_size=7) for _ in range(2)]
+    results = await asyncio.gather(*(storage.fetch_all_datasource_ids() for storage in storages))
+    assert results[0] == results[1] == [f"src_{i:05d}" for i in range(30)]
+
+    # Once backfilled, new entries come from the index only
+    await redis_client.set("rag/datasource:src_99999", json.dumps(datasource(99999).model_dump(), default=str))
+    assert "src_99999" not in await MetadataStorage(redis_client=redis_client).fetch_all_datasource_ids()
+
+
+@pytest.mark.asyncio
+async def test_expired_datasources_are_dropped_from_the_index(storage, redis_client):
+    await storage.store_datasource_info(datasource(1))
+    await storage.store_datasource_info(datasource(2), ttl=60)
+    await redis_client.delete("rag/datasource:src_00002") # as if it expired
+
+    assert [ds.datasource_id for ds in await storage.fetch_all_datasource_info()] == ["src_00001"]
+    assert await storage.fetch_all_datasource_ids() == ["src_00001"]
+
+
+@pytest.mark.asyncio
+async def test_list_graph_connectors_in_pages(storage):
+    for i in range(25):
+        await storage.store_graphconnector_info(connector(i))
+    await storage.delete_graphconnector_info("connector_003")
+
+    first, cursor = await storage.list_graphconnector_info(limit=20)
+    rest, end = await storage.list_graphconnector_info(limit=20, cursor=cursor)
+    assert [c.connector_id for c in first + rest] == [f"connector_{i:03d}" for i in range(25) if i != 3]
+    assert (cursor, end) == ("connector_020", None)
+    assert len(await storage.fetch_all_graphconnector_info()) == 24
+
+
+@pytest.mark.asyncio
+async def test_delete_datasource_removes_only_its_documents(storage, redis_client):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for datasource_id in ("src_a", "src_a_docs"):
+        await storage.store_datasource_info(datasource(0).model_copy(update={"datasource_id": datasource_id}))
+        for n in range(250):
+            await storage.store_document_info(DocumentInfo(document_id=f"{datasource_id}_doc_{n}", datasource_id=datasource_id,
+                                                           path=f"https://example.com/{n}", title="", description="",
+                                                           created_at=now, metadata={}, chunk_count=1))
+    assert sorted(await storage.fetch_document_ids("src_a")) == sorted(f"src_a_doc_{n}" for n in range(250))
+
+    await storage.delete_datasource_info("src_a")
+
+    assert await storage.fetch_document_ids("src_a") == []
+    assert await redis_client.exists("rag/document:src_a_doc_0") == 0
+    assert len(await storage.fetch_document_ids("src_a_docs")) == 250
+    assert await storage.get_document_info("src_a_docs_doc_0") is not None
+    assert await storage.fetch_all_datasource_ids() == ["src_a_docs"]
@@ -0,0 +1,149 @@
+"""
+Tests for VectorDBQueryService on Milvus Lite, with the collection set up the way
+the server does (dense embeddings plus the built-in BM25 sparse field).
+
+The embedding model is a stand-in that only knows a few concepts (synonyms share
+a dimension), so dense search matches paraphrases and BM25 matches exact terms.
+"""
+import asyncio
+import math
+import uuid
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+pytest.importorskip("milvus_lite")
+from langchain_milvus import BM25BuiltInFunction, Milvus  # noqa: E402
+
+from server.query_service import CachedQueryEmbeddings, VectorDBQueryService  # noqa: E402
+
+CONCEPTS = [
+    {"restart", "reboot", "recycle"},
+    {"pod", "container", "workload"},
+    {"deploy", "rollout", "release"},
+    {"slow", "latency", "lag"},
+    {"database", "postgres", "db"},
+    {"certificate", "tls", "cert"},
+]
+
+
+class ConceptEmbeddings(Embeddings):
+    def __init__(self):
+        self.requests = []
+
+    def _embed(self, text):
+        words = set(text.lower().replace("?", " ").split())
+        vector = [float(len(words & concept)) for concept in CONCEPTS] + [0.01]
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        await asyncio.sleep(0.01)
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+
+DOCUMENTS = [
+    ("ops_1", "src_ops", "How to reboot a pod that is stuck"),
+    ("ops_2", "src_ops", "Rollout of a new release with canary steps"),
+    ("ops_3", "src_ops", "Error KX-4471 means the node pool quota is exhausted"),
+    ("db_1", "src_db", "Postgres latency troubleshooting"),
+    ("db_2", "src_db", "Rotate the TLS certificate of the database"),
+]
+
+
+def document(doc_id, datasource_id, text):
+    return Document(page_content=text, metadata={"document_id": doc_id, "datasource_id": datasource_id, "doc_type": "text"})
+
+
+async def vector_store(tmp_path, **embedding_options):
+    model = ConceptEmbeddings()
+    vector_db = Milvus(
+        embedding_function=CachedQueryEmbeddings(model, **embedding_options),
+        collection_name=f"rag_{uuid.uuid4().hex}",
+        connection_args={"uri": str(tmp_path / "milvus.db")},
+        index_params=[{"index_type": "FLAT", "metric_type": "COSINE"}, {"index_type": "SPARSE_INVERTED_INDEX", "metric_type": "BM25"}],
+        search_params=[{"metric_type": "COSINE", "params": {}}, {"metric_type": "BM25", "params": {}}],
+        builtin_function=BM25BuiltInFunction(output_field_names="sparse"),
+        vector_field=["dense", "sparse"],
+        enable_dynamic_field=True,
+    )
+    await vector_db.aadd_documents([document(*d) for d in DOCUMENTS], ids=[d[0] for d in DOCUMENTS])
+    model.requests.clear()
+    return vector_db, model
+
+
+def ids(results):
+    return [result.document.metadata["document_id"] for result in results.results]
+
+
+@pytest.mark.asyncio
+async def test_rrf_fuses_dense_and_keyword_matches(tmp_path):
+    vector_db, _ = await vector_store(tmp_path)
+    service = VectorDBQueryService(vector_db, result_cache_ttl=0)
+
+    # "recycle" and "container" only match by meaning, "KX-4471" only by keyword
+    query = "recycle container after KX-4471"
+    dense = await service.query(query, limit=1, similarity_threshold=0, ranker="weighted", ranker_params={"weights": [1.0, 0.0]})
+    keyword = await service.query(query, limit=1, similarity_threshold=0, ranker="weighted", ranker_params={"weights": [0.0, 1.0]})
+    fused = await service.query(query, limit=2, similarity_threshold=0, ranker="rrf")
+    assert (ids(dense), ids(keyword)) == (["ops_1"], ["ops_3"])
+    assert set(ids(fused)) == {"ops_1", "ops_3"}
+    assert all(0 < result.score <= 1 for result in fused.results)
+
+    filtered = await service.query(query, filters={"datasource_id": "src_db"}, limit=5, similarity_threshold=0, ranker="rrf")
+    assert set(ids(filtered)) <= {"db_1", "db_2"}
+    await vector_db.aadd_documents([document("quoted_1", "it's \\ quoted", "Recycle a container")], ids=["quoted_1"])
+    quoted = await service.query(query, filters={"datasource_id": "it's \\ quoted"}, limit=5, similarity_threshold=0, ranker="rrf")
+    assert ids(quoted) == ["quoted_1"]
+    with pytest.raises(ValueError):
+        await service.query(query, filters={"datasource_id) or (1": "x"})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_query_embeddings_are_batched_and_cached(tmp_path):
+    vector_db, model = await vector_store(tmp_path, batch_window=0.02)
+    service = VectorDBQueryService(vector_db, result_cache_ttl=0)
+    queries = ["postgres slow", "reboot pod", "tls cert", "release rollout"]
+
+    variants = [variant for query in queries for variant in (query, f"  {query} ", query.replace(" ", "   "))]
+
+    results = await asyncio.gather(*(service.query(variant, ranker="rrf", similarity_threshold=0) for variant in variants * 8))
+    assert all(result.results for result in results)
+    assert model.requests == [queries]
+
+    await service.query("reboot   pod", ranker="rrf")
+    assert len(model.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_until_the_datasource_changes(tmp_path):
+    vector_db, _ = await vector_store(tmp_path)
+    service = VectorDBQueryService(vector_db, result_cache_ttl=60)
+    searches = []
+    search = vector_db.asimilarity_search_with_score
+    async def counting_search(*args, **kwargs):
+        searches.append(args)
+        return await search(*args, **kwargs)
+    vector_db.asimilarity_search_with_score = counting_search # type: ignore
+
+    ops = await service.query("database certificate", ranker="rrf", similarity_threshold=0)
+    db = await service.query("database certificate", filters={"datasource_id": "src_db"}, ranker="rrf", similarity_threshold=0)
+    again = await service.query("database  certificate ", ranker="rrf", similarity_threshold=0)
+    assert (len(searches), ids(again), again.query) == (2, ids(ops), "database  certificate ")
+
+    await vector_db.aadd_documents([document("ops_4", "src_ops", "Renew the database certificate before it expires")], ids=["ops_4"])
+    service.invalidate("src_ops")
+    assert "ops_4" in ids(await service.query("database certificate", ranker="rrf", similarity_threshold=0))
+    assert ids(await service.query("database certificate", filters={"datasource_id": "src_db"}, ranker="rrf", similarity_threshold=0)) == ids(db)
+    assert len(searches) == 3
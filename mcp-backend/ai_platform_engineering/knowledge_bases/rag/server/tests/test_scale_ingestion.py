@@ -2,8 +2,8 @@
 Scale test for ingesting large numbers of HTML pages.
 Tests memory efficiency and single URL processing.
 """
-from asyncio import Lock
 import datetime
+import fakeredis
 from common.job_manager import JobManager
 from common.models.rag import DataSourceInfo
 from server.loader.loader import Loader
@@ -63,15 +63,8 @@ def memory_monitor():
 
 @pytest.fixture
 def mock_redis_scale():
-    """Mock Redis client for scale testing."""
-    mock_redis = AsyncMock()
-    mock_redis.ping = AsyncMock(return_value=True)
-    mock_redis.get = AsyncMock(return_value=None)
-    mock_redis.setex = AsyncMock(return_value=True)
-    mock_redis.keys = AsyncMock(return_value=[])
-    mock_redis.close = AsyncMock(return_value=None)
-    mock_redis.lock = MagicMock(return_value=Lock())
-    return mock_redis
+    """In-memory Redis for scale testing (the JobManager update script needs Lua)."""
+    return fakeredis.aioredis.FakeRedis()
 
 
 @pytest.fixture
@@ -0,0 +1,204 @@
+"""
+Tests for streaming sitemap reads: sitemaps (and gzipped sitemap indexes) are
+parsed as they download, and their URLs are handed to process_url before the
+rest has been read.
+"""
+import asyncio
+import datetime
+import gzip
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock
+
+import pytest
+
+from common.models.rag import DataSourceInfo
+from common.task_scheduler import TaskScheduler
+from server.loader.loader import Loader
+from server.loader.url.sitemap_reader import SitemapEntry, SitemapReader
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" xmlns:image="http://www.google.com/schemas/sitemap-image/1.1"'
+
+
+def urlset(locs, lastmod=None):
+    entries = "".join(f"<url><loc>{loc}</loc>{f'<lastmod>{lastmod}</lastmod>' if lastmod else ''}"
+                      f"<image:image><image:loc>{loc}/logo.png</image:loc></image:image></url>" for loc in locs)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{entries}</urlset>'.encode()
+
+
+def sitemapindex(locs):
+    entries = "".join(f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locs)
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex {NS}>{entries}</sitemapindex>'.encode()
+
+
+class SitemapServer:
+    """
+    Serves sitemaps (bytes per path) over HTTP/1.0, ending each body by closing the connection.
+    A gated sitemap sends its first half, then waits for `gate` (or a timeout) before sending the rest.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        self.gated = set()
+        self.gate = threading.Event()
+        self.gate_opened_in_time = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.path)
+                if self.path not in server.files:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = server.files[self.path]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-gzip" if self.path.endswith(".gz") else "application/xml")
+                self.end_headers()
+                if self.path in server.gated:
+                    self.wfile.write(body[:len(body) // 2])
+                    self.wfile.flush()
+                    server.gate_opened_in_time = server.gate.wait(timeout=5)
+                    body = body[len(body) // 2:]
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass # The loader stopped reading
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = SitemapServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def jobmanager():
+    jobmanager = AsyncMock()
+    jobmanager.is_job_terminated.return_value = False
+    jobmanager.get_job.return_value = None
+    return jobmanager
+
+
+@pytest.fixture
+def loader(jobmanager):
+    now = datetime.datetime.now()
+    datasource = DataSourceInfo(datasource_id=f"src_{uuid.uuid4().hex}", description="", source_type="web", path="",
+                                created_at=now, last_updated=now)
+    metadata_storage = AsyncMock()
+    metadata_storage.fetch_document_ids.return_value = []
+    return Loader(AsyncMock(), metadata_storage, datasource, jobmanager, max_concurrency=2)
+
+
+def test_reader_parses_chunks_of_any_size():
+    locs = [f"https://example.com/page/{i}?a=1&amp;b=2" for i in range(20)]
+    body = gzip.compress(urlset(locs, lastmod="2025-01-01"))
+    expected = [SitemapEntry(loc.replace("&amp;", "&"), "2025-01-01", False) for loc in locs]
+    for size in (1, 7, 4096):
+        reader = SitemapReader(gzipped=True)
+        entries = []
+        for i in range(0, len(body), size):
+            entries += reader.feed(body[i:i + size])
+        entries += reader.close()
+        assert entries == expected # Image extension <loc>s are not pages
+
+    # Served as .gz but not actually compressed
+    reader = SitemapReader(gzipped=True)
+    assert reader.feed(sitemapindex(["https://example.com/a.xml"])) + reader.close() == [SitemapEntry("https://example.com/a.xml", None, True)]
+
+    reader = SitemapReader()
+    assert reader.feed(b"<html><body>Not found") + reader.close() == []
+
+
+@pytest.mark.asyncio
+async def test_load_url_streams_gzipped_sitemap_index(server, loader, jobmanager):
+    children = [f"/sitemap-{i}.xml.gz" for i in range(3)]
+    server.files["/sitemap_index.xml.gz"] = gzip.compress(sitemapindex([server.url + child for child in children]))
+    for i, child in enumerate(children):
+        # Each child repeats the last URL of the previous one
+        locs = [f"{server.url}/docs/{n}" for n in range(i * 10 - (1 if i else 0), (i + 1) * 10)]
+        server.files[child] = gzip.compress(urlset(locs, lastmod=f"2025-01-0{i + 1}"))
+
+    lastmods = {}
+    async def process_url(url, job_id):
+        lastmods[url] = loader.sitemap_lastmod.get(url)
+    loader.get_sitemaps = AsyncMock(return_value=[server.url + "/sitemap_index.xml.gz"])
+    loader.process_url = AsyncMock(side_effect=process_url)
+
+    async with loader:
+        await loader.load_url(server.url, "job", check_for_site_map=True)
+
+    urls = [call.args[0] for call in loader.process_url.call_args_list]
+    assert sorted(urls) == sorted(f"{server.url}/docs/{n}" for n in range(30))
+    assert lastmods[f"{server.url}/docs/9"] == "2025-01-01" # First occurrence wins
+    assert lastmods[f"{server.url}/docs/29"] == "2025-01-03"
+    assert loader.sitemap_lastmod == {}
+    jobmanager.update_job.assert_any_call("job", message="Found 30 URLs to process", total=30)
+
+
+@pytest.mark.asyncio
+async def test_max_urls_stops_reading_sitemaps(server, loader):
+    children = [f"/sitemap-{i}.xml" for i in range(3)]
+    server.files["/sitemap.xml"] = sitemapindex([server.url + child for child in children])
+    for i, child in enumerate(children):
+        server.files[child] = urlset(f"{server.url}/{i}/{n}" for n in range(50))
+    loader.get_sitemaps = AsyncMock(return_value=[server.url + "/sitemap.xml"])
+    loader.process_url = AsyncMock()
+
+    async with loader:
+        await loader.load_url(server.url, "job", check_for_site_map=True, sitemap_max_urls=5)
+
+    assert [call.args[0] for call in loader.process_url.call_args_list] == [f"{server.url}/0/{n}" for n in range(5)]
+    assert server.requests == ["/sitemap.xml", "/sitemap-0.xml"]
+
+
+@pytest.mark.asyncio
+async def test_ingestion_starts_before_sitemap_is_downloaded(server, loader):
+    server.files["/sitemap.xml"] = urlset(f"{server.url}/page/{n}" for n in range(2000))
+    server.gated.add("/sitemap.xml")
+    loader.get_sitemaps = AsyncMock(return_value=[server.url + "/sitemap.xml"])
+    loader.process_url = AsyncMock(side_effect=lambda url, job_id: server.gate.set())
+
+    async with loader:
+        await loader.load_url(server.url, "job", check_for_site_map=True)
+
+    assert server.gate_opened_in_time # The first URL was processed while half the sitemap was still unsent
+    assert loader.process_url.call_count == 2000
+
+
+@pytest.mark.asyncio
+async def test_scheduler_reads_next_task_only_once_a_slot_is_free():
+    started, release = [], asyncio.Event()
+    produced = 0
+
+    async def task(n):
+        started.append(n)
+        await release.wait()
+
+    async def tasks():
+        nonlocal produced
+        for n in range(5):
+            produced += 1
+            yield task(n)
+
+    run = asyncio.create_task(TaskScheduler(max_parallel_tasks=2).run_stream(tasks()))
+    await asyncio.sleep(0.05)
+    # Both slots are busy: the third task was not taken from the producer, so cancelling leaves none unawaited
+    assert (started, produced) == ([0, 1], 2)
+    release.set()
+    await run
+    assert sorted(started) == list(range(5))
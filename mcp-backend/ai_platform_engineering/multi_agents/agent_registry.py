@@ -6,19 +6,27 @@ Agent Registry for AI Platform Engineering Multi-Agent System.
 
 This module provides the central registry for managing and discovering agents
 across the platform, with integrated agent enablement logic.
+
+Health probing runs on a dedicated asyncio loop: every agent is probed
+concurrently with jittered backoff, each result is published as soon as it
+arrives, and readers see an immutable RegistrySnapshot without taking a lock.
 """
 
 import os
+import asyncio
 import logging
+import random
 import httpx
 import time
 import threading
-from typing import Dict, Any, Optional, Callable, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Any, Optional, Callable, List, Tuple
 from ai_platform_engineering.utils.a2a_common.a2a_remote_agent_connect import (
     A2ARemoteAgentConnectTool,
 )
 from ai_platform_engineering.utils.agntcy.agntcy_remote_agent_connect import AgntcySlimRemoteAgentConnectTool
+from ai_platform_engineering.utils.a2a_common.transport import AgentCardCache, get_agent_card_cache
 from a2a.types import AgentCard
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -26,6 +34,44 @@ logger = logging.getLogger(__name__)
 
 GENERIC_CLIENT = "generic_client"
 
+
+class AgentHealth(str, Enum):
+    """Health of a configured agent as last seen by the registry."""
+
+    PENDING = "pending"  # not probed yet
+    HEALTHY = "healthy"
+    UNHEALTHY = "unhealthy"
+
+
+@dataclass(frozen=True)
+class AgentHealthEvent:
+    """Published whenever an agent's health or agent card changes."""
+
+    agent_name: str
+    previous: AgentHealth
+    current: AgentHealth
+    agent_card: Optional[Dict[str, Any]] = None
+
+
+@dataclass(frozen=True)
+class RegistrySnapshot:
+    """
+    Immutable view of the registry.
+
+    A new snapshot replaces the old one on every change and its dicts are never
+    mutated after publication, so readers can use one without locking.
+    """
+
+    agents: Dict[str, Any] = field(default_factory=dict)
+    tools: Dict[str, Any] = field(default_factory=dict)
+    health: Dict[str, AgentHealth] = field(default_factory=dict)
+    generation: int = 0
+
+    @property
+    def pending(self) -> List[str]:
+        return [name for name, status in self.health.items() if status is AgentHealth.PENDING]
+
+
 class AgentRegistry:
     """Centralized registry for transport-aware agent management."""
 
@@ -51,12 +97,27 @@ class AgentRegistry:
         self._retry_delay = float(os.getenv("AGENT_CONNECTIVITY_RETRY_DELAY", "2.0"))
         # Initial startup delay before starting connectivity checks
         self._startup_delay = float(os.getenv("AGENT_CONNECTIVITY_STARTUP_DELAY", "0.0"))
+        # Wait for the first probe round in __init__ instead of starting with every agent pending
+        self._blocking_startup = os.getenv("AGENT_CONNECTIVITY_BLOCKING_STARTUP", "false").lower() == "true"
+        # Coalesce bursts of health changes into one on_change_callback call
+        self._change_debounce = float(os.getenv("AGENT_CONNECTIVITY_CHANGE_DEBOUNCE", "0.2"))
 
         self.AGENT_NAMES = self.get_enabled_agents_from_env()
         self.AGENT_ADDRESS_MAPPING = self.get_agent_address_mapping(self.AGENT_NAMES)
 
-        self._agents: Dict[str, Any] = {}  # Will be populated by _load_agents
-        self._tools: Dict[str, Any] = {}  # Will be populated by _load_agents
+        # Readers load self._snapshot once; writers build a new one under _snapshot_lock
+        self._snapshot = RegistrySnapshot(health={name: AgentHealth.PENDING for name in self.AGENT_NAMES})
+        self._snapshot_lock = threading.RLock()
+        self._listeners: Tuple[Callable[[AgentHealthEvent], None], ...] = ()
+        self._on_change_callback: Optional[Callable[[], None]] = None
+        self._ready = threading.Event()  # Set once every agent has been probed
+
+        # Probes and monitors run on a private event loop thread, started on first use
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        self._change_pending = False
+        self._change_task: Optional[asyncio.Task] = None
         self._loaded_modules: Dict[str, Any] = {}  # Cache of loaded modules for refresh
 
         self._load_agents()
@@ -67,6 +128,8 @@ class AgentRegistry:
             logger.info("Connectivity config: timeout=%.1fs, retries=%d, retry_delay=%.1fs, startup_delay=%.1fs",
                        self._connectivity_timeout, self._max_retries, self._retry_delay, self._startup_delay)
         logger.info("Loaded agents: %s", list(self._agents.keys()))
+        if self._snapshot.pending:
+            logger.info("Agents pending first probe: %s", self._snapshot.pending)
 
     def get_enabled_agents_from_env(self) -> List[str]:
         """Get all environment variables that start with ENABLE_*."""
@@ -117,32 +180,84 @@ class AgentRegistry:
 
     def generate_subagents(self, agent_prompts) -> List[Dict[str, Any]]:
         """Generate the subagents for all enabled agents."""
-        subagents = []
-        for agent in self._agents:
-            system_prompt_override = agent_prompts.get(agent, {}).get("system_prompt")
-            agent_card = self._agents[agent]
-            description = agent_card['description']
-            prompt = system_prompt_override or description
-
-            # Sanitize agent name to match OpenAI's tool name pattern
-            agent_name = agent_card['name']
-            sanitized_name = self._sanitize_tool_name(agent_name)
-
-            # Log if sanitization changed the name
-            if sanitized_name != agent_name:
-                logger.warning(f"Subagent: Sanitized name from '{agent_name}' to '{sanitized_name}' to match OpenAI pattern requirements")
-
-            subagents.append({
-                "name": sanitized_name,
-                "description": description,
-                "prompt": prompt
-            })
-        return subagents
+        return [self.generate_subagent(agent, self._agents[agent], agent_prompts) for agent in self._agents]
+
+    def generate_subagent(self, agent: str, agent_card: Dict[str, Any], agent_prompts) -> Dict[str, Any]:
+        """Generate the subagent definition for one agent card."""
+        system_prompt_override = agent_prompts.get(agent, {}).get("system_prompt")
+        description = agent_card['description']
+        prompt = system_prompt_override or description
+
+        # Sanitize agent name to match OpenAI's tool name pattern
+        agent_name = agent_card['name']
+        sanitized_name = self._sanitize_tool_name(agent_name)
+
+        # Log if sanitization changed the name
+        if sanitized_name != agent_name:
+            logger.warning(f"Subagent: Sanitized name from '{agent_name}' to '{sanitized_name}' to match OpenAI pattern requirements")
+
+        return {
+            "name": sanitized_name,
+            "description": description,
+            "prompt": prompt
+        }
 
     @property
     def agents(self) -> Dict[str, Any]:
         """Get all available agents."""
-        return self._agents
+        return self._snapshot.agents
+
+    @property
+    def generation(self) -> int:
+        """Counter incremented every time the set of loaded agents changes."""
+        return self._snapshot.generation
+
+    @property
+    def snapshot(self) -> RegistrySnapshot:
+        """The current immutable registry view; read it once and use it without locking."""
+        return self._snapshot
+
+    @property
+    def _agents(self) -> Dict[str, Any]:
+        return self._snapshot.agents
+
+    @_agents.setter
+    def _agents(self, agents: Dict[str, Any]) -> None:
+        with self._snapshot_lock:
+            self._publish(dict(agents), self._snapshot.tools)
+
+    @property
+    def _tools(self) -> Dict[str, Any]:
+        return self._snapshot.tools
+
+    @_tools.setter
+    def _tools(self, tools: Dict[str, Any]) -> None:
+        with self._snapshot_lock:
+            self._publish(self._snapshot.agents, dict(tools))
+
+    def health(self, name: str) -> AgentHealth:
+        """Get the last known health of a configured agent."""
+        return self._snapshot.health.get(name, AgentHealth.PENDING)
+
+    def subscribe(self, listener: Callable[[AgentHealthEvent], None]) -> Callable[[], None]:
+        """
+        Register a listener for agent health events.
+
+        Listeners run on the thread that published the change (usually the
+        registry loop) and must not block. Returns a function that unsubscribes.
+        """
+        with self._snapshot_lock:
+            self._listeners = self._listeners + (listener,)
+
+        def unsubscribe():
+            with self._snapshot_lock:
+                self._listeners = tuple(existing for existing in self._listeners if existing is not listener)
+
+        return unsubscribe
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until every configured agent has been probed once."""
+        return self._ready.wait(timeout)
 
     @property
     def transport(self) -> str:
@@ -263,6 +378,57 @@ class AgentRegistry:
             # For A2A transport, use HTTP connectivity check which returns agent card
             return self._check_http_agent_connectivity(agent_name, agent_url)
 
+    async def _acheck_agent_connectivity(self, agent_name: str, agent_url: str, client: httpx.AsyncClient) -> tuple[bool, Optional[Dict[str, Any]]]:
+        """Async counterpart of _check_agent_connectivity, sharing one client across probes."""
+        if not self._check_connectivity:
+            logger.debug(f"Connectivity checks disabled, assuming {agent_name} is reachable")
+            return (True, None)
+
+        if self.transport == "slim":
+            return (True, None)
+        return await self._acheck_http_agent_connectivity(agent_name, agent_url, client)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff (2s, 4s, 8s, ...) with jitter so agents retry out of step."""
+        return self._retry_delay * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+    def _validate_agent_card(self, agent_name: str, agent_url: str, agent_card: Dict[str, Any]) -> bool:
+        """Check that the agent card served at agent_url belongs to agent_name."""
+        logger.debug(f"🌐 Response JSON keys: {list(agent_card.keys()) if isinstance(agent_card, dict) else 'not a dict'}")
+
+        card_name = agent_card.get('name', '').lower()
+        expected_name = agent_name.lower()
+        logger.debug(f"🌐 Agent card name: '{card_name}', expected: '{expected_name}'")
+
+        # Check if the agent name matches (handle variations like "AI Platform Engineer" vs "platform_engineer")
+        name_matches = (
+            card_name == expected_name or
+            card_name.replace(' ', '_') == expected_name or
+            card_name.replace('_', ' ') == expected_name or
+            expected_name in card_name or
+            card_name in expected_name
+        )
+
+        if not name_matches:
+            logger.warning(f"❌ Agent {agent_name} at {agent_url} returned wrong agent card (got '{card_name}', expected '{expected_name}')")
+            logger.debug(f"🌐 Full agent card response: {agent_card}")
+            return False
+
+        # Also check skills for additional validation
+        skills = agent_card.get('skills', [])
+        if skills:
+            skill_names = [skill.get('name', '').lower() for skill in skills]
+            skill_ids = [skill.get('id', '').lower() for skill in skills]
+            logger.debug(f"🌐 Agent skills: names={skill_names}, ids={skill_ids}")
+            # Check if agent name appears in any skill
+            agent_in_skills = any(expected_name in skill or skill in expected_name for skill in skill_names + skill_ids)
+            if not agent_in_skills and not name_matches:
+                logger.warning(f"❌ Agent {agent_name} at {agent_url} has no matching skills: {skill_names}")
+                return False
+
+        logger.debug(f"✓ Agent {agent_name} identity validated: card_name='{card_name}'")
+        return True
+
     def _check_http_agent_connectivity(self, agent_name: str, agent_url: str) -> tuple[bool, Optional[Dict[str, Any]]]:
         """
         Check A2A agent connectivity by testing the agent card endpoint. Only for P2P transport.
@@ -280,70 +446,28 @@ class AgentRegistry:
         for attempt in range(self._max_retries + 1):  # +1 for initial attempt
             try:
                 if attempt > 0:
-                    # Exponential backoff: 2s, 4s, 8s, etc.
-                    delay = self._retry_delay * (2 ** (attempt - 1))
-                    logger.debug(f"Retrying {agent_name} connectivity check in {delay}s (attempt {attempt + 1}/{self._max_retries + 1})")
+                    delay = self._backoff_delay(attempt)
+                    logger.debug(f"Retrying {agent_name} connectivity check in {delay:.1f}s (attempt {attempt + 1}/{self._max_retries + 1})")
                     time.sleep(delay)
 
                 logger.debug(f"Testing connectivity for {agent_name} at {agent_url} (attempt {attempt + 1}) [transport: {self.transport}]")
 
-                # Use synchronous HTTP client to avoid event loop conflicts
                 with httpx.Client(timeout=httpx.Timeout(self._connectivity_timeout)) as client:
-                    # Try to fetch the agent card endpoint - this tests connectivity
-                    card_url = f"{agent_url.rstrip('/')}/.well-known/agent.json"
-                    logger.debug(f"🌐 Testing URL: {card_url}")
-
-                    response = client.get(card_url)
-                    logger.debug(f"🌐 Response status: {response.status_code}")
-                    response.raise_for_status()  # Raises exception for 4xx/5xx status codes
-
-                    # Validate that this is actually the correct agent by checking the agent card
+                    logger.debug(f"🌐 Testing URL: {AgentCardCache.card_url(agent_url)}")
                     try:
-                        agent_card = response.json()
-                        logger.debug(f"🌐 Response JSON keys: {list(agent_card.keys()) if isinstance(agent_card, dict) else 'not a dict'}")
-
-                        card_name = agent_card.get('name', '').lower()
-                        expected_name = agent_name.lower()
-                        logger.debug(f"🌐 Agent card name: '{card_name}', expected: '{expected_name}'")
-
-                        # Check if the agent name matches (handle variations like "AI Platform Engineer" vs "platform_engineer")
-                        name_matches = (
-                            card_name == expected_name or
-                            card_name.replace(' ', '_') == expected_name or
-                            card_name.replace('_', ' ') == expected_name or
-                            expected_name in card_name or
-                            card_name in expected_name
-                        )
-
-                        if not name_matches:
-                            logger.warning(f"❌ Agent {agent_name} at {agent_url} returned wrong agent card (got '{card_name}', expected '{expected_name}')")
-                            logger.debug(f"🌐 Full agent card response: {agent_card}")
-                            return (False, None)
-
-                        # Also check skills for additional validation
-                        skills = agent_card.get('skills', [])
-                        if skills:
-                            skill_names = [skill.get('name', '').lower() for skill in skills]
-                            skill_ids = [skill.get('id', '').lower() for skill in skills]
-                            logger.debug(f"🌐 Agent skills: names={skill_names}, ids={skill_ids}")
-                            # Check if agent name appears in any skill
-                            agent_in_skills = any(expected_name in skill or skill in expected_name for skill in skill_names + skill_ids)
-                            if not agent_in_skills and not name_matches:
-                                logger.warning(f"❌ Agent {agent_name} at {agent_url} has no matching skills: {skill_names}")
-                                return (False, None)
-
-                        logger.debug(f"✓ Agent {agent_name} identity validated: card_name='{card_name}'")
-
+                        # Always revalidate (a 304 when unchanged) and share the card with the
+                        # A2A transport pool, so sub-agent streaming skips its own card fetch
+                        # Raises HTTPStatusError for 4xx/5xx status codes
+                        agent_card = get_agent_card_cache().get(agent_url, client, revalidate=True)
                     except (ValueError, KeyError) as e:
                         logger.warning(f"❌ Agent {agent_name} at {agent_url} returned invalid agent card JSON: {e}")
-                        logger.debug(f"🌐 Raw response content: {response.text[:500]}...")
+                        get_agent_card_cache().invalidate(agent_url)
                         return (False, None)
 
-                    if attempt > 0:
-                        logger.info(f"✅ Agent {agent_name} is reachable at {agent_url} (succeeded on attempt {attempt + 1})")
-                    else:
-                        logger.info(f"✅ Agent {agent_name} is reachable at {agent_url}")
-                    return (True, agent_card)
+                if not self._validate_agent_card(agent_name, agent_url, agent_card):
+                    return (False, None)
+                self._log_reachable(agent_name, agent_url, attempt)
+                return (True, agent_card)
 
             except (httpx.TimeoutException, httpx.ConnectError, httpx.HTTPStatusError) as e:
                 last_exception = e
@@ -356,17 +480,62 @@ class AgentRegistry:
                 logger.warning(f"❌ Agent {agent_name} at {agent_url} connectivity check failed: {e}")
                 return (False, None)
 
-        # All attempts failed
+        self._log_unreachable(agent_name, agent_url, last_exception)
+        return (False, None)
+
+    async def _acheck_http_agent_connectivity(self, agent_name: str, agent_url: str, client: httpx.AsyncClient) -> tuple[bool, Optional[Dict[str, Any]]]:
+        """Async agent card probe; retries sleep on the event loop, so other agents keep probing."""
+        last_exception = None
+
+        for attempt in range(self._max_retries + 1):
+            try:
+                if attempt > 0:
+                    delay = self._backoff_delay(attempt)
+                    logger.debug(f"Retrying {agent_name} connectivity check in {delay:.1f}s (attempt {attempt + 1}/{self._max_retries + 1})")
+                    await asyncio.sleep(delay)
+
+                logger.debug(f"Testing connectivity for {agent_name} at {agent_url} (attempt {attempt + 1}) [transport: {self.transport}]")
+                try:
+                    agent_card = await get_agent_card_cache().aget(agent_url, client, revalidate=True)
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"❌ Agent {agent_name} at {agent_url} returned invalid agent card JSON: {e}")
+                    get_agent_card_cache().invalidate(agent_url)
+                    return (False, None)
+
+                if not self._validate_agent_card(agent_name, agent_url, agent_card):
+                    return (False, None)
+                self._log_reachable(agent_name, agent_url, attempt)
+                return (True, agent_card)
+
+            except (httpx.TimeoutException, httpx.ConnectError, httpx.HTTPStatusError) as e:
+                last_exception = e
+                if attempt < self._max_retries:
+                    logger.debug(f"Agent {agent_name} connectivity attempt {attempt + 1} failed: {type(e).__name__}")
+                continue
+            except Exception as e:
+                logger.warning(f"❌ Agent {agent_name} at {agent_url} connectivity check failed: {e}")
+                return (False, None)
+
+        self._log_unreachable(agent_name, agent_url, last_exception)
+        return (False, None)
+
+    @staticmethod
+    def _log_reachable(agent_name: str, agent_url: str, attempt: int) -> None:
+        if attempt > 0:
+            logger.info(f"✅ Agent {agent_name} is reachable at {agent_url} (succeeded on attempt {attempt + 1})")
+        else:
+            logger.info(f"✅ Agent {agent_name} is reachable at {agent_url}")
+
+    def _log_unreachable(self, agent_name: str, agent_url: str, last_exception: Optional[Exception]) -> None:
+        attempts = self._max_retries + 1
         if isinstance(last_exception, httpx.TimeoutException):
-            logger.warning(f"❌ Agent {agent_name} at {agent_url} timed out after {self._max_retries + 1} attempts")
+            logger.warning(f"❌ Agent {agent_name} at {agent_url} timed out after {attempts} attempts")
         elif isinstance(last_exception, httpx.ConnectError):
-            logger.warning(f"❌ Agent {agent_name} at {agent_url} is not reachable after {self._max_retries + 1} attempts (connection refused)")
+            logger.warning(f"❌ Agent {agent_name} at {agent_url} is not reachable after {attempts} attempts (connection refused)")
         elif isinstance(last_exception, httpx.HTTPStatusError):
-            logger.warning(f"❌ Agent {agent_name} at {agent_url} returned HTTP {last_exception.response.status_code} after {self._max_retries + 1} attempts")
+            logger.warning(f"❌ Agent {agent_name} at {agent_url} returned HTTP {last_exception.response.status_code} after {attempts} attempts")
         else:
-            logger.warning(f"❌ Agent {agent_name} at {agent_url} connectivity check failed after {self._max_retries + 1} attempts: {last_exception}")
-
-        return (False, None)
+            logger.warning(f"❌ Agent {agent_name} at {agent_url} connectivity check failed after {attempts} attempts: {last_exception}")
 
     def _infer_agent_url_from_env_var(self, agent_name: str) -> str:
         return os.getenv(f"{agent_name.replace('-', '_').upper()}_AGENT_URL", "http://localhost:8000")
@@ -411,50 +580,100 @@ class AgentRegistry:
 
     def _run_connectivity_checks(self) -> tuple[Dict[str, bool], Dict[str, Dict[str, Any]]]:
         """
-        Run connectivity checks in parallel using thread pool.
+        Probe every agent concurrently on the registry loop and wait for all of them.
 
         Returns:
             Tuple of (connectivity_results, agent_cards):
             - connectivity_results: Dict[str, bool] mapping agent_name to connectivity status
             - agent_cards: Dict[str, Dict] mapping agent_name to agent card JSON
         """
+        if not self._check_connectivity:
+            return {name: True for name in self.AGENT_ADDRESS_MAPPING}, {}
+        return self._run_on_loop(self._aprobe_all())
+
+    async def _aprobe_all(
+        self,
+        on_result: Optional[Callable[[str, bool, Optional[Dict[str, Any]]], None]] = None,
+    ) -> tuple[Dict[str, bool], Dict[str, Dict[str, Any]]]:
+        """
+        Probe all agents at once over a shared async client.
+
+        on_result is called as each probe finishes, so a slow or dead agent
+        does not hold back the others.
+        """
         connectivity_results = {}
         agent_cards = {}
 
-        # Use thread pool for parallel connectivity checks
-        max_workers = min(len(self.AGENT_ADDRESS_MAPPING), 10)  # Limit concurrent connections
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all connectivity check tasks
-            future_to_agent = {
-                executor.submit(
-                    self._check_agent_connectivity,
-                    agent_name,
-                    agent_url,
-                ): agent_name
-                for agent_name, agent_url in self.AGENT_ADDRESS_MAPPING.items()
-            }
-
-            # Collect results as they complete
-            for future in as_completed(future_to_agent):
-                agent_name = future_to_agent[future]
-                try:
-                    is_reachable, agent_card = future.result()
-                    connectivity_results[agent_name] = is_reachable
-                    if agent_card:
-                        agent_cards[agent_name] = agent_card
-                except Exception as e:
-                    logger.error(f"Connectivity check for {agent_name} raised exception: {e}")
-                    connectivity_results[agent_name] = False
+        async def probe(agent_name: str, agent_url: str):
+            try:
+                is_reachable, agent_card = await self._acheck_agent_connectivity(agent_name, agent_url, client)
+            except Exception as e:
+                logger.error(f"Connectivity check for {agent_name} raised exception: {e}")
+                is_reachable, agent_card = False, None
+            connectivity_results[agent_name] = is_reachable
+            if agent_card:
+                agent_cards[agent_name] = agent_card
+            if on_result:
+                on_result(agent_name, is_reachable, agent_card)
+
+        async with httpx.AsyncClient(timeout=httpx.Timeout(self._connectivity_timeout)) as client:
+            await asyncio.gather(*(probe(name, url) for name, url in self.AGENT_ADDRESS_MAPPING.items()))
 
         return connectivity_results, agent_cards
 
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the registry's event loop thread if it is not running yet."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._run_loop,
+                    args=(self._loop,),
+                    name="AgentRegistryLoop",
+                    daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def _submit(self, coro):
+        """Schedule a coroutine on the registry loop and return its concurrent future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def _run_on_loop(self, coro):
+        """Run a coroutine on the registry loop and wait for its result."""
+        if self._loop_thread is not None and threading.current_thread() is self._loop_thread:
+            coro.close()
+            raise RuntimeError("Cannot wait on the agent registry loop from inside it")
+        return self._submit(coro).result()
+
+    def _probes_in_background(self) -> bool:
+        return (
+            self._check_connectivity
+            and self.transport != "slim"
+            and not self._blocking_startup
+            and bool(self.AGENT_ADDRESS_MAPPING)
+        )
+
     def _load_agents(self) -> None:
         """Load the appropriate agent implementations based on transport mode with connectivity checks."""
         logger.info("Loading agents with connectivity verification...")
 
         logger.debug(f"Configured agents: {self.AGENT_NAMES}")
 
+        # Serve straight away with every agent pending; each probe publishes its result as it lands
+        if self._probes_in_background():
+            logger.info(f"Probing {len(self.AGENT_ADDRESS_MAPPING)} agents in the background (max {self._max_retries + 1} attempts per agent)...")
+            self._submit(self._initial_probe())
+            return
+
         # Step 1: Apply startup delay if configured (helps with Docker Compose race conditions)
         if self._startup_delay > 0:
             logger.info(f"Waiting {self._startup_delay}s for services to start up before connectivity checks...")
@@ -462,29 +681,43 @@ class AgentRegistry:
 
         # Step 2: Check connectivity and get agent cards, then build registry
         connectivity_results, agent_cards = self._check_connectivity_for_modules()
-        agents, tools = self._build_registry_from_active_agents(connectivity_results, agent_cards)
+        with self._snapshot_lock:
+            agents, tools = self._build_registry_from_active_agents(connectivity_results, agent_cards)
+            events = self._publish(agents, tools, self._health_of(agents))
+        self._emit(events)
 
-        # Compute stats for logging
-        reachable_count = len(agents)
-        total_configured = len(self.AGENT_NAMES)
+        self._log_load_summary(connectivity_results)
+        self._loaded_modules = {}  # No longer using loaded modules
+        self._ready.set()
+
+    async def _initial_probe(self) -> None:
+        """First probe round for a non-blocking start."""
+        try:
+            if self._startup_delay > 0:
+                logger.info(f"Waiting {self._startup_delay}s for services to start up before connectivity checks...")
+                await asyncio.sleep(self._startup_delay)
+
+            connectivity_results, _ = await self._aprobe_all(on_result=self._apply_probe_result)
+            self._log_load_summary(connectivity_results)
+        except Exception as e:
+            logger.error(f"Initial agent probe failed: {e}")
+        finally:
+            self._ready.set()
+
+    def _log_load_summary(self, connectivity_results: Dict[str, bool]) -> None:
+        agents = self._snapshot.agents
         unreachable_agents = [name for name, is_reachable in connectivity_results.items() if not is_reachable]
 
-        # Log results
         for agent_name in agents.keys():
             logger.info(f"✅ Added {agent_name} to registry (reachable)")
         for agent_name in unreachable_agents:
             logger.warning(f"❌ Excluded {agent_name} from registry (unreachable)")
 
-        # Log summary
-        logger.info(f"Agent loading complete: {reachable_count}/{total_configured} agents reachable")
+        logger.info(f"Agent loading complete: {len(agents)}/{len(self.AGENT_NAMES)} agents reachable")
         if unreachable_agents:
             logger.warning(f"Unreachable agents excluded: {', '.join(unreachable_agents)}")
             logger.info("To skip connectivity checks, set SKIP_AGENT_CONNECTIVITY_CHECK=true")
 
-        self._agents = agents
-        self._tools = tools
-        self._loaded_modules = {}  # No longer using loaded modules
-
     def _check_connectivity_for_modules(self) -> tuple[Dict[str, bool], Dict[str, Dict[str, Any]]]:
         """Check connectivity for a set of loaded modules."""
         if self.transport == "slim":
@@ -498,6 +731,7 @@ class AgentRegistry:
         """Build agents registry using connectivity results and cached agent cards."""
         agents = {}
         tools = {}
+        previous = self._snapshot
 
         for agent_name in self.AGENT_NAMES:
             reachable = connectivity_results.get(agent_name, True)
@@ -512,63 +746,153 @@ class AgentRegistry:
                 logger.warning(f"No agent card available for {agent_name}, skipping registration...")
                 continue
 
-            logger.debug(f"Registering agent {agent_name} with cached agent card")
-            agents[agent_name] = agent_card
+            tool = self._register_agent(agent_name, agent_card, previous)
+            if tool is not None:
+                agents[agent_name] = agent_card
+                tools[agent_name] = tool
+
+        return agents, tools
+
+    def _register_agent(self, agent_name: str, agent_card: Dict[str, Any], previous: RegistrySnapshot) -> Optional[Any]:
+        """Return the tool for an agent card, or None if the tool could not be created."""
+        logger.debug(f"Registering agent {agent_name} with cached agent card")
+
+        # Unchanged card: keep the existing tool so its client and the compiled graph's wrapper stay valid
+        if agent_name in previous.tools and previous.agents.get(agent_name) == agent_card:
+            return previous.tools[agent_name]
+
+        # Create tool object from agent card
+        # Use the agent card's name (not the registry key) for the tool name
+        # to ensure it matches the subagent name
+        tool_name = agent_card.get('name', agent_name)
+
+        # Sanitize tool name to match OpenAI's pattern: ^[a-zA-Z0-9_\.-]+$
+        sanitized_tool_name = self._sanitize_tool_name(tool_name)
+
+        # Log if sanitization changed the name
+        if sanitized_tool_name != tool_name:
+            logger.warning(f"Agent {agent_name}: Sanitized tool name from '{tool_name}' to '{sanitized_tool_name}' to match OpenAI pattern requirements")
 
-            # Create tool object from agent card
-            # Use the agent card's name (not the registry key) for the tool name
-            # to ensure it matches the subagent name
-            tool_name = agent_card.get('name', agent_name)
+        agent_url = self.AGENT_ADDRESS_MAPPING.get(agent_name)
 
-            # Sanitize tool name to match OpenAI's pattern: ^[a-zA-Z0-9_\.-]+$
-            sanitized_tool_name = self._sanitize_tool_name(tool_name)
+        try:
+            # Pass the actual agent_url and agent_card from connectivity check
+            # Pass sanitized_tool_name to the constructor so it's set correctly from the start
+            tool = self._create_generic_a2a_client(
+                agent_name,
+                self._transport,
+                agent_url,
+                agent_card,
+                tool_name=sanitized_tool_name
+            )
+            tool.description = agent_card.get('description', '')
+            logger.debug(f"Created tool for agent {agent_name} with name '{sanitized_tool_name}' (original: '{tool_name}') using URL {agent_url}")
+            return tool
+        except Exception as e:
+            logger.error(f"Failed to create tool for agent {agent_name}: {e}")
+            return None
 
-            # Log if sanitization changed the name
-            if sanitized_tool_name != tool_name:
-                logger.warning(f"Agent {agent_name}: Sanitized tool name from '{tool_name}' to '{sanitized_tool_name}' to match OpenAI pattern requirements")
+    def _health_of(self, agents: Dict[str, Any]) -> Dict[str, AgentHealth]:
+        return {
+            name: AgentHealth.HEALTHY if name in agents else AgentHealth.UNHEALTHY
+            for name in self.AGENT_NAMES
+        }
+
+    def _publish(self, agents: Dict[str, Any], tools: Dict[str, Any], health: Optional[Dict[str, AgentHealth]] = None) -> List[AgentHealthEvent]:
+        """
+        Replace the snapshot and return the health events it implies.
 
-            agent_url = self.AGENT_ADDRESS_MAPPING.get(agent_name)
+        Must be called with _snapshot_lock held. The generation is bumped only
+        when the agent cards differ from the previous snapshot.
+        """
+        previous = self._snapshot
+        health = previous.health if health is None else health
+        changed = agents != previous.agents
+        self._snapshot = RegistrySnapshot(
+            agents=agents,
+            tools=tools,
+            health=health,
+            generation=previous.generation + 1 if changed else previous.generation,
+        )
 
+        events = []
+        for name in dict.fromkeys([*previous.health, *health]):
+            before = previous.health.get(name, AgentHealth.PENDING)
+            after = health.get(name, AgentHealth.PENDING)
+            if before != after or (after is AgentHealth.HEALTHY and previous.agents.get(name) != agents.get(name)):
+                events.append(AgentHealthEvent(name, before, after, agents.get(name)))
+        return events
+
+    def _emit(self, events: List[AgentHealthEvent]) -> None:
+        for event in events:
+            logger.debug(f"Agent {event.agent_name} health: {event.previous.value} → {event.current.value}")
+            for listener in self._listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    logger.error(f"Error in agent health listener: {e}")
+
+    def _apply_probe_result(self, agent_name: str, is_reachable: bool, agent_card: Optional[Dict[str, Any]]) -> bool:
+        """Publish one agent's probe result on its own. Runs on the registry loop."""
+        with self._snapshot_lock:
+            previous = self._snapshot
+            tool = self._register_agent(agent_name, agent_card, previous) if is_reachable and agent_card else None
+
+            # Keep configuration order so the graph does not depend on which probe finished first
+            agents, tools = {}, {}
+            for name in self.AGENT_NAMES:
+                if name == agent_name:
+                    if tool is not None:
+                        agents[name], tools[name] = agent_card, tool
+                elif name in previous.agents:
+                    agents[name], tools[name] = previous.agents[name], previous.tools[name]
+
+            health = dict(previous.health)
+            health[agent_name] = AgentHealth.HEALTHY if tool is not None else AgentHealth.UNHEALTHY
+            events = self._publish(agents, tools, health)
+            changed = self._snapshot.generation != previous.generation
+
+        self._emit(events)
+        if changed:
+            self._schedule_change_notification()
+        return changed
+
+    def _schedule_change_notification(self) -> None:
+        """Call on_change_callback once per burst of changes, off the registry loop."""
+        if self._on_change_callback is None:
+            return
+        self._change_pending = True
+        if self._change_task is None or self._change_task.done():
+            self._change_task = asyncio.get_running_loop().create_task(self._notify_changes())
+
+    async def _notify_changes(self) -> None:
+        while self._change_pending:
+            await asyncio.sleep(self._change_debounce)
+            self._change_pending = False
             try:
-                # Pass the actual agent_url and agent_card from connectivity check
-                # Pass sanitized_tool_name to the constructor so it's set correctly from the start
-                tool = self._create_generic_a2a_client(
-                    agent_name,
-                    self._transport,
-                    agent_url,
-                    agent_card,
-                    tool_name=sanitized_tool_name
-                )
-                tool.description = agent_card.get('description', '')
-                tools[agent_name] = tool
-                logger.debug(f"Created tool for agent {agent_name} with name '{sanitized_tool_name}' (original: '{tool_name}') using URL {agent_url}")
+                await asyncio.to_thread(self._on_change_callback)
             except Exception as e:
-                logger.error(f"Failed to create tool for agent {agent_name}: {e}")
-                # Remove the agent card if tool creation fails
-                del agents[agent_name]
-                continue
-
-        return agents, tools
+                logger.error(f"Error in change callback: {e}")
 
     def _refresh_connectivity_only(self) -> bool:
         """Efficiently refresh agent connectivity without reloading modules."""
         logger.debug(f"Refreshing connectivity for {len(self.AGENT_NAMES)} agents...")
 
-        # Store current state
-        old_agent_names = set(self._agents.keys())
-
         # Check connectivity and rebuild registry
         connectivity_results, agent_cards = self._check_connectivity_for_modules()
-        agents, tools = self._build_registry_from_active_agents(connectivity_results, agent_cards)
-
-        # Update registry
-        self._agents = agents
-        self._tools = tools
-
-        # Check for changes
-        new_agent_names = set(self._agents.keys())
-
-        has_changes = old_agent_names != new_agent_names
+        with self._snapshot_lock:
+            old_agents = self._snapshot.agents
+            agents, tools = self._build_registry_from_active_agents(connectivity_results, agent_cards)
+            events = self._publish(agents, tools, self._health_of(agents))
+        self._emit(events)
+
+        # Check for changes (agents added/removed, or an agent card that changed)
+        old_agent_names = set(old_agents.keys())
+        new_agent_names = set(agents.keys())
+
+        has_changes = old_agent_names != new_agent_names or any(
+            old_agents[name] != agents[name] for name in old_agent_names & new_agent_names
+        )
 
         if has_changes:
             added = new_agent_names - old_agent_names
@@ -589,24 +913,23 @@ class AgentRegistry:
         self._enable_background_monitoring = os.getenv("AGENT_CONNECTIVITY_ENABLE_BACKGROUND", "false").lower() == "true"
         self._fast_check_timeout = float(os.getenv("AGENT_CONNECTIVITY_FAST_CHECK_TIMEOUT", "2.0"))
 
-        # Thread safety
+        # Serializes full refreshes; readers use the snapshot and never take it
         self._lock = threading.RLock()
-        self._monitoring_thread = None
-        self._stop_monitoring = threading.Event()
+        self._monitor_future = None
 
-        # Callback for when agent list changes
+        # Callback for when agent list changes, also fired by per-agent probe results
         self._on_change_callback = on_change_callback
 
         # Track initial state
-        with self._lock:
-            self._last_agent_list = set(self._agents.keys())
-            self._last_tools_count = len(self._tools)
+        snapshot = self._snapshot
+        self._last_agent_list = set(snapshot.agents.keys())
+        self._last_tools_count = len(snapshot.tools)
 
         # Start background monitoring if enabled
         if self._enable_background_monitoring and self._refresh_interval > 0:
             self.start_background_monitoring()
 
-        logger.info(f"Dynamic monitoring enabled for {len(self._agents)} agents")
+        logger.info(f"Dynamic monitoring enabled for {len(snapshot.agents)} agents")
         if self._enable_background_monitoring:
             logger.info(f"Background monitoring enabled (interval: {self._refresh_interval}s)")
 
@@ -680,65 +1003,51 @@ class AgentRegistry:
                     self._connectivity_timeout = original_timeout
 
     def start_background_monitoring(self):
-        """Start background thread for periodic agent monitoring."""
-        if not hasattr(self, '_monitoring_thread'):
+        """Start probing each agent on its own jittered schedule on the registry loop."""
+        if not hasattr(self, '_monitor_future'):
             logger.warning("Dynamic monitoring not initialized, call enable_dynamic_monitoring() first")
             return
 
-        if self._monitoring_thread and self._monitoring_thread.is_alive():
+        if self._monitor_future and not self._monitor_future.done():
             logger.warning("Background monitoring already running")
             return
 
-        self._stop_monitoring.clear()
-        self._monitoring_thread = threading.Thread(
-            target=self._background_monitor,
-            name="AgentConnectivityMonitor",
-            daemon=True
-        )
-        self._monitoring_thread.start()
+        self._monitor_future = self._submit(self._monitor_agents())
         logger.info(f"Started background agent monitoring (interval: {self._refresh_interval}s)")
 
     def stop_background_monitoring(self):
-        """Stop background monitoring thread."""
-        if not hasattr(self, '_monitoring_thread') or not self._monitoring_thread:
+        """Stop background monitoring."""
+        future = getattr(self, '_monitor_future', None)
+        if future is None or future.done():
             return
 
-        if self._monitoring_thread.is_alive():
-            logger.info("Stopping background agent monitoring...")
-            self._stop_monitoring.set()
-            self._monitoring_thread.join(timeout=10)
-            if self._monitoring_thread.is_alive():
-                logger.warning("Background monitoring thread did not stop cleanly")
-            else:
-                logger.info("Background monitoring stopped")
+        logger.info("Stopping background agent monitoring...")
+        future.cancel()
+        logger.info("Background monitoring stopped")
 
-    def _background_monitor(self):
-        """Background thread function for periodic monitoring."""
+    async def _monitor_agents(self):
+        """Background task running one monitor per agent over a shared client."""
         logger.info("Background agent monitoring started")
-
-        while not self._stop_monitoring.is_set():
+        try:
+            async with httpx.AsyncClient(timeout=httpx.Timeout(self._fast_check_timeout)) as client:
+                await asyncio.gather(*(
+                    self._monitor_agent(name, url, client) for name, url in self.AGENT_ADDRESS_MAPPING.items()
+                ))
+        finally:
+            logger.info("Background agent monitoring stopped")
+
+    async def _monitor_agent(self, agent_name: str, agent_url: str, client: httpx.AsyncClient):
+        """Re-probe one agent every refresh interval and publish the result if it changed."""
+        while True:
+            # Jitter keeps agents from being probed in lockstep
+            await asyncio.sleep(self._refresh_interval * random.uniform(0.8, 1.2))
             try:
-                # Wait for the refresh interval (or until stop signal)
-                if self._stop_monitoring.wait(self._refresh_interval):
-                    break  # Stop signal received
-
-                # Perform connectivity refresh with fast timeout
-                logger.info("Running background agent connectivity check...")
-                start_time = time.time()
-
-                has_changes = self.refresh_agents(use_fast_timeout=True)
-
-                duration = time.time() - start_time
-                if has_changes:
-                    logger.info(f"Background check completed in {duration:.1f}s - changes detected")
-                else:
-                    logger.info(f"Background check completed in {duration:.1f}s - no changes")
-
+                is_reachable, agent_card = await self._acheck_agent_connectivity(agent_name, agent_url, client)
             except Exception as e:
-                logger.error(f"Error in background monitoring: {e}")
-                # Continue monitoring despite errors
-
-        logger.info("Background agent monitoring stopped")
+                logger.error(f"Error in background monitoring of {agent_name}: {e}")
+                continue
+            if self._apply_probe_result(agent_name, is_reachable, agent_card):
+                logger.info(f"🔄 Agent {agent_name} is now {self.health(agent_name).value}")
 
     def force_refresh(self) -> bool:
         """Force immediate refresh (useful for manual triggers or API calls)."""
@@ -747,29 +1056,56 @@ class AgentRegistry:
 
     def get_registry_status(self) -> Dict[str, Any]:
         """Get current registry status for monitoring/debugging."""
+        snapshot = self._snapshot
+        status = {
+            "agents_count": len(snapshot.agents),
+            "tools_count": len(snapshot.tools),
+            "agents": list(snapshot.agents.keys()),
+            "generation": snapshot.generation,
+            "health": {name: health.value for name, health in snapshot.health.items()},
+            "pending": snapshot.pending,
+        }
         if not hasattr(self, '_lock'):
-            return {
-                "agents_count": len(self._agents),
-                "tools_count": len(self._tools),
-                "agents": list(self._agents.keys()),
-                "dynamic_monitoring": False
-            }
+            status["dynamic_monitoring"] = False
+            return status
+
+        status.update({
+            "background_monitoring": self._enable_background_monitoring,
+            "refresh_interval": self._refresh_interval,
+            "monitoring_active": bool(self._monitor_future and not self._monitor_future.done()),
+        })
+        return status
+
+    async def _cancel_tasks(self) -> None:
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self) -> None:
+        """Stop monitoring, cancel in-flight probes and shut down the registry loop."""
+        self.stop_background_monitoring()
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is None or loop.is_closed():
+            return
 
-        with self._lock:
-            return {
-                "agents_count": len(self._agents),
-                "tools_count": len(self._tools),
-                "agents": list(self._agents.keys()),
-                "background_monitoring": self._enable_background_monitoring,
-                "refresh_interval": self._refresh_interval,
-                "monitoring_active": self._monitoring_thread and self._monitoring_thread.is_alive() if self._monitoring_thread else False
-            }
+        on_loop = threading.current_thread() is thread
+        if not on_loop:
+            try:
+                asyncio.run_coroutine_threadsafe(self._cancel_tasks(), loop).result(timeout=5)
+            except Exception as e:
+                logger.debug(f"Error cancelling registry tasks: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if not on_loop:
+            thread.join(timeout=5)
 
     def __del__(self):
         """Cleanup background monitoring on destruction."""
         try:
-            if hasattr(self, 'stop_background_monitoring'):
-                self.stop_background_monitoring()
+            if hasattr(self, '_loop_lock'):
+                self.close()
         except Exception as e:
             logger.error(f"Error in __del__: {e}")
             pass
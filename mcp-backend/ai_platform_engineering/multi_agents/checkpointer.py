@@ -0,0 +1,542 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Bounded, durable LangGraph checkpointer for the AI Platform Engineer supervisor.
+
+InMemorySaver keeps every checkpoint of every conversation for the lifetime of
+the process. BoundedSqliteSaver stores checkpoints in SQLite instead and keeps
+the store bounded:
+
+- idle threads are evicted after CHECKPOINT_TTL_SECONDS, and the least
+  recently used threads are evicted once there are more than
+  CHECKPOINT_MAX_THREADS,
+- once a thread has more than CHECKPOINT_MAX_PER_THREAD checkpoints, older
+  checkpoints (with their writes and superseded channel blobs) are compacted
+  into the latest snapshot,
+- stats() reports thread/checkpoint counts, database size and eviction counts.
+
+With a file path the store survives restarts and can be shared by replicas
+that mount the same volume (SQLite WAL mode). ":memory:" keeps it in process.
+
+Configuration (environment variables):
+    CHECKPOINTER_BACKEND        "sqlite" (default), "memory" (unbounded InMemorySaver) or "none"
+    CHECKPOINT_SQLITE_PATH      database file (default: ":memory:")
+    CHECKPOINT_MAX_THREADS      threads kept before LRU eviction (default: 10000)
+    CHECKPOINT_TTL_SECONDS      idle time before a thread expires (default: 86400, 0 disables)
+    CHECKPOINT_MAX_PER_THREAD   checkpoints per thread before compaction (default: 10)
+"""
+
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_last_access ON threads (last_access);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class BoundedSqliteSaver(BaseCheckpointSaver[str]):
+    """
+    SQLite checkpoint saver with LRU/TTL eviction of idle threads and
+    per-thread compaction. Safe to share between threads; async methods run
+    the SQLite calls in a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        *,
+        max_threads: int = 10000,
+        ttl_seconds: float = 86400,
+        max_checkpoints_per_thread: int = 10,
+        cache_kib: int = 8192,
+        serde: Any = None,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.max_checkpoints_per_thread = max(1, max_checkpoints_per_thread)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(f"PRAGMA cache_size=-{int(cache_kib)}")
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        self._thread_count = self._conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+        self._next_sweep = 0.0
+        self._evicted = 0
+        self._expired = 0
+        self._compacted = 0
+
+    @classmethod
+    def from_env(cls) -> "BoundedSqliteSaver":
+        """Saver configured from CHECKPOINT_* environment variables."""
+        return cls(
+            os.getenv("CHECKPOINT_SQLITE_PATH", ":memory:"),
+            max_threads=int(os.getenv("CHECKPOINT_MAX_THREADS", "10000")),
+            ttl_seconds=float(os.getenv("CHECKPOINT_TTL_SECONDS", "86400")),
+            max_checkpoints_per_thread=int(os.getenv("CHECKPOINT_MAX_PER_THREAD", "10")),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # BaseCheckpointSaver
+    # ------------------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        with self._lock:
+            if checkpoint_id:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                    "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                    "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._touch(thread_id, time.time())
+            return self._load_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                f"metadata_type, metadata FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+                params,
+            ).fetchall()
+
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            metadata = self.serde.loads_typed((row[4], row[5]))
+            if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                item = self._load_tuple(thread_id, checkpoint_ns, row, metadata)
+            yield item
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        c = checkpoint.copy()
+        values: Dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+
+        blobs = []
+        for channel, version in new_versions.items():
+            type_, blob = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")
+            blobs.append((thread_id, checkpoint_ns, channel, str(version), type_, blob))
+        type_, serialized = self.serde.dumps_typed(c)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint["id"],
+                        config["configurable"].get("checkpoint_id"),
+                        type_,
+                        serialized,
+                        metadata_type,
+                        serialized_metadata,
+                    ),
+                )
+                new_thread = self._touch(thread_id, now)
+                self._maybe_compact(thread_id, checkpoint_ns, checkpoint["id"], c["channel_versions"])
+            if new_thread or now >= self._next_sweep:
+                self._evict(now)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Regular writes are kept from the first attempt; special writes (errors, interrupts) overwrite
+        regular, special = [], []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            row = (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                   channel, type_, blob, task_path)
+            (special if channel in WRITES_IDX_MAP else regular).append(row)
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", regular)
+                self._conn.executemany("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", special)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._delete_threads([thread_id])
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: [*self.list(config, filter=filter, before=before, limit=limit)])
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Same version format as InMemorySaver: zero-padded counter plus a random tie-breaker
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # ------------------------------------------------------------------
+    # Eviction, compaction and metrics
+    # ------------------------------------------------------------------
+
+    def compact(self) -> int:
+        """Compact every thread to its latest checkpoint. Returns the number of checkpoints removed."""
+        with self._lock:
+            latest = self._conn.execute(
+                "SELECT thread_id, checkpoint_ns, MAX(checkpoint_id) FROM checkpoints "
+                "GROUP BY thread_id, checkpoint_ns HAVING COUNT(*) > 1"
+            ).fetchall()
+            before = self._compacted
+            with self._conn:
+                for thread_id, checkpoint_ns, checkpoint_id in latest:
+                    type_, blob = self._conn.execute(
+                        "SELECT type, checkpoint FROM checkpoints "
+                        "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                        (thread_id, checkpoint_ns, checkpoint_id),
+                    ).fetchone()
+                    versions = self.serde.loads_typed((type_, blob))["channel_versions"]
+                    self._compact_thread(thread_id, checkpoint_ns, checkpoint_id, versions)
+            return self._compacted - before
+
+    def evict_expired(self) -> int:
+        """Run eviction now. Returns the number of threads evicted."""
+        with self._lock:
+            before = self._evicted + self._expired
+            self._evict(time.time())
+            return self._evicted + self._expired - before
+
+    def stats(self) -> Dict[str, Any]:
+        """Store size and eviction counters, for get_status() and metrics."""
+        with self._lock:
+            counts = {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("threads", "checkpoints", "blobs", "writes")
+            }
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                **counts,
+                "db_bytes": page_count * page_size,
+                "max_threads": self.max_threads,
+                "ttl_seconds": self.ttl_seconds,
+                "evicted_threads": self._evicted,
+                "expired_threads": self._expired,
+                "compacted_checkpoints": self._compacted,
+            }
+
+    def _touch(self, thread_id: str, now: float) -> bool:
+        """Record access to a thread; returns True if the thread is new. Caller holds the lock."""
+        updated = self._conn.execute(
+            "UPDATE threads SET last_access = ? WHERE thread_id = ?", (now, thread_id)
+        ).rowcount
+        if updated:
+            return False
+        self._conn.execute("INSERT INTO threads VALUES (?, ?)", (thread_id, now))
+        self._thread_count += 1
+        return True
+
+    def _evict(self, now: float) -> None:
+        """Drop expired threads, then the least recently used above max_threads. Caller holds the lock."""
+        if self.ttl_seconds > 0:
+            self._next_sweep = now + min(self.ttl_seconds / 10, 60)
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT thread_id FROM threads WHERE last_access < ?", (now - self.ttl_seconds,)
+            )]
+            if expired:
+                self._expired += len(expired)
+                self._delete_threads(expired)
+        else:
+            self._next_sweep = float("inf")
+
+        excess = self._thread_count - self.max_threads
+        if self.max_threads > 0 and excess > 0:
+            lru = [row[0] for row in self._conn.execute(
+                "SELECT thread_id FROM threads ORDER BY last_access LIMIT ?", (excess,)
+            )]
+            self._evicted += len(lru)
+            self._delete_threads(lru)
+            logger.debug("Evicted %d least recently used checkpoint threads", len(lru))
+
+    def _delete_threads(self, thread_ids: List[str]) -> None:
+        params = [(thread_id,) for thread_id in thread_ids]
+        with self._conn:
+            for table in ("checkpoints", "blobs", "writes"):
+                self._conn.executemany(f"DELETE FROM {table} WHERE thread_id = ?", params)
+            self._thread_count -= self._conn.executemany("DELETE FROM threads WHERE thread_id = ?", params).rowcount
+
+    def _maybe_compact(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, versions: ChannelVersions) -> None:
+        count = self._conn.execute(
+            "SELECT COUNT(*) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ).fetchone()[0]
+        if count > self.max_checkpoints_per_thread:
+            self._compact_thread(thread_id, checkpoint_ns, checkpoint_id, versions)
+
+    def _compact_thread(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, versions: ChannelVersions) -> None:
+        """Keep only ``checkpoint_id`` (with its pending writes and live channel blobs) for the namespace."""
+        key = (thread_id, checkpoint_ns, checkpoint_id)
+        removed = self._conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id != ?", key
+        ).rowcount
+        self._conn.execute(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id != ?", key
+        )
+        self._conn.execute(
+            "UPDATE checkpoints SET parent_checkpoint_id = NULL "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", key
+        )
+        live = {(channel, str(version)) for channel, version in versions.items()}
+        stale = [
+            (thread_id, checkpoint_ns, channel, version)
+            for channel, version in self._conn.execute(
+                "SELECT channel, version FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            )
+            if (channel, version) not in live
+        ]
+        self._conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?", stale
+        )
+        self._compacted += removed
+
+    def _load_tuple(self, thread_id: str, checkpoint_ns: str, row: Sequence[Any],
+                    metadata: Optional[CheckpointMetadata] = None) -> CheckpointTuple:
+        """Build a CheckpointTuple from a checkpoints row. Caller holds the lock."""
+        checkpoint_id, parent_checkpoint_id, type_, blob, metadata_type, metadata_blob = row
+        checkpoint = self.serde.loads_typed((type_, blob))
+
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            found = self._conn.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if found and found[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(found)
+
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=metadata if metadata is not None else self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, value)))
+                for task_id, channel, type_, value in writes
+            ],
+        )
+
+
+def create_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """Checkpointer selected by CHECKPOINTER_BACKEND, or None for "none"."""
+    backend = os.getenv("CHECKPOINTER_BACKEND", "sqlite").lower()
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return InMemorySaver()
+    if backend != "sqlite":
+        logger.warning(f"Unknown CHECKPOINTER_BACKEND '{backend}', using sqlite")
+    saver = BoundedSqliteSaver.from_env()
+    logger.info(
+        f"Checkpointer: sqlite at {saver.path} (max {saver.max_threads} threads, "
+        f"ttl {saver.ttl_seconds:.0f}s, compact after {saver.max_checkpoints_per_thread} checkpoints)"
+    )
+    return saver
+
+
+def checkpointer_stats(checkpointer: Optional[BaseCheckpointSaver]) -> Dict[str, Any]:
+    """stats() for a bounded saver; a rough size for InMemorySaver; empty when disabled."""
+    if checkpointer is None:
+        return {"backend": "none"}
+    if isinstance(checkpointer, BoundedSqliteSaver):
+        return checkpointer.stats()
+    if isinstance(checkpointer, InMemorySaver):
+        return {
+            "backend": "memory",
+            "threads": len(checkpointer.storage),
+            "checkpoints": sum(len(c) for ns in checkpointer.storage.values() for c in ns.values()),
+            "blobs": len(checkpointer.blobs),
+        }
+    return {"backend": type(checkpointer).__name__}
@@ -5,7 +5,6 @@ import logging
 from typing import Any, Optional, Union
 from uuid import uuid4
 from pydantic import PrivateAttr
-import pprint
 
 import httpx
 
@@ -163,11 +162,9 @@ class A2ARemoteAgentConnectTool(BaseTool):
         params=MessageSendParams(**send_message_payload)
     )
 
-    logger.info(f"Request to send message: {request}")
-    pprint.pprint(request)
+    logger.debug("Request to send message: %s", request)
     response = await self._client.send_message(request)
-    logger.info(f"Response received from A2A agent: {response}")
-    pprint.pprint(response)
+    logger.debug("Response received from A2A agent: %s", response)
 
     def extract_text_from_parts(artifacts):
       """Extract all text fields from artifact parts."""
@@ -1,16 +1,22 @@
 # Copyright 2025 CNOE Contributors
 # SPDX-License-Identifier: Apache-2.0
 
+import hashlib
+import json
 import logging
 import uuid
 import os
 import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
 from langchain_core.messages import AIMessage
 from langgraph.graph.state import CompiledStateGraph
-from langgraph.checkpoint.memory import InMemorySaver
 from cnoe_agent_utils import LLMFactory
 
 
+from ai_platform_engineering.multi_agents.checkpointer import checkpointer_stats, create_checkpointer
 from ai_platform_engineering.multi_agents.platform_engineer import platform_registry
 from ai_platform_engineering.multi_agents.platform_engineer.prompts import agent_prompts, generate_system_prompt
 from deepagents import async_create_deep_agent
@@ -18,15 +24,61 @@ from deepagents import async_create_deep_agent
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+
+def agent_fingerprint(agent_card: Dict[str, Any]) -> str:
+  """Stable hash of an agent card, used to tell which agents changed between rebuilds."""
+  return hashlib.sha1(json.dumps(agent_card, sort_keys=True, default=str).encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class AgentSetDiff:
+  """Agents added, removed or with a changed card between two registry states."""
+  added: Tuple[str, ...] = ()
+  removed: Tuple[str, ...] = ()
+  changed: Tuple[str, ...] = ()
+
+  @classmethod
+  def between(cls, old: Mapping[str, str], new: Mapping[str, str]) -> "AgentSetDiff":
+    return cls(
+      added=tuple(sorted(new.keys() - old.keys())),
+      removed=tuple(sorted(old.keys() - new.keys())),
+      changed=tuple(sorted(name for name in old.keys() & new.keys() if old[name] != new[name])),
+    )
+
+  def __bool__(self) -> bool:
+    return bool(self.added or self.removed or self.changed)
+
+
+@dataclass(frozen=True)
+class GraphSnapshot:
+  """
+  A compiled graph and the agent set it was built from. Snapshots are never
+  mutated: a rebuild publishes a new one, and requests that already hold the
+  previous graph keep streaming from it.
+  """
+  graph: CompiledStateGraph
+  generation: int
+  agent_fingerprints: Mapping[str, str] = field(default_factory=dict)
+  build_seconds: float = 0.0
+
+
 class AIPlatformEngineerMAS:
   def __init__(self):
     # Use existing platform_registry and enable dynamic monitoring
     platform_registry.enable_dynamic_monitoring(on_change_callback=self._on_agents_changed)
 
-    # Thread safety for graph access
-    self._graph_lock = threading.RLock()
-    self._graph = None
-    self._graph_generation = 0  # Track graph version for debugging
+    # Readers take self._snapshot without locking; rebuilds are serialized and publish a new snapshot
+    self._rebuild_lock = threading.Lock()
+    self._snapshot: Optional[GraphSnapshot] = None
+    self._last_rebuild: Dict[str, Any] = {}
+
+    # Reused across rebuilds: the LLM client and per-agent subagent entries (keyed by card fingerprint)
+    self._base_model = None
+    self._subagent_cache: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+
+    # One checkpointer for the life of the process, so conversations survive graph rebuilds
+    # (disabled under LANGGRAPH_DEV, where the dev server provides its own)
+    self._checkpointer = None if os.getenv("LANGGRAPH_DEV") else create_checkpointer()
 
     # Build initial graph
     self._build_graph()
@@ -36,13 +88,20 @@ class AIPlatformEngineerMAS:
   def get_graph(self) -> CompiledStateGraph:
     """
     Returns the current compiled LangGraph instance.
-    Thread-safe access to the graph.
+    Lock-free: returns the graph of the latest published snapshot, even while a rebuild is running.
 
     Returns:
         CompiledStateGraph: The current compiled LangGraph instance.
     """
-    with self._graph_lock:
-      return self._graph
+    return self._snapshot.graph
+
+  def get_snapshot(self) -> GraphSnapshot:
+    """Returns the latest published graph snapshot."""
+    return self._snapshot
+
+  @property
+  def _graph_generation(self) -> int:
+    return self._snapshot.generation if self._snapshot else 0
 
   def _on_agents_changed(self):
     """Callback triggered when agent registry detects changes."""
@@ -57,11 +116,10 @@ class AIPlatformEngineerMAS:
         bool: True if graph was rebuilt successfully
     """
     try:
-      with self._graph_lock:
-        old_generation = self._graph_generation
-        self._build_graph()
+      old_generation = self._graph_generation
+      if self._build_graph():
         logger.info(f"Graph successfully rebuilt (generation {old_generation} → {self._graph_generation})")
-        return True
+      return True
     except Exception as e:
       logger.error(f"Failed to rebuild graph: {e}")
       return False
@@ -78,60 +136,91 @@ class AIPlatformEngineerMAS:
 
   def get_status(self) -> dict:
     """Get current status for monitoring/debugging."""
-    with self._graph_lock:
-      return {
-        "graph_generation": self._graph_generation,
-        "registry_status": platform_registry.get_registry_status()
-      }
-
-  def _build_graph(self) -> None:
+    return {
+      "graph_generation": self._graph_generation,
+      "last_rebuild": dict(self._last_rebuild),
+      "registry_status": platform_registry.get_registry_status(),
+      "checkpointer": checkpointer_stats(self._checkpointer),
+    }
+
+  def _subagent(self, agent_key: str, agent_card: Dict[str, Any], fingerprint: str) -> Dict[str, Any]:
+    """Subagent definition for an agent, regenerated only when its card changed."""
+    cached = self._subagent_cache.get(agent_key)
+    if cached is None or cached[0] != fingerprint:
+      cached = (fingerprint, platform_registry.generate_subagent(agent_key, agent_card, agent_prompts))
+      self._subagent_cache[agent_key] = cached
+    return cached[1]
+
+  def _build_graph(self) -> bool:
     """
     Internal method to construct and compile a DeepAgents graph with current agents.
-    Updates self._graph and increments generation counter.
-    """
-    logger.debug(f"Building deep agent (generation {self._graph_generation + 1})...")
-
-    base_model = LLMFactory().get_llm()
-
-    # Get fresh tools from registry
-    all_agents = platform_registry.get_all_agents()
-
-    # Dynamically generate system prompt and subagents from current registry
-    current_agents = platform_registry.agents
-    system_prompt = generate_system_prompt(current_agents)
-    subagents = platform_registry.generate_subagents(agent_prompts)
-
-    logger.info(f'🔧 Rebuilding with {len(all_agents)} tools and {len(subagents)} sub_agents')
-    logger.info(f'📦 Tools: {[t.name for t in all_agents]}')
-    logger.info(f'🤖 Subagents: {[s["name"] for s in subagents]}')
-
-    # Create the Deep Agent
-    # NOTE: Sub-agents are A2A tools, not Deep Agent subagents
-    # Streaming is handled via A2ARemoteAgentConnectTool's streaming implementation
-    deep_agent = async_create_deep_agent(
-      tools=all_agents,
-      instructions=system_prompt,
-      subagents=subagents,
-      model=base_model,
-      # response_format=PlatformEngineerResponse
-    )
-
-    # Check if LANGGRAPH_DEV is defined in the environment
-    if os.getenv("LANGGRAPH_DEV"):
-      checkpointer = None
-    else:
-      checkpointer = InMemorySaver()
-
-    # Attach checkpointer if desired
-    if checkpointer is not None:
-      deep_agent.checkpointer = checkpointer
 
-    # Atomically update graph and increment generation
-    self._graph = deep_agent
-    self._graph_generation += 1
+    Diffs the registry against the current snapshot and returns False without
+    rebuilding when no agent was added, removed or changed. Otherwise only the
+    affected subagent entries and prompt blocks are regenerated (unchanged tools
+    are reused by the registry), the graph is compiled outside any lock that
+    readers take, and the new snapshot is published with a single assignment.
+    """
+    with self._rebuild_lock:
+      started = time.perf_counter()
+      current_agents = dict(platform_registry.agents)
+      fingerprints = {name: agent_fingerprint(card) for name, card in current_agents.items()}
+      previous = self._snapshot
+      diff = AgentSetDiff.between(previous.agent_fingerprints if previous else {}, fingerprints)
+
+      if previous is not None and not diff:
+        logger.debug(f"Agent set unchanged, keeping graph generation {previous.generation}")
+        return False
+
+      generation = (previous.generation if previous else 0) + 1
+      logger.debug(f"Building deep agent (generation {generation}): {diff}")
+
+      if self._base_model is None:
+        self._base_model = LLMFactory().get_llm()
+
+      # Get tools from registry (reused for agents whose card did not change)
+      all_agents = platform_registry.get_all_agents()
+
+      # System prompt blocks are memoized per agent; subagent entries are cached per card fingerprint
+      system_prompt = generate_system_prompt(current_agents)
+      for name in diff.removed:
+        self._subagent_cache.pop(name, None)
+      subagents = [self._subagent(name, card, fingerprints[name]) for name, card in current_agents.items()]
+
+      logger.info(f'🔧 Rebuilding with {len(all_agents)} tools and {len(subagents)} sub_agents '
+                  f'(added={list(diff.added)}, removed={list(diff.removed)}, changed={list(diff.changed)})')
+      logger.info(f'📦 Tools: {[t.name for t in all_agents]}')
+      logger.info(f'🤖 Subagents: {[s["name"] for s in subagents]}')
+
+      # Create the Deep Agent
+      # NOTE: Sub-agents are A2A tools, not Deep Agent subagents
+      # Streaming is handled via A2ARemoteAgentConnectTool's streaming implementation
+      deep_agent = async_create_deep_agent(
+        tools=all_agents,
+        instructions=system_prompt,
+        subagents=subagents,
+        model=self._base_model,
+        # response_format=PlatformEngineerResponse
+      )
+
+      # Attach checkpointer if desired
+      if self._checkpointer is not None:
+        deep_agent.checkpointer = self._checkpointer
+
+      # Publish the new snapshot; in-flight requests keep the graph they already hold
+      build_seconds = time.perf_counter() - started
+      self._snapshot = GraphSnapshot(deep_agent, generation, MappingProxyType(fingerprints), build_seconds)
+      self._last_rebuild = {
+        "generation": generation,
+        "added": list(diff.added),
+        "removed": list(diff.removed),
+        "changed": list(diff.changed),
+        "build_seconds": round(build_seconds, 4),
+      }
 
-    logger.debug(f"Deep agent created successfully (generation {self._graph_generation})")
-    logger.info(f"✅ Deep agent updated with {len(all_agents)} tools and {len(subagents)} subagents")
+      logger.debug(f"Deep agent created successfully (generation {generation})")
+      logger.info(f"✅ Deep agent updated with {len(all_agents)} tools and {len(subagents)} subagents in {build_seconds:.3f}s")
+      return True
 
 
   async def serve(self, prompt: str):
@@ -1,3 +1,5 @@
+import functools
+
 from langchain.prompts import PromptTemplate
 import yaml
 import os
@@ -71,23 +73,38 @@ skills_prompt = PromptTemplate(
 
 subagents = platform_registry.generate_subagents(agent_prompts)
 
+# Prompt rendering is memoized: prompt_config is loaded once, so an agent's instruction block only
+# changes with its description, and graph rebuilds only re-render agents whose cards changed.
+@functools.lru_cache(maxsize=512)
+def render_tool_instruction(agent_key: str, description: str) -> str:
+  logger.info(f"Generating tool instruction for agent_key: {agent_key}")
+
+  # Check if there is a system_prompt override provided in the prompt config
+  system_prompt_override = agent_prompts.get(agent_key, {}).get("system_prompt", None)
+  if system_prompt_override:
+    agent_system_prompt = system_prompt_override
+  else:
+    # Use the agent description as the system prompt
+    agent_system_prompt = description
+
+  instruction = f"""
+{agent_key}:
+  {agent_system_prompt}
+"""
+  return instruction.strip()
+
+
 # Generate system prompt dynamically based on tools and their tasks
 def generate_system_prompt(agents: Dict[str, Any]):
   tool_instructions = []
   for agent_key, agent_card in agents.items():
 
-    logger.info(f"Generating tool instruction for agent_key: {agent_key}")
-
     # Check if agent and agent_card are available
     if agent_card is None:
       logger.warning(f"Agent {agent_key} is None, skipping...")
       continue
 
     try:
-      if agent_card is None:
-        logger.warning(f"Agent {agent_key} has no agent card, skipping...")
-        continue
-      print(f"agent_card 1: {agent_card}")
       description = agent_card['description']
     except AttributeError as e:
       logger.warning(f"Agent {agent_key} does not have agent_card method or description: {e}, skipping...")
@@ -96,22 +113,13 @@ def generate_system_prompt(agents: Dict[str, Any]):
       logger.error(f"Error getting agent card for {agent_key}: {e}, skipping...")
       continue
 
-    # Check if there is a system_prompt override provided in the prompt config
-    system_prompt_override = agent_prompts.get(agent_key, {}).get("system_prompt", None)
-    if system_prompt_override:
-      agent_system_prompt = system_prompt_override
-    else:
-      # Use the agent description as the system prompt
-      agent_system_prompt = description
+    tool_instructions.append(render_tool_instruction(agent_key, description))
 
-    instruction = f"""
-{agent_key}:
-  {agent_system_prompt}
-"""
-    tool_instructions.append(instruction.strip())
+  return render_system_prompt("\n\n".join(tool_instructions))
 
-  tool_instructions_str = "\n\n".join(tool_instructions)
 
+@functools.lru_cache(maxsize=32)
+def render_system_prompt(tool_instructions_str: str) -> str:
   yaml_template = config.get("system_prompt_template")
 
   logger.info(f"System Prompt Template: {yaml_template}")
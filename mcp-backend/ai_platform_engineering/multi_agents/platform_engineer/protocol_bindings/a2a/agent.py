@@ -4,6 +4,7 @@
 import asyncio
 import json
 import logging
+import re
 from collections.abc import AsyncIterable
 from typing import Any
 
@@ -25,6 +26,9 @@ from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# "🔍 Querying <agent> for <purpose>..." announcements streamed by the supervisor LLM
+QUERYING_PATTERN = re.compile(r'🔍\s+Querying\s+(\w+)\s+for\s+([^.]+?)\.\.\.')
+
 class AIPlatformEngineerA2ABinding:
   """
   AI Platform Engineer Multi-Agent System (MAS) for currency conversion.
@@ -33,9 +37,14 @@ class AIPlatformEngineerA2ABinding:
   SYSTEM_INSTRUCTION = system_prompt
 
   def __init__(self):
-      self.graph = AIPlatformEngineerMAS().get_graph()
+      self.mas = AIPlatformEngineerMAS()
       self.tracing = TracingManager()
 
+  @property
+  def graph(self):
+      """The latest compiled graph; each stream takes it once and keeps it until it finishes."""
+      return self.mas.get_graph()
+
   def _deserialize_a2a_event(self, data: Any):
       """Try to deserialize a dict payload into known A2A models."""
       if not isinstance(data, dict):
@@ -52,6 +61,8 @@ class AIPlatformEngineerA2ABinding:
       logging.info(f"Starting stream with query: {query}, context_id: {context_id}, trace_id: {trace_id}")
       inputs = {'messages': [('user', query)]}
       config = self.tracing.create_config(context_id)
+      # Snapshot the graph: an agent registry change mid-stream publishes a new graph for later requests
+      graph = self.graph
 
       # Ensure trace_id is always in config metadata for tools to access
       if 'metadata' not in config:
@@ -69,14 +80,14 @@ class AIPlatformEngineerA2ABinding:
           else:
               logging.warning("No trace_id available from parameter or context")
 
-      logging.info(f"Created tracing config: {config}")
+      logging.debug("Created tracing config: %s", config)
 
       try:
           # Use astream with multiple stream modes to get both token-level streaming AND custom events
           # stream_mode=['messages', 'custom'] enables:
           # - 'messages': Token-level streaming via AIMessageChunk
           # - 'custom': Custom events from sub-agents via get_stream_writer()
-          async for item_type, item in self.graph.astream(inputs, config, stream_mode=['messages', 'custom']):
+          async for item_type, item in graph.astream(inputs, config, stream_mode=['messages', 'custom']):
               
               # Handle custom A2A event payloads from sub-agents
               if item_type == 'custom' and isinstance(item, dict):
@@ -158,9 +169,7 @@ class AIPlatformEngineerA2ABinding:
 
                   if content:  # Only yield if there's actual content
                       # Check for querying announcements and emit as tool_update events
-                      import re
-                      querying_pattern = r'🔍\s+Querying\s+(\w+)\s+for\s+([^.]+?)\.\.\.'
-                      match = re.search(querying_pattern, content)
+                      match = QUERYING_PATTERN.search(content) if '🔍' in content else None
                       
                       if match:
                           agent_name = match.group(1)
@@ -233,7 +242,7 @@ class AIPlatformEngineerA2ABinding:
       # Fallback to old method if astream doesn't work
       except Exception as e:
           logging.warning(f"Token-level streaming failed, falling back to message-level: {e}")
-          async for item_type, item in self.graph.astream(inputs, config, stream_mode=['messages', 'custom', 'updates']):
+          async for item_type, item in graph.astream(inputs, config, stream_mode=['messages', 'custom', 'updates']):
 
               # Handle custom A2A event payloads emitted via get_stream_writer()
               if isinstance(item, dict) and item.get("type") == "a2a_event":
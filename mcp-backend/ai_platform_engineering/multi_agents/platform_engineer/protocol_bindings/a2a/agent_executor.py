@@ -9,13 +9,13 @@ import asyncio
 import os
 from typing import Optional, Tuple, List, Dict
 from typing_extensions import override
-from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events.event_queue import EventQueue
-from a2a.client import A2AClient, A2ACardResolver
 from a2a.types import (
+    Artifact,
+    TextPart,
     Message as A2AMessage,
     Task as A2ATask,
     TaskArtifactUpdateEvent,
@@ -32,24 +32,43 @@ from ai_platform_engineering.multi_agents.platform_engineer.protocol_bindings.a2
     AIPlatformEngineerA2ABinding
 )
 from ai_platform_engineering.multi_agents.platform_engineer import platform_registry
+from ai_platform_engineering.multi_agents.query_router import (  # noqa: F401 (RoutingCandidate re-exported)
+    QueryRouter,
+    RoutingCandidate,
+    RoutingDecision,
+    RoutingType,
+    parse_keywords,
+)
+from ai_platform_engineering.utils.a2a_common.hot_path import ChunkCoalescer, SampledLogger, event_text, stream_event
+from ai_platform_engineering.utils.a2a_common.transport import get_transport_pool
 from cnoe_agent_utils.tracing import extract_trace_id_from_context
 
 logger = logging.getLogger(__name__)
 
 
-class RoutingType(Enum):
-    """Types of routing strategies for query execution"""
-    DIRECT = "direct"          # Single sub-agent, direct streaming
-    PARALLEL = "parallel"      # Multiple sub-agents, parallel streaming
-    COMPLEX = "complex"        # Requires Deep Agent orchestration
-
-
 @dataclass
-class RoutingDecision:
-    """Routing decision for query execution"""
-    type: RoutingType
-    agents: List[Tuple[str, str]]  # List of (agent_name, agent_url)
-    reason: str = ""
+class TaskStreamState:
+    """Streaming state for a single execute() call.
+
+    One instance is created per task and threaded through the streaming
+    helpers, so concurrent tasks on a shared executor never see each
+    other's execution plan buffer or artifact IDs.
+    """
+    # Execution plan streaming (⟦ ... ⟧ markers)
+    execution_plan_active: bool = False
+    execution_plan_buffer: str = ""
+    execution_plan_complete: bool = False
+    execution_plan_artifact_id: Optional[str] = None  # Separate artifact ID for execution plan streaming
+    execution_plan_first_chunk: bool = True  # Track if this is the first execution plan chunk
+
+    # Regular content streaming
+    first_artifact_sent: bool = False
+    streaming_artifact_id: Optional[str] = None  # Shared artifact ID for all streaming chunks
+    accumulated_content: List[str] = field(default_factory=list)
+
+    # Hot path: coalesces regular content chunks (A2A_STREAM_HOT_PATH) and samples per-chunk logs
+    coalescer: ChunkCoalescer = field(default_factory=ChunkCoalescer.from_env)
+    chunk_log: SampledLogger = field(default_factory=lambda: SampledLogger(logger))
 
 
 class AIPlatformEngineerA2AExecutor(AgentExecutor):
@@ -58,11 +77,6 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
     def __init__(self):
         self.agent = AIPlatformEngineerA2ABinding()
 
-        # Execution plan streaming state
-        self._execution_plan_active = False
-        self._execution_plan_buffer = ""
-        self._execution_plan_complete = False
-
         # Feature flags for different routing approaches
         # Default to DEEP_AGENT_PARALLEL_ORCHESTRATION mode (best performance: 4.94s avg, 29% faster than ENHANCED_STREAMING)
         self.enhanced_streaming_enabled = os.getenv('ENABLE_ENHANCED_STREAMING', 'false').lower() == 'true'
@@ -93,53 +107,98 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
             'analyze,compare,if,then,create,update,based on,depending on,which,that have'
         )
         
+        # Per-agent deadline for PARALLEL fan-out; late agents contribute partial results
+        self.parallel_agent_timeout = float(os.getenv('PARALLEL_AGENT_TIMEOUT', '120'))
+
         logger.info(f"📚 Knowledge base keywords: {self.knowledge_base_keywords}")
         logger.info(f"🔧 Orchestration keywords: {self.orchestration_keywords}")
 
+        # Compiled matchers over agent names/aliases and keywords, rebuilt when the registry changes
+        self.router = QueryRouter.from_env(
+            platform_registry, self.knowledge_base_keywords, self.orchestration_keywords
+        )
+
     def _parse_env_keywords(self, env_var: str, default: str) -> List[str]:
         """Parse comma-separated keywords from environment variable."""
-        keywords_str = os.getenv(env_var, default)
-        keywords = [kw.strip() for kw in keywords_str.split(',') if kw.strip()]
-        return keywords
+        return parse_keywords(os.getenv(env_var, default))
 
-    def _handle_execution_plan_detection(self, content: str) -> bool:
+    def _handle_execution_plan_detection(self, state: TaskStreamState, content: str) -> bool:
         """
         Detect and handle execution plan streaming using Unicode markers ⟦ and ⟧.
         Returns True if this content is part of an execution plan.
         """
         # Check for start marker ⟦ (U+27E6)
         if '⟦' in content:
-            self._execution_plan_active = True
-            self._execution_plan_buffer = content
-            self._execution_plan_complete = False
+            state.execution_plan_active = True
+            state.execution_plan_buffer = content
+            state.execution_plan_complete = False
             logger.debug(f"🎯 Execution plan START detected: {content[:50]}...")
             return True
         
         # If we're in an active execution plan, accumulate content
-        elif self._execution_plan_active:
-            self._execution_plan_buffer += content
+        elif state.execution_plan_active:
+            state.execution_plan_buffer += content
             
             # Check for end marker ⟧ (U+27E7)
             if '⟧' in content:
-                self._execution_plan_active = False
-                self._execution_plan_complete = True
-                logger.debug(f"🎯 Execution plan END detected. Total length: {len(self._execution_plan_buffer)} chars")
+                state.execution_plan_active = False
+                state.execution_plan_complete = True
+                logger.debug(f"🎯 Execution plan END detected. Total length: {len(state.execution_plan_buffer)} chars")
                 # Note: The complete execution plan will be sent as an artifact in the main streaming logic
             
             return True
         
         return False
 
-    def _get_complete_execution_plan(self) -> str:
+    def _get_complete_execution_plan(self, state: TaskStreamState) -> str:
         """Get the complete execution plan buffer and reset the state."""
-        if self._execution_plan_complete:
-            complete_plan = self._execution_plan_buffer
+        if state.execution_plan_complete:
+            complete_plan = state.execution_plan_buffer
             # Reset state for next execution plan
-            self._execution_plan_buffer = ""
-            self._execution_plan_complete = False
+            state.execution_plan_buffer = ""
+            state.execution_plan_complete = False
             return complete_plan
         return ""
 
+    async def _send_streaming_chunk(
+        self, state: TaskStreamState, task: A2ATask, event_queue: EventQueue, content: str
+    ) -> None:
+        """Append regular content to the task's shared streaming_result artifact."""
+        artifact = new_text_artifact(
+            name='streaming_result',
+            description='Streaming result from Platform Engineer',
+            text=content,
+        )
+        if state.streaming_artifact_id is None:
+            # First regular content chunk - create new artifact with unique ID
+            state.streaming_artifact_id = artifact.artifactId  # Save for subsequent chunks
+            state.first_artifact_sent = True
+            use_append = False
+            logger.info(f"📝 Sending FIRST streaming artifact (append=False) with ID: {state.streaming_artifact_id}")
+        else:
+            # Subsequent regular content chunks - reuse the same artifact ID
+            artifact.artifactId = state.streaming_artifact_id  # Use the same ID for regular chunks
+            use_append = True
+            state.chunk_log.debug("📝 appending streaming chunk", chars=len(content))
+
+        # Forward chunk immediately to client (STREAMING!)
+        await self._safe_enqueue_event(
+            event_queue,
+            TaskArtifactUpdateEvent(
+                append=use_append,
+                context_id=task.context_id,
+                task_id=task.id,
+                lastChunk=False,  # Not the last chunk, more are coming
+                artifact=artifact,
+            )
+        )
+
+    async def _flush_streaming_chunks(self, state: TaskStreamState, task: A2ATask, event_queue: EventQueue) -> None:
+        """Send coalesced content before anything else is enqueued, so events keep their order."""
+        ready = await state.coalescer.drain()
+        if ready:
+            await self._send_streaming_chunk(state, task, event_queue, ready)
+
     def _detect_sub_agent_query(self, query: str) -> Optional[Tuple[str, str]]:
         """
         Detect if a query is targeting a specific A2A sub-agent.
@@ -168,12 +227,10 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
                 return (agent_name, available_agents[agent_name])
 
         # Check for agent name mentions in the query
-        for agent_name, agent_url in available_agents.items():
-            agent_name_lower = agent_name.lower()
-            logger.info(f"🔍 Checking if '{agent_name_lower}' is in query...")
-            if agent_name_lower in query_lower:
-                logger.info(f"🎯 Detected direct sub-agent query for: {agent_name}")
-                return (agent_name, agent_url)
+        mentioned = self.router.mentioned_agents(query)
+        if mentioned:
+            logger.info(f"🎯 Detected direct sub-agent query for: {mentioned[0].agent_name}")
+            return (mentioned[0].agent_name, mentioned[0].agent_url)
 
         logger.info("🔍 No sub-agent detected in query")
         return None
@@ -185,91 +242,9 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
         Returns:
             RoutingDecision with type (DIRECT/PARALLEL/COMPLEX) and target agents
 
-        Examples:
-            - "show me komodor clusters" → DIRECT (komodor - explicit mention)
-            - "list github repos and komodor clusters" → PARALLEL (github + komodor - explicit mentions)
-            - "analyze clusters and create jira tickets" → COMPLEX (needs Deep Agent orchestration)
-            - "who is on call for SRE" → COMPLEX (no explicit agent - Deep Agent will route to PagerDuty + RAG)
+        See QueryRouter.route for the decision rules.
         """
-        query_lower = query.lower()
-        available_agents = platform_registry.AGENT_ADDRESS_MAPPING
-
-        # Check for explicit knowledge base queries (direct to RAG)
-        # Use configurable keywords for knowledge base requests
-        is_knowledge_base_query = any(
-            query_lower.startswith(keyword.lower()) for keyword in self.knowledge_base_keywords
-        )
-
-        if is_knowledge_base_query:
-            # Direct route to RAG agent for knowledge base queries
-            rag_agent_url = available_agents.get('RAG')
-            if rag_agent_url:
-                logger.info("🎯 Knowledge base query detected, routing directly to RAG")
-                return RoutingDecision(
-                    type=RoutingType.DIRECT,
-                    agents=[('RAG', rag_agent_url)],
-                    reason=f"Knowledge base query (matched: {[k for k in self.knowledge_base_keywords if query_lower.startswith(k.lower())][0]}) - direct to RAG"
-                )
-
-        # Detect explicitly mentioned agents (by name only)
-        # Let Deep Agent handle semantic routing for all other cases
-        mentioned_agents = []
-
-        # Check direct agent name mentions
-        for agent_name, agent_url in available_agents.items():
-            agent_name_lower = agent_name.lower()
-            if agent_name_lower in query_lower:
-                if (agent_name, agent_url) not in mentioned_agents:
-                    mentioned_agents.append((agent_name, agent_url))
-                    logger.info(f"🔍 Explicit agent mention: '{agent_name_lower}' → {agent_name}")
-
-        logger.info(f"🎯 Routing analysis: found {len(mentioned_agents)} explicit agent mentions")
-
-        # Routing logic
-        # - Knowledge base keywords → Direct to RAG (fast path)
-        # - No explicit agents → Deep Agent (handles semantic routing + RAG)
-        # - One explicit agent → Direct streaming (fast path)
-        # - Multiple explicit agents → Parallel or Deep Agent (depends on complexity)
-
-        if len(mentioned_agents) == 0:
-            # No explicit agents mentioned - use Deep Agent for intelligent routing
-            # Deep Agent will decide which agents/RAG to query based on the improved prompt
-            return RoutingDecision(
-                type=RoutingType.COMPLEX,
-                agents=[],
-                reason="No explicit agents mentioned, using Deep Agent for intelligent routing"
-            )
-
-        elif len(mentioned_agents) == 1:
-            # Single explicit agent mention, use direct streaming (fast path)
-            agent_name, agent_url = mentioned_agents[0]
-            return RoutingDecision(
-                type=RoutingType.DIRECT,
-                agents=mentioned_agents,
-                reason=f"Direct streaming from {agent_name}"
-            )
-
-        else:
-            # Multiple explicit agents mentioned
-            # Check if query requires orchestration using configurable keywords
-            needs_orchestration = any(keyword.lower() in query_lower for keyword in self.orchestration_keywords)
-
-            if needs_orchestration:
-                # Needs Deep Agent for intelligent orchestration
-                return RoutingDecision(
-                    type=RoutingType.COMPLEX,
-                    agents=mentioned_agents,
-                    reason=f"Query requires orchestration across {len(mentioned_agents)} agents"
-                )
-            else:
-                # Simple multi-agent query, can stream in parallel
-                # E.g., "show me github repos and komodor clusters"
-                agent_names = [name for name, _ in mentioned_agents]
-                return RoutingDecision(
-                    type=RoutingType.PARALLEL,
-                    agents=mentioned_agents,
-                    reason=f"Parallel streaming from {', '.join(agent_names)}"
-                )
+        return self.router.route(query)
 
     async def _stream_from_sub_agent(
         self,
@@ -285,233 +260,186 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
         """
         logger.info(f"🌊 Streaming directly from sub-agent at {agent_url}")
 
-        httpx_client = httpx.AsyncClient(timeout=httpx.Timeout(300.0))
+        accumulated_text = []
         try:
-            # Fetch agent card
-            resolver = A2ACardResolver(httpx_client=httpx_client, base_url=agent_url)
-            agent_card = await resolver.get_agent_card()
-
-            # Override the agent card's URL with the correct external URL
-            # (agent cards often contain internal URLs like http://0.0.0.0:8000)
-            agent_card.url = agent_url
-            logger.debug(f"Overriding agent card URL to: {agent_url}")
-
-            # Create A2A client
-            client = A2AClient(httpx_client=httpx_client, agent_card=agent_card)
-
-            # Prepare message payload
-            message_payload = {
-                "message": {
-                    "role": "user",
-                    "parts": [{"kind": "text", "text": query}],
-                    "messageId": str(uuid.uuid4()),
+            # Pooled keep-alive connection and cached agent card (card URL already
+            # overridden with agent_url); holds one of the agent's concurrency slots
+            async with get_transport_pool().session(agent_url) as client:
+                # Prepare message payload
+                message_payload = {
+                    "message": {
+                        "role": "user",
+                        "parts": [{"kind": "text", "text": query}],
+                        "messageId": str(uuid.uuid4()),
+                    }
                 }
-            }
-
-            # Add trace_id to metadata if available
-            if trace_id:
-                message_payload["message"]["metadata"] = {"trace_id": trace_id}
 
-            # Create streaming request
-            streaming_request = SendStreamingMessageRequest(
-                id=str(uuid.uuid4()),
-                params=MessageSendParams(**message_payload),
-            )
+                # Add trace_id to metadata if available
+                if trace_id:
+                    message_payload["message"]["metadata"] = {"trace_id": trace_id}
 
-            # Send initial working status
-            await self._safe_enqueue_event(
-                event_queue,
-                TaskStatusUpdateEvent(
-                    status=TaskStatus(
-                        state=TaskState.working,
-                        message=new_agent_text_message(
-                            "Processing query...",
-                            task.context_id,
-                            task.id,
-                        ),
-                    ),
-                    final=False,
-                    context_id=task.context_id,
-                    task_id=task.id,
+                # Create streaming request
+                streaming_request = SendStreamingMessageRequest(
+                    id=str(uuid.uuid4()),
+                    params=MessageSendParams(**message_payload),
                 )
-            )
-
-            # Stream chunks from sub-agent
-            accumulated_text = []
-            chunk_count = 0
-            first_artifact_sent = False  # Track if we've sent the initial artifact
-            async for response_wrapper in client.send_message_streaming(streaming_request):
-                chunk_count += 1
-                wrapper_type = type(response_wrapper).__name__
-                logger.info(f"📦 Received stream response #{chunk_count}: {wrapper_type}")
-
-                # Extract event data from Pydantic response model
-                try:
-                    response_dict = response_wrapper.model_dump()
-                    result_data = response_dict.get('result', {})
-                    event_kind = result_data.get('kind', '')
-                    logger.info(f"   └─ Event kind: {event_kind}")
-
-                    # Handle artifact-update events (these contain the streaming content!)
-                    if event_kind == 'artifact-update':
-                        artifact_data = result_data.get('artifact', {})
-                        parts_data = artifact_data.get('parts', [])
-
-                        # Extract text from parts
-                        texts = []
-                        for part in parts_data:
-                            if isinstance(part, dict):
-                                text_content = part.get('text', '')
-                                if text_content:
-                                    texts.append(text_content)
-
-                        combined_text = ''.join(texts)
-                        if combined_text:
-                            logger.info(f"📝 Extracted {len(combined_text)} chars from artifact")
-                            accumulated_text.append(combined_text)
-
-                            # A2A protocol: first artifact must have append=False to create it
-                            # Subsequent artifacts use append=True to append to existing artifact
-                            use_append = first_artifact_sent
-                            if not first_artifact_sent:
-                                first_artifact_sent = True
-                                logger.info("📝 Sending FIRST artifact (append=False) to create artifact")
-                            else:
-                                logger.info("📝 Appending to existing artifact (append=True)")
-
-                            # Forward chunk immediately to client (streaming!)
-                            await self._safe_enqueue_event(
-                                event_queue,
-                                TaskArtifactUpdateEvent(
-                                    append=use_append,  # First: False (create), subsequent: True (append)
-                                    context_id=task.context_id,
-                                    task_id=task.id,
-                                    lastChunk=False,
-                                    artifact=new_text_artifact(
-                                        name='streaming_result',
-                                        description='Streaming result from sub-agent',
-                                        text=combined_text,
-                                    ),
-                                )
-                            )
-                            logger.info(f"✅ Streamed chunk to client: {combined_text[:50]}...")
-
-                    # Handle status-update events (task completion and content)
-                    elif event_kind == 'status-update':
-                        status_data = result_data.get('status', {})
-                        state = status_data.get('state', '')
-                        logger.info(f"📊 Status update: {state}")
 
-                        # Extract content from status message (if any)
-                        # Note: message can be None when status is "completed"
-                        message_data = status_data.get('message')
-                        parts_data = message_data.get('parts', []) if message_data else []
-
-                        texts = []
-                        for part in parts_data:
-                            if isinstance(part, dict):
-                                text_content = part.get('text', '')
-                                if text_content:
-                                    texts.append(text_content)
-
-                        combined_text = ''.join(texts)
-                        if combined_text:
-                            logger.info(f"📝 Extracted {len(combined_text)} chars from status message")
-                            accumulated_text.append(combined_text)
-
-                            # A2A protocol: first artifact must have append=False to create it
-                            use_append = first_artifact_sent
-                            if not first_artifact_sent:
-                                first_artifact_sent = True
-                                logger.info("📝 Sending FIRST artifact (append=False) from status message")
-                            else:
-                                logger.info("📝 Appending status content to artifact (append=True)")
-
-                            # Forward status message content to client
-                            await self._safe_enqueue_event(
-                                event_queue,
-                                TaskArtifactUpdateEvent(
-                                    append=use_append,  # First: False (create), subsequent: True (append)
-                                    context_id=task.context_id,
-                                    task_id=task.id,
-                                    lastChunk=False,
-                                    artifact=new_text_artifact(
-                                        name='streaming_result',
-                                        description='Streaming result from sub-agent',
-                                        text=combined_text,
-                                    ),
-                                )
-                            )
-                            logger.info(f"✅ Streamed status content to client: {combined_text[:50]}...")
-
-                        if state == 'completed':
-                            logger.info(f"🎉 Sub-agent completed! Total chunks: {chunk_count}")
-                            # Send final artifact with complete accumulated text
-                            # For streaming clients: redundant but safe (they already got chunks)
-                            # For non-streaming clients: essential (only way to get complete text)
-                            final_text = ''.join(accumulated_text)
-                            logger.info(f"📦 Sending final artifact with {len(final_text)} chars")
-                            await self._safe_enqueue_event(
-                                event_queue,
-                                TaskArtifactUpdateEvent(
-                                    append=False,
-                                    context_id=task.context_id,
-                                    task_id=task.id,
-                                    lastChunk=True,
-                                    artifact=new_text_artifact(
-                                        name='final_result',
-                                        description='Complete result from sub-agent',
-                                        text=final_text,  # Complete accumulated text for non-streaming clients
-                                    ),
-                                )
-                            )
-                            await self._safe_enqueue_event(
-                                event_queue,
-                                TaskStatusUpdateEvent(
-                                    status=TaskStatus(state=TaskState.completed),
-                                    final=True,
-                                    context_id=task.context_id,
-                                    task_id=task.id,
-                                )
-                            )
-                            return
-
-                except Exception as e:
-                    logger.error(f"   └─ Error processing stream chunk: {e}")
-                    import traceback
-                    logger.error(traceback.format_exc())
-
-            # If we exit the loop without receiving 'completed' status, stream ended prematurely
-            # Send any accumulated text as final result
-            if accumulated_text:
-                logger.warning(f"⚠️  Stream ended without completion status, sending {len(accumulated_text)} partial chunks")
-                await self._safe_enqueue_event(
-                    event_queue,
-                    TaskArtifactUpdateEvent(
-                        append=False,
-                        context_id=task.context_id,
-                        task_id=task.id,
-                        lastChunk=True,
-                        artifact=new_text_artifact(
-                            name='partial_result',
-                            description='Partial result from sub-agent (stream ended prematurely)',
-                            text=" ".join(accumulated_text),
-                        ),
-                    )
-                )
+                # Send initial working status
                 await self._safe_enqueue_event(
                     event_queue,
                     TaskStatusUpdateEvent(
-                        status=TaskStatus(state=TaskState.completed),
-                        final=True,
+                        status=TaskStatus(
+                            state=TaskState.working,
+                            message=new_agent_text_message(
+                                "Processing query...",
+                                task.context_id,
+                                task.id,
+                            ),
+                        ),
+                        final=False,
                         context_id=task.context_id,
                         task_id=task.id,
                     )
                 )
-                logger.info("🏁 Sub-agent streaming completed (with partial results)")
-            else:
-                logger.warning("⚠️  Stream ended without any results")
-                raise Exception("Stream ended without receiving any results")
+
+                # Stream chunks from sub-agent
+                chunk_count = 0
+                chunk_log = SampledLogger(logger)
+                streaming_artifact_id = None  # Shared by all streamed chunks
+
+                async def forward_chunk(text: str) -> None:
+                    nonlocal streaming_artifact_id
+                    artifact = new_text_artifact(
+                        name='streaming_result',
+                        description='Streaming result from sub-agent',
+                        text=text,
+                    )
+                    # A2A protocol: first artifact must have append=False to create it
+                    # Subsequent artifacts use append=True to append to existing artifact
+                    use_append = streaming_artifact_id is not None
+                    if use_append:
+                        artifact.artifact_id = streaming_artifact_id
+                    else:
+                        streaming_artifact_id = artifact.artifact_id
+                        logger.info("📝 Sending FIRST artifact (append=False) to create artifact")
+
+                    # Forward chunk immediately to client (streaming!)
+                    await self._safe_enqueue_event(
+                        event_queue,
+                        TaskArtifactUpdateEvent(
+                            append=use_append,  # First: False (create), subsequent: True (append)
+                            context_id=task.context_id,
+                            task_id=task.id,
+                            lastChunk=False,
+                            artifact=artifact,
+                        )
+                    )
+                    chunk_log.debug("✅ streamed chunk to client", chars=len(text))
+
+                # Buffered text is also forwarded once the stream goes quiet for the coalescing window
+                coalescer = ChunkCoalescer.from_env(on_idle=forward_chunk)
+
+                try:
+                    async for response_wrapper in client.send_message_streaming(streaming_request):
+                        chunk_count += 1
+
+                        # Read the event straight off the response model; no per-chunk model_dump
+                        try:
+                            event = stream_event(response_wrapper)
+                            chunk_log.debug("📦 received stream response", kind=getattr(event, 'kind', None))
+
+                            # Artifact-update events carry the streaming content; status-update
+                            # messages may carry content too (e.g. RAG)
+                            if isinstance(event, (TaskArtifactUpdateEvent, TaskStatusUpdateEvent)):
+                                combined_text = event_text(event)
+                                if combined_text:
+                                    accumulated_text.append(combined_text)
+                                    ready = coalescer.add(combined_text)
+                                    if ready:
+                                        await forward_chunk(ready)
+
+                            if isinstance(event, TaskStatusUpdateEvent):
+                                logger.debug("📊 Status update: %s", event.status.state.value)
+
+                                if event.status.state == TaskState.completed:
+                                    ready = await coalescer.drain()
+                                    if ready:
+                                        await forward_chunk(ready)
+
+                                    logger.info(f"🎉 Sub-agent completed! Total chunks: {chunk_count}")
+                                    # Send final artifact with complete accumulated text
+                                    # For streaming clients: redundant but safe (they already got chunks)
+                                    # For non-streaming clients: essential (only way to get complete text)
+                                    final_text = ''.join(accumulated_text)
+                                    logger.info(f"📦 Sending final artifact with {len(final_text)} chars")
+                                    await self._safe_enqueue_event(
+                                        event_queue,
+                                        TaskArtifactUpdateEvent(
+                                            append=False,
+                                            context_id=task.context_id,
+                                            task_id=task.id,
+                                            lastChunk=True,
+                                            artifact=new_text_artifact(
+                                                name='final_result',
+                                                description='Complete result from sub-agent',
+                                                text=final_text,  # Complete accumulated text for non-streaming clients
+                                            ),
+                                        )
+                                    )
+                                    await self._safe_enqueue_event(
+                                        event_queue,
+                                        TaskStatusUpdateEvent(
+                                            status=TaskStatus(state=TaskState.completed),
+                                            final=True,
+                                            context_id=task.context_id,
+                                            task_id=task.id,
+                                        )
+                                    )
+                                    return
+
+                        except Exception as e:
+                            logger.error(f"   └─ Error processing stream chunk: {e}")
+                            import traceback
+                            logger.error(traceback.format_exc())
+                finally:
+                    # No idle flush may follow an error or early return
+                    coalescer.close()
+
+                ready = await coalescer.drain()
+                if ready:
+                    await forward_chunk(ready)
+
+                # If we exit the loop without receiving 'completed' status, stream ended prematurely
+                # Send any accumulated text as final result
+                if accumulated_text:
+                    logger.warning(f"⚠️  Stream ended without completion status, sending {len(accumulated_text)} partial chunks")
+                    await self._safe_enqueue_event(
+                        event_queue,
+                        TaskArtifactUpdateEvent(
+                            append=False,
+                            context_id=task.context_id,
+                            task_id=task.id,
+                            lastChunk=True,
+                            artifact=new_text_artifact(
+                                name='partial_result',
+                                description='Partial result from sub-agent (stream ended prematurely)',
+                                text=" ".join(accumulated_text),
+                            ),
+                        )
+                    )
+                    await self._safe_enqueue_event(
+                        event_queue,
+                        TaskStatusUpdateEvent(
+                            status=TaskStatus(state=TaskState.completed),
+                            final=True,
+                            context_id=task.context_id,
+                            task_id=task.id,
+                        )
+                    )
+                    logger.info("🏁 Sub-agent streaming completed (with partial results)")
+                else:
+                    logger.warning("⚠️  Stream ended without any results")
+                    raise Exception("Stream ended without receiving any results")
 
         except httpx.HTTPStatusError as e:
             # HTTP errors (503, 500, etc.) - these are recoverable, let caller handle fallback
@@ -548,8 +476,6 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
             import traceback
             logger.error(traceback.format_exc())
             raise
-        finally:
-            await httpx_client.aclose()
 
     def _extract_text_from_artifact(self, artifact) -> str:
         """Extract text content from an A2A artifact."""
@@ -563,6 +489,12 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
                     texts.append(text)
         return " ".join(texts)
 
+    @staticmethod
+    def _caller_disconnected(event_queue: EventQueue) -> bool:
+        """True once the task's event queue has been closed (client gone or task torn down)."""
+        is_closed = getattr(event_queue, 'is_closed', None)
+        return bool(is_closed and is_closed())
+
     async def _stream_from_multiple_agents(
         self,
         agents: List[Tuple[str, str]],
@@ -573,7 +505,14 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
     ) -> None:
         """
         Stream from multiple sub-agents in parallel.
-        Results are aggregated and streamed to the client with source annotations.
+
+        Chunks are forwarded as soon as any agent produces them, each agent
+        appending to its own 'streaming_result' artifact tagged with
+        metadata.source_agent, so the first token arrives with the fastest
+        agent rather than the slowest. Each agent gets PARALLEL_AGENT_TIMEOUT
+        seconds; one that misses it or fails mid-stream contributes what it
+        streamed so far. Remaining streams are cancelled if the caller goes
+        away. The aggregated summary artifact is sent once all agents finish.
 
         Args:
             agents: List of (agent_name, agent_url) tuples
@@ -602,68 +541,49 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
             )
         )
 
-        # Create tasks for parallel execution
+        # Sub-agent streams push (agent_name, text) here; text=None marks the end of a stream
+        merged: asyncio.Queue = asyncio.Queue()
+        deadline = self.parallel_agent_timeout
+
         async def stream_single_agent(agent_name: str, agent_url: str) -> Dict[str, any]:
-            """Stream from a single agent and collect results"""
+            """Stream from a single agent, forwarding chunks to the merge queue"""
             logger.info(f"🔄 Starting stream from {agent_name}")
-            httpx_client = httpx.AsyncClient(timeout=httpx.Timeout(300.0))
             accumulated_text = []
 
             try:
-                # Fetch agent card
-                resolver = A2ACardResolver(httpx_client=httpx_client, base_url=agent_url)
-                agent_card = await resolver.get_agent_card()
-
-                # Override agent card URL
-                agent_card.url = agent_url
-
-                # Create A2A client
-                client = A2AClient(httpx_client=httpx_client, agent_card=agent_card)
+                async with asyncio.timeout(deadline):
+                    # Pooled keep-alive connection and cached agent card
+                    async with get_transport_pool().session(agent_url) as client:
+                        # Prepare message
+                        message_payload = {
+                            "message": {
+                                "role": "user",
+                                "parts": [{"kind": "text", "text": query}],
+                                "messageId": str(uuid.uuid4()),
+                            }
+                        }
 
-                # Prepare message
-                message_payload = {
-                    "message": {
-                        "role": "user",
-                        "parts": [{"kind": "text", "text": query}],
-                        "messageId": str(uuid.uuid4()),
-                    }
-                }
-
-                if trace_id:
-                    message_payload["message"]["metadata"] = {"trace_id": trace_id}
-
-                streaming_request = SendStreamingMessageRequest(
-                    id=str(uuid.uuid4()),
-                    params=MessageSendParams(**message_payload),
-                )
+                        if trace_id:
+                            message_payload["message"]["metadata"] = {"trace_id": trace_id}
 
-                # Stream and collect results
-                async for response_wrapper in client.send_message_streaming(streaming_request):
-                    response_dict = response_wrapper.model_dump()
-                    result_data = response_dict.get('result', {})
-                    event_kind = result_data.get('kind', '')
+                        streaming_request = SendStreamingMessageRequest(
+                            id=str(uuid.uuid4()),
+                            params=MessageSendParams(**message_payload),
+                        )
 
-                    # Handle artifact-update events (incremental chunks)
-                    if event_kind == 'artifact-update':
-                        artifact_data = result_data.get('artifact', {})
-                        parts_data = artifact_data.get('parts', [])
+                        async for response_wrapper in client.send_message_streaming(streaming_request):
+                            event = stream_event(response_wrapper)
 
-                        for part in parts_data:
-                            if isinstance(part, dict):
-                                text_content = part.get('text', '')
+                            # Handle artifact-update events (incremental chunks)
+                            if isinstance(event, TaskArtifactUpdateEvent):
+                                text_content = event_text(event)
                                 if text_content:
                                     accumulated_text.append(text_content)
-                                    logger.debug(f"  {agent_name}: collected {len(text_content)} chars")
+                                    merged.put_nowait((agent_name, text_content))
 
-                    # Handle status-update with completed state (final artifact might be here)
-                    elif event_kind == 'status-update':
-                        status_data = result_data.get('status', {})
-                        state = status_data.get('state', '')
-
-                        if state == 'completed':
-                            # Some agents send final artifact in status-update
-                            # Try to extract any remaining content
-                            logger.debug(f"  {agent_name}: received completed status")
+                            # Handle status-update with completed state
+                            elif isinstance(event, TaskStatusUpdateEvent) and event.status.state == TaskState.completed:
+                                logger.debug("  %s: received completed status", agent_name)
 
                 result_text = ''.join(accumulated_text)
                 logger.info(f"✅ {agent_name} completed: {len(result_text)} chars (from {len(accumulated_text)} chunks)")
@@ -675,20 +595,80 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
                     "error": None
                 }
 
+            except TimeoutError:
+                logger.warning(f"⏱️  {agent_name} missed its {deadline:.0f}s deadline after {len(accumulated_text)} chunks")
+                return {
+                    "agent_name": agent_name,
+                    "status": "timeout",
+                    "content": ''.join(accumulated_text),
+                    "error": f"No complete response within {deadline:.0f}s"
+                }
             except Exception as e:
                 logger.error(f"❌ Error streaming from {agent_name}: {e}")
                 return {
                     "agent_name": agent_name,
                     "status": "error",
-                    "content": "",
+                    "content": ''.join(accumulated_text),
                     "error": str(e)
                 }
             finally:
-                await httpx_client.aclose()
+                merged.put_nowait((agent_name, None))
 
-        # Execute all streams in parallel
-        tasks_list = [stream_single_agent(name, url) for name, url in agents]
-        results = await asyncio.gather(*tasks_list, return_exceptions=True)
+        # Start all streams, then forward chunks in arrival order
+        agent_tasks = [asyncio.create_task(stream_single_agent(name, url)) for name, url in agents]
+        artifact_ids: Dict[str, str] = {}
+        open_streams = len(agent_tasks)
+
+        try:
+            while open_streams:
+                try:
+                    agent_name, text = await asyncio.wait_for(merged.get(), timeout=1.0)
+                except TimeoutError:
+                    if self._caller_disconnected(event_queue):
+                        logger.warning("🔌 Caller disconnected, cancelling parallel sub-agent streams")
+                        return
+                    continue
+
+                if text is None:
+                    open_streams -= 1
+                    continue
+
+                # One artifact per source agent: created by its first chunk, appended to afterwards
+                use_append = agent_name in artifact_ids
+                if not use_append:
+                    artifact_ids[agent_name] = str(uuid.uuid4())
+                    logger.info(f"📝 First chunk from {agent_name}")
+
+                artifact = new_text_artifact(
+                    name='streaming_result',
+                    description=f'Streaming result from {agent_name}',
+                    text=text,
+                )
+                artifact.artifact_id = artifact_ids[agent_name]
+                artifact.metadata = {'source_agent': agent_name}
+
+                await self._safe_enqueue_event(
+                    event_queue,
+                    TaskArtifactUpdateEvent(
+                        append=use_append,
+                        context_id=task.context_id,
+                        task_id=task.id,
+                        lastChunk=False,
+                        artifact=artifact,
+                    )
+                )
+                if self._caller_disconnected(event_queue):
+                    logger.warning("🔌 Caller disconnected, cancelling parallel sub-agent streams")
+                    return
+        finally:
+            stragglers = [t for t in agent_tasks if not t.done()]
+            for straggler in stragglers:
+                straggler.cancel()
+            if stragglers:
+                await asyncio.gather(*stragglers, return_exceptions=True)
+                logger.info(f"🛑 Cancelled {len(stragglers)} unfinished sub-agent streams")
+
+        results = await asyncio.gather(*agent_tasks, return_exceptions=True)
 
         # Aggregate and send results
         combined_output = []
@@ -718,9 +698,15 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
             else:
                 agent_name = result.get("agent_name", "Unknown")
                 error = result.get("error", "Unknown error")
+                content = result.get("content", "")
                 failed_agents.append(agent_name)
-                combined_output.append(f"\n## ❌ {agent_name.upper()} Error\n\n{error}\n")
-                logger.warning(f"Agent {agent_name} failed: {error}")
+                if content and content.strip():
+                    # Partial-result fallback: keep what the agent streamed before it failed
+                    combined_output.append(f"\n## ⚠️ {agent_name.upper()} Partial Results\n\n{content}\n\n_{error}_\n")
+                    logger.warning(f"Agent {agent_name} returned partial results ({len(content)} chars): {error}")
+                else:
+                    combined_output.append(f"\n## ❌ {agent_name.upper()} Error\n\n{error}\n")
+                    logger.warning(f"Agent {agent_name} failed: {error}")
 
         final_text = "".join(combined_output)
 
@@ -783,11 +769,10 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
         context: RequestContext,
         event_queue: EventQueue,
     ) -> None:
-        # Reset execution plan state for new task
-        self._execution_plan_active = False
-        self._execution_plan_buffer = ""
-        self._execution_plan_complete = False
-        
+        # Streaming state is scoped to this task so concurrent executions on the
+        # same executor never share plan buffers or artifact IDs
+        state = TaskStreamState()
+
         query = context.get_user_input()
         task = context.current_task
         context_id = context.message.context_id if context.message else None
@@ -801,6 +786,9 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
                 raise Exception("Failed to create a new task from the provided message.")
             await self._safe_enqueue_event(event_queue, task)
 
+        # Coalesced content also goes out once the agent stream goes quiet for the coalescing window
+        state.coalescer.on_idle = lambda text: self._send_streaming_chunk(state, task, event_queue, text)
+
         # Extract trace_id from A2A context (or generate if root)
         trace_id = extract_trace_id_from_context(context)
 
@@ -871,11 +859,7 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
             logger.info("🧠 ENHANCED_ORCHESTRATION: Adding orchestration hints to Deep Agent")
             
             # Analyze query to provide orchestration hints (logging only - agent.stream() doesn't accept config)
-            available_agents = platform_registry.AGENT_ADDRESS_MAPPING
-            mentioned_agents = []
-            for agent_name, agent_url in available_agents.items():
-                if agent_name.lower() in query.lower():
-                    mentioned_agents.append(agent_name)
+            mentioned_agents = [c.agent_name for c in self.router.mentioned_agents(query)]
             
             if mentioned_agents:
                 logger.info(f"🤖 Detected agents in query for enhanced orchestration: {mentioned_agents}")
@@ -919,11 +903,7 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
             logger.info("🎛️  DEEP_AGENT_PARALLEL_ORCHESTRATION mode: Routing to Deep Agent with parallel orchestration hints")
             
             # Analyze query to provide orchestration hints in logs
-            available_agents = platform_registry.AGENT_ADDRESS_MAPPING
-            mentioned_agents = []
-            for agent_name, agent_url in available_agents.items():
-                if agent_name.lower() in query.lower():
-                    mentioned_agents.append(agent_name)
+            mentioned_agents = [c.agent_name for c in self.router.mentioned_agents(query)]
             
             if mentioned_agents:
                 logger.info(f"🤖 Detected agents in query for parallel orchestration: {mentioned_agents}")
@@ -931,27 +911,24 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
         else:  # DEEP_AGENT_ONLY
             logger.info("🎛️  DEEP_AGENT_ONLY mode: All queries via Deep Agent (original behavior)")
 
-        # Track streaming state for proper A2A protocol
-        first_artifact_sent = False
-        accumulated_content = []
-        streaming_artifact_id = None  # Shared artifact ID for all streaming chunks
-        execution_plan_artifact_id = None  # Separate artifact ID for execution plan streaming
-        execution_plan_first_chunk = True  # Track if this is the first execution plan chunk
-
         try:
             # invoke the underlying agent, using streaming results
             # NOTE: Pass task to maintain task ID consistency across sub-agents
             async for event in self.agent.stream(query, context_id, trace_id):
+                # Anything other than plain content must not overtake coalesced chunks
+                if not isinstance(event, dict) or event.get('type') or event.get('is_task_complete') or event.get('require_user_input'):
+                    await self._flush_streaming_chunks(state, task, event_queue)
+
                 # Handle typed A2A events - TRANSFORM APPEND FLAG FOR FORWARDED EVENTS
                 if isinstance(event, (A2ATaskArtifactUpdateEvent, A2ATaskStatusUpdateEvent)):
-                    logger.debug(f"Executor: Processing streamed A2A event: {type(event).__name__}")
+                    logger.debug("Executor: Processing streamed A2A event: %s", type(event).__name__)
                     
                     # Fix forwarded TaskArtifactUpdateEvent to handle append flag correctly
                     if isinstance(event, A2ATaskArtifactUpdateEvent):
                         # Transform the event to use our first_artifact_sent logic
-                        use_append = first_artifact_sent
-                        if not first_artifact_sent:
-                            first_artifact_sent = True
+                        use_append = state.first_artifact_sent
+                        if not state.first_artifact_sent:
+                            state.first_artifact_sent = True
                             logger.info("📝 Transforming FIRST forwarded artifact (append=False) to create artifact")
                         else:
                             logger.debug("📝 Transforming subsequent forwarded artifact (append=True)")
@@ -1016,29 +993,33 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
                 # Check if this is a custom event from writer() (e.g., sub-agent streaming via artifact-update)
                 if isinstance(event, dict) and 'type' in event and event.get('type') == 'artifact-update':
                     # Custom artifact-update event from sub-agent (via writer() in a2a_remote_agent_connect.py)
-                    result = event.get('result', {})
-                    artifact = result.get('artifact')
-                    
-                    if artifact:
-                        # Extract text length for logging
-                        parts = artifact.get('parts', [])
-                        text_len = sum(len(p.get('text', '')) for p in parts if isinstance(p, dict))
-                        
-                        logger.info(f"🎯 Platform Engineer: Forwarding artifact-update from sub-agent ({text_len} chars)")
-                        
-                        # Convert dict to proper Artifact object
-                        from a2a.types import Artifact, TextPart
-                        artifact_obj = Artifact(
-                            artifactId=artifact.get('artifactId'),
-                            name=artifact.get('name', 'streaming_result'),
-                            description=artifact.get('description', 'Streaming from sub-agent'),
-                            parts=[TextPart(text=p.get('text', '')) for p in parts if isinstance(p, dict) and p.get('text')]
-                        )
-                        
+                    sub_agent_event = event.get('event')
+                    if sub_agent_event is not None:
+                        # Typed event passed through as-is: forward its artifact without copying
+                        artifact_obj = sub_agent_event.artifact
+                        last_chunk = bool(sub_agent_event.last_chunk)
+                    else:
+                        # Legacy payload: {'result': <artifact-update event as dict>}
+                        result = event.get('result', {})
+                        artifact = result.get('artifact')
+                        artifact_obj = None
+                        if artifact:
+                            parts = artifact.get('parts', [])
+                            artifact_obj = Artifact(
+                                artifactId=artifact.get('artifactId'),
+                                name=artifact.get('name', 'streaming_result'),
+                                description=artifact.get('description', 'Streaming from sub-agent'),
+                                parts=[TextPart(text=p.get('text', '')) for p in parts if isinstance(p, dict) and p.get('text')]
+                            )
+                        last_chunk = result.get('lastChunk', False)
+
+                    if artifact_obj is not None:
+                        state.chunk_log.info("🎯 forwarding sub-agent artifact-update", artifact=artifact_obj.artifact_id)
+
                         # Use first_artifact_sent logic for append flag
-                        use_append = first_artifact_sent
-                        if not first_artifact_sent:
-                            first_artifact_sent = True
+                        use_append = state.first_artifact_sent
+                        if not state.first_artifact_sent:
+                            state.first_artifact_sent = True
                             logger.info("📝 First sub-agent artifact chunk (append=False)")
                         
                         await self._safe_enqueue_event(
@@ -1047,7 +1028,7 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
                                 append=use_append,
                                 context_id=task.context_id,
                                 task_id=task.id,
-                                lastChunk=result.get('lastChunk', False),
+                                lastChunk=last_chunk,
                                 artifact=artifact_obj,
                             )
                         )
@@ -1075,7 +1056,7 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
                     logger.info("Task complete event received. Enqueuing final TaskArtifactUpdateEvent and TaskStatusUpdateEvent.")
                     
                     # Send final artifact with all accumulated content for non-streaming clients
-                    final_content = ''.join(accumulated_content) if accumulated_content else content
+                    final_content = ''.join(state.accumulated_content) if state.accumulated_content else content
                     await self._safe_enqueue_event(
                         event_queue,
                         TaskArtifactUpdateEvent(
@@ -1121,9 +1102,9 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
                     logger.info(f"Task {task.id} requires user input.")
                 else:
                     # This is a streaming chunk - forward it immediately to the client!
-                    logger.debug(f"🔍 Processing streaming chunk: has_content={bool(content)}, content_length={len(content) if content else 0}")
                     if content:  # Only send artifacts with actual content
                        # Check if this is a tool notification (both metadata-based and content-based)
+                       stripped = content.strip()
                        is_tool_notification = (
                            # Metadata-based tool notifications (from tool_call/tool_result events)
                            'tool_call' in event or 'tool_result' in event or
@@ -1131,125 +1112,83 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
                            '🔍 Querying ' in content or
                            '🔍 Checking ' in content or
                            '🔧 Calling ' in content or
-                           ('✅ ' in content and 'completed' in content.lower()) or
-                           content.strip().startswith('🔍') or
-                           content.strip().startswith('🔧') or
-                           (content.strip().startswith('✅') and 'completed' in content.lower())
+                           stripped.startswith(('🔍', '🔧')) or
+                           (('✅ ' in content or stripped.startswith('✅')) and 'completed' in content.lower())
                        )
                        
                        # Execution plan detection using Unicode markers ⟦ and ⟧
-                       is_execution_plan = self._handle_execution_plan_detection(content)
+                       is_execution_plan = self._handle_execution_plan_detection(state, content)
                        
-                       # Accumulate non-notification content for final UI response
-                       # Streaming artifacts are for real-time display, final response for clean UI display
                        if not is_tool_notification and not is_execution_plan:
-                           accumulated_content.append(content)
-                           logger.debug(f"📝 Added content to final response accumulator: {content[:50]}...")
-                       elif is_tool_notification:
-                           logger.debug(f"🔧 Skipping tool notification from final response: {content.strip()}")
-                       elif is_execution_plan:
-                           logger.debug(f"📋 Skipping execution plan from final response: {content.strip()}")
-                       
-                       # A2A protocol: first artifact must have append=False, subsequent use append=True
-                       use_append = first_artifact_sent
-                       logger.debug(f"🔍 first_artifact_sent={first_artifact_sent}, use_append={use_append}")
-                       
-                       artifact_name = 'streaming_result'
-                       artifact_description = 'Streaming result from Platform Engineer'
-                       
+                           # Accumulate regular content for final UI response, and stream it
+                           # (coalesced into fewer artifact updates when A2A_STREAM_HOT_PATH is on)
+                           state.accumulated_content.append(content)
+                           ready = state.coalescer.add(content)
+                           if ready:
+                               await self._send_streaming_chunk(state, task, event_queue, ready)
+                           continue
+
+                       # Notifications and plan updates go out on their own artifacts, after any buffered content
+                       await self._flush_streaming_chunks(state, task, event_queue)
+
                        if is_tool_notification:
                            if 'tool_call' in event:
                                tool_info = event['tool_call']
                                artifact_name = 'tool_notification_start'
                                artifact_description = f'Tool call started: {tool_info.get("name", "unknown")}'
-                               logger.debug(f"🔧 Tool call notification: {tool_info}")
                            elif 'tool_result' in event:
                                tool_info = event['tool_result']
                                artifact_name = 'tool_notification_end'
                                artifact_description = f'Tool call completed: {tool_info.get("name", "unknown")}'
-                               logger.debug(f"✅ Tool result notification: {tool_info}")
+                           elif '✅' in content and 'completed' in content.lower():
+                               # Content-based tool completion notification
+                               artifact_name = 'tool_notification_end'
+                               artifact_description = 'Tool operation completed'
                            else:
-                               # Content-based tool notification
-                               if ('✅' in content and 'completed' in content.lower()) or (content.strip().startswith('✅') and 'completed' in content.lower()):
-                                   artifact_name = 'tool_notification_end'
-                                   artifact_description = 'Tool operation completed'
-                                   logger.debug(f"✅ Tool completion notification: {content.strip()}")
-                               else:
-                                   # Assume it's a start notification (🔍 Querying, 🔍 Checking, 🔧 Calling)
-                                   artifact_name = 'tool_notification_start'
-                                   artifact_description = 'Tool operation started'
-                                   logger.debug(f"🔍 Tool start notification: {content.strip()}")
-                       elif is_execution_plan:
+                               # Assume it's a start notification (🔍 Querying, 🔍 Checking, 🔧 Calling)
+                               artifact_name = 'tool_notification_start'
+                               artifact_description = 'Tool operation started'
+                           logger.debug("🔧 Tool notification (%s): %s", artifact_name, stripped)
+
+                           # Tool notifications always get their own artifact IDs
+                           artifact = new_text_artifact(
+                               name=artifact_name,
+                               description=artifact_description,
+                               text=content,
+                           )
+                           use_append = False
+                       else:
                            # Check if execution plan is complete
-                           complete_plan = self._get_complete_execution_plan()
+                           complete_plan = self._get_complete_execution_plan(state)
                            if complete_plan:
                                # Send complete execution plan as special artifact
                                artifact_name = 'execution_plan_update'
                                artifact_description = 'Complete execution plan streamed to user'
                                content = complete_plan  # Use complete plan content
-                               logger.debug(f"📋 Complete execution plan ready: {len(complete_plan)} chars")
+                               logger.debug("📋 Complete execution plan ready: %d chars", len(complete_plan))
                            else:
                                # Still accumulating execution plan
                                artifact_name = 'execution_plan_streaming'
                                artifact_description = 'Execution plan streaming in progress'
-                               logger.debug(f"📋 Execution plan streaming: {content[:50]}...")
-                        
-                       # Create shared artifact ID once for all streaming chunks
-                       if is_execution_plan:
+
+                           artifact = new_text_artifact(
+                               name=artifact_name,
+                               description=artifact_description,
+                               text=content,
+                           )
                            # Handle execution plan streaming separately
-                           if execution_plan_first_chunk:
+                           if state.execution_plan_first_chunk:
                                # First execution plan chunk - create new artifact
-                               artifact = new_text_artifact(
-                                   name=artifact_name,
-                                   description=artifact_description,
-                                   text=content,
-                               )
-                               execution_plan_artifact_id = artifact.artifactId  # Save for subsequent chunks
-                               execution_plan_first_chunk = False
+                               state.execution_plan_artifact_id = artifact.artifactId  # Save for subsequent chunks
+                               state.execution_plan_first_chunk = False
                                use_append = False
-                               logger.info(f"📝 Sending FIRST execution plan chunk (append=False) with ID: {execution_plan_artifact_id}")
+                               logger.info(f"📝 Sending FIRST execution plan chunk (append=False) with ID: {state.execution_plan_artifact_id}")
                            else:
                                # Subsequent execution plan chunks - reuse the same artifact ID
-                               artifact = new_text_artifact(
-                                   name=artifact_name,
-                                   description=artifact_description,
-                                   text=content,
-                               )
-                               artifact.artifactId = execution_plan_artifact_id  # Reuse the same artifact ID
+                               artifact.artifactId = state.execution_plan_artifact_id  # Reuse the same artifact ID
                                use_append = True
-                               logger.debug(f"📝 Appending execution plan chunk (append=True) to artifact: {execution_plan_artifact_id}")
-                       elif is_tool_notification:
-                           # Tool notifications always get their own artifact IDs
-                           artifact = new_text_artifact(
-                               name=artifact_name,
-                               description=artifact_description,
-                               text=content,
-                           )
-                           use_append = False
-                           logger.debug(f"📝 Creating separate tool notification artifact: {artifact.artifactId}")
-                       elif streaming_artifact_id is None:
-                           # First regular content chunk - create new artifact with unique ID
-                           artifact = new_text_artifact(
-                               name=artifact_name,
-                               description=artifact_description,
-                               text=content,
-                           )
-                           streaming_artifact_id = artifact.artifactId  # Save for subsequent chunks
-                           first_artifact_sent = True
-                           use_append = False
-                           logger.info(f"📝 Sending FIRST streaming artifact (append=False) with ID: {streaming_artifact_id}")
-                       else:
-                           # Subsequent regular content chunks - reuse the same artifact ID
-                           artifact = new_text_artifact(
-                               name=artifact_name,
-                               description=artifact_description,
-                               text=content,
-                           )
-                           artifact.artifactId = streaming_artifact_id  # Use the same ID for regular chunks
-                           use_append = True
-                           logger.debug(f"📝 Appending streaming chunk (append=True) to artifact: {streaming_artifact_id}")
+                               state.chunk_log.debug("📝 appending execution plan chunk", chars=len(content))
 
-                       # Forward chunk immediately to client (STREAMING!)
                        await self._safe_enqueue_event(
                            event_queue,
                            TaskArtifactUpdateEvent(
@@ -1260,16 +1199,16 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
                                artifact=artifact,
                            )
                        )
-                       logger.debug(f"✅ Streamed chunk to A2A client: {content[:50]}...")
-                    
-                    # Skip status updates for ALL streaming content to eliminate duplicates
-                    # Artifacts already provide the content, status updates are redundant during streaming
-                    logger.debug("Skipping status update for streaming content to avoid duplication - artifacts provide the content")
+
+                    # Status updates are skipped for ALL streaming content to eliminate duplicates:
+                    # artifacts already provide the content
+
+            await self._flush_streaming_chunks(state, task, event_queue)
 
             # If we exit the stream loop without receiving 'is_task_complete', send accumulated content
-            if accumulated_content and not event.get('is_task_complete', False):
-                logger.warning(f"⚠️  Stream ended without completion signal, sending accumulated content ({len(accumulated_content)} chunks)")
-                final_content = ''.join(accumulated_content)
+            if state.accumulated_content and not event.get('is_task_complete', False):
+                logger.warning(f"⚠️  Stream ended without completion signal, sending accumulated content ({len(state.accumulated_content)} chunks)")
+                final_content = ''.join(state.accumulated_content)
                 await self._safe_enqueue_event(
                     event_queue,
                     TaskArtifactUpdateEvent(
@@ -1297,6 +1236,7 @@ class AIPlatformEngineerA2AExecutor(AgentExecutor):
 
         except Exception as e:
             logger.error(f"Error during agent execution: {e}")
+            state.coalescer.close()
             # Try to enqueue a failure status if the queue is still open
             try:
                 await self._safe_enqueue_event(
@@ -0,0 +1,457 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Compiled query router for the AI Platform Engineer supervisor.
+
+Agent names, aliases and routing keywords are compiled into Aho-Corasick
+automata once per registry generation, so routing a query is a single pass
+over its characters regardless of how many agents and keywords are
+registered. Matches respect word boundaries ("aws" does not match "laws").
+
+An optional scorer (TF-IDF over agent card descriptions and skills) ranks
+agents for queries that do not name one, returning candidates with a
+confidence that callers can use as a routing hint or, above a threshold,
+as a direct route.
+
+Configuration (environment variables):
+    AGENT_ROUTING_ALIASES    JSON object of extra aliases, e.g. {"pagerduty": ["pd", "on-call"]}
+    ROUTING_SCORER           "tfidf" to enable skill scoring (default: disabled)
+    ROUTING_MIN_CONFIDENCE   scorer confidence needed to route directly (default: 0.35)
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Protocol, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RoutingType(Enum):
+    """Types of routing strategies for query execution"""
+    DIRECT = "direct"          # Single sub-agent, direct streaming
+    PARALLEL = "parallel"      # Multiple sub-agents, parallel streaming
+    COMPLEX = "complex"        # Requires Deep Agent orchestration
+
+
+@dataclass
+class RoutingCandidate:
+    """An agent considered for a query, with how it was found"""
+    agent_name: str
+    agent_url: str
+    confidence: float
+    source: str  # "mention", "alias" or "scorer"
+
+
+@dataclass
+class RoutingDecision:
+    """Routing decision for query execution"""
+    type: RoutingType
+    agents: List[Tuple[str, str]]  # List of (agent_name, agent_url)
+    reason: str = ""
+    candidates: List[RoutingCandidate] = field(default_factory=list)  # Ranked, highest confidence first
+
+
+def parse_keywords(value: str) -> List[str]:
+    """Parse a comma-separated keyword list."""
+    return [kw.strip() for kw in value.split(',') if kw.strip()]
+
+
+@dataclass
+class KeywordMatch:
+    start: int
+    end: int
+    keyword: str
+    payload: Any
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over lowercase keywords.
+
+    A keyword only matches on word boundaries: if it starts (ends) with a
+    word character, the character before (after) the match must not be one.
+    Keywords such as "docs:" or "@docs" therefore still match next to
+    punctuation.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Any]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._keywords: List[Tuple[str, Any]] = []
+
+        for keyword, payload in keywords:
+            keyword = keyword.lower()
+            if not keyword:
+                continue
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(len(self._keywords))
+            self._keywords.append((keyword, payload))
+
+        # Breadth-first construction of failure links (depth-1 states fail to the root)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+        # Fold failure links into a transition table so scanning is one dict lookup per
+        # character. BFS order guarantees a state's failure target is complete first.
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])] + [{} for _ in self._goto[1:]]
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self._delta[state] = {**self._delta[self._fail[state]], **self._goto[state]}
+            queue.extend(self._goto[state].values())
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    @staticmethod
+    def _on_boundary(text: str, start: int, end: int, keyword: str) -> bool:
+        if _is_word_char(keyword[0]) and start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if _is_word_char(keyword[-1]) and end < len(text) and _is_word_char(text[end]):
+            return False
+        return True
+
+    def iter_matches(self, text: str) -> Iterator[KeywordMatch]:
+        """Yield keyword matches in ``text`` (already lowercased) in order of end position."""
+        delta, out = self._delta, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for index in out[state]:
+                    keyword, payload = self._keywords[index]
+                    start = i + 1 - len(keyword)
+                    if self._on_boundary(text, start, i + 1, keyword):
+                        yield KeywordMatch(start, i + 1, keyword, payload)
+
+    def match_prefix(self, text: str) -> Optional[KeywordMatch]:
+        """Longest keyword that ``text`` (already lowercased) starts with."""
+        state = 0
+        best = None
+        for i, ch in enumerate(text):
+            state = self._goto[state].get(ch)
+            if state is None:
+                break
+            for index in self._out[state]:
+                keyword, payload = self._keywords[index]
+                if len(keyword) == i + 1 and self._on_boundary(text, 0, i + 1, keyword):
+                    best = KeywordMatch(0, i + 1, keyword, payload)
+        return best
+
+
+class RoutingScorer(Protocol):
+    """Ranks agents for a query; plugged into QueryRouter."""
+
+    def fit(self, documents: Dict[str, str]) -> None:
+        ...
+
+    def rank(self, query: str, limit: int = 3) -> List[Tuple[str, float]]:
+        ...
+
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset(
+    "a an and are all any as at be by can do for from get give how i in is it list me my of on or "
+    "please show the this to what which with you your".split()
+)
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+class TfidfSkillScorer:
+    """
+    Cosine similarity between a query and each agent's card text using TF-IDF.
+
+    Documents are indexed into an inverted index, so ranking only touches the
+    postings of the query's own terms.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, List[Tuple[str, float]]] = {}
+        self._idf: Dict[str, float] = {}
+
+    def fit(self, documents: Dict[str, str]) -> None:
+        term_counts = {name: Counter(_tokens(text)) for name, text in documents.items()}
+        df = Counter(term for counts in term_counts.values() for term in counts)
+        n_docs = len(documents)
+        self._idf = {term: math.log((1 + n_docs) / (1 + count)) + 1.0 for term, count in df.items()}
+
+        postings: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        for name, counts in term_counts.items():
+            weights = {term: (1 + math.log(tf)) * self._idf[term] for term, tf in counts.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for term, weight in weights.items():
+                postings[term].append((name, weight / norm))
+        self._postings = dict(postings)
+
+    def rank(self, query: str, limit: int = 3) -> List[Tuple[str, float]]:
+        counts = Counter(t for t in _tokens(query) if t in self._idf)
+        if not counts:
+            return []
+        weights = {term: (1 + math.log(tf)) * self._idf[term] for term, tf in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+
+        scores: Dict[str, float] = defaultdict(float)
+        for term, weight in weights.items():
+            for name, doc_weight in self._postings.get(term, ()):
+                scores[name] += weight / norm * doc_weight
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+SCORERS = {
+    "tfidf": TfidfSkillScorer,
+}
+
+
+def agent_card_document(agent_name: str, agent_card: Optional[Dict[str, Any]]) -> str:
+    """Text describing an agent for scoring: name, description and skills."""
+    parts = [agent_name.replace('_', ' ').replace('-', ' ')]
+    if isinstance(agent_card, dict):
+        parts.append(agent_card.get('description') or '')
+        for skill in agent_card.get('skills') or []:
+            parts.append(skill.get('name') or '')
+            parts.append(skill.get('description') or '')
+            parts.extend(skill.get('tags') or [])
+            parts.extend(skill.get('examples') or [])
+    return ' '.join(parts)
+
+
+# Spellings users write for agents whose names are compound words
+DEFAULT_ALIASES: Dict[str, List[str]] = {
+    "argocd": ["argo cd", "argo-cd"],
+    "pagerduty": ["pager duty", "pager-duty"],
+}
+
+
+def name_variants(agent_name: str) -> List[str]:
+    """The agent name with underscores/dashes also written as spaces or dashes."""
+    name = agent_name.lower()
+    return sorted({name, name.replace('_', ' '), name.replace('_', '-'), name.replace('-', ' ')})
+
+
+@dataclass(frozen=True)
+class CompiledAgents:
+    """Agent URLs and their matcher, compiled together and published as one snapshot."""
+    urls: Dict[str, str]
+    matcher: KeywordAutomaton
+
+
+class QueryRouter:
+    """
+    Route queries to DIRECT / PARALLEL / COMPLEX using compiled matchers.
+
+    The matchers are rebuilt lazily whenever the registry's generation
+    changes; between changes a route costs one pass over the query. Each
+    call reads the compiled agents once, so a concurrent rebuild never
+    pairs a matcher with the URLs of another generation.
+    """
+
+    def __init__(
+        self,
+        registry: Any,
+        knowledge_base_keywords: List[str],
+        orchestration_keywords: List[str],
+        aliases: Optional[Dict[str, List[str]]] = None,
+        scorer: Optional[RoutingScorer] = None,
+        min_confidence: float = 0.35,
+    ):
+        self.registry = registry
+        self.knowledge_base_keywords = knowledge_base_keywords
+        self.orchestration_keywords = orchestration_keywords
+        self.aliases = {name: list(values) for name, values in DEFAULT_ALIASES.items()}
+        for name, values in (aliases or {}).items():
+            self.aliases.setdefault(name.lower(), []).extend(values)
+        self.scorer = scorer
+        self.min_confidence = min_confidence
+
+        self._lock = threading.Lock()
+        self._compiled_generation: Optional[int] = None
+        self._agents = CompiledAgents({}, KeywordAutomaton([]))
+        self._knowledge_base_matcher = KeywordAutomaton((kw, kw) for kw in knowledge_base_keywords)
+        self._orchestration_matcher = KeywordAutomaton((kw, kw) for kw in orchestration_keywords)
+
+    @classmethod
+    def from_env(cls, registry: Any, knowledge_base_keywords: List[str], orchestration_keywords: List[str]) -> "QueryRouter":
+        aliases = {}
+        raw_aliases = os.getenv('AGENT_ROUTING_ALIASES', '').strip()
+        if raw_aliases:
+            try:
+                aliases = json.loads(raw_aliases)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Ignoring invalid AGENT_ROUTING_ALIASES: {e}")
+
+        scorer = None
+        scorer_name = os.getenv('ROUTING_SCORER', '').strip().lower()
+        if scorer_name and scorer_name != 'none':
+            if scorer_name in SCORERS:
+                scorer = SCORERS[scorer_name]()
+            else:
+                logger.warning(f"Unknown ROUTING_SCORER '{scorer_name}', available: {list(SCORERS)}")
+
+        return cls(
+            registry,
+            knowledge_base_keywords,
+            orchestration_keywords,
+            aliases=aliases,
+            scorer=scorer,
+            min_confidence=float(os.getenv('ROUTING_MIN_CONFIDENCE', '0.35')),
+        )
+
+    def _ensure_compiled(self) -> CompiledAgents:
+        generation = getattr(self.registry, 'generation', 0)
+        if generation == self._compiled_generation:
+            return self._agents
+        with self._lock:
+            if generation != self._compiled_generation:
+                self._compile()
+                self._compiled_generation = generation
+            return self._agents
+
+    def _compile(self) -> None:
+        agent_urls = dict(self.registry.AGENT_ADDRESS_MAPPING)
+        keywords = []
+        for agent_name in agent_urls:
+            for variant in name_variants(agent_name):
+                keywords.append((variant, (agent_name, 'mention')))
+            for alias in self.aliases.get(agent_name.lower(), []):
+                keywords.append((alias, (agent_name, 'alias')))
+
+        compiled = CompiledAgents(agent_urls, KeywordAutomaton(keywords))
+
+        if self.scorer is not None:
+            cards = getattr(self.registry, 'agents', {}) or {}
+            self.scorer.fit({name: agent_card_document(name, cards.get(name)) for name in agent_urls})
+
+        self._agents = compiled
+        logger.info(f"🧭 Compiled query router: {len(agent_urls)} agents, {len(compiled.matcher)} agent patterns")
+
+    def mentioned_agents(self, query: str, compiled: Optional[CompiledAgents] = None) -> List[RoutingCandidate]:
+        """Agents named (or aliased) in the query, in order of first mention."""
+        compiled = compiled or self._ensure_compiled()
+        found: Dict[str, RoutingCandidate] = {}
+        for match in compiled.matcher.iter_matches(query.lower()):
+            agent_name, source = match.payload
+            if agent_name not in found:
+                found[agent_name] = RoutingCandidate(
+                    agent_name, compiled.urls[agent_name], 1.0 if source == 'mention' else 0.9, source
+                )
+        return list(found.values())
+
+    def rank(self, query: str, limit: int = 3, compiled: Optional[CompiledAgents] = None) -> List[RoutingCandidate]:
+        """Scorer candidates for the query; empty when no scorer is configured."""
+        if self.scorer is None:
+            return []
+        compiled = compiled or self._ensure_compiled()
+        return [
+            RoutingCandidate(name, compiled.urls[name], round(score, 4), 'scorer')
+            for name, score in self.scorer.rank(query, limit)
+            if name in compiled.urls
+        ]
+
+    def route(self, query: str) -> RoutingDecision:
+        """
+        Decide how to execute a query.
+
+        Examples:
+            - "show me komodor clusters" → DIRECT (komodor - explicit mention)
+            - "list github repos and komodor clusters" → PARALLEL (github + komodor - explicit mentions)
+            - "analyze clusters and create jira tickets" → COMPLEX (needs Deep Agent orchestration)
+            - "who is on call for SRE" → COMPLEX (no explicit agent - Deep Agent will route to PagerDuty + RAG)
+        """
+        compiled = self._ensure_compiled()
+        query_lower = query.lower()
+
+        # Knowledge base keywords → direct to RAG (fast path)
+        kb_match = self._knowledge_base_matcher.match_prefix(query_lower)
+        rag_agent_url = compiled.urls.get('RAG')
+        if kb_match and rag_agent_url:
+            logger.info("🎯 Knowledge base query detected, routing directly to RAG")
+            return RoutingDecision(
+                type=RoutingType.DIRECT,
+                agents=[('RAG', rag_agent_url)],
+                reason=f"Knowledge base query (matched: {kb_match.payload}) - direct to RAG",
+                candidates=[RoutingCandidate('RAG', rag_agent_url, 1.0, 'mention')],
+            )
+
+        mentioned = self.mentioned_agents(query, compiled)
+        logger.info(f"🎯 Routing analysis: found {len(mentioned)} explicit agent mentions")
+
+        if not mentioned:
+            # No explicit agents mentioned - the scorer may still be confident enough
+            candidates = self.rank(query, compiled=compiled)
+            if candidates and candidates[0].confidence >= self.min_confidence:
+                top = candidates[0]
+                return RoutingDecision(
+                    type=RoutingType.DIRECT,
+                    agents=[(top.agent_name, top.agent_url)],
+                    reason=f"Skill match for {top.agent_name} (confidence {top.confidence:.2f})",
+                    candidates=candidates,
+                )
+            return RoutingDecision(
+                type=RoutingType.COMPLEX,
+                agents=[],
+                reason="No explicit agents mentioned, using Deep Agent for intelligent routing",
+                candidates=candidates,
+            )
+
+        agents = [(c.agent_name, c.agent_url) for c in mentioned]
+
+        if len(mentioned) == 1:
+            # Single explicit agent mention, use direct streaming (fast path)
+            return RoutingDecision(
+                type=RoutingType.DIRECT,
+                agents=agents,
+                reason=f"Direct streaming from {mentioned[0].agent_name}",
+                candidates=mentioned,
+            )
+
+        # Multiple explicit agents: orchestration keywords need the Deep Agent
+        if next(self._orchestration_matcher.iter_matches(query_lower), None) is not None:
+            return RoutingDecision(
+                type=RoutingType.COMPLEX,
+                agents=agents,
+                reason=f"Query requires orchestration across {len(mentioned)} agents",
+                candidates=mentioned,
+            )
+
+        # Simple multi-agent query, can stream in parallel
+        # E.g., "show me github repos and komodor clusters"
+        return RoutingDecision(
+            type=RoutingType.PARALLEL,
+            agents=agents,
+            reason=f"Parallel streaming from {', '.join(name for name, _ in agents)}",
+            candidates=mentioned,
+        )
@@ -0,0 +1,202 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Concurrency tests for AIPlatformEngineerA2AExecutor.
+
+A single executor instance serves many A2A tasks at once. These tests drive
+dozens of interleaved execute() calls against a stub graph and check that
+each task's execution plan, streaming artifacts and final result stay
+isolated from every other task.
+"""
+
+import asyncio
+import random
+import uuid
+from unittest.mock import patch
+
+import pytest
+from a2a.server.agent_execution import RequestContext
+from a2a.types import (
+    Message,
+    MessageSendParams,
+    Part,
+    Role,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+# Importing the executor creates the platform registry; keep it from probing agents
+with patch('ai_platform_engineering.multi_agents.agent_registry.AgentRegistry._load_agents'):
+    from ai_platform_engineering.multi_agents.platform_engineer.protocol_bindings.a2a import agent_executor
+
+
+NUM_TASKS = 48
+
+
+def expected_plan(query: str) -> str:
+    return f"⟦Execution plan for {query}: step 1, step 2, step 3⟧"
+
+
+def expected_answer(query: str) -> str:
+    return f"Answer for {query}: part 1. part 2. part 3."
+
+
+class StubBinding:
+    """Stands in for AIPlatformEngineerA2ABinding; streams per-query chunks with random pauses."""
+
+    def __init__(self):
+        self.rng = random.Random(42)
+
+    def _chunks(self, text: str, size: int):
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    async def stream(self, query, context_id, trace_id=None):
+        delays = [self.rng.uniform(0, 0.005) for _ in range(32)]
+
+        for i, chunk in enumerate(self._chunks(expected_plan(query), 12)):
+            await asyncio.sleep(delays[i % len(delays)])
+            yield {'is_task_complete': False, 'require_user_input': False, 'content': chunk}
+
+        for i, chunk in enumerate(self._chunks(expected_answer(query), 9)):
+            await asyncio.sleep(delays[-i % len(delays)])
+            yield {'is_task_complete': False, 'require_user_input': False, 'content': chunk}
+
+        yield {'is_task_complete': True, 'require_user_input': False, 'content': ''}
+
+
+class RecordingEventQueue:
+    """Minimal EventQueue that records everything enqueued for one task."""
+
+    def __init__(self):
+        self.events = []
+
+    async def enqueue_event(self, event):
+        self.events.append(event)
+
+
+def make_context(query: str) -> RequestContext:
+    message = Message(
+        role=Role.user,
+        parts=[Part(root=TextPart(text=query))],
+        message_id=str(uuid.uuid4()),
+        context_id=str(uuid.uuid4()),
+    )
+    return RequestContext(request=MessageSendParams(message=message))
+
+
+def artifact_text(event: TaskArtifactUpdateEvent) -> str:
+    return ''.join(part.root.text for part in event.artifact.parts)
+
+
+@pytest.fixture
+def executor(clean_env):
+    with patch.object(agent_executor, 'AIPlatformEngineerA2ABinding', StubBinding):
+        yield agent_executor.AIPlatformEngineerA2AExecutor()
+
+
+@pytest.mark.asyncio
+async def test_interleaved_tasks_keep_execution_plans_isolated(executor):
+    """Each task receives exactly its own execution plan and final answer."""
+    queries = [f"query-{i}" for i in range(NUM_TASKS)]
+    queues = [RecordingEventQueue() for _ in queries]
+
+    await asyncio.gather(*(
+        executor.execute(make_context(query), queue)
+        for query, queue in zip(queries, queues)
+    ))
+
+    seen_task_ids = set()
+    seen_streaming_ids = set()
+
+    for query, queue in zip(queries, queues):
+        task = queue.events[0]
+        assert isinstance(task, Task)
+        seen_task_ids.add(task.id)
+
+        artifacts = [e for e in queue.events if isinstance(e, TaskArtifactUpdateEvent)]
+        assert all(e.task_id == task.id for e in artifacts)
+
+        plans = [artifact_text(e) for e in artifacts if e.artifact.name == 'execution_plan_update']
+        assert plans == [expected_plan(query)]
+
+        finals = [artifact_text(e) for e in artifacts if e.artifact.name == 'final_result']
+        assert finals == [expected_answer(query)]
+
+        streaming = [e for e in artifacts if e.artifact.name == 'streaming_result']
+        assert ''.join(artifact_text(e) for e in streaming) == expected_answer(query)
+        assert [e.append for e in streaming] == [False] + [True] * (len(streaming) - 1)
+        streaming_ids = {e.artifact.artifactId for e in streaming}
+        assert len(streaming_ids) == 1
+        seen_streaming_ids |= streaming_ids
+
+        statuses = [e for e in queue.events if isinstance(e, TaskStatusUpdateEvent)]
+        assert [e.status.state for e in statuses] == [TaskState.completed]
+        assert statuses[0].final
+
+    assert len(seen_task_ids) == NUM_TASKS
+    assert len(seen_streaming_ids) == NUM_TASKS
+
+
+@pytest.mark.asyncio
+async def test_execution_plan_artifact_ids_are_per_task(executor):
+    """Execution plan chunks of one task always append to that task's plan artifact."""
+    queries = [f"plan-{i}" for i in range(NUM_TASKS)]
+    queues = [RecordingEventQueue() for _ in queries]
+
+    await asyncio.gather(*(
+        executor.execute(make_context(query), queue)
+        for query, queue in zip(queries, queues)
+    ))
+
+    plan_ids = set()
+    for queue in queues:
+        plan_events = [
+            e for e in queue.events
+            if isinstance(e, TaskArtifactUpdateEvent)
+            and e.artifact.name in ('execution_plan_streaming', 'execution_plan_update')
+        ]
+        ids = {e.artifact.artifactId for e in plan_events}
+        assert len(ids) == 1
+        assert plan_events[0].append is False
+        assert all(e.append for e in plan_events[1:])
+        plan_ids |= ids
+
+    assert len(plan_ids) == NUM_TASKS
+
+
+@pytest.mark.asyncio
+async def test_hot_path_coalesces_streaming_chunks(executor, monkeypatch):
+    """With A2A_STREAM_HOT_PATH on, fewer streaming artifacts carry the same text."""
+    queries = [f"query-{i}" for i in range(8)]
+
+    async def run():
+        queues = [RecordingEventQueue() for _ in queries]
+        await asyncio.gather(*(
+            executor.execute(make_context(query), queue)
+            for query, queue in zip(queries, queues)
+        ))
+        return queues
+
+    plain = await run()
+    monkeypatch.setenv('A2A_STREAM_HOT_PATH', 'true')
+    monkeypatch.setenv('A2A_STREAM_COALESCE_BYTES', '24')
+    monkeypatch.setenv('A2A_STREAM_COALESCE_MS', '60000')
+    coalesced = await run()
+
+    for query, plain_queue, queue in zip(queries, plain, coalesced):
+        artifacts = [e for e in queue.events if isinstance(e, TaskArtifactUpdateEvent)]
+        plans = [artifact_text(e) for e in artifacts if e.artifact.name == 'execution_plan_update']
+        assert plans == [expected_plan(query)]
+
+        streaming = [e for e in artifacts if e.artifact.name == 'streaming_result']
+        plain_streaming = [
+            e for e in plain_queue.events
+            if isinstance(e, TaskArtifactUpdateEvent) and e.artifact.name == 'streaming_result'
+        ]
+        assert ''.join(artifact_text(e) for e in streaming) == expected_answer(query)
+        assert len(streaming) < len(plain_streaming)
+        assert [e.append for e in streaming] == [False] + [True] * (len(streaming) - 1)
@@ -415,6 +415,50 @@ class TestSubagentGeneration(unittest.TestCase):
         print("✓ Subagent prompt override works")
 
 
+class TestIncrementalRefresh(unittest.TestCase):
+    """Test that refreshes only rebuild tools for agents whose card changed."""
+
+    CARDS = {
+        'github': {'name': 'github', 'description': 'GitHub integration'},
+        'jira': {'name': 'jira', 'description': 'JIRA integration'},
+    }
+
+    def make_registry(self):
+        with patch.dict(os.environ, {'ENABLE_GITHUB': 'true', 'ENABLE_JIRA': 'true'}, clear=True):
+            with patch.object(AgentRegistry, '_load_agents'):
+                registry = AgentRegistry()
+        registry.AGENT_NAMES = ['github', 'jira']
+        registry._agents, registry._tools = registry._build_registry_from_active_agents(
+            {'github': True, 'jira': True}, dict(self.CARDS))
+        return registry
+
+    def test_unchanged_cards_reuse_tools(self):
+        registry = self.make_registry()
+        tools = dict(registry._tools)
+
+        with patch.object(registry, '_check_connectivity_for_modules',
+                          return_value=({'github': True, 'jira': True}, dict(self.CARDS))):
+            self.assertFalse(registry._refresh_connectivity_only())
+
+        self.assertIs(registry._tools['github'], tools['github'])
+        self.assertIs(registry._tools['jira'], tools['jira'])
+
+    def test_changed_card_is_a_change(self):
+        registry = self.make_registry()
+        tools = dict(registry._tools)
+        generation = registry.generation
+        cards = {**self.CARDS, 'jira': {'name': 'jira', 'description': 'JIRA and Confluence'}}
+
+        with patch.object(registry, '_check_connectivity_for_modules',
+                          return_value=({'github': True, 'jira': True}, cards)):
+            self.assertTrue(registry._refresh_connectivity_only())
+
+        self.assertIs(registry._tools['github'], tools['github'])
+        self.assertIsNot(registry._tools['jira'], tools['jira'])
+        self.assertEqual(registry._tools['jira'].description, 'JIRA and Confluence')
+        self.assertEqual(registry.generation, generation + 1)
+
+
 class TestSanitization(unittest.TestCase):
     """Test tool name sanitization."""
 
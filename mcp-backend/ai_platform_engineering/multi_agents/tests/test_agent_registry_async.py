@@ -0,0 +1,205 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Tests for the async AgentRegistry probe loop.
+
+Agents are served by an httpx MockTransport whose card endpoint can be slowed
+down or failed per agent, so the tests can check that startup does not wait
+for the slowest agent, that health changes arrive as events, and that reads
+never block on a refresh.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from functools import partial
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from ai_platform_engineering.multi_agents import agent_registry
+from ai_platform_engineering.multi_agents.agent_registry import AgentHealth, AgentRegistry
+from ai_platform_engineering.utils.a2a_common.transport import get_agent_card_cache
+
+AGENT_COUNT = 20
+SLOW_AGENT = 'AGENT07'
+SLOW_SECONDS = 1.0
+
+
+class StubAgents:
+    """Card endpoint for AGENT01..AGENTnn with per-agent latency and outages."""
+
+    def __init__(self, count):
+        self.names = [f"AGENT{i:02d}" for i in range(1, count + 1)]
+        self.delays = {}
+        self.down = set()
+
+    def env(self, **extra):
+        env = {'SKIP_AGENT_CONNECTIVITY_CHECK': 'false', 'AGENT_CONNECTIVITY_RETRY_DELAY': '0.05', **extra}
+        for name in self.names:
+            env[f"ENABLE_{name}"] = 'true'
+            env[f"{name}_AGENT_HOST"] = name.lower()
+        return env
+
+    async def __call__(self, request):
+        name = request.url.host.upper()
+        await asyncio.sleep(self.delays.get(name, 0))
+        if name in self.down:
+            return httpx.Response(503)
+        return httpx.Response(200, json={
+            'name': name.lower(),
+            'description': f"{name} operations",
+            'url': f"http://{name.lower()}:8000",
+            'version': '0.1.0',
+            'capabilities': {},
+            'defaultInputModes': ['text'],
+            'defaultOutputModes': ['text'],
+            'skills': [],
+        })
+
+
+@pytest.fixture
+def stubs():
+    get_agent_card_cache().invalidate()
+    stubs = StubAgents(AGENT_COUNT)
+    client = partial(httpx.AsyncClient, transport=httpx.MockTransport(stubs))
+    with patch.object(agent_registry.httpx, 'AsyncClient', client):
+        yield stubs
+    get_agent_card_cache().invalidate()
+
+
+@pytest.fixture
+def make_registry(stubs):
+    registries = []
+
+    def make(**env):
+        with patch.dict(os.environ, stubs.env(**env), clear=True):
+            registry = AgentRegistry()
+        registries.append(registry)
+        return registry
+
+    yield make
+    for registry in registries:
+        registry.close()
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.005)
+
+
+def test_cold_start_does_not_wait_for_slowest_agent(stubs, make_registry):
+    stubs.delays[SLOW_AGENT] = SLOW_SECONDS
+    started = time.perf_counter()
+    registry = make_registry()
+    construct = time.perf_counter() - started
+
+    assert construct < 0.2
+    assert set(registry.snapshot.pending) | set(registry.agents) == set(stubs.names)
+
+    wait_for(lambda: len(registry.agents) == AGENT_COUNT - 1)
+    fast_ready = time.perf_counter() - started
+    assert registry.health(SLOW_AGENT) is AgentHealth.PENDING
+    assert fast_ready < SLOW_SECONDS / 2
+
+    assert registry.wait_until_ready(timeout=5)
+    assert registry.health(SLOW_AGENT) is AgentHealth.HEALTHY
+    assert list(registry.agents) == stubs.names  # configuration order, not arrival order
+    assert len(registry.get_all_agents()) == AGENT_COUNT
+
+
+def test_blocking_startup_waits_for_every_agent(stubs, make_registry):
+    stubs.delays[SLOW_AGENT] = 0.2
+    started = time.perf_counter()
+    registry = make_registry(AGENT_CONNECTIVITY_BLOCKING_STARTUP='true')
+
+    assert time.perf_counter() - started >= 0.2
+    assert registry.wait_until_ready(timeout=0)
+    assert registry.snapshot.pending == []
+    assert len(registry.agents) == AGENT_COUNT
+
+
+def test_health_changes_are_published_as_events(stubs, make_registry):
+    stubs.down.add('AGENT03')
+    registry = make_registry(AGENT_CONNECTIVITY_STARTUP_DELAY='0.1', AGENT_CONNECTIVITY_MAX_RETRIES='2')
+    events = []
+    registry.subscribe(events.append)
+
+    assert registry.wait_until_ready(timeout=5)
+    by_agent = {event.agent_name: event for event in events}
+    assert set(by_agent) == set(stubs.names)
+    assert all(event.previous is AgentHealth.PENDING for event in events)
+    assert by_agent['AGENT03'].current is AgentHealth.UNHEALTHY
+    assert by_agent['AGENT01'].current is AgentHealth.HEALTHY
+    assert by_agent['AGENT01'].agent_card['name'] == 'agent01'
+
+    status = registry.get_registry_status()
+    assert status['agents_count'] == AGENT_COUNT - 1
+    assert status['health']['AGENT03'] == 'unhealthy'
+    assert status['pending'] == []
+
+
+def test_bursts_of_changes_fire_one_callback(stubs, make_registry):
+    registry = make_registry(AGENT_CONNECTIVITY_STARTUP_DELAY='0.05', AGENT_CONNECTIVITY_CHANGE_DEBOUNCE='0.1')
+    seen = []
+    registry.enable_dynamic_monitoring(on_change_callback=lambda: seen.append(len(registry.agents)))
+
+    assert registry.wait_until_ready(timeout=5)
+    wait_for(lambda: seen and seen[-1] == AGENT_COUNT)
+    assert len(seen) < AGENT_COUNT / 2
+
+
+def test_reads_do_not_wait_for_refresh(stubs, make_registry):
+    registry = make_registry()
+    assert registry.wait_until_ready(timeout=5)
+    registry.enable_dynamic_monitoring()
+    stubs.delays[SLOW_AGENT] = 0.5
+
+    refresh = threading.Thread(target=registry.force_refresh)
+    refresh.start()
+    time.sleep(0.1)  # the refresh now holds the lock, waiting on the slow agent
+    assert refresh.is_alive()
+
+    started = time.perf_counter()
+    status = registry.get_registry_status()
+    agents = registry.agents
+    waited = time.perf_counter() - started
+    refresh.join()
+
+    assert waited < 0.01
+    assert status['agents_count'] == len(agents) == AGENT_COUNT
+
+
+def test_background_monitor_publishes_outages(stubs, make_registry, monkeypatch):
+    registry = make_registry(AGENT_CONNECTIVITY_MAX_RETRIES='0', AGENT_CONNECTIVITY_CHANGE_DEBOUNCE='0.01')
+    monkeypatch.setenv('AGENT_CONNECTIVITY_ENABLE_BACKGROUND', 'true')
+    monkeypatch.setenv('AGENT_CONNECTIVITY_REFRESH_INTERVAL', '0.05')
+    assert registry.wait_until_ready(timeout=5)
+    generation = registry.generation
+    changes = []
+    events = []
+    registry.subscribe(events.append)
+    registry.enable_dynamic_monitoring(on_change_callback=lambda: changes.append(registry.generation))
+    assert registry.get_registry_status()['monitoring_active']
+
+    stubs.down.add('AGENT05')
+    wait_for(lambda: registry.health('AGENT05') is AgentHealth.UNHEALTHY)
+    assert 'AGENT05' not in registry.agents
+    stubs.down.clear()
+    wait_for(lambda: registry.health('AGENT05') is AgentHealth.HEALTHY)
+
+    assert [(e.previous, e.current) for e in events if e.agent_name == 'AGENT05'] == [
+        (AgentHealth.HEALTHY, AgentHealth.UNHEALTHY),
+        (AgentHealth.UNHEALTHY, AgentHealth.HEALTHY),
+    ]
+    assert registry.generation == generation + 2
+    wait_for(lambda: changes and changes[-1] == generation + 2)
+
+    registry.stop_background_monitoring()
+    wait_for(lambda: not registry.get_registry_status()['monitoring_active'])
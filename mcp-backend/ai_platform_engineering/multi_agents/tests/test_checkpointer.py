@@ -0,0 +1,219 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for the bounded SQLite checkpointer."""
+
+import gc
+import os
+import time
+from typing import Annotated, TypedDict
+
+import pytest
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from ai_platform_engineering.multi_agents.checkpointer import (
+    BoundedSqliteSaver,
+    checkpointer_stats,
+    create_checkpointer,
+)
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+    turns: int
+
+
+def build_graph(checkpointer):
+    """Two-node graph that answers every user message, so each turn writes several checkpoints."""
+
+    def think(state: State):
+        return {"turns": state.get("turns", 0) + 1}
+
+    def answer(state: State):
+        return {"messages": [AIMessage(content=f"answer {state['turns']}: {state['messages'][-1].content}")]}
+
+    builder = StateGraph(State)
+    builder.add_node("think", think)
+    builder.add_node("answer", answer)
+    builder.add_edge(START, "think")
+    builder.add_edge("think", "answer")
+    builder.add_edge("answer", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def ask(graph, thread_id, text):
+    return graph.invoke({"messages": [{"role": "user", "content": text}]}, config(thread_id))
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class TestBoundedSqliteSaver:
+
+    def test_conversation_state_round_trips(self):
+        graph = build_graph(BoundedSqliteSaver())
+        ask(graph, "t1", "hello")
+        result = ask(graph, "t1", "again")
+
+        assert result["turns"] == 2
+        assert [m.content for m in result["messages"]] == ["hello", "answer 1: hello", "again", "answer 2: again"]
+        assert ask(graph, "t2", "other")["turns"] == 1
+
+    def test_matches_in_memory_saver(self):
+        bounded, memory = build_graph(BoundedSqliteSaver()), build_graph(InMemorySaver())
+        for text in ("one", "two", "three"):
+            ask(bounded, "t", text)
+            ask(memory, "t", text)
+
+        bounded_state, memory_state = bounded.get_state(config("t")), memory.get_state(config("t"))
+        assert bounded_state.values["turns"] == memory_state.values["turns"]
+        assert [m.content for m in bounded_state.values["messages"]] == [m.content for m in memory_state.values["messages"]]
+        assert bounded_state.next == memory_state.next
+        assert bounded_state.metadata["step"] == memory_state.metadata["step"]
+
+    def test_history_and_filters(self):
+        saver = BoundedSqliteSaver(max_checkpoints_per_thread=100)
+        graph = build_graph(saver)
+        ask(graph, "t", "one")
+        ask(graph, "t", "two")
+
+        history = list(graph.get_state_history(config("t")))
+        assert len(history) == 8  # input + three steps, per turn
+        assert [s.metadata["step"] for s in history] == sorted((s.metadata["step"] for s in history), reverse=True)
+        assert len(list(saver.list(config("t"), limit=3))) == 3
+        assert {t.metadata["source"] for t in saver.list(config("t"), filter={"source": "input"})} == {"input"}
+        before = history[2].config
+        assert all(t.config["configurable"]["checkpoint_id"] < before["configurable"]["checkpoint_id"]
+                   for t in saver.list(config("t"), before=before))
+
+    def test_lru_eviction_keeps_recently_used_threads(self):
+        saver = BoundedSqliteSaver(max_threads=3, ttl_seconds=0)
+        graph = build_graph(saver)
+        for thread_id in ("a", "b", "c"):
+            ask(graph, thread_id, "hi")
+        ask(graph, "a", "still here")  # "b" is now least recently used
+        ask(graph, "d", "hi")
+
+        assert graph.get_state(config("b")).values == {}
+        assert graph.get_state(config("a")).values["turns"] == 2
+        stats = saver.stats()
+        assert stats["threads"] == 3
+        assert stats["evicted_threads"] == 1
+
+    def test_ttl_expires_idle_threads(self):
+        saver = BoundedSqliteSaver(ttl_seconds=0.05)
+        graph = build_graph(saver)
+        ask(graph, "idle", "hi")
+        time.sleep(0.1)
+        ask(graph, "active", "hi")  # a new thread triggers a sweep
+
+        assert graph.get_state(config("idle")).values == {}
+        assert graph.get_state(config("active")).values["turns"] == 1
+        assert saver.stats()["expired_threads"] == 1
+
+        time.sleep(0.1)
+        assert saver.evict_expired() == 1
+        assert saver.stats()["threads"] == 0
+
+    def test_compaction_keeps_latest_snapshot(self):
+        saver = BoundedSqliteSaver(max_checkpoints_per_thread=3)
+        graph = build_graph(saver)
+        for i in range(5):
+            ask(graph, "t", f"message {i}")
+
+        stats = saver.stats()
+        assert stats["checkpoints"] <= 3
+        assert stats["compacted_checkpoints"] > 0
+        state = graph.get_state(config("t"))
+        assert state.values["turns"] == 5
+        assert len(state.values["messages"]) == 10
+
+        saver.compact()
+        stats = saver.stats()
+        assert stats["checkpoints"] == 1
+        assert stats["blobs"] <= len(state.values) + 4  # one live version per channel
+        assert graph.get_state(config("t")).parent_config is None
+        assert ask(graph, "t", "after compaction")["turns"] == 6
+
+    def test_state_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "checkpoints.sqlite")
+        saver = BoundedSqliteSaver(path)
+        ask(build_graph(saver), "t", "before restart")
+        saver.close()
+
+        reopened = BoundedSqliteSaver(path)
+        result = ask(build_graph(reopened), "t", "after restart")
+        assert result["turns"] == 2
+        assert reopened.stats()["threads"] == 1
+
+    def test_delete_thread(self):
+        saver = BoundedSqliteSaver()
+        graph = build_graph(saver)
+        ask(graph, "t", "hi")
+        saver.delete_thread("t")
+
+        assert saver.stats()["threads"] == 0
+        assert saver.stats()["checkpoints"] == 0
+        assert graph.get_state(config("t")).values == {}
+
+    @pytest.mark.asyncio
+    async def test_async_api(self):
+        graph = build_graph(BoundedSqliteSaver())
+        await graph.ainvoke({"messages": [{"role": "user", "content": "hi"}]}, config("t"))
+        result = await graph.ainvoke({"messages": [{"role": "user", "content": "again"}]}, config("t"))
+        assert result["turns"] == 2
+        assert len([s async for s in graph.aget_state_history(config("t"))]) > 0
+
+    @pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc to read RSS")
+    @pytest.mark.asyncio
+    async def test_soak_rss_stays_flat(self):
+        """Thousands of one-off context_ids: the store stays at max_threads and RSS stops growing."""
+        saver = BoundedSqliteSaver(max_threads=200)
+        graph = build_graph(saver)
+
+        async def run(start, count):
+            for i in range(start, start + count):
+                await graph.ainvoke({"messages": [{"role": "user", "content": f"context {i} " * 20}]}, config(f"ctx-{i}"))
+
+        await run(0, 1000)  # fill the store and warm up allocators
+        gc.collect()
+        baseline = rss_bytes()
+        await run(1000, 2000)
+        gc.collect()
+        growth = rss_bytes() - baseline
+
+        stats = saver.stats()
+        assert stats["threads"] == 200
+        assert stats["evicted_threads"] == 2800
+        assert growth < 8 * 1024 * 1024, f"RSS grew by {growth / 1024 / 1024:.1f} MiB"
+
+
+class TestFactory:
+
+    def test_default_is_bounded_sqlite(self, clean_env):
+        os.environ.pop('CHECKPOINTER_BACKEND', None)
+        os.environ['CHECKPOINT_MAX_THREADS'] = '42'
+        saver = create_checkpointer()
+        assert isinstance(saver, BoundedSqliteSaver)
+        assert saver.max_threads == 42
+        assert checkpointer_stats(saver)["backend"] == "sqlite"
+
+    def test_memory_and_none_backends(self, clean_env):
+        os.environ['CHECKPOINTER_BACKEND'] = 'memory'
+        saver = create_checkpointer()
+        assert isinstance(saver, InMemorySaver)
+        ask(build_graph(saver), "t", "hi")
+        assert checkpointer_stats(saver)["threads"] == 1
+
+        os.environ['CHECKPOINTER_BACKEND'] = 'none'
+        assert create_checkpointer() is None
+        assert checkpointer_stats(None) == {"backend": "none"}
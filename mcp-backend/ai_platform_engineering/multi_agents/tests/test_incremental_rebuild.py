@@ -0,0 +1,200 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Tests for incremental graph rebuilds in AIPlatformEngineerMAS.
+
+The registry and deep-agent compiler are replaced by fakes; graph compilation
+sleeps for COMPILE_SECONDS so the tests can check that requests never wait on
+a rebuild while agents flap on and off.
+"""
+
+import asyncio
+import statistics
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+# Importing the MAS creates the platform registry; keep it from probing agents
+with patch('ai_platform_engineering.multi_agents.agent_registry.AgentRegistry._load_agents'):
+    from ai_platform_engineering.multi_agents.platform_engineer import deep_agent, prompts
+
+
+COMPILE_SECONDS = 0.05
+
+
+def card(name, description=None):
+    return {'name': name, 'description': description or f"{name} operations"}
+
+
+class FakeRegistry:
+    """Stands in for platform_registry; counts how many subagent entries it renders."""
+
+    def __init__(self, cards):
+        self.agents = dict(cards)
+        self.subagents_rendered = []
+
+    def enable_dynamic_monitoring(self, on_change_callback=None):
+        self.on_change = on_change_callback
+
+    def get_all_agents(self):
+        return [SimpleNamespace(name=name) for name in self.agents]
+
+    def generate_subagent(self, agent, agent_card, agent_prompts):
+        self.subagents_rendered.append(agent)
+        return {'name': agent_card['name'], 'description': agent_card['description'], 'prompt': agent_card['description']}
+
+    def get_registry_status(self):
+        return {'agents': list(self.agents)}
+
+    def set_agents(self, cards):
+        self.agents = dict(cards)
+        self.on_change()
+
+
+def fake_compile(tools, instructions, subagents, model):
+    time.sleep(COMPILE_SECONDS)
+    return SimpleNamespace(tools=[t.name for t in tools], instructions=instructions, subagents=subagents, checkpointer=None)
+
+
+@pytest.fixture
+def registry():
+    return FakeRegistry({'github': card('github'), 'jira': card('jira')})
+
+
+@pytest.fixture
+def mas(clean_env, registry, monkeypatch):
+    monkeypatch.setenv('CHECKPOINTER_BACKEND', 'none')
+    llm_factory = SimpleNamespace(calls=0)
+
+    def get_llm():
+        llm_factory.calls += 1
+        return object()
+
+    with patch.object(deep_agent, 'platform_registry', registry), \
+         patch.object(deep_agent, 'async_create_deep_agent', fake_compile), \
+         patch.object(deep_agent, 'LLMFactory', lambda: SimpleNamespace(get_llm=get_llm)):
+        instance = deep_agent.AIPlatformEngineerMAS()
+        instance.llm_factory = llm_factory
+        yield instance
+
+
+def test_agent_set_diff():
+    diff = deep_agent.AgentSetDiff.between({'a': '1', 'b': '1', 'c': '1'}, {'b': '1', 'c': '2', 'd': '1'})
+    assert diff == deep_agent.AgentSetDiff(added=('d',), removed=('a',), changed=('c',))
+    assert not deep_agent.AgentSetDiff.between({'a': '1'}, {'a': '1'})
+
+
+def test_unchanged_registry_keeps_graph(mas, registry):
+    graph = mas.get_graph()
+    registry.set_agents(registry.agents)
+
+    assert mas.get_graph() is graph
+    assert mas.get_status()['graph_generation'] == 1
+
+
+def test_only_affected_agents_are_regenerated(mas, registry):
+    assert sorted(registry.subagents_rendered) == ['github', 'jira']
+    registry.subagents_rendered.clear()
+
+    registry.set_agents({**registry.agents, 'argocd': card('argocd')})
+    assert registry.subagents_rendered == ['argocd']
+    assert mas.get_status()['last_rebuild']['added'] == ['argocd']
+
+    registry.set_agents({**registry.agents, 'jira': card('jira', 'JIRA and Confluence')})
+    assert registry.subagents_rendered == ['argocd', 'jira']
+    assert mas.get_status()['last_rebuild']['changed'] == ['jira']
+
+    registry.set_agents({name: c for name, c in registry.agents.items() if name != 'github'})
+    assert registry.subagents_rendered == ['argocd', 'jira']
+    graph = mas.get_graph()
+    assert graph.tools == ['jira', 'argocd']
+    assert [s['name'] for s in graph.subagents] == ['jira', 'argocd']
+    assert 'JIRA and Confluence' in graph.instructions and 'github operations' not in graph.instructions
+
+    assert mas.llm_factory.calls == 1
+    assert mas.get_status()['graph_generation'] == 4
+
+
+def test_prompt_rendering_is_memoized(mas, registry):
+    prompts.render_tool_instruction.cache_clear()
+    registry.set_agents({**registry.agents, 'argocd': card('argocd')})
+    registry.set_agents({name: c for name, c in registry.agents.items() if name != 'argocd'})
+    registry.set_agents({**registry.agents, 'argocd': card('argocd')})
+
+    info = prompts.render_tool_instruction.cache_info()
+    assert info.misses == 3  # github, jira and argocd, each rendered once
+    assert info.hits == 5
+
+
+def test_running_stream_keeps_its_snapshot(mas, registry):
+    held = mas.get_graph()
+    registry.set_agents({**registry.agents, 'argocd': card('argocd')})
+
+    assert held.tools == ['github', 'jira']
+    assert mas.get_graph() is not held
+    assert mas.get_graph().tools == ['github', 'jira', 'argocd']
+
+
+def test_get_graph_is_not_blocked_by_rebuild(mas, registry):
+    old = mas.get_graph()
+    rebuild = threading.Thread(target=registry.set_agents, args=({**registry.agents, 'argocd': card('argocd')},))
+    rebuild.start()
+    time.sleep(COMPILE_SECONDS / 5)  # rebuild is now compiling
+
+    started = time.perf_counter()
+    during = mas.get_graph()
+    waited = time.perf_counter() - started
+    rebuild.join()
+
+    assert during is old
+    assert waited < COMPILE_SECONDS / 5
+    assert mas.get_graph() is not old
+
+
+@pytest.mark.asyncio
+async def test_request_latency_while_agents_flap(mas, registry):
+    """Agents flap on and off while requests run; report rebuild time and request latency."""
+    flaps = 20
+    base = dict(registry.agents)
+    rebuild_times = []
+    done = threading.Event()
+
+    def flap():
+        for i in range(flaps):
+            cards = {**base, 'argocd': card('argocd')} if i % 2 == 0 else base
+            started = time.perf_counter()
+            registry.set_agents(cards)
+            rebuild_times.append(time.perf_counter() - started)
+        done.set()
+
+    latencies = []
+    generations = set()
+
+    async def request():
+        started = time.perf_counter()
+        graph = mas.get_graph()
+        generations.add(id(graph))
+        await asyncio.sleep(0.002)  # stream from the snapshot
+        assert graph.tools[:2] == ['github', 'jira']
+        latencies.append(time.perf_counter() - started)
+
+    flapper = threading.Thread(target=flap)
+    flapper.start()
+    while not done.is_set():
+        await asyncio.gather(*(request() for _ in range(10)))
+    flapper.join()
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"\n{flaps} rebuilds: mean {statistics.mean(rebuild_times) * 1000:.1f} ms, max {max(rebuild_times) * 1000:.1f} ms; "
+          f"{len(latencies)} requests over {len(generations)} graphs: p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms")
+
+    assert mas.get_status()['graph_generation'] == 1 + flaps
+    assert len(generations) > 1
+    # Requests never wait for a compile to finish
+    assert p99 < 0.002 + COMPILE_SECONDS / 2
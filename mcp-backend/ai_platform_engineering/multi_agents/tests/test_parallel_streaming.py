@@ -0,0 +1,203 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Tests for the streaming merge of PARALLEL sub-agent fan-out.
+
+Sub-agents are replaced by a fake transport pool whose clients stream
+artifact chunks with configurable delays, so the tests can check arrival
+order, per-agent artifacts, deadlines and cancellation without a network.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from a2a.types import (
+    Artifact,
+    Part,
+    SendStreamingMessageResponse,
+    SendStreamingMessageSuccessResponse,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+# Importing the executor creates the platform registry; keep it from probing agents
+with patch('ai_platform_engineering.multi_agents.agent_registry.AgentRegistry._load_agents'):
+    from ai_platform_engineering.multi_agents.platform_engineer.protocol_bindings.a2a import agent_executor
+
+
+def response(result):
+    return SendStreamingMessageResponse(root=SendStreamingMessageSuccessResponse(id='1', result=result))
+
+
+class FakeAgent:
+    """A sub-agent that streams ``chunks`` after ``first_delay``, ``interval`` apart."""
+
+    def __init__(self, name, chunks=3, first_delay=0.0, interval=0.0, fail_after=None):
+        self.name = name
+        self.chunks = chunks
+        self.first_delay = first_delay
+        self.interval = interval
+        self.fail_after = fail_after
+        self.cancelled = False
+
+    async def send_message_streaming(self, request):
+        try:
+            await asyncio.sleep(self.first_delay)
+            for i in range(self.chunks):
+                if i and self.interval:
+                    await asyncio.sleep(self.interval)
+                if self.fail_after is not None and i == self.fail_after:
+                    raise ConnectionError(f"{self.name} dropped the stream")
+                yield response(TaskArtifactUpdateEvent(
+                    task_id='sub-task',
+                    context_id='sub-ctx',
+                    artifact=Artifact(artifact_id=f"{self.name}-artifact", parts=[Part(root=TextPart(text=f"{self.name}-{i} "))]),
+                ))
+            yield response(TaskStatusUpdateEvent(
+                task_id='sub-task', context_id='sub-ctx', final=True, status=TaskStatus(state=TaskState.completed),
+            ))
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+class FakePool:
+    def __init__(self, agents):
+        self.agents = {agent.name: agent for agent in agents}
+
+    @asynccontextmanager
+    async def session(self, agent_url):
+        yield self.agents[agent_url]
+
+
+class RecordingEventQueue:
+    """Records events with their arrival time; can be closed to simulate a disconnect."""
+
+    def __init__(self):
+        self.events = []
+        self.started = time.perf_counter()
+        self.closed = False
+
+    async def enqueue_event(self, event):
+        self.events.append((time.perf_counter() - self.started, event))
+
+    def is_closed(self):
+        return self.closed
+
+    def artifacts(self, name=None):
+        return [e for _, e in self.events if isinstance(e, TaskArtifactUpdateEvent) and (name is None or e.artifact.name == name)]
+
+
+def text_of(event):
+    return ''.join(part.root.text for part in event.artifact.parts)
+
+
+@pytest.fixture
+def executor(clean_env):
+    with patch.object(agent_executor, 'AIPlatformEngineerA2ABinding', lambda: SimpleNamespace()):
+        yield agent_executor.AIPlatformEngineerA2AExecutor()
+
+
+@pytest.fixture
+def task():
+    return Task(id='task-1', context_id='ctx-1', status=TaskStatus(state=TaskState.submitted))
+
+
+async def run_fan_out(executor, task, agents, queue=None):
+    queue = queue or RecordingEventQueue()
+    with patch.object(agent_executor, 'get_transport_pool', lambda: FakePool(agents)):
+        await executor._stream_from_multiple_agents([(a.name, a.name) for a in agents], 'query', task, queue)
+    return queue
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_forwarded_before_slowest_agent_finishes(executor, task):
+    fast = FakeAgent('fast', chunks=3)
+    slow = FakeAgent('slow', chunks=3, first_delay=0.3)
+    queue = await run_fan_out(executor, task, [slow, fast])
+
+    streaming = queue.artifacts('streaming_result')
+    first_time = next(t for t, e in queue.events if isinstance(e, TaskArtifactUpdateEvent))
+    assert first_time < 0.2
+    assert text_of(streaming[0]) == 'fast-0 '
+
+    by_agent = {}
+    for event in streaming:
+        by_agent.setdefault(event.artifact.metadata['source_agent'], []).append(event)
+    assert set(by_agent) == {'fast', 'slow'}
+    for name, events in by_agent.items():
+        assert ''.join(text_of(e) for e in events) == f"{name}-0 {name}-1 {name}-2 "
+        assert [e.append for e in events] == [False, True, True]
+        assert len({e.artifact.artifact_id for e in events}) == 1
+    assert by_agent['fast'][0].artifact.artifact_id != by_agent['slow'][0].artifact.artifact_id
+
+    summary = queue.artifacts()[-1]
+    assert summary.last_chunk
+    assert 'FAST Results' in text_of(summary) and 'SLOW Results' in text_of(summary)
+    status = queue.events[-1][1]
+    assert isinstance(status, TaskStatusUpdateEvent) and status.final
+    assert status.status.state == TaskState.completed
+
+
+@pytest.mark.asyncio
+async def test_deadline_keeps_partial_results(executor, task):
+    executor.parallel_agent_timeout = 0.15
+    fast = FakeAgent('fast', chunks=2)
+    laggard = FakeAgent('laggard', chunks=5, interval=0.1)
+    queue = await run_fan_out(executor, task, [fast, laggard])
+
+    assert laggard.cancelled
+    summary = text_of(queue.artifacts()[-1])
+    assert 'FAST Results' in summary
+    assert 'LAGGARD Partial Results' in summary
+    assert 'laggard-0 laggard-1' in summary
+    assert 'No complete response within' in summary
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_keeps_partial_results(executor, task):
+    broken = FakeAgent('broken', chunks=3, fail_after=1)
+    queue = await run_fan_out(executor, task, [broken, FakeAgent('ok')])
+
+    summary = text_of(queue.artifacts()[-1])
+    assert 'BROKEN Partial Results' in summary
+    assert 'broken-0' in summary and 'dropped the stream' in summary
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_stragglers(executor, task):
+    fast = FakeAgent('fast', chunks=1)
+    straggler = FakeAgent('straggler', chunks=1, first_delay=5)
+    queue = RecordingEventQueue()
+
+    async def disconnect():
+        await asyncio.sleep(0.1)
+        queue.closed = True
+
+    started = time.perf_counter()
+    await asyncio.gather(run_fan_out(executor, task, [fast, straggler], queue), disconnect())
+
+    assert time.perf_counter() - started < 2.5
+    assert straggler.cancelled
+    assert not any(e.last_chunk for e in queue.artifacts())
+
+
+@pytest.mark.asyncio
+async def test_outer_cancellation_cancels_stragglers(executor, task):
+    straggler = FakeAgent('straggler', chunks=1, first_delay=5)
+    fan_out = asyncio.create_task(run_fan_out(executor, task, [straggler, FakeAgent('other', first_delay=5)]))
+    await asyncio.sleep(0.05)
+    fan_out.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await fan_out
+    assert straggler.cancelled
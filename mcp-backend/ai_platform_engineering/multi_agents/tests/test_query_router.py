@@ -0,0 +1,142 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for the compiled query router."""
+
+from types import SimpleNamespace
+
+from ai_platform_engineering.multi_agents.query_router import (
+    KeywordAutomaton,
+    QueryRouter,
+    RoutingType,
+    TfidfSkillScorer,
+)
+
+
+KB_KEYWORDS = ['docs:', '@docs']
+ORCH_KEYWORDS = ['analyze', 'compare', 'if', 'then', 'create', 'update', 'based on', 'depending on', 'which', 'that have']
+
+
+def make_registry(names, cards=None, generation=1):
+    return SimpleNamespace(
+        AGENT_ADDRESS_MAPPING={name: f"http://{name.lower()}:8000" for name in names},
+        agents=cards or {name: None for name in names},
+        generation=generation,
+    )
+
+
+def make_router(names=('GITHUB', 'KOMODOR', 'JIRA', 'ARGOCD', 'PAGERDUTY', 'RAG'), **kwargs):
+    return QueryRouter(make_registry(names), KB_KEYWORDS, ORCH_KEYWORDS, **kwargs)
+
+
+class TestKeywordAutomaton:
+    """Multi-pattern matching with word boundaries."""
+
+    def test_overlapping_keywords(self):
+        automaton = KeywordAutomaton([(kw, kw) for kw in ['he', 'she', 'his', 'hers']])
+        matches = [m.keyword for m in automaton.iter_matches('ushers')]
+        assert matches == []  # none of them is a whole word
+        matches = [m.keyword for m in automaton.iter_matches('she said hers and his')]
+        assert matches == ['she', 'hers', 'his']
+
+    def test_word_boundaries(self):
+        automaton = KeywordAutomaton([('aws', 'aws'), ('if', 'if')])
+        assert list(automaton.iter_matches('review the laws to notify')) == []
+        assert [m.keyword for m in automaton.iter_matches('aws costs, if any')] == ['aws', 'if']
+
+    def test_punctuation_keywords_match_next_to_words(self):
+        automaton = KeywordAutomaton([('docs:', 'docs:'), ('@docs', '@docs')])
+        assert automaton.match_prefix('docs:how to deploy').keyword == 'docs:'
+        assert automaton.match_prefix('@docs deploy').keyword == '@docs'
+        assert automaton.match_prefix('read docs: deploy') is None
+
+
+class TestQueryRouter:
+    """Routing decisions."""
+
+    def test_single_mention_is_direct(self):
+        decision = make_router().route('show me komodor clusters')
+        assert decision.type == RoutingType.DIRECT
+        assert decision.agents == [('KOMODOR', 'http://komodor:8000')]
+
+    def test_multiple_mentions_in_mention_order(self):
+        decision = make_router().route('list jira tickets and github repos')
+        assert decision.type == RoutingType.PARALLEL
+        assert [name for name, _ in decision.agents] == ['JIRA', 'GITHUB']
+
+    def test_orchestration_keyword_is_complex(self):
+        decision = make_router().route('analyze github prs and create jira tickets')
+        assert decision.type == RoutingType.COMPLEX
+        assert len(decision.agents) == 2
+
+    def test_orchestration_keyword_needs_word_boundary(self):
+        # "notify" contains "if" and "then" appears inside "authentication"
+        decision = make_router().route('show github authentication and jira notify settings')
+        assert decision.type == RoutingType.PARALLEL
+
+    def test_agent_name_needs_word_boundary(self):
+        decision = make_router(names=('AWS', 'GITHUB')).route('summarize the laws on github')
+        assert decision.agents == [('GITHUB', 'http://github:8000')]
+
+    def test_aliases(self):
+        router = make_router(aliases={'pagerduty': ['on-call']})
+        decision = router.route('who is on-call and what is synced in argo cd')
+        assert decision.type == RoutingType.PARALLEL
+        assert {c.agent_name for c in decision.candidates} == {'PAGERDUTY', 'ARGOCD'}
+        assert all(c.source == 'alias' and c.confidence < 1.0 for c in decision.candidates)
+
+    def test_knowledge_base_prefix_goes_to_rag(self):
+        decision = make_router().route('docs: how do I use github actions')
+        assert decision.type == RoutingType.DIRECT
+        assert decision.agents == [('RAG', 'http://rag:8000')]
+
+    def test_no_mentions_is_complex(self):
+        decision = make_router().route('who is on call for SRE')
+        assert decision.type == RoutingType.COMPLEX
+        assert decision.agents == []
+        assert decision.candidates == []
+
+    def test_recompiles_when_registry_changes(self):
+        router = make_router(names=('GITHUB',))
+        assert router.route('komodor clusters').type == RoutingType.COMPLEX
+
+        router.registry.AGENT_ADDRESS_MAPPING['KOMODOR'] = 'http://komodor:8000'
+        router.registry.generation += 1
+        assert router.route('komodor clusters').agents == [('KOMODOR', 'http://komodor:8000')]
+
+
+class TestTfidfScoring:
+    """Skill scoring for queries that do not name an agent."""
+
+    CARDS = {
+        'PAGERDUTY': {
+            'description': 'Incident management and on-call schedules',
+            'skills': [{'name': 'oncall', 'description': 'Find who is on call', 'tags': ['incidents', 'escalation']}],
+        },
+        'JIRA': {
+            'description': 'Issue tracking',
+            'skills': [{'name': 'issues', 'description': 'Search and create tickets', 'tags': ['tickets', 'sprints']}],
+        },
+    }
+
+    def test_rank(self):
+        scorer = TfidfSkillScorer()
+        scorer.fit({name: f"{name} {card['description']}" for name, card in self.CARDS.items()})
+        ranked = scorer.rank('open incident management tasks')
+        assert ranked[0][0] == 'PAGERDUTY'
+        assert scorer.rank('completely unrelated words') == []
+
+    def test_confident_scorer_routes_direct(self):
+        registry = make_registry(['PAGERDUTY', 'JIRA'], cards=self.CARDS)
+        router = QueryRouter(registry, KB_KEYWORDS, ORCH_KEYWORDS, scorer=TfidfSkillScorer(), min_confidence=0.2)
+        decision = router.route('which tickets are in the current sprints')
+        assert decision.type == RoutingType.DIRECT
+        assert decision.agents == [('JIRA', 'http://jira:8000')]
+        assert decision.candidates[0].source == 'scorer'
+
+    def test_low_confidence_keeps_candidates_as_hints(self):
+        registry = make_registry(['PAGERDUTY', 'JIRA'], cards=self.CARDS)
+        router = QueryRouter(registry, KB_KEYWORDS, ORCH_KEYWORDS, scorer=TfidfSkillScorer(), min_confidence=0.99)
+        decision = router.route('escalation for the database incidents')
+        assert decision.type == RoutingType.COMPLEX
+        assert decision.candidates[0].agent_name == 'PAGERDUTY'
@@ -6,7 +6,6 @@ import os
 from typing import Any, Optional, Union, List
 from uuid import uuid4
 from pydantic import PrivateAttr
-import pprint
 
 import httpx
 
@@ -16,11 +15,14 @@ from a2a.types import (
     SendMessageRequest,
     SendStreamingMessageRequest,
     MessageSendParams,
+    TaskArtifactUpdateEvent,
+    TaskStatusUpdateEvent,
 )
 
 from langchain_core.tools import BaseTool
 from langgraph.config import get_stream_writer
 
+from ai_platform_engineering.utils.a2a_common.hot_path import SampledLogger, event_text, stream_event
 from ai_platform_engineering.utils.models.generic_agent import Output
 from cnoe_agent_utils.tracing import TracingManager
 from pydantic import BaseModel, Field
@@ -195,109 +197,74 @@ class A2ARemoteAgentConnectTool(BaseTool):
         writer = get_stream_writer()
         logger.info("Starting A2A streaming send_message.")
 
+        # Read once per call rather than once per chunk
+        enable_artifact_streaming = os.getenv("ENABLE_ARTIFACT_STREAMING", "false").lower() == "true"
+        stream_tool_output = os.getenv("STREAM_SUB_AGENT_TOOL_OUTPUT", "false").lower() == "true"
+        chunk_log = SampledLogger(logger)
+
         accumulated_text: list[str] = []
 
         async for chunk in self._client.send_message_streaming(streaming_request):
             try:
-                chunk_dump = chunk.model_dump(mode="json", exclude_none=True)
-            except Exception:
-                chunk_dump = str(chunk)
-
-            logger.info(f"Received A2A stream chunk: {chunk_dump}")
-            # Don't stream raw chunk_dump - we'll stream extracted text only at line 251
-
-            try:
-                # The chunk is a SendStreamingMessageResponse Pydantic object
-                # The actual event data is in chunk.model_dump()['result']
-                # We already dumped it above as chunk_dump
-                result = chunk_dump.get('result') if isinstance(chunk_dump, dict) else None
-                if not result:
-                    logger.info("No result in chunk, skipping")
-                    continue
-
-                # Get event kind
-                kind = result.get('kind')
-                logger.debug(f"Received event: {result}")
-                if not kind:
-                    logger.info(f"No kind in result, skipping: {result}")
+                # Read the event straight off the response model; no per-chunk model_dump
+                event = stream_event(chunk)
+                if event is None:
+                    logger.info(f"No result in chunk, skipping: {chunk}")
                     continue
 
                 # Extract and stream text from artifact-update events
-                if kind == "artifact-update":
-                    logger.info(f"Received artifact-update event: {result}")
-                    artifact = result.get('artifact')
-                    logger.info(f"🔍 artifact type: {type(artifact)}, is_dict: {isinstance(artifact, dict)}")
-                    if artifact and isinstance(artifact, dict):
-                        parts = artifact.get('parts', [])
-                        logger.info(f"🔍 parts count: {len(parts)}")
-                        for part in parts:
-                            logger.info(f"🔍 part type: {type(part)}, is_dict: {isinstance(part, dict)}")
-                            if isinstance(part, dict):
-                                text = part.get('text')
-                                logger.info(f"🔍 text extracted: '{text}', exists: {bool(text)}")
-                                if text:
-                                    accumulated_text.append(text)
-                                    logger.info(f"✅ Accumulated text from artifact-update: {len(text)} chars")
-
-                                    # Check if artifact streaming is enabled (for agents like AWS that use artifact-update for streaming)
-                                    enable_artifact_streaming = os.getenv("ENABLE_ARTIFACT_STREAMING", "false").lower() == "true"
-                                    
-                                    if enable_artifact_streaming:
-                                        # Stream the entire artifact-update result as-is (preserves A2A event structure)
-                                        writer({"type": "artifact-update", "result": result})
-                                        logger.info(f"✅ Streamed artifact-update event (ENABLE_ARTIFACT_STREAMING=true): {len(text)} chars")
-                                    else:
-                                        logger.info("⏭️  Artifact streaming disabled (ENABLE_ARTIFACT_STREAMING=false), only accumulating")
+                if isinstance(event, TaskArtifactUpdateEvent):
+                    text = event_text(event)
+                    chunk_log.debug("artifact-update", chars=len(text), streaming=enable_artifact_streaming)
+                    if text:
+                        accumulated_text.append(text)
+
+                        # Artifact streaming is for agents like AWS that use artifact-update for streaming.
+                        # The event object is passed through as-is (preserves A2A event structure).
+                        if enable_artifact_streaming:
+                            writer({"type": "artifact-update", "event": event})
 
                 # Extract text from status-update events (RAG agent streams via status messages)
-                elif kind == "status-update":
-                    logger.info(f"Received status-update event: {result}")
-                    status = result.get('status')
-                    if status and isinstance(status, dict):
-                        message = status.get('message')
-                        if message and isinstance(message, dict):
-                            parts = message.get('parts', [])
-                            for part in parts:
-                                if isinstance(part, dict):
-                                    text = part.get('text')
-                                    if text:
-                                        accumulated_text.append(text)
-
-                                        # TODO: Uncomment this when we are ready to stream status-update content for real-time feedback
-
-                                        # # Stream all status-update content for real-time feedback
-                                        # clean_text = text.replace('**', '')
-                                        # writer({"type": "a2a_event", "data": clean_text})
-                                        # logger.info(f"✅ Streamed content from status-update: {len(clean_text)} chars")
-                                        
-                                        
-                                        # Check if tool output streaming is enabled
-                                        stream_tool_output = os.getenv("STREAM_SUB_AGENT_TOOL_OUTPUT", "false").lower() == "true"
-                                        
-                                        # Stream tool-related messages (🔧 calling, ✅ completed, and optionally 📄 output)
-                                        # Full responses will be streamed token-by-token by supervisor
-                                        is_tool_notification = '🔧' in text or '✅' in text
-                                        is_tool_output = '📄' in text
-                                        
-                                        should_stream = is_tool_notification or (is_tool_output and stream_tool_output)
-                                        
-                                        if should_stream:
-                                            # Remove markdown bold formatting (** **) from tool names
-                                            clean_text = text.replace('**', '')
-                                            writer({"type": "a2a_event", "data": clean_text})
-                                            if is_tool_output:
-                                                logger.info(f"✅ Streamed tool output from status-update (STREAM_SUB_AGENT_TOOL_OUTPUT=true): {len(clean_text)} chars")
-                                            else:
-                                                logger.info(f"✅ Streamed tool notification from status-update: {len(clean_text)} chars")
-                                        elif is_tool_output:
-                                            logger.info(f"⏭️  Skipped streaming tool output (STREAM_SUB_AGENT_TOOL_OUTPUT=false): {len(text)} chars")
-                                        else:
-                                            logger.info(f"⏭️  Skipped streaming content from status-update (not a tool message): {len(text)} chars")
+                elif isinstance(event, TaskStatusUpdateEvent):
+                    message = event.status.message
+                    chunk_log.debug("status-update", state=event.status.state.value)
+                    for part in (message.parts if message is not None else ()):
+                        text = getattr(part.root, 'text', None)
+                        if not text:
+                            continue
+                        accumulated_text.append(text)
+
+                        # TODO: Uncomment this when we are ready to stream status-update content for real-time feedback
+
+                        # # Stream all status-update content for real-time feedback
+                        # clean_text = text.replace('**', '')
+                        # writer({"type": "a2a_event", "data": clean_text})
+
+                        # Stream tool-related messages (🔧 calling, ✅ completed, and optionally 📄 output)
+                        # Full responses will be streamed token-by-token by supervisor
+                        is_tool_notification = '🔧' in text or '✅' in text
+                        is_tool_output = '📄' in text
+
+                        if is_tool_notification or (is_tool_output and stream_tool_output):
+                            # Remove markdown bold formatting (** **) from tool names
+                            clean_text = text.replace('**', '')
+                            writer({"type": "a2a_event", "data": clean_text})
+                            logger.info("✅ Streamed %s from status-update: %d chars",
+                                        "tool output" if is_tool_output else "tool notification", len(clean_text))
+                        elif is_tool_output:
+                            chunk_log.info("⏭️  skipped tool output (STREAM_SUB_AGENT_TOOL_OUTPUT=false)", chars=len(text))
+                        else:
+                            chunk_log.debug("⏭️  skipped status-update content (not a tool message)", chars=len(text))
+                else:
+                    logger.debug("Received %s event", type(event).__name__)
             except Exception as e:
                 logger.warning(f"Non-fatal error while handling stream chunk: {e}")
                 import traceback
                 logger.warning(traceback.format_exc())
 
+        logger.info("A2A stream finished: %d artifact-updates, %d status-updates",
+                    chunk_log.count("artifact-update"), chunk_log.count("status-update"))
+
         # Concatenate tokens without adding extra spaces (tokens already include spaces)
         final_response = "".join(accumulated_text).strip()
         if not final_response:
@@ -346,11 +313,9 @@ class A2ARemoteAgentConnectTool(BaseTool):
         params=MessageSendParams(**send_message_payload)
     )
 
-    logger.info(f"Request to send message: {request}")
-    pprint.pprint(request)
+    logger.debug("Request to send message: %s", request)
     response = await self._client.send_message(request)
-    logger.info(f"Response received from A2A agent: {response}")
-    pprint.pprint(response)
+    logger.debug("Response received from A2A agent: %s", response)
 
     def extract_text_from_response(result):
       """
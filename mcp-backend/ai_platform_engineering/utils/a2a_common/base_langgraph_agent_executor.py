@@ -135,6 +135,20 @@ class BaseLangGraphAgentExecutor(AgentExecutor, ABC):
                 # Check if this is a custom event from writer() (e.g., sub-agent streaming via artifact-update)
                 if 'type' in event and event.get('type') == 'artifact-update':
                     # Custom artifact-update event from sub-agent - forward as TaskArtifactUpdateEvent
+                    sub_agent_event = event.get('event')
+                    if sub_agent_event is not None:
+                        # Typed event passed through by A2ARemoteAgentConnectTool: reuse its artifact as-is
+                        await event_queue.enqueue_event(
+                            TaskArtifactUpdateEvent(
+                                append=sub_agent_event.append if sub_agent_event.append is not None else True,
+                                contextId=task.contextId,
+                                taskId=task.id,
+                                lastChunk=sub_agent_event.last_chunk or False,
+                                artifact=sub_agent_event.artifact,
+                            )
+                        )
+                        continue
+
                     result = event.get('result', {})
                     artifact = result.get('artifact')
                     
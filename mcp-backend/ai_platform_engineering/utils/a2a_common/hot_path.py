@@ -0,0 +1,211 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Helpers for the per-chunk streaming path between sub-agents, the supervisor
+and A2A clients.
+
+At token granularity, formatting log lines and re-serialising events costs
+more CPU than relaying the chunk. This module provides:
+
+- stream_event / event_text: read events and text straight off the A2A
+  response models instead of model_dump()-ing every chunk,
+- SampledLogger: lazy key=value logging that emits the first and then every
+  Nth occurrence of a per-chunk event,
+- ChunkCoalescer: buffers small text chunks and releases them once a byte
+  budget or time window is reached, also when no further chunk arrives.
+
+Configuration (environment variables):
+  A2A_STREAM_HOT_PATH          "true" to coalesce streamed chunks (default false)
+  A2A_STREAM_COALESCE_BYTES    flush once this much text is buffered, counted in characters (default 256)
+  A2A_STREAM_COALESCE_MS       flush once the oldest buffered chunk is this old (default 50)
+  A2A_STREAM_LOG_SAMPLE        log every Nth per-chunk event (default 100, 1 logs all)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from a2a.types import (
+  JSONRPCErrorResponse,
+  TaskArtifactUpdateEvent,
+  TaskStatusUpdateEvent,
+)
+
+
+def hot_path_enabled() -> bool:
+  return os.getenv("A2A_STREAM_HOT_PATH", "false").lower() == "true"
+
+
+def stream_event(response: Any) -> Optional[Any]:
+  """
+  The event carried by a SendStreamingMessageResponse (Task, Message,
+  TaskStatusUpdateEvent or TaskArtifactUpdateEvent), without copying it.
+  Returns None for JSON-RPC error responses.
+  """
+  root = getattr(response, "root", response)
+  if isinstance(root, JSONRPCErrorResponse):
+    return None
+  return getattr(root, "result", None)
+
+
+def _parts_text(parts) -> str:
+  texts = []
+  for part in parts or ():
+    text = getattr(getattr(part, "root", part), "text", None)
+    if text:
+      texts.append(text)
+  return "".join(texts)
+
+
+def event_text(event: Any) -> str:
+  """Text of an artifact-update's parts or a status-update's message parts."""
+  if isinstance(event, TaskArtifactUpdateEvent):
+    return _parts_text(event.artifact.parts)
+  if isinstance(event, TaskStatusUpdateEvent) and event.status.message is not None:
+    return _parts_text(event.status.message.parts)
+  return ""
+
+
+class _Fields:
+  """key=value rendering deferred until a handler formats the record."""
+  __slots__ = ("fields",)
+
+  def __init__(self, fields: Dict[str, Any]):
+    self.fields = fields
+
+  def __str__(self) -> str:
+    return " ".join(f"{key}={value}" for key, value in self.fields.items())
+
+
+class SampledLogger:
+  """
+  Per-chunk logging that costs one counter increment when a record is not
+  emitted. The first occurrence of each event name is always logged, then
+  every ``every``-th one, with ``n`` set to the running count.
+  """
+
+  def __init__(self, logger: logging.Logger, every: Optional[int] = None):
+    self.logger = logger
+    self.every = max(1, every or int(os.getenv("A2A_STREAM_LOG_SAMPLE", "100")))
+    self._counts: Dict[str, int] = {}
+
+  def log(self, level: int, event: str, **fields: Any) -> None:
+    count = self._counts.get(event, 0) + 1
+    self._counts[event] = count
+    if (count == 1 or count % self.every == 0) and self.logger.isEnabledFor(level):
+      fields["n"] = count
+      self.logger.log(level, "%s %s", event, _Fields(fields))
+
+  def debug(self, event: str, **fields: Any) -> None:
+    self.log(logging.DEBUG, event, **fields)
+
+  def info(self, event: str, **fields: Any) -> None:
+    self.log(logging.INFO, event, **fields)
+
+  def count(self, event: str) -> int:
+    return self._counts.get(event, 0)
+
+
+class ChunkCoalescer:
+  """
+  Buffer small text chunks into fewer, larger ones.
+
+  ``add`` returns the buffered text once it reaches ``max_bytes`` or the
+  oldest buffered chunk is older than ``max_delay`` seconds; otherwise None.
+  With ``on_idle`` set, a timer also hands the buffered text to ``on_idle``
+  when the window expires with no chunk arriving, so a stalled stream does
+  not hold back its tail. Callers must ``drain`` before emitting anything
+  else and when the stream ends (``drain`` waits for an idle flush in
+  progress, keeping events in order), and ``close`` when they give up on the
+  stream. With ``max_bytes=0`` every chunk passes straight through.
+  """
+
+  def __init__(
+    self,
+    max_bytes: int = 256,
+    max_delay: float = 0.05,
+    on_idle: Optional[Callable[[str], Awaitable[None]]] = None,
+  ):
+    self.max_bytes = max_bytes
+    self.max_delay = max_delay
+    self.on_idle = on_idle
+    self._parts: List[str] = []
+    self._size = 0
+    self._started = 0.0
+    self._timer: Optional[asyncio.TimerHandle] = None
+    self._idle_flush: Optional[asyncio.Task] = None
+
+  @classmethod
+  def from_env(cls, on_idle: Optional[Callable[[str], Awaitable[None]]] = None) -> "ChunkCoalescer":
+    """Coalescer configured from the environment; pass-through unless A2A_STREAM_HOT_PATH is on."""
+    if not hot_path_enabled():
+      return cls(max_bytes=0, on_idle=on_idle)
+    return cls(
+      max_bytes=int(os.getenv("A2A_STREAM_COALESCE_BYTES", "256")),
+      max_delay=float(os.getenv("A2A_STREAM_COALESCE_MS", "50")) / 1000,
+      on_idle=on_idle,
+    )
+
+  def __bool__(self) -> bool:
+    return bool(self._parts)
+
+  def add(self, text: str) -> Optional[str]:
+    if self.max_bytes <= 0 and not self._parts:
+      return text
+    if not self._parts:
+      self._started = time.monotonic()
+    self._parts.append(text)
+    self._size += len(text)
+    # While an idle flush is being sent, chunks wait for the next one so they cannot overtake it
+    if self._idle_flush is None and (
+      self._size >= self.max_bytes or time.monotonic() - self._started >= self.max_delay
+    ):
+      return self.flush()
+    if self.on_idle is not None and self._timer is None:
+      self._timer = asyncio.get_running_loop().call_later(
+        max(0.0, self._started + self.max_delay - time.monotonic()), self._on_timer
+      )
+    return None
+
+  def flush(self) -> Optional[str]:
+    self._cancel_timer()
+    if not self._parts:
+      return None
+    text = "".join(self._parts)
+    self._parts.clear()
+    self._size = 0
+    return text
+
+  async def drain(self) -> Optional[str]:
+    """Wait for the idle flushes in progress, then flush what is left."""
+    while self._idle_flush is not None:
+      await asyncio.shield(self._idle_flush)
+    return self.flush()
+
+  def close(self) -> None:
+    """Drop the idle timer; the buffered text stays available to ``flush``."""
+    self._cancel_timer()
+
+  def _cancel_timer(self) -> None:
+    if self._timer is not None:
+      self._timer.cancel()
+      self._timer = None
+
+  def _on_timer(self) -> None:
+    self._timer = None
+    self._idle_flush = asyncio.ensure_future(self._send_idle(self._idle_flush))
+
+  async def _send_idle(self, previous: Optional[asyncio.Task]) -> None:
+    """Send the buffered text to ``on_idle``, after the idle flush before it."""
+    try:
+      if previous is not None:
+        await previous
+      text = self.flush()
+      if text:
+        await self.on_idle(text)
+    finally:
+      if self._idle_flush is asyncio.current_task():
+        self._idle_flush = None
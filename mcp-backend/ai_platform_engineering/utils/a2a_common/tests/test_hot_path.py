@@ -0,0 +1,183 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for the streaming hot-path helpers."""
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from a2a.types import (
+    Artifact,
+    JSONRPCError,
+    JSONRPCErrorResponse,
+    Part,
+    SendStreamingMessageResponse,
+    SendStreamingMessageSuccessResponse,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from a2a.utils import new_agent_text_message
+
+from ai_platform_engineering.utils.a2a_common.hot_path import (
+    ChunkCoalescer,
+    SampledLogger,
+    event_text,
+    stream_event,
+)
+
+
+def artifact_event(*texts):
+    return TaskArtifactUpdateEvent(
+        task_id="t",
+        context_id="c",
+        artifact=Artifact(artifact_id="a", parts=[Part(root=TextPart(text=text)) for text in texts]),
+    )
+
+
+def test_stream_event_returns_result_without_copying():
+    event = artifact_event("hello")
+    response = SendStreamingMessageResponse(root=SendStreamingMessageSuccessResponse(id="1", result=event))
+    assert stream_event(response) is event
+
+
+def test_stream_event_ignores_error_responses():
+    response = SendStreamingMessageResponse(root=JSONRPCErrorResponse(id="1", error=JSONRPCError(code=-32000, message="boom")))
+    assert stream_event(response) is None
+
+
+def test_event_text_reads_artifact_and_status_parts():
+    assert event_text(artifact_event("a", "b")) == "ab"
+    status = TaskStatusUpdateEvent(
+        task_id="t",
+        context_id="c",
+        final=False,
+        status=TaskStatus(state=TaskState.working, message=new_agent_text_message("working", "c", "t")),
+    )
+    assert event_text(status) == "working"
+    status.status.message = None
+    assert event_text(status) == ""
+
+
+def test_coalescer_pass_through():
+    coalescer = ChunkCoalescer(max_bytes=0)
+    assert coalescer.add("a") == "a"
+    assert not coalescer
+    assert coalescer.flush() is None
+
+
+def test_coalescer_flushes_on_bytes():
+    coalescer = ChunkCoalescer(max_bytes=8, max_delay=60)
+    assert coalescer.add("abcd") is None
+    assert coalescer
+    assert coalescer.add("efgh") == "abcdefgh"
+    assert not coalescer
+
+
+def test_coalescer_flushes_on_time():
+    coalescer = ChunkCoalescer(max_bytes=1024, max_delay=0.01)
+    assert coalescer.add("a") is None
+    time.sleep(0.02)
+    assert coalescer.add("b") == "ab"
+
+
+def test_coalescer_explicit_flush():
+    coalescer = ChunkCoalescer(max_bytes=1024, max_delay=60)
+    coalescer.add("a")
+    coalescer.add("b")
+    assert coalescer.flush() == "ab"
+    assert coalescer.flush() is None
+
+
+@pytest.mark.asyncio
+async def test_coalescer_flushes_when_idle():
+    sent = []
+
+    async def on_idle(text):
+        sent.append(text)
+
+    coalescer = ChunkCoalescer(max_bytes=1024, max_delay=0.01, on_idle=on_idle)
+    assert coalescer.add("a") is None
+    assert coalescer.add("b") is None
+    await asyncio.sleep(0.05)
+    assert sent == ["ab"]
+    assert not coalescer
+    assert await coalescer.drain() is None
+
+
+@pytest.mark.asyncio
+async def test_coalescer_drain_keeps_order_with_idle_flush():
+    sent = []
+    sending = asyncio.Event()
+
+    async def on_idle(text):
+        sending.set()
+        await asyncio.sleep(0.02)
+        sent.append(text)
+
+    coalescer = ChunkCoalescer(max_bytes=4, max_delay=0.01, on_idle=on_idle)
+    coalescer.add("a")
+    await sending.wait()
+    # Chunks arriving while the idle flush is sent wait behind it, even past the byte budget
+    assert coalescer.add("bcdef") is None
+    ready = await coalescer.drain()
+    if ready:
+        sent.append(ready)
+    assert sent == ["a", "bcdef"]
+
+
+@pytest.mark.asyncio
+async def test_coalescer_close_cancels_idle_flush():
+    sent = []
+
+    async def on_idle(text):
+        sent.append(text)
+
+    coalescer = ChunkCoalescer(max_bytes=1024, max_delay=0.01, on_idle=on_idle)
+    coalescer.add("a")
+    coalescer.close()
+    await asyncio.sleep(0.03)
+    assert sent == []
+    assert coalescer.flush() == "a"
+
+
+def test_coalescer_from_env(monkeypatch):
+    monkeypatch.delenv("A2A_STREAM_HOT_PATH", raising=False)
+    assert ChunkCoalescer.from_env().max_bytes == 0
+
+    monkeypatch.setenv("A2A_STREAM_HOT_PATH", "true")
+    monkeypatch.setenv("A2A_STREAM_COALESCE_BYTES", "64")
+    monkeypatch.setenv("A2A_STREAM_COALESCE_MS", "20")
+    coalescer = ChunkCoalescer.from_env()
+    assert coalescer.max_bytes == 64
+    assert coalescer.max_delay == 0.02
+
+
+def test_sampled_logger_logs_first_and_every_nth(caplog):
+    sampled = SampledLogger(logging.getLogger("hot_path_test"), every=10)
+    with caplog.at_level(logging.DEBUG, logger="hot_path_test"):
+        for i in range(25):
+            sampled.debug("chunk", size=i)
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "chunk size=0 n=1",
+        "chunk size=9 n=10",
+        "chunk size=19 n=20",
+    ]
+    assert sampled.count("chunk") == 25
+
+
+def test_sampled_logger_skips_formatting_when_disabled(caplog):
+    class Exploding:
+        def __str__(self):
+            raise AssertionError("formatted a record that was never emitted")
+
+    sampled = SampledLogger(logging.getLogger("hot_path_test"), every=1)
+    with caplog.at_level(logging.INFO, logger="hot_path_test"):
+        sampled.debug("chunk", payload=Exploding())
+    assert not caplog.records
@@ -0,0 +1,136 @@
+# Copyright 2025 CNOE
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for the pooled A2A transport and agent card cache."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from ai_platform_engineering.utils.a2a_common.transport import AgentCardCache, A2ATransportPool
+
+
+AGENT_URL = "http://github-agent:8000"
+
+AGENT_CARD = {
+    "name": "github",
+    "description": "GitHub agent",
+    "url": "http://0.0.0.0:8000/",
+    "version": "0.1.0",
+    "capabilities": {"streaming": True},
+    "defaultInputModes": ["text"],
+    "defaultOutputModes": ["text"],
+    "skills": [{"id": "github", "name": "github", "description": "GitHub operations", "tags": ["github"]}],
+}
+
+
+class CardServer:
+    """httpx MockTransport handler serving an agent card with an ETag."""
+
+    def __init__(self, etag='"v1"'):
+        self.etag = etag
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304, headers={"etag": self.etag})
+        return httpx.Response(200, json=AGENT_CARD, headers={"etag": self.etag})
+
+
+class TestAgentCardCache:
+    """Agent card caching and revalidation."""
+
+    def test_fresh_card_served_from_memory(self):
+        server = CardServer()
+        cache = AgentCardCache(ttl=60)
+        with httpx.Client(transport=httpx.MockTransport(server)) as client:
+            first = cache.get(AGENT_URL, client)
+            second = cache.get(AGENT_URL + "/", client)
+
+        assert first == second == AGENT_CARD
+        assert len(server.requests) == 1
+        assert str(server.requests[0].url) == "http://github-agent:8000/.well-known/agent.json"
+        assert cache.stats == {"hits": 1, "revalidated": 0, "fetched": 1}
+
+    def test_stale_card_revalidated_with_etag(self):
+        server = CardServer()
+        cache = AgentCardCache(ttl=0)
+        with httpx.Client(transport=httpx.MockTransport(server)) as client:
+            cache.get(AGENT_URL, client)
+            card = cache.get(AGENT_URL, client)
+
+        assert card == AGENT_CARD
+        assert server.requests[1].headers["if-none-match"] == '"v1"'
+        assert cache.stats["revalidated"] == 1
+
+    def test_changed_card_replaces_entry(self):
+        server = CardServer()
+        cache = AgentCardCache(ttl=60)
+        with httpx.Client(transport=httpx.MockTransport(server)) as client:
+            cache.get(AGENT_URL, client)
+            server.etag = '"v2"'
+            cache.get(AGENT_URL, client, revalidate=True)
+
+        assert cache.peek(AGENT_URL).etag == '"v2"'
+        assert cache.stats["fetched"] == 2
+
+    def test_http_error_is_not_cached(self):
+        cache = AgentCardCache(ttl=60)
+        transport = httpx.MockTransport(lambda request: httpx.Response(503))
+        with httpx.Client(transport=transport) as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                cache.get(AGENT_URL, client)
+        assert cache.peek(AGENT_URL) is None
+
+
+class TestA2ATransportPool:
+    """Pooled clients and per-agent concurrency limits."""
+
+    async def test_session_reuses_client_and_cached_card(self):
+        server = CardServer()
+        pool = A2ATransportPool(card_cache=AgentCardCache(ttl=60), transport=httpx.MockTransport(server))
+
+        async with pool.session(AGENT_URL) as first:
+            pass
+        async with pool.session(AGENT_URL) as second:
+            pass
+
+        assert first.httpx_client is second.httpx_client
+        assert first.url == AGENT_URL
+        assert len(server.requests) == 1
+        await pool.aclose()
+        assert first.httpx_client.is_closed
+
+    async def test_concurrency_limited_per_agent(self):
+        pool = A2ATransportPool(
+            card_cache=AgentCardCache(ttl=60),
+            transport=httpx.MockTransport(CardServer()),
+            max_concurrency_per_agent=2,
+        )
+        in_flight = 0
+        peak = 0
+
+        async def call():
+            nonlocal in_flight, peak
+            async with pool.session(AGENT_URL):
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+
+        await asyncio.gather(*(call() for _ in range(8)))
+        assert peak == 2
+        await pool.aclose()
+
+    async def test_http_error_invalidates_card(self):
+        cache = AgentCardCache(ttl=60)
+        pool = A2ATransportPool(card_cache=cache, transport=httpx.MockTransport(CardServer()))
+
+        with pytest.raises(httpx.ConnectError):
+            async with pool.session(AGENT_URL):
+                raise httpx.ConnectError("connection refused")
+
+        assert cache.peek(AGENT_URL) is None
+        await pool.aclose()
@@ -0,0 +1,245 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Pooled A2A transport for supervisor -> sub-agent calls.
+
+Opening a fresh httpx.AsyncClient, resolving the agent card and building an
+A2AClient for every request costs a TCP/TLS handshake plus an extra card
+round-trip per agent. This module keeps, process-wide:
+
+- one keep-alive connection pool per sub-agent (per event loop),
+- an agent card cache with a TTL, revalidated with ETag/Last-Modified
+  (shared with AgentRegistry so connectivity checks warm it),
+- a bounded number of in-flight requests per sub-agent.
+
+Configuration (environment variables):
+  A2A_AGENT_CARD_TTL              seconds a cached card is served without revalidation (default 300)
+  A2A_POOL_MAX_CONNECTIONS        max connections per sub-agent pool (default 100)
+  A2A_POOL_MAX_KEEPALIVE          max idle keep-alive connections per sub-agent (default 20)
+  A2A_POOL_KEEPALIVE_EXPIRY       seconds an idle connection is kept (default 60)
+  A2A_MAX_CONCURRENCY_PER_AGENT   max concurrent requests per sub-agent (default 16)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+from a2a.client import A2AClient, A2AClientHTTPError
+from a2a.types import AgentCard
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAgentCard:
+  """Agent card JSON plus the validators needed for a conditional GET."""
+  card: Dict[str, Any]
+  etag: Optional[str] = None
+  last_modified: Optional[str] = None
+  fetched_at: float = field(default_factory=time.monotonic)
+
+  def is_fresh(self, ttl: float) -> bool:
+    return time.monotonic() - self.fetched_at < ttl
+
+
+class AgentCardCache:
+  """
+  Thread-safe agent card cache keyed by agent base URL.
+
+  Fresh entries are served from memory. Stale entries are revalidated with
+  If-None-Match / If-Modified-Since, so an unchanged card costs a 304 with no
+  body. Both sync (AgentRegistry) and async (executor) callers share entries.
+  """
+
+  def __init__(self, ttl: float = 300.0):
+    self.ttl = ttl
+    self._entries: Dict[str, CachedAgentCard] = {}
+    self._lock = threading.Lock()
+    self.stats = {"hits": 0, "revalidated": 0, "fetched": 0}
+
+  @staticmethod
+  def _key(agent_url: str) -> str:
+    return agent_url.rstrip('/')
+
+  @classmethod
+  def card_url(cls, agent_url: str) -> str:
+    return f"{cls._key(agent_url)}{AGENT_CARD_WELL_KNOWN_PATH}"
+
+  def peek(self, agent_url: str) -> Optional[CachedAgentCard]:
+    with self._lock:
+      return self._entries.get(self._key(agent_url))
+
+  def invalidate(self, agent_url: Optional[str] = None) -> None:
+    """Drop one agent's card, or every card when no URL is given."""
+    with self._lock:
+      if agent_url is None:
+        self._entries.clear()
+      else:
+        self._entries.pop(self._key(agent_url), None)
+
+  def _lookup(self, agent_url: str, revalidate: bool) -> Tuple[Optional[CachedAgentCard], Dict[str, str]]:
+    """Return (entry, {}) on a fresh hit, else (None, conditional headers for any stale entry)."""
+    entry = self.peek(agent_url)
+    if entry is not None and not revalidate and entry.is_fresh(self.ttl):
+      self.stats["hits"] += 1
+      return entry, {}
+
+    headers = {}
+    if entry is not None:
+      if entry.etag:
+        headers["If-None-Match"] = entry.etag
+      if entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    return None, headers
+
+  def _store(self, agent_url: str, response: httpx.Response) -> Dict[str, Any]:
+    entry = self.peek(agent_url)
+    if response.status_code == 304 and entry is not None:
+      entry.fetched_at = time.monotonic()
+      self.stats["revalidated"] += 1
+      return entry.card
+
+    response.raise_for_status()
+    card = response.json()
+    with self._lock:
+      self._entries[self._key(agent_url)] = CachedAgentCard(
+        card=card,
+        etag=response.headers.get("etag"),
+        last_modified=response.headers.get("last-modified"),
+      )
+    self.stats["fetched"] += 1
+    return card
+
+  def get(self, agent_url: str, client: httpx.Client, revalidate: bool = False) -> Dict[str, Any]:
+    """Fetch an agent card with a synchronous client, using the cache."""
+    hit, headers = self._lookup(agent_url, revalidate)
+    if hit is not None:
+      return hit.card
+    return self._store(agent_url, client.get(self.card_url(agent_url), headers=headers))
+
+  async def aget(self, agent_url: str, client: httpx.AsyncClient, revalidate: bool = False) -> Dict[str, Any]:
+    """Fetch an agent card with an async client, using the cache."""
+    hit, headers = self._lookup(agent_url, revalidate)
+    if hit is not None:
+      return hit.card
+    return self._store(agent_url, await client.get(self.card_url(agent_url), headers=headers))
+
+
+class A2ATransportPool:
+  """
+  Process-wide keep-alive pools and concurrency limits for A2A sub-agents.
+
+  httpx.AsyncClient and asyncio.Semaphore are bound to the event loop that
+  first uses them, so pools are kept per (event loop, agent URL). Pools of
+  closed loops are discarded lazily.
+  """
+
+  def __init__(
+      self,
+      card_cache: Optional[AgentCardCache] = None,
+      max_connections: Optional[int] = None,
+      max_keepalive_connections: Optional[int] = None,
+      keepalive_expiry: Optional[float] = None,
+      max_concurrency_per_agent: Optional[int] = None,
+      timeout: float = 300.0,
+      transport: Optional[httpx.AsyncBaseTransport] = None,
+  ):
+    self.card_cache = card_cache or get_agent_card_cache()
+    self.limits = httpx.Limits(
+      max_connections=max_connections or int(os.getenv("A2A_POOL_MAX_CONNECTIONS", "100")),
+      max_keepalive_connections=max_keepalive_connections or int(os.getenv("A2A_POOL_MAX_KEEPALIVE", "20")),
+      keepalive_expiry=keepalive_expiry or float(os.getenv("A2A_POOL_KEEPALIVE_EXPIRY", "60")),
+    )
+    self.max_concurrency_per_agent = max_concurrency_per_agent or int(os.getenv("A2A_MAX_CONCURRENCY_PER_AGENT", "16"))
+    self.timeout = httpx.Timeout(timeout)
+    self.transport = transport
+    self._clients: Dict[Tuple[asyncio.AbstractEventLoop, str], httpx.AsyncClient] = {}
+    self._semaphores: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Semaphore] = {}
+
+  def _key(self, agent_url: str) -> Tuple[asyncio.AbstractEventLoop, str]:
+    return asyncio.get_running_loop(), agent_url.rstrip('/')
+
+  def _prune_closed_loops(self) -> None:
+    for key in [k for k in self._clients if k[0].is_closed()]:
+      self._clients.pop(key, None)
+      self._semaphores.pop(key, None)
+
+  def http_client(self, agent_url: str) -> httpx.AsyncClient:
+    """Keep-alive client for one sub-agent on the running event loop."""
+    key = self._key(agent_url)
+    client = self._clients.get(key)
+    if client is None or client.is_closed:
+      self._prune_closed_loops()
+      client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, transport=self.transport)
+      self._clients[key] = client
+      logger.debug("Opened A2A connection pool for %s", key[1])
+    return client
+
+  def _semaphore(self, agent_url: str) -> asyncio.Semaphore:
+    key = self._key(agent_url)
+    semaphore = self._semaphores.get(key)
+    if semaphore is None:
+      semaphore = asyncio.Semaphore(self.max_concurrency_per_agent)
+      self._semaphores[key] = semaphore
+    return semaphore
+
+  async def get_agent_card(self, agent_url: str) -> AgentCard:
+    """Cached agent card with its URL pointed at ``agent_url``."""
+    card = AgentCard.model_validate(await self.card_cache.aget(agent_url, self.http_client(agent_url)))
+    # Agent cards often advertise internal URLs like http://0.0.0.0:8000
+    card.url = agent_url
+    return card
+
+  @asynccontextmanager
+  async def session(self, agent_url: str) -> AsyncIterator[A2AClient]:
+    """
+    Yield an A2AClient on the agent's pooled connection while holding one of
+    its concurrency slots. HTTP failures drop the cached card so the next
+    request re-resolves it.
+    """
+    async with self._semaphore(agent_url):
+      try:
+        card = await self.get_agent_card(agent_url)
+        yield A2AClient(httpx_client=self.http_client(agent_url), agent_card=card)
+      except (httpx.HTTPError, A2AClientHTTPError):
+        self.card_cache.invalidate(agent_url)
+        raise
+
+  async def aclose(self) -> None:
+    """Close the pools that belong to the running event loop."""
+    loop = asyncio.get_running_loop()
+    for key in [k for k in self._clients if k[0] is loop]:
+      await self._clients.pop(key).aclose()
+      self._semaphores.pop(key, None)
+
+
+_card_cache: Optional[AgentCardCache] = None
+_transport_pool: Optional[A2ATransportPool] = None
+_singleton_lock = threading.Lock()
+
+
+def get_agent_card_cache() -> AgentCardCache:
+  """Process-wide agent card cache shared by AgentRegistry and the transport pool."""
+  global _card_cache
+  with _singleton_lock:
+    if _card_cache is None:
+      _card_cache = AgentCardCache(ttl=float(os.getenv("A2A_AGENT_CARD_TTL", "300")))
+    return _card_cache
+
+
+def get_transport_pool() -> A2ATransportPool:
+  """Process-wide A2A transport pool."""
+  global _transport_pool
+  card_cache = get_agent_card_cache()
+  with _singleton_lock:
+    if _transport_pool is None:
+      _transport_pool = A2ATransportPool(card_cache=card_cache)
+    return _transport_pool
@@ -1,26 +1,54 @@
+import json
 import requests
 import logging
-from typing import Dict, Optional
+import threading
+from typing import Any, Dict, Optional, Tuple
 import time
+
+import jwt
+
 DEFAULT_JWKS_TTL = 3600                   # Fallback TTL (seconds) if JWKS lacks cache headers
 HTTP_TIMEOUT = 3                         # Seconds for JWKS HTTP calls
+MIN_REFRESH_INTERVAL = 30                # Seconds between refreshes forced by an unknown kid
+FAILED_REFRESH_BACKOFF = 30              # Seconds to serve the stale key set after a failed refresh
 
 logger = logging.getLogger(__name__)
 
 
+def public_key_from_jwk(jwk: dict):
+    """
+    Build a public key object from a JWK. Supports RSA and EC.
+    """
+    kty = jwk.get("kty")
+    if kty == "RSA":
+        return jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(jwk))
+
+    if kty == "EC":
+        return jwt.algorithms.ECAlgorithm.from_jwk(json.dumps(jwk))
+    raise ValueError(f"Unsupported key type: {kty}")
+
+
 class JwksCache:
     """
     Caches JWKS (public signing keys) to avoid a network call per request.
     - Respects Cache-Control: max-age when present.
     - Falls back to DEFAULT_JWKS_TTL otherwise.
-    - Refreshes on demand if 'kid' not found (key rotation).
+    - Refreshes on demand if 'kid' not found (key rotation), at most once per MIN_REFRESH_INTERVAL.
+    - Refreshes are single-flight: concurrent callers wait for one fetch instead of each making one.
+    - Parsed public keys are cached per kid.
+    - `version` changes whenever a refresh returns a different key set.
     """
 
     def __init__(self, jwks_uri: str, ttl_seconds: int = DEFAULT_JWKS_TTL):
         self.jwks_uri = jwks_uri
         self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.fetches = 0
         self._keys_by_kid: Dict[str, dict] = {}
+        self._public_keys: Dict[str, Tuple[dict, Any]] = {}  # kid -> (jwk, parsed key)
         self._expires_at = 0.0
+        self._last_refresh = 0.0
+        self._refresh_lock = threading.Lock()
         self._session = requests.Session()
 
     def _parse_ttl_from_headers(self, resp: requests.Response) -> int:
@@ -38,36 +66,71 @@ class JwksCache:
 
     def refresh(self) -> None:
         # Fetch and cache JWKS. If network fails, propagate to caller.
+        self.fetches += 1
         r = self._session.get(self.jwks_uri, timeout=HTTP_TIMEOUT)
         r.raise_for_status()
         body = r.json()
         keys = body.get("keys", [])
-        self._keys_by_kid = {k.get("kid"): k for k in keys if "kid" in k}
+        keys_by_kid = {k.get("kid"): k for k in keys if "kid" in k}
         ttl = self._parse_ttl_from_headers(r)
-        self._expires_at = time.time() + ttl
+
+        if keys_by_kid != self._keys_by_kid:
+            # Rotation: drop parsed keys for kids that were removed.
+            self._public_keys = {kid: entry for kid, entry in self._public_keys.items() if kid in keys_by_kid}
+            self._keys_by_kid = keys_by_kid
+            self.version += 1
+        now = time.time()
+        self._last_refresh = now
+        self._expires_at = now + ttl
         logger.debug("JWKS refreshed; %d keys; TTL=%ds", len(self._keys_by_kid), ttl)
 
+    def _refresh_once(self, needed, reason: str) -> None:
+        """Refresh unless another caller already did while we waited for the lock."""
+        with self._refresh_lock:
+            if not needed():
+                return
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("JWKS refresh failed (%s); using stale cache if available: %s", reason, e)
+                # Back off so a failing IdP is not hit by every request.
+                self._expires_at = time.time() + min(self.ttl_seconds, FAILED_REFRESH_BACKOFF)
+
+    def _expired(self) -> bool:
+        return time.time() >= self._expires_at
+
+    def ensure_fresh(self) -> None:
+        """Refresh the key set if its TTL has passed."""
+        if self._expired():
+            self._refresh_once(self._expired, "expired")
+
     def get_jwk(self, kid: str) -> Optional[dict]:
         """
         Returns the JWK for the given kid, refreshing if:
         - Cache expired, or
         - kid is missing (possible key rotation).
         """
-        now = time.time()
-        # Refresh if cache empty or expired.
-        if now >= self._expires_at or not self._keys_by_kid:
-            try:
-                self.refresh()
-            except Exception as e:
-                logger.warning("JWKS refresh failed; using stale cache if available: %s", e)
+        self.ensure_fresh()
 
         jwk = self._keys_by_kid.get(kid)
         if jwk is None:
             # Unknown kid — try one forced refresh (key rotation scenario).
             logger.info("Unknown kid '%s'; attempting JWKS refresh.", kid)
-            try:
-                self.refresh()
-                jwk = self._keys_by_kid.get(kid)
-            except Exception as e:
-                logger.warning("JWKS refresh failed on unknown kid: %s", e)
-        return jwk
\ No newline at end of file
+            self._refresh_once(
+                lambda: kid not in self._keys_by_kid and time.time() - self._last_refresh >= MIN_REFRESH_INTERVAL,
+                "unknown kid",
+            )
+            jwk = self._keys_by_kid.get(kid)
+        return jwk
+
+    def get_public_key(self, kid: str):
+        """Returns the parsed public key for kid, or None if the kid is unknown."""
+        jwk = self.get_jwk(kid)
+        if jwk is None:
+            return None
+        cached = self._public_keys.get(kid)
+        if cached is not None and cached[0] == jwk:
+            return cached[1]
+        key = public_key_from_jwk(jwk)
+        self._public_keys[kid] = (jwk, key)
+        return key
@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 import jwt
@@ -12,9 +11,11 @@ from starlette.responses import JSONResponse, PlainTextResponse
 try:
     # Try absolute import (when run directly)
     from ai_platform_engineering.utils.auth.jwks_cache import JwksCache
+    from ai_platform_engineering.utils.auth.token_cache import DEFAULT_TOKEN_CACHE_SIZE, VerifiedTokenCache
 except ImportError:
     # Fall back to relative import (when run as module)
     from .jwks_cache import JwksCache
+    from .token_cache import DEFAULT_TOKEN_CACHE_SIZE, VerifiedTokenCache
 
 # Load environment variables from .env file
 load_dotenv()
@@ -32,6 +33,8 @@ if A2A_AUTH_OAUTH2:
   OAUTH2_CLIENT_ID = os.environ["OAUTH2_CLIENT_ID"]  # your client ID for audience validation
   DEBUG_UNMASK_AUTH_HEADER = os.environ.get("DEBUG_UNMASK_AUTH_HEADER", "false").lower() == "true"
   _jwks_cache = JwksCache(JWKS_URI)
+  # Tokens that already passed verification; skips the signature check on reconnects
+  _verified_tokens = VerifiedTokenCache(int(os.environ.get("OAUTH2_TOKEN_CACHE_SIZE", DEFAULT_TOKEN_CACHE_SIZE)))
 
   print("\n" + "="*40)
   print(f"JWKS_URI: {JWKS_URI}")
@@ -39,22 +42,6 @@ if A2A_AUTH_OAUTH2:
 
 
 
-# ------------------------------------------------------------------------------
-# Public key builder from JWK (supports RSA and EC)
-# ------------------------------------------------------------------------------
-def _public_key_from_jwk(jwk: dict):
-    """
-    Build a public key object from a JWK. Supports RSA and EC.
-    """
-    kty = jwk.get("kty")
-    if kty == "RSA":
-        return jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(jwk))
-
-    if kty == "EC":
-        return jwt.algorithms.ECAlgorithm.from_jwk(json.dumps(jwk))
-    raise ValueError(f"Unsupported key type: {kty}")
-
-
 # ------------------------------------------------------------------------------
 # Token verification
 # ------------------------------------------------------------------------------
@@ -63,7 +50,15 @@ def verify_token(token: str) -> bool:
     Local JWT validation with JWKS. Returns True if token is valid and intended for this agent.
     - Verifies signature.
     - Checks iss, aud, exp, nbf.
+    - Remembers valid tokens until exp or a JWKS rotation, so repeat requests skip the checks above.
     """
+    digest = _verified_tokens.digest(token)
+    # Keep the key set fresh even when every request is a cache hit, so rotation is noticed
+    _jwks_cache.ensure_fresh()
+    jwks_version = _jwks_cache.version
+    if _verified_tokens.get(digest, jwks_version, CLOCK_SKEW_LEEWAY):
+        return True
+
     try:
         header = jwt.get_unverified_header(token)
     except InvalidTokenError:
@@ -75,13 +70,12 @@ def verify_token(token: str) -> bool:
         logger.warning("Missing kid in token header")
         return False
 
-    jwk = _jwks_cache.get_jwk(kid)
-    if not jwk:
-        logger.warning("Unknown signing key (kid=%s)", kid)
-        return False
-
     try:
-        public_key = _public_key_from_jwk(jwk)
+        public_key = _jwks_cache.get_public_key(kid)
+        if public_key is None:
+            logger.warning("Unknown signing key (kid=%s)", kid)
+            return False
+
         # aud and exp validation happen inside jwt.decode:
         # - audience=AUDIENCE sets expected aud (aud claim must match).
         # - options.verify_exp=True enforces exp claim (not expired).
@@ -107,20 +101,18 @@ def verify_token(token: str) -> bool:
             token_cid = payload["cid"]
             if token_cid == OAUTH2_CLIENT_ID:
                 logger.debug(f"Token CID matches expected client ID: {token_cid}")
-                return True
             else:
                 logger.warning(f"Token CID '{token_cid}' does not match expected client ID '{OAUTH2_CLIENT_ID}'")
                 return False
         else:
-            print("\n" + "="*40)
-            print("Token missing 'cid' claim. Moving on and return True")
-            print("="*40 + "\n")
+            logger.debug("Token missing 'cid' claim. Moving on and return True")
     except InvalidTokenError as e:
         logger.warning("Token validation failed: %s", e)
         return False
     except Exception as e:
         logger.warning("Token verification error: %s", e)
         return False
+    _verified_tokens.put(digest, payload, jwks_version)
     return True
 
 class OAuth2Middleware(BaseHTTPMiddleware):
@@ -144,17 +136,18 @@ class OAuth2Middleware(BaseHTTPMiddleware):
         :return:
         """
         path = request.url.path
-        for header_name, header_value in request.headers.items():
-            if header_name.lower() == 'authorization' and not DEBUG_UNMASK_AUTH_HEADER:
-                # Mask the Authorization header for security
-                if header_value.startswith('Bearer '):
-                    token = header_value[7:]  # Remove 'Bearer ' prefix
-                    masked_token = f"{token[:3]}***{token[-3:]}" if len(token) > 20 else "***"
-                    print(f"{header_name}: Bearer {masked_token}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for header_name, header_value in request.headers.items():
+                if header_name.lower() == 'authorization' and not DEBUG_UNMASK_AUTH_HEADER:
+                    # Mask the Authorization header for security
+                    if header_value.startswith('Bearer '):
+                        token = header_value[7:]  # Remove 'Bearer ' prefix
+                        masked_token = f"{token[:3]}***{token[-3:]}" if len(token) > 20 else "***"
+                        logger.debug(f"{header_name}: Bearer {masked_token}")
+                    else:
+                        logger.debug(f"{header_name}: ***MASKED***")
                 else:
-                    print(f"{header_name}: ***MASKED***")
-            else:
-                print(f"{header_name}: {header_value}")
+                    logger.debug(f"{header_name}: {header_value}")
 
 
         # Allow public paths and anonymous access
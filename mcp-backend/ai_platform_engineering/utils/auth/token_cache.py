@@ -0,0 +1,80 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+DEFAULT_TOKEN_CACHE_SIZE = 1024          # Verified tokens remembered (0 disables the cache)
+
+
+@dataclass(frozen=True)
+class VerifiedToken:
+    """Validity window of a token whose signature and claims already passed verification."""
+    expires_at: float
+    not_before: Optional[float]
+    jwks_version: int
+
+    def is_valid(self, now: float, leeway: float, jwks_version: int) -> bool:
+        if jwks_version != self.jwks_version:
+            return False
+        if now > self.expires_at + leeway:
+            return False
+        return self.not_before is None or now >= self.not_before - leeway
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified bearer tokens, keyed by SHA-256 digest so raw
+    tokens are never kept in memory.
+
+    An entry is only trusted while the token's exp/nbf window holds and the
+    JWKS has not rotated since it was verified.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, VerifiedToken]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, digest: bytes, jwks_version: int, leeway: float = 0) -> bool:
+        """True if the token with this digest was verified and is still valid."""
+        if self.maxsize <= 0:
+            return False
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if entry.is_valid(time.time(), leeway, jwks_version):
+                    self._entries.move_to_end(digest)
+                    self.stats["hits"] += 1
+                    return True
+                del self._entries[digest]
+            self.stats["misses"] += 1
+            return False
+
+    def put(self, digest: bytes, payload: dict, jwks_version: int) -> None:
+        """Remember a token after a successful verification of its decoded payload."""
+        if self.maxsize <= 0 or "exp" not in payload:
+            return
+        entry = VerifiedToken(
+            expires_at=float(payload["exp"]),
+            not_before=float(payload["nbf"]) if "nbf" in payload else None,
+            jwks_version=jwks_version,
+        )
+        with self._lock:
+            self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,214 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Tests for the OAuth2 middleware's JWKS and verified-token caches.
+
+A local HTTP server stands in for the identity provider's JWKS endpoint, so
+the tests can count fetches, rotate keys and slow the endpoint down.
+"""
+
+import importlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from ai_platform_engineering.utils.auth import jwks_cache
+from ai_platform_engineering.utils.auth.token_cache import VerifiedToken, VerifiedTokenCache
+
+ISSUER = "https://idp.example.com"
+AUDIENCE = "agents"
+CLIENT_ID = "supervisor"
+
+
+class SigningKey:
+    def __init__(self, kid):
+        self.kid = kid
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.jwk = {**jwt.algorithms.RSAAlgorithm.to_jwk(self.private_key.public_key(), as_dict=True), "kid": kid}
+
+    def token(self, **claims):
+        now = int(time.time())
+        payload = {"iss": ISSUER, "aud": AUDIENCE, "cid": CLIENT_ID, "iat": now, "exp": now + 300, **claims}
+        return jwt.encode(payload, self.private_key, algorithm="RS256", headers={"kid": self.kid})
+
+
+class JwksServer:
+    """Serves {"keys": [...]} and counts requests."""
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.delay = 0.0
+        self.fetches = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.fetches += 1
+                time.sleep(server.delay)
+                body = json.dumps({"keys": [k.jwk for k in server.keys]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", "max-age=300")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/jwks"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+@pytest.fixture(scope="module")
+def key():
+    return SigningKey("key-1")
+
+
+@pytest.fixture
+def jwks_server(key):
+    server = JwksServer([key])
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def middleware(jwks_server, monkeypatch):
+    monkeypatch.setenv("A2A_AUTH_OAUTH2", "true")
+    monkeypatch.setenv("JWKS_URI", jwks_server.url)
+    monkeypatch.setenv("AUDIENCE", AUDIENCE)
+    monkeypatch.setenv("ISSUER", ISSUER)
+    monkeypatch.setenv("OAUTH2_CLIENT_ID", CLIENT_ID)
+    from ai_platform_engineering.utils.auth import oauth2_middleware
+    return importlib.reload(oauth2_middleware)
+
+
+def expire_jwks(middleware):
+    middleware._jwks_cache._expires_at = 0
+
+
+def test_repeat_token_skips_signature_check(middleware, key):
+    token = key.token()
+    with patch.object(middleware.jwt, "decode", wraps=jwt.decode) as decode:
+        assert all(middleware.verify_token(token) for _ in range(5))
+    assert decode.call_count == 1
+    assert middleware._verified_tokens.stats["hits"] == 4
+
+
+def test_invalid_tokens_are_not_cached(middleware, key):
+    token = key.token(cid="someone-else")
+    assert not middleware.verify_token(token)
+    assert not middleware.verify_token(token)
+    assert len(middleware._verified_tokens) == 0
+
+
+def test_cached_token_expires_with_exp(middleware, key):
+    middleware.CLOCK_SKEW_LEEWAY = 0
+    token = key.token(exp=int(time.time()) + 1)
+    assert middleware.verify_token(token)
+    time.sleep(1.1)
+    assert not middleware.verify_token(token)
+
+
+def test_parsed_key_is_reused(middleware, key):
+    with patch.object(jwks_cache, "public_key_from_jwk", wraps=jwks_cache.public_key_from_jwk) as parse:
+        for i in range(5):
+            assert middleware.verify_token(key.token(sub=f"user-{i}"))
+    assert parse.call_count == 1
+
+
+def test_rotation_invalidates_cached_tokens(middleware, key, jwks_server):
+    token = key.token()
+    assert middleware.verify_token(token)
+
+    new_key = SigningKey("key-2")
+    jwks_server.keys = [new_key]
+    expire_jwks(middleware)
+
+    assert not middleware.verify_token(token)
+    assert middleware.verify_token(new_key.token())
+    assert jwks_server.fetches == 2
+
+
+def test_refresh_is_single_flight(middleware, key, jwks_server):
+    token = key.token()
+    assert middleware.verify_token(token)
+    jwks_server.delay = 0.2
+    expire_jwks(middleware)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(middleware.verify_token(token))) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [True] * 20
+    assert jwks_server.fetches == 2  # initial fetch plus one refresh
+
+
+def test_unknown_kid_burst_fetches_once(middleware, key, jwks_server):
+    assert middleware.verify_token(key.token())
+    stranger = SigningKey("unknown")
+    middleware._jwks_cache._last_refresh = 0  # last refresh long ago, so one forced refresh is allowed
+    threads = [threading.Thread(target=middleware.verify_token, args=(stranger.token(),)) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert jwks_server.fetches == 2
+
+    # Within MIN_REFRESH_INTERVAL unknown kids do not reach the IdP at all
+    assert not middleware.verify_token(stranger.token())
+    assert jwks_server.fetches == 2
+
+
+def test_failed_refresh_backs_off(middleware, key, jwks_server):
+    token = key.token()
+    assert middleware.verify_token(token)
+    jwks_server.close()
+    expire_jwks(middleware)
+
+    assert middleware.verify_token(key.token(sub="new"))  # stale keys still verify
+    assert middleware._jwks_cache.fetches == 2
+    assert middleware.verify_token(key.token(sub="newer"))
+    assert middleware._jwks_cache.fetches == 2
+
+
+class TestVerifiedTokenCache:
+
+    def test_lru_is_bounded(self):
+        cache = VerifiedTokenCache(maxsize=2)
+        payload = {"exp": time.time() + 60}
+        for token in ("a", "b"):
+            cache.put(cache.digest(token), payload, jwks_version=1)
+        assert cache.get(cache.digest("a"), 1)  # "b" is now least recently used
+        cache.put(cache.digest("c"), payload, jwks_version=1)
+
+        assert len(cache) == 2
+        assert cache.get(cache.digest("a"), 1)
+        assert not cache.get(cache.digest("b"), 1)
+
+    def test_validity_window(self):
+        now = time.time()
+        entry = VerifiedToken(expires_at=now + 10, not_before=now + 5, jwks_version=3)
+        assert not entry.is_valid(now, leeway=0, jwks_version=3)
+        assert entry.is_valid(now, leeway=5, jwks_version=3)
+        assert entry.is_valid(now + 6, leeway=0, jwks_version=3)
+        assert not entry.is_valid(now + 6, leeway=0, jwks_version=4)
+        assert not entry.is_valid(now + 11, leeway=0, jwks_version=3)
+
+    def test_disabled(self):
+        cache = VerifiedTokenCache(maxsize=0)
+        cache.put(cache.digest("a"), {"exp": time.time() + 60}, jwks_version=1)
+        assert not cache.get(cache.digest("a"), 1)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+First-byte latency of sub-agent streaming with and without the pooled A2A transport.
+
+"unpooled" reproduces the previous per-request path: new httpx.AsyncClient,
+A2ACardResolver card fetch and A2AClient for every call. "pooled" goes through
+ai_platform_engineering.utils.a2a_common.transport (keep-alive pools, cached
+agent cards, per-agent concurrency limits).
+
+Stub agents run locally over plain HTTP, so the saving shown excludes TLS
+handshakes; --card-delay-ms simulates a slower card endpoint.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_a2a_transport.py --requests 200 --agents 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+from a2a.client import A2ACardResolver, A2AClient
+from a2a.types import MessageSendParams, SendStreamingMessageRequest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from stub_a2a_server import StubAgentConfig, start_stub_agents  # noqa: E402
+
+from ai_platform_engineering.utils.a2a_common.transport import A2ATransportPool, AgentCardCache  # noqa: E402
+
+
+def streaming_request(query: str) -> SendStreamingMessageRequest:
+  return SendStreamingMessageRequest(
+    id=str(uuid.uuid4()),
+    params=MessageSendParams(message={
+      "role": "user",
+      "parts": [{"kind": "text", "text": query}],
+      "messageId": str(uuid.uuid4()),
+    }),
+  )
+
+
+async def first_byte_unpooled(agent_url: str) -> float:
+  start = time.perf_counter()
+  httpx_client = httpx.AsyncClient(timeout=httpx.Timeout(300.0))
+  try:
+    card = await A2ACardResolver(httpx_client=httpx_client, base_url=agent_url).get_agent_card()
+    card.url = agent_url
+    client = A2AClient(httpx_client=httpx_client, agent_card=card)
+    first = None
+    async for _ in client.send_message_streaming(streaming_request("bench")):
+      if first is None:
+        first = time.perf_counter() - start
+    return first
+  finally:
+    await httpx_client.aclose()
+
+
+async def first_byte_pooled(pool: A2ATransportPool, agent_url: str) -> float:
+  start = time.perf_counter()
+  async with pool.session(agent_url) as client:
+    first = None
+    async for _ in client.send_message_streaming(streaming_request("bench")):
+      if first is None:
+        first = time.perf_counter() - start
+    return first
+
+
+def percentile(samples, pct):
+  ordered = sorted(samples)
+  return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(label: str, samples):
+  ms = [s * 1000 for s in samples]
+  print(f"  {label:<10} n={len(ms):<5} p50={percentile(ms, 50):7.2f} ms  p95={percentile(ms, 95):7.2f} ms  mean={statistics.mean(ms):7.2f} ms")
+
+
+async def run(args) -> None:
+  servers = start_stub_agents([
+    StubAgentConfig(name=f"agent{i}", chunks=3, card_delay=args.card_delay_ms / 1000)
+    for i in range(args.agents)
+  ])
+  urls = [server.url for server in servers]
+  pool = A2ATransportPool(card_cache=AgentCardCache(ttl=300))
+
+  try:
+    for mode in ("sequential", "fan-out"):
+      print(f"\n{mode}: {args.requests} requests over {args.agents} stub agents (card delay {args.card_delay_ms} ms)")
+      for label in ("unpooled", "pooled"):
+        samples = []
+        for i in range(args.requests if mode == "sequential" else args.requests // len(urls)):
+          if mode == "sequential":
+            url = urls[i % len(urls)]
+            if label == "pooled":
+              samples.append(await first_byte_pooled(pool, url))
+            else:
+              samples.append(await first_byte_unpooled(url))
+          else:
+            if label == "pooled":
+              samples.extend(await asyncio.gather(*(first_byte_pooled(pool, url) for url in urls)))
+            else:
+              samples.extend(await asyncio.gather(*(first_byte_unpooled(url) for url in urls)))
+        report(label, samples)
+
+    card_requests = sum(server.stats["card_requests"] for server in servers)
+    print(f"\nagent card requests served: {card_requests} (pool cache stats: {pool.card_cache.stats})")
+  finally:
+    await pool.aclose()
+    for server in servers:
+      server.stop()
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--requests", type=int, default=200, help="Requests per mode and transport")
+  parser.add_argument("--agents", type=int, default=3, help="Number of stub sub-agents")
+  parser.add_argument("--card-delay-ms", type=float, default=0.0, help="Extra latency on the agent card endpoint")
+  asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+RSS and store size of the supervisor checkpointer under many one-off context_ids.
+
+Drives a small two-node LangGraph graph (no LLM) with --threads distinct
+thread_ids, one turn each, against InMemorySaver and BoundedSqliteSaver, and
+prints RSS and stored thread counts every --report-every threads.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_checkpointer_soak.py --threads 20000
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import subprocess
+import sys
+import time
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from ai_platform_engineering.multi_agents.checkpointer import BoundedSqliteSaver, checkpointer_stats
+
+
+class State(TypedDict):
+  messages: Annotated[list, add_messages]
+  turns: int
+
+
+def build_graph(checkpointer):
+  def think(state: State):
+    return {"turns": state.get("turns", 0) + 1}
+
+  def answer(state: State):
+    return {"messages": [AIMessage(content="ok " * 50)]}
+
+  builder = StateGraph(State)
+  builder.add_node("think", think)
+  builder.add_node("answer", answer)
+  builder.add_edge(START, "think")
+  builder.add_edge("think", "answer")
+  builder.add_edge("answer", END)
+  return builder.compile(checkpointer=checkpointer)
+
+
+def rss_mib() -> float:
+  with open("/proc/self/statm") as f:
+    return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+async def soak(label, checkpointer, args):
+  graph = build_graph(checkpointer)
+  start = time.perf_counter()
+  print(f"\n{label}")
+  for i in range(1, args.threads + 1):
+    await graph.ainvoke({"messages": [{"role": "user", "content": f"context {i} " * 50}]}, {"configurable": {"thread_id": f"ctx-{i}"}})
+    if i % args.report_every == 0:
+      gc.collect()
+      stats = checkpointer_stats(checkpointer)
+      print(f"  {i:>7} threads  rss={rss_mib():7.1f} MiB  stored threads={stats.get('threads'):>6}  "
+            f"checkpoints={stats.get('checkpoints'):>7}  {(time.perf_counter() - start) / i * 1000:.2f} ms/turn")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--threads", type=int, default=20000, help="Distinct thread_ids to run")
+  parser.add_argument("--report-every", type=int, default=5000, help="Print RSS every N threads")
+  parser.add_argument("--max-threads", type=int, default=1000, help="BoundedSqliteSaver max_threads")
+  parser.add_argument("--backend", choices=["memory", "sqlite", "both"], default="both")
+  args = parser.parse_args()
+
+  # Run each backend in its own process so one does not inherit the other's heap
+  if args.backend == "both":
+    for backend in ("sqlite", "memory"):
+      subprocess.run([sys.executable, __file__, "--backend", backend, "--threads", str(args.threads),
+                      "--report-every", str(args.report_every), "--max-threads", str(args.max_threads)], check=True)
+    return
+  if args.backend == "memory":
+    asyncio.run(soak("InMemorySaver", InMemorySaver(), args))
+  else:
+    asyncio.run(soak(f"BoundedSqliteSaver(max_threads={args.max_threads})", BoundedSqliteSaver(max_threads=args.max_threads), args))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+End-to-end sync of the test_dummy graph connector against a local server:
+the previous synchronous Connector (the entities grouped by type in memory,
+then one POST per type with the whole list, JSON body printed) vs
+AsyncConnector (entities streamed in gzipped batches, several in flight,
+backing off on 429s).
+
+The server is a uvicorn process serving /v1/graph/ingest/entities the way the
+RAG server does: gzip request route, EntityIngest validation, 429 once
+--max-pending ingestions are running, and an ingestion standing in for the
+vector store and graph writes (--ingest-us per entity) that is done before the
+response. A sync ends
+when the server has ingested every entity. Each client runs in its own
+process, so that its peak RSS is its own.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_graph_connector_sync.py --entities 1000000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+RAG = os.path.join(os.path.dirname(__file__), "../../ai_platform_engineering/knowledge_bases/rag")
+sys.path[:0] = [os.path.join(RAG, "server/src"), os.path.join(RAG, "common/src"), os.path.join(RAG, "connectors/src")]
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("CONNECTOR_NAME", "test_dummy")
+
+
+def serve(port, max_pending, ingest_us):
+  import uvicorn
+  from fastapi import FastAPI, status
+  from fastapi.responses import JSONResponse
+
+  from server.gzip_request import GzipRoute
+  from server.models import EntityIngest
+
+  app = FastAPI()
+  app.router.route_class = GzipRoute
+  stats = {"pending": 0, "requests": 0, "throttled": 0, "bytes": 0, "ingested": 0}
+
+  async def ingest(entities):
+    stats["pending"] += 1
+    try:
+      await asyncio.sleep(len(entities) * ingest_us / 1e6)
+      stats["ingested"] += len(entities)
+    finally:
+      stats["pending"] -= 1
+
+  @app.get("/healthz")
+  async def healthz():
+    return {"status": "healthy"}
+
+  @app.get("/stats")
+  async def get_stats():
+    return stats
+
+  @app.post("/stats/reset")
+  async def reset_stats():
+    stats.update(requests=0, throttled=0, bytes=0, ingested=0)
+    return stats
+
+  @app.post("/v1/graph/ingest/entities")
+  async def ingest_entities(entity_ingest_request: EntityIngest):
+    stats["requests"] += 1
+    if stats["pending"] >= max_pending:
+      stats["throttled"] += 1
+      return JSONResponse(status_code=status.HTTP_429_TOO_MANY_REQUESTS, content={"message": "Too many pending entity ingestions"},
+                          headers={"Retry-After": "1"})
+    await ingest(entity_ingest_request.entities)
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Entity created/updated successfully"})
+
+  @app.middleware("http")
+  async def count_bytes(request, call_next):
+    stats["bytes"] += int(request.headers.get("Content-Length", 0))
+    return await call_next(request)
+
+  uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def previous_sync(server_addr, count):
+  """test_dummy's sync as it was: entities grouped by type, then Connector.update_entity (with its print) per type."""
+  import requests
+
+  from common import utils
+  from connectors.test_dummy.client import generate_dummy_entities
+
+  grouped_entities = defaultdict(list)
+  for entity in generate_dummy_entities(count):
+    grouped_entities[entity.entity_type].append(entity)
+  for entity_type, entities in grouped_entities.items():
+    json_str = utils.json_encode({"entity_type": entity_type, "connector_name": "test_dummy",
+                                  "entities": [entity.model_dump() for entity in entities], "fresh_until": utils.get_default_fresh_until()})
+    with contextlib.redirect_stdout(io.StringIO()):
+      print(json_str)
+    requests.post(url=f"{server_addr}/v1/graph/ingest/entities", headers={"Content-Type": "application/json"}, data=json_str).raise_for_status()
+
+
+async def async_sync(server_addr, count):
+  from common.connector import AsyncConnector
+  from connectors.test_dummy.client import sync
+
+  os.environ["ENTITY_COUNT"] = str(count)
+  async with AsyncConnector(server_addr=server_addr) as connector:
+    await sync(connector)
+
+
+def client(mode, server_addr, count):
+  if mode == "previous":
+    previous_sync(server_addr, count)
+  else:
+    asyncio.run(async_sync(server_addr, count))
+  print(json.dumps({"rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def run_client(mode, server_addr, count):
+  import requests
+
+  while requests.get(f"{server_addr}/stats").json()["pending"]: # ingestions left by a failed sync
+    time.sleep(0.05)
+  requests.post(f"{server_addr}/stats/reset").raise_for_status()
+  started = time.perf_counter()
+  proc = subprocess.run([sys.executable, __file__, "--client", mode, "--server-addr", server_addr, "--entities", str(count)],
+                        capture_output=True, text=True)
+  if proc.returncode:
+    return None, None, None, proc.stderr.strip().splitlines()[-1]
+  sent = time.perf_counter() - started
+  while (stats := requests.get(f"{server_addr}/stats").json())["ingested"] < count:
+    time.sleep(0.05)
+  return sent, time.perf_counter() - started, stats, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--entities", type=int, default=1_000_000, help="Entities synced by test_dummy")
+  parser.add_argument("--previous-entities", type=int, help="Entities synced with the previous Connector (default: --entities)")
+  parser.add_argument("--max-pending", type=int, default=8, help="Ingestions queued on the server before it answers 429")
+  parser.add_argument("--ingest-us", type=float, default=20, help="Microseconds the server spends ingesting an entity")
+  parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+  parser.add_argument("--client", choices=["previous", "async"], help=argparse.SUPPRESS)
+  parser.add_argument("--server-addr", help=argparse.SUPPRESS)
+  args = parser.parse_args()
+  if args.serve:
+    serve(args.serve, args.max_pending, args.ingest_us)
+    return
+  if args.client:
+    client(args.client, args.server_addr, args.entities)
+    return
+
+  with socket.socket() as s:
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+  server_addr = f"http://127.0.0.1:{port}"
+  server = subprocess.Popen([sys.executable, __file__, "--serve", str(port), "--max-pending", str(args.max_pending), "--ingest-us", str(args.ingest_us)])
+  try:
+    import requests
+    for _ in range(100):
+      with contextlib.suppress(requests.ConnectionError):
+        requests.get(f"{server_addr}/healthz").raise_for_status()
+        break
+      time.sleep(0.1)
+
+    print(f"test_dummy sync, {args.ingest_us:g} us per entity ingested, 429 above {args.max_pending} pending ingestions")
+    print(f"{'client':<22} {'entities':>10} {'sent':>8} {'ingested':>9} {'entities/s':>10} {'requests':>9} {'429s':>5} {'MB sent':>8} {'client RSS':>11}")
+    for mode, count in (("previous", args.previous_entities or args.entities), ("async", args.entities)):
+      sent, elapsed, stats, result = run_client(mode, server_addr, count)
+      name = "Connector (sync)" if mode == "previous" else "AsyncConnector"
+      if sent is None: # the previous Connector does not retry, e.g. after a 429
+        print(f"{name:<22} {count:>10,} failed: {result}")
+        continue
+      print(f"{name:<22} {count:>10,} {sent:>7.1f}s {elapsed:>8.1f}s {count / elapsed:>10,.0f} {stats['requests']:>9,} {stats['throttled']:>5,} "
+            f"{stats['bytes'] / 1e6:>8.1f} {result['rss_mb']:>8.0f} MB")
+  finally:
+    server.terminate()
+    server.wait()
+
+
+if __name__ == "__main__":
+  main()
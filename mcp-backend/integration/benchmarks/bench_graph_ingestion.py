@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Throughput of the RAG server's graph entity ingestion: run_graph_entity_ingestion
+as it was (an aget_by_ids per entity, then one write of all of them) vs
+GraphEntityIngestor (one hash fetch and one write of the changed entities per
+batch, and a data graph update per batch).
+
+--entities Pod entities are ingested into an empty store, then ingested again
+with --changed of them edited. The vector store is langchain's in-memory store
+with a deterministic fake embedding, and the data graph only records updates;
+each vector store and graph call first waits --rtt-ms to stand in for the
+network.
+
+The previous change check read a metadata key that is not stored ("hash"
+instead of "graph_entity_hash"), so it never skipped anything; had it
+matched, its early return would have dropped the rest of the request.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_graph_ingestion.py --entities 100000 --rtt-ms 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+RAG = os.path.join(os.path.dirname(__file__), "../../ai_platform_engineering/knowledge_bases/rag")
+sys.path[:0] = [os.path.join(RAG, "server/src"), os.path.join(RAG, "common/src")]
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import DeterministicFakeEmbedding  # noqa: E402
+from langchain_core.vectorstores import InMemoryVectorStore  # noqa: E402
+
+from common import utils  # noqa: E402
+from common.models.graph import Entity  # noqa: E402
+from common.models.rag import DocTypeGraphEntity, VectorDBGraphMetadata  # noqa: E402
+from server.graph_ingestion import GraphEntityIngestor  # noqa: E402
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+  texts: int = 0
+
+  def embed_documents(self, texts):
+    self.texts += len(texts)
+    return super().embed_documents(texts)
+
+
+class RemoteVectorStore(InMemoryVectorStore):
+  """In-memory store whose calls each take `rtt` seconds more, and are counted."""
+
+  def __init__(self, rtt):
+    super().__init__(CountingEmbeddings(size=64))
+    self.rtt = rtt
+    self.calls = 0
+
+  async def _round_trip(self):
+    self.calls += 1
+    if self.rtt:
+      await asyncio.sleep(self.rtt)
+
+  async def aget_by_ids(self, ids, /):
+    await self._round_trip()
+    return self.get_by_ids(ids)
+
+  async def aadd_documents(self, documents, **kwargs):
+    await self._round_trip()
+    return self.add_documents(documents, **kwargs)
+
+  async def adelete(self, ids=None, **kwargs):
+    await self._round_trip()
+    return self.delete(ids)
+
+
+class RecordingGraphDB:
+  def __init__(self, rtt):
+    self.rtt = rtt
+    self.calls = 0
+
+  async def update_entity(self, entity_type, entities, client_name, fresh_until):
+    self.calls += 1
+    if self.rtt:
+      await asyncio.sleep(self.rtt)
+
+
+async def previous_ingestion(vector_db, graph_db, connector_name, entity_type, entities, fresh_until):
+  """run_graph_entity_ingestion as it was (without the connector info update)."""
+  documents, ids = [], []
+  for entity in entities:
+    entity_hash = entity.get_hash()
+    primary_key = entity.generate_primary_key()
+    try:
+      existing_data = await vector_db.aget_by_ids([primary_key])
+      if existing_data:
+        if existing_data[0].metadata.get("hash") == entity_hash:
+          return
+    except Exception:
+      pass
+    entity_properties = entity.get_external_properties()
+    entity_properties["entity_type"] = entity.entity_type
+    documents.append(Document(
+      page_content=utils.json_encode(entity_properties),
+      metadata=VectorDBGraphMetadata(doc_type=DocTypeGraphEntity, chunk_index=0, total_chunks=1, datasource_id=connector_name, id=primary_key,
+                                     graph_entity_hash=entity_hash, graph_connector_id=connector_name, graph_entity_type=entity.entity_type,
+                                     graph_entity_primary_key=primary_key).model_dump()))
+    ids.append(primary_key)
+  await vector_db.aadd_documents(documents, ids=ids)
+  await graph_db.update_entity(entity_type, entities, fresh_until=fresh_until, client_name=connector_name)
+
+
+def pods(count, changed=0):
+  step = count // changed if changed else 0
+  return [Entity(entity_type="Pod", primary_key_properties=["namespace", "name"],
+                 all_properties={"namespace": f"ns-{n % 50}", "name": f"pod-{n}", "node": f"node-{n % 300}",
+                                 "image": "nginx:1.27" if step and n % step == 0 else "nginx:1.25", "phase": "Running"})
+          for n in range(count)]
+
+
+async def measure(name, ingest, args):
+  vector_db, graph_db = RemoteVectorStore(args.rtt_ms / 1000), RecordingGraphDB(args.rtt_ms / 1000)
+  rows = []
+  for run, entities in (("initial", pods(args.entities)), (f"{args.changed} changed", pods(args.entities, args.changed))):
+    vector_db.calls = graph_db.calls = 0
+    embedded = vector_db.embedding.texts
+    started = time.perf_counter()
+    await ingest(vector_db, graph_db, "k8s", "Pod", entities, 0)
+    elapsed = time.perf_counter() - started
+    rows.append((f"{name}, {run}", len(entities) / elapsed, elapsed, vector_db.embedding.texts - embedded, vector_db.calls, graph_db.calls))
+  return rows
+
+
+async def run(args):
+  async def batched(vector_db, graph_db, *request):
+    return await GraphEntityIngestor(vector_db, graph_db, batch_size=args.batch_size).ingest(*request)
+
+  return await measure("per entity", previous_ingestion, args) + await measure(f"batches of {args.batch_size}", batched, args)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--entities", type=int, default=100_000, help="Entities per ingestion request")
+  parser.add_argument("--changed", type=int, default=1000, help="Entities edited before the second ingestion")
+  parser.add_argument("--batch-size", type=int, default=1000, help="Batch size of GraphEntityIngestor")
+  parser.add_argument("--rtt-ms", type=float, default=0.2, help="Latency added to each vector store and graph call")
+  args = parser.parse_args()
+
+  print(f"{args.entities:,} entities, {args.rtt_ms:g} ms RTT")
+  print(f"{'ingestion':<32} {'entities/s':>10} {'time':>8} {'embedded':>9} {'vector calls':>13} {'graph calls':>12}")
+  for name, rate, elapsed, embedded, vector_calls, graph_calls in asyncio.run(run(args)):
+    print(f"{name:<32} {rate:>10,.0f} {elapsed:>7.2f}s {embedded:>9,} {vector_calls:>13,} {graph_calls:>12,}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Parse time per MB of the RAG loader's HTML extraction: BeautifulSoup
+(html.parser + custom_parser scrapers) vs the lxml extractor.
+
+Uses the parity fixture corpus of the RAG server tests (Docusaurus, MkDocs,
+plain and malformed pages) plus a large page made by repeating the Docusaurus
+article until it reaches --large-mb. Each page goes from raw response bytes
+to (content, metadata), as the loader does, and both backends must produce
+identical output.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_html_extraction.py --repeat 20
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import time
+from pathlib import Path
+
+RAG = os.path.join(os.path.dirname(__file__), "../../ai_platform_engineering/knowledge_bases/rag")
+sys.path[:0] = [os.path.join(RAG, "server/src"), os.path.join(RAG, "common/src")]
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from common.models.rag import DataSourceInfo  # noqa: E402
+from server.loader.loader import Loader  # noqa: E402
+from server.loader.url import lxml_extractor  # noqa: E402
+
+FIXTURES = Path(RAG) / "server/tests/fixtures/html"
+
+
+def large_page(mb):
+  html = (FIXTURES / "docusaurus.html").read_text()
+  start, end = html.index("<article>"), html.index("</article>") + len("</article>")
+  article = html[start:end]
+  copies = int(mb * 1024 * 1024 / len(article)) + 1
+  return (html[:start] + article * copies + html[end:]).encode()
+
+
+def run_bs4(loop, loader, content, url):
+  soup = BeautifulSoup(content.decode("utf-8"), "html.parser")
+  return loop.run_until_complete(loader.custom_parser(soup, url))
+
+
+def run_lxml(content, url):
+  root = lxml_extractor.parse_html(content, "utf-8")
+  return lxml_extractor.extract(root, url, lxml_extractor.detect_generator(root))
+
+
+def timed(fn, repeat):
+  started = time.perf_counter()
+  for _ in range(repeat):
+    result = fn()
+  return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--repeat", type=int, default=20, help="Parses per page and backend")
+  parser.add_argument("--large-mb", type=float, default=5.0, help="Size of the large page in MB")
+  args = parser.parse_args()
+
+  now = datetime.datetime.now()
+  datasource = DataSourceInfo(datasource_id="bench", description="", source_type="web", path="", created_at=now, last_updated=now)
+  loader = Loader(None, None, datasource, None, 1)  # type: ignore
+  loop = asyncio.new_event_loop()
+
+  pages = [(path.stem, path.read_bytes()) for path in sorted(FIXTURES.glob("*.html"))]
+  pages.append((f"large ({args.large_mb:g} MB)", large_page(args.large_mb)))
+  print(f"{'page':<16} {'size':>9}   {'BeautifulSoup':>14} {'lxml':>10}   {'speedup':>7}")
+  for name, content in pages:
+    url = f"https://example.com/{name}"
+    repeat = max(1, args.repeat // 10) if len(content) > 1024 * 1024 else args.repeat
+    bs4_time, expected = timed(lambda: run_bs4(loop, loader, content, url), repeat)
+    lxml_time, result = timed(lambda: run_lxml(content, url), repeat)
+    assert result == expected, f"output differs for {name}"
+    mb = len(content) / (1024 * 1024)
+    print(f"{name:<16} {len(content) / 1024:>6.0f} KB   {bs4_time / mb * 1000:>8.0f} ms/MB {lxml_time / mb * 1000:>6.0f} ms/MB"
+          f"   {bs4_time / lxml_time:>6.1f}x")
+
+
+if __name__ == "__main__":
+  main()
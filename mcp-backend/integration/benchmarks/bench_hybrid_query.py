@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Recall@k and latency of the RAG server's VectorDBQueryService on Milvus Lite,
+with the collection set up the way the server does (dense embeddings plus the
+built-in BM25 sparse field).
+
+The corpus is synthetic: each document names two topics (with one of several
+synonyms per topic) and an identifier such as an error code. A query for a
+document paraphrases its topics with other synonyms and, half of the time,
+mentions its identifier, so that dense search sees the meaning and BM25 the
+identifier. The embedding model maps synonyms to the same dimension, and
+takes --embed-ms per request (plus a little per text) like a remote model.
+
+Recall is measured for dense only, the previous weighted search (4 candidates
+per search, the langchain default), weighted with 20 candidates, and RRF.
+Latency is measured for --clients concurrent clients sending --queries queries
+drawn (Zipf) from the query set: without caches, with the query embedding
+cache and batching, and with the result cache as well.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_hybrid_query.py --documents 5000 --queries 1000 --clients 8
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+RAG = os.path.join(os.path.dirname(__file__), "../../ai_platform_engineering/knowledge_bases/rag")
+sys.path[:0] = [os.path.join(RAG, "server/src"), os.path.join(RAG, "common/src")]
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import logging  # noqa: E402
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from langchain_milvus import BM25BuiltInFunction, Milvus  # noqa: E402
+
+from server.query_service import CachedQueryEmbeddings, VectorDBQueryService  # noqa: E402
+
+logging.getLogger("rag").setLevel(logging.WARNING)
+
+TOPICS = 40
+SYNONYMS = 4
+LIMIT = 5
+
+
+def word(topic, synonym):
+  return f"t{topic}s{synonym}"
+
+
+class TopicEmbeddings(Embeddings):
+  """Synonyms of a topic share a dimension; each request takes `latency` seconds."""
+
+  def __init__(self, latency=0.0):
+    self.latency = latency
+    self.requests = 0
+
+  def _embed(self, text):
+    vector = [0.0] * (TOPICS + 1)
+    for token in text.split():
+      if token.startswith("t") and "s" in token[1:]:
+        vector[int(token[1:].split("s")[0])] += 1.0
+    vector[TOPICS] = 0.05
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector]
+
+  def embed_documents(self, texts):
+    return [self._embed(text) for text in texts]
+
+  def embed_query(self, text):
+    return self._embed(text)
+
+  async def aembed_documents(self, texts):
+    self.requests += 1
+    await asyncio.sleep(self.latency * (1 + 0.02 * len(texts)))
+    return self.embed_documents(texts)
+
+  async def aembed_query(self, text):
+    return (await self.aembed_documents([text]))[0]
+
+
+def corpus(documents, seed=7):
+  rng = random.Random(seed)
+  docs, queries = [], []
+  for n in range(documents):
+    topics = rng.sample(range(TOPICS), 2)
+    synonyms = [rng.randrange(SYNONYMS) for _ in topics]
+    identifier = f"ERR{rng.randrange(10**6):06d}"
+    text = f"{word(topics[0], synonyms[0])} {word(topics[1], synonyms[1])} when {identifier} is reported by the service"
+    docs.append(Document(page_content=text, metadata={"document_id": f"doc_{n}", "datasource_id": "src_bench", "doc_type": "text"}))
+    paraphrase = " ".join(word(topic, (synonym + 1) % SYNONYMS) for topic, synonym in zip(topics, synonyms))
+    queries.append((f"{paraphrase} {identifier}" if n % 2 else paraphrase, f"doc_{n}"))
+  return docs, queries
+
+
+def vector_store(uri, collection_name, embeddings):
+  return Milvus(
+    embedding_function=embeddings,
+    collection_name=collection_name,
+    connection_args={"uri": uri},
+    index_params=[{"index_type": "FLAT", "metric_type": "COSINE"}, {"index_type": "SPARSE_INVERTED_INDEX", "metric_type": "BM25"}],
+    search_params=[{"metric_type": "COSINE", "params": {}}, {"metric_type": "BM25", "params": {}}],
+    builtin_function=BM25BuiltInFunction(output_field_names="sparse"),
+    vector_field=["dense", "sparse"],
+    enable_dynamic_field=True,
+  )
+
+
+async def recall(uri, collection_name, queries):
+  vector_db = vector_store(uri, collection_name, TopicEmbeddings())
+  service = VectorDBQueryService(vector_db, result_cache_ttl=0)
+
+  async def previous(query, weights):
+    # The search as it was: fetch_k left at langchain's default of 4 per search
+    return [doc for doc, _ in await vector_db.asimilarity_search_with_score(query, k=LIMIT, ranker_type="weighted", ranker_params={"weights": weights})]
+
+  async def current(query, ranker, ranker_params):
+    return [result.document for result in (await service.query(query, limit=LIMIT, similarity_threshold=0, ranker=ranker, ranker_params=ranker_params)).results]
+
+  searches = {
+    "dense only": lambda query: current(query, "weighted", {"weights": [1.0, 0.0]}),
+    "weighted 0.7/0.3, 4 candidates": lambda query: previous(query, [0.7, 0.3]),
+    "weighted 0.7/0.3, 20 candidates": lambda query: current(query, "weighted", {"weights": [0.7, 0.3]}),
+    "rrf, 20 candidates": lambda query: current(query, "rrf", None),
+  }
+  rows = []
+  for name, search in searches.items():
+    hits = {"with identifier": [0, 0], "paraphrase only": [0, 0]}
+    for n, (query, expected) in enumerate(queries):
+      found = [doc.metadata["document_id"] for doc in await search(query)]
+      kind = "with identifier" if n % 2 else "paraphrase only"
+      hits[kind][0] += expected in found
+      hits[kind][1] += 1
+    total = sum(h[0] for h in hits.values()) / sum(h[1] for h in hits.values())
+    rows.append((name, total, *(h[0] / h[1] for h in hits.values())))
+  return rows
+
+
+async def latency(uri, collection_name, queries, mode, args):
+  model = TopicEmbeddings(latency=args.embed_ms / 1000)
+  embeddings = model if mode == "no caches" else CachedQueryEmbeddings(model, batch_window=0.005)
+  vector_db = vector_store(uri, collection_name, embeddings)
+  service = VectorDBQueryService(vector_db, result_cache_ttl=60 if mode == "+ result cache" else 0)
+
+  rng = random.Random(11)
+  weights = [1 / (rank + 1) for rank in range(len(queries))]
+  workload = rng.choices([query for query, _ in queries], weights=weights, k=args.queries)
+  latencies = []
+
+  async def client(worker):
+    for query in workload[worker::args.clients]:
+      started = time.perf_counter()
+      await service.query(query, limit=LIMIT, similarity_threshold=0, ranker="rrf")
+      latencies.append(time.perf_counter() - started)
+
+  started = time.perf_counter()
+  await asyncio.gather(*(client(worker) for worker in range(args.clients)))
+  elapsed = time.perf_counter() - started
+  latencies.sort()
+  return args.queries / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000, model.requests
+
+
+async def run(args):
+  docs, queries = corpus(args.documents)
+  queries = queries[:args.query_set]
+  with tempfile.TemporaryDirectory() as tmp:
+    uri = os.path.join(tmp, "milvus.db")
+    collection_name = f"bench_{uuid.uuid4().hex}"
+    vector_db = vector_store(uri, collection_name, TopicEmbeddings())
+    for start in range(0, len(docs), 1000):
+      batch = docs[start:start + 1000]
+      await vector_db.aadd_documents(batch, ids=[doc.metadata["document_id"] for doc in batch])
+    vector_db.client.flush(collection_name)  # Milvus Lite searches unflushed rows row by row
+
+    print(f"{args.documents:,} documents, {len(queries)} distinct queries, recall@{LIMIT}")
+    print(f"{'search':<34} {'recall':>7} {'w/ identifier':>14} {'paraphrase':>11}")
+    for name, total, with_identifier, paraphrase in await recall(uri, collection_name, queries):
+      print(f"{name:<34} {total:>7.3f} {with_identifier:>14.3f} {paraphrase:>11.3f}")
+
+    print(f"\n{args.queries:,} RRF queries (Zipf over the query set), {args.clients} clients, {args.embed_ms:g} ms per embedding request")
+    print(f"{'mode':<34} {'queries/s':>9} {'p50':>9} {'p99':>9} {'embedding reqs':>15}")
+    for mode in ("no caches", "embedding cache + batching", "+ result cache"):
+      qps, p50, p99, requests = await latency(uri, collection_name, queries, mode, args)
+      print(f"{mode:<34} {qps:>9.0f} {p50:>7.1f}ms {p99:>7.1f}ms {requests:>15,}")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--documents", type=int, default=5000, help="Documents in the collection")
+  parser.add_argument("--query-set", type=int, default=500, help="Distinct queries (recall is measured on all of them)")
+  parser.add_argument("--queries", type=int, default=1000, help="Queries sent in the latency run")
+  parser.add_argument("--clients", type=int, default=8, help="Concurrent clients in the latency run")
+  parser.add_argument("--embed-ms", type=float, default=30, help="Latency of an embedding request")
+  asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+  main()
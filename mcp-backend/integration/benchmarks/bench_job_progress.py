@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Job progress accounting under contention: the previous JobManager (Redis lock,
+read-modify-write of the JobInfo JSON) vs the hash + update script, with and
+without coalescing of progress updates.
+
+--workers concurrent workers each report --urls URLs the way the loader does
+(one update per processed URL, plus a failed increment and an error for one
+URL in 8). Redis is in-process fakeredis (with Lua) by default, with --rtt-ms
+of latency added to every command to stand in for the network, or a real
+server with --redis-url.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_job_progress.py --workers 64 --urls 20 --rtt-ms 0.5
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import time
+import uuid
+
+RAG = os.path.join(os.path.dirname(__file__), "../../ai_platform_engineering/knowledge_bases/rag")
+sys.path[:0] = [os.path.join(RAG, "server/src"), os.path.join(RAG, "common/src")]
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import fakeredis  # noqa: E402
+import redis.asyncio as redis  # noqa: E402
+import redis.exceptions as redis_exceptions  # noqa: E402
+
+from common.job_manager import JobInfo, JobManager, JobStatus  # noqa: E402
+
+
+class LockingJobManager:
+  """The update path JobManager had before: lock, GET the JSON, apply, SET it back (10 lock attempts)."""
+
+  def __init__(self, redis_client):
+    self.redis_client = redis_client
+
+  async def get_job(self, job_id):
+    job_data = await self.redis_client.get(f"job_info:{job_id}")
+    return JobInfo.model_validate_json(job_data) if job_data else None
+
+  async def update_job(self, job_id, *, status=None, message=None, processed_increment=None, failed_increment=None,
+                       total=None, errors=None):
+    updates = {key: value for key, value in (("status", status), ("message", message), ("total", total)) if value is not None}
+    for _ in range(10):
+      try:
+        async with self.redis_client.lock(f"job_lock:{job_id}", timeout=10, blocking_timeout=5):
+          job_data = await self.redis_client.get(f"job_info:{job_id}")
+          if job_data:
+            job_info = JobInfo.model_validate_json(job_data)
+          else:
+            job_info = JobInfo(job_id=job_id, status=JobStatus.PENDING, created_at=datetime.datetime.now(datetime.timezone.utc),
+                               completed_at=None, errors=[], processed_counter=0, failed_counter=0, total=0, message="")
+          job_info = job_info.model_copy(update=updates)
+          job_info.processed_counter = (job_info.processed_counter or 0) + (processed_increment or 0)
+          job_info.failed_counter = (job_info.failed_counter or 0) + (failed_increment or 0)
+          if errors:
+            job_info.errors = (job_info.errors or []) + errors
+          await self.redis_client.set(f"job_info:{job_id}", job_info.model_dump_json())
+          return True
+      except redis_exceptions.LockError:
+        await asyncio.sleep(1)
+    return False
+
+  async def flush(self, job_id=None):
+    pass
+
+
+def client(redis_url, rtt):
+  """A Redis client counting commands; with fakeredis, each command first waits `rtt` seconds."""
+  base = redis.Redis if redis_url else fakeredis.aioredis.FakeRedis
+
+  class CountingRedis(base):
+    commands = 0
+
+    async def execute_command(self, *args, **options):
+      CountingRedis.commands += 1
+      if rtt:
+        await asyncio.sleep(rtt)
+      return await super().execute_command(*args, **options)
+
+  return CountingRedis.from_url(redis_url) if redis_url else CountingRedis()
+
+
+async def run(mode, args):
+  redis_client = client(args.redis_url, 0 if args.redis_url else args.rtt_ms / 1000)
+  if mode == "lock":
+    jobmanager = LockingJobManager(redis_client)
+  else:
+    jobmanager = JobManager(redis_client, progress_flush_interval=0.5 if mode == "coalesced" else 0)
+  job_id = f"bench_{uuid.uuid4().hex}"
+  await jobmanager.update_job(job_id, status=JobStatus.IN_PROGRESS, total=args.workers * args.urls)
+  type(redis_client).commands = 0
+  latencies = []
+  dropped = 0
+
+  async def worker(worker_id):
+    nonlocal dropped
+    for i in range(args.urls):
+      started = time.perf_counter()
+      ok = True
+      if (worker_id + i) % 8 == 0:
+        ok &= await jobmanager.update_job(job_id, message=f"Failed to process URL {worker_id}/{i}", failed_increment=1,
+                                          errors=[f"Failed to process URL {worker_id}/{i} : TimeoutError"])
+      ok &= await jobmanager.update_job(job_id, message=f"Processed URL {worker_id}/{i}", processed_increment=1)
+      latencies.append(time.perf_counter() - started)
+      dropped += not ok
+
+  started = time.perf_counter()
+  await asyncio.gather(*(worker(worker_id) for worker_id in range(args.workers)))
+  await jobmanager.flush()
+  elapsed = time.perf_counter() - started
+  job = await jobmanager.get_job(job_id)
+  latencies.sort()
+  return {
+    "updates_per_s": len(latencies) / elapsed,
+    "p50_ms": latencies[len(latencies) // 2] * 1000,
+    "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    "commands": type(redis_client).commands,
+    "processed": job.processed_counter,
+    "dropped": dropped,
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--workers", type=int, default=64, help="Concurrent workers")
+  parser.add_argument("--urls", type=int, default=20, help="URLs reported per worker")
+  parser.add_argument("--rtt-ms", type=float, default=0.5, help="Latency added to each fakeredis command")
+  parser.add_argument("--redis-url", help="Use this Redis server instead of fakeredis")
+  args = parser.parse_args()
+
+  expected = args.workers * args.urls
+  print(f"{args.workers} workers x {args.urls} URLs, {'Redis at ' + args.redis_url if args.redis_url else f'fakeredis, {args.rtt_ms:g} ms RTT'}")
+  print(f"{'mode':<10} {'URL reports/s':>13} {'p50':>9} {'p99':>9} {'Redis cmds':>11} {'processed':>10} {'dropped':>8}")
+  for mode in ("lock", "scripted", "coalesced"):
+    result = asyncio.run(run(mode, args))
+    print(f"{mode:<10} {result['updates_per_s']:>13.0f} {result['p50_ms']:>7.1f}ms {result['p99_ms']:>7.1f}ms"
+          f" {result['commands']:>11} {result['processed']:>5}/{expected:<4} {result['dropped']:>8}")
+
+
+if __name__ == "__main__":
+  main()
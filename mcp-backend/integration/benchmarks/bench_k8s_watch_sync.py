@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Load on the RAG server of the k8s connector keeping a cluster in sync: periodic
+full syncs (every object listed and sent each cycle) vs the watch-driven sync
+(one list, then the watch events, debounced per object).
+
+A fake Kubernetes API server holds --objects Services; each cycle, --changed
+of them are edited --edits-per-change times in a row (as a rollout does) and
+--deleted are replaced by new ones. The connector is a stand-in that counts
+what would be sent to the server. The watch sync also reports how long a
+change waited before it was sent (the full sync sends it at the next cycle,
+SYNC_INTERVAL later, 15 minutes by default).
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_k8s_watch_sync.py --objects 20000 --cycles 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+RAG = os.path.join(os.path.dirname(__file__), "../../ai_platform_engineering/knowledge_bases/rag")
+sys.path[:0] = [os.path.join(RAG, "common/src"), os.path.join(RAG, "connectors/src")]
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["CLUSTER_NAME"] = "bench"
+os.environ["RESOURCE_LIST"] = "Service"
+
+from kubernetes import client as kclient  # noqa: E402
+from kubernetes.dynamic import DynamicClient  # noqa: E402
+
+from connectors.k8s import client as k8s  # noqa: E402
+from connectors.k8s.watch import K8sWatchSync  # noqa: E402
+
+
+class FakeAPIServer:
+  """Services, with paginated lists and chunked watches streaming the events after a resourceVersion."""
+
+  def __init__(self):
+    self.objects = {}
+    self.events = [] # (resourceVersion, type, object)
+    self.lists = 0
+    self.condition = threading.Condition()
+    server = self
+
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = "HTTP/1.1"
+
+      def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == "/version":
+          return self.respond({"major": "1", "minor": "33"})
+        if url.path == "/apis":
+          return self.respond({"kind": "APIGroupList", "groups": []})
+        if url.path == "/api/v1":
+          return self.respond({"kind": "APIResourceList", "groupVersion": "v1", "resources": [
+            {"name": "services", "kind": "Service", "namespaced": True, "verbs": ["get", "list", "watch"]}]})
+        if url.path != "/api/v1/services":
+          return self.send_error(404)
+        if query.get("watch", "").lower() == "true":
+          return self.watch(int(query.get("resourceVersion") or 0), float(query.get("timeoutSeconds", 60)))
+        start, limit = int(query.get("continue") or 0), int(query.get("limit") or 500)
+        with server.condition:
+          server.lists += start == 0
+          items = list(server.objects.values())[start:start + limit]
+          metadata = {"resourceVersion": str(server.resource_version())}
+          if start + limit < len(server.objects):
+            metadata["continue"] = str(start + limit)
+        self.respond({"kind": "ServiceList", "apiVersion": "v1", "metadata": metadata, "items": items})
+
+      def watch(self, resource_version, timeout):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        deadline = time.monotonic() + timeout
+        with server.condition:
+          while time.monotonic() < deadline:
+            lines = [json.dumps({"type": event_type, "object": obj}).encode() + b"\n"
+                     for version, event_type, obj in server.events if version > resource_version]
+            if lines:
+              resource_version = server.resource_version()
+              body = b"".join(lines)
+              self.wfile.write(b"%x\r\n%s\r\n" % (len(body), body))
+              self.wfile.flush()
+            server.condition.wait(deadline - time.monotonic())
+        self.wfile.write(b"0\r\n\r\n")
+
+      def respond(self, content):
+        data = json.dumps(content).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+      def log_message(self, *args):
+        pass
+
+    self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    self.httpd.daemon_threads = True
+    threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+    configuration = kclient.Configuration()
+    configuration.host = f"http://127.0.0.1:{self.httpd.server_port}"
+    self.dyn_client = DynamicClient(kclient.ApiClient(configuration), cache_file=f"/tmp/bench-k8s-discovery-{os.getpid()}.json")
+
+  def resource_version(self):
+    return self.events[-1][0] if self.events else 0
+
+  def apply(self, name, revision=0):
+    with self.condition:
+      event_type = "MODIFIED" if name in self.objects else "ADDED"
+      version = self.resource_version() + 1
+      self.objects[name] = {"kind": "Service", "apiVersion": "v1",
+                            "metadata": {"name": name, "namespace": f"ns-{hash(name) % 50}", "resourceVersion": str(version),
+                                         "labels": {"app": name, "revision": str(revision)}},
+                            "spec": {"type": "ClusterIP", "ports": [{"port": 80, "targetPort": 8080}], "selector": {"app": name}}}
+      self.events.append((version, event_type, self.objects[name]))
+      self.condition.notify_all()
+
+  def delete(self, name):
+    with self.condition:
+      obj = self.objects.pop(name)
+      self.events.append((self.resource_version() + 1, "DELETED", obj))
+      self.condition.notify_all()
+
+  def churn(self, cycle, args):
+    names = list(self.objects)
+    for name in names[:args.changed]:
+      for edit in range(args.edits_per_change):
+        self.apply(name, revision=cycle * args.edits_per_change + edit + 1)
+    for name in names[-args.deleted:] if args.deleted else []:
+      self.delete(name)
+      self.apply(f"{name}-c{cycle}")
+    with self.condition:
+      self.events = self.events[-100_000:] # keep the event log bounded
+
+
+class CountingConnector:
+  def __init__(self):
+    self.sent = 0
+    self.deleted = 0
+    self.requests = 0
+    self.last_sent = 0.0
+
+  async def sync_entities(self, entities, fresh_until=0, sync_id=None):
+    count = 0
+    if hasattr(entities, "__aiter__"):
+      async for _ in entities:
+        count += 1
+    else:
+      count = len(entities)
+    self.sent += count
+    self.requests += 1
+    self.last_sent = time.perf_counter()
+    return count
+
+  async def delete_entities(self, entity_type, primary_keys):
+    self.deleted += len(primary_keys)
+    self.requests += 1
+    self.last_sent = time.perf_counter()
+
+
+def setup(args):
+  server = FakeAPIServer()
+  for n in range(args.objects):
+    server.apply(f"svc-{n}")
+  return server
+
+
+async def full_sync(args):
+  server, connector = setup(args), CountingConnector()
+  rows = []
+  for cycle in range(args.cycles + 1):
+    if cycle:
+      server.churn(cycle, args)
+    sent, lists = connector.sent, server.lists
+    started = time.perf_counter()
+    await k8s.sync_all_k8s_resources(connector, server.dyn_client)
+    rows.append((cycle, connector.sent - sent, 0, server.lists - lists, time.perf_counter() - started, None))
+  return rows
+
+
+async def watch_sync(args):
+  server, connector = setup(args), CountingConnector()
+  sync = K8sWatchSync(connector, server.dyn_client, k8s.list_resources(server.dyn_client),
+                      to_entity=lambda resource, obj: k8s.k8s_entity(resource, obj, "bench"),
+                      debounce=args.debounce, max_delay=args.debounce * 5, watch_timeout=300)
+  task = asyncio.create_task(sync.run())
+  rows = []
+  try:
+    for cycle in range(args.cycles + 1):
+      sent, deleted, lists = sync.upserted, sync.deleted, server.lists
+      started = time.perf_counter()
+      if cycle:
+        await asyncio.to_thread(server.churn, cycle, args)
+      changed = time.perf_counter()
+      expected = args.objects if cycle == 0 else args.changed + args.deleted
+      while sync.upserted - sent < expected or sync.pending:
+        await asyncio.sleep(0.01)
+      rows.append((cycle, sync.upserted - sent, sync.deleted - deleted, server.lists - lists,
+                   connector.last_sent - started, connector.last_sent - changed))
+  finally:
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+  return rows
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--objects", type=int, default=20_000, help="Services in the cluster")
+  parser.add_argument("--cycles", type=int, default=5, help="Sync cycles after the initial one")
+  parser.add_argument("--changed", type=int, default=200, help="Services edited per cycle")
+  parser.add_argument("--edits-per-change", type=int, default=3, help="Consecutive edits of each changed Service")
+  parser.add_argument("--deleted", type=int, default=20, help="Services replaced by new ones per cycle")
+  parser.add_argument("--debounce", type=float, default=0.5, help="Debounce of the watch sync, seconds")
+  args = parser.parse_args()
+
+  print(f"{args.objects:,} Services, {args.changed} edited {args.edits_per_change}x and {args.deleted} replaced per cycle")
+  print(f"{'sync':<7} {'cycle':>6} {'sent':>8} {'deleted':>8} {'lists':>6} {'time':>8} {'change to send':>15}")
+  for name, measure in (("full", full_sync), ("watch", watch_sync)):
+    for cycle, sent, deleted, lists, elapsed, latency in asyncio.run(measure(args)):
+      latency = f"{latency:>14.2f}s" if latency is not None else f"{'next cycle':>15}"
+      print(f"{name:<7} {'initial' if cycle == 0 else cycle:>6} {sent:>8,} {deleted:>8,} {lists:>6} {elapsed:>7.2f}s {latency}")
+
+
+if __name__ == "__main__":
+  main()
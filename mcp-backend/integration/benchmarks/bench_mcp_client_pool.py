@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Tool-call latency of a generated MCP server's API client with and without the
+shared HTTP client.
+
+Calls the ArgoCD MCP server's make_api_request against a local mock API,
+first with a client per call (no server lifespan) and then inside
+client_lifespan, where every call reuses the pooled client. Each mode runs
+--calls calls sequentially and then in waves of --concurrency.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_mcp_client_pool.py --calls 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../ai_platform_engineering/agents/argocd/mcp"))
+os.environ.setdefault("ARGOCD_API_URL", "http://127.0.0.1")
+os.environ.setdefault("ARGOCD_API_TOKEN", "bench-token")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+class MockApi:
+  def __init__(self, delay=0.0):
+    self.connections = 0
+    api = self
+
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = "HTTP/1.1"
+      disable_nagle_algorithm = True
+
+      def setup(self):
+        api.connections += 1  # one handler per TCP connection
+        super().setup()
+
+      def do_GET(self):
+        time.sleep(delay)
+        body = json.dumps({"items": [{"metadata": {"name": f"app-{i}"}} for i in range(20)]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+      def log_message(self, *args):
+        pass
+
+    self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+    threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+async def timed_call(make_api_request):
+  started = time.perf_counter()
+  success, data = await make_api_request("/api/v1/applications")
+  assert success, data
+  return time.perf_counter() - started
+
+
+async def measure(make_api_request, calls, concurrency):
+  sequential = [await timed_call(make_api_request) for _ in range(calls)]
+  concurrent = []
+  for _ in range(calls // concurrency):
+    concurrent += await asyncio.gather(*(timed_call(make_api_request) for _ in range(concurrency)))
+  return sequential, concurrent
+
+
+def report(label, latencies):
+  ordered = sorted(latencies)
+  p95 = ordered[int(len(ordered) * 0.95) - 1]
+  print(f"{label:<40} p50 {statistics.median(ordered) * 1000:>7.2f} ms   p95 {p95 * 1000:>7.2f} ms")
+
+
+async def run(api, calls, concurrency):
+  from mcp_argocd.api import client
+
+  client.API_URL = api.url
+  for label, pooled in (("client per call", False), ("shared client (lifespan)", True)):
+    api.connections = 0
+    if pooled:
+      async with client.client_lifespan():
+        await timed_call(client.make_api_request)  # warm up
+        sequential, concurrent = await measure(client.make_api_request, calls, concurrency)
+    else:
+      await timed_call(client.make_api_request)
+      sequential, concurrent = await measure(client.make_api_request, calls, concurrency)
+    report(f"{label}, sequential", sequential)
+    report(f"{label}, {concurrency} concurrent", concurrent)
+    print(f"{'':<40} TCP connections opened: {api.connections}")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--calls", type=int, default=500, help="Calls per mode")
+  parser.add_argument("--concurrency", type=int, default=10, help="Concurrent calls per wave")
+  parser.add_argument("--api-delay", type=float, default=0.0, help="Seconds the mock API takes to answer")
+  args = parser.parse_args()
+
+  api = MockApi(delay=args.api_delay)
+  asyncio.run(run(api, args.calls, args.concurrency))
+
+
+if __name__ == "__main__":
+  main()
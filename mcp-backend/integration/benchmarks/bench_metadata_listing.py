@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Listing stored datasources from the RAG server's metadata storage: the
+previous KEYS rag/datasource:* followed by a GET per key vs MetadataStorage's
+ID index (a page of IDs from ZRANGEBYLEX, then one MGET for their values).
+
+--datasources entries are stored the way older servers stored them (plain
+keys, no index), so the first indexed listing includes the one-time SCAN
+backfill of the index. Redis is in-process fakeredis by default, with
+--rtt-ms of latency added to every command to stand in for the network, or a
+real server with --redis-url (the database is flushed).
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_metadata_listing.py --datasources 50000 --rtt-ms 0.2
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import time
+
+RAG = os.path.join(os.path.dirname(__file__), "../../ai_platform_engineering/knowledge_bases/rag")
+sys.path[:0] = [os.path.join(RAG, "server/src"), os.path.join(RAG, "common/src")]
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import fakeredis  # noqa: E402
+import redis.asyncio as redis  # noqa: E402
+
+from common.models.rag import DataSourceInfo  # noqa: E402
+from server.metadata_storage import MetadataStorage  # noqa: E402
+
+
+async def keys_and_get(redis_client):
+  """fetch_all_datasource_info as it was: KEYS, then one GET per key."""
+  keys = await redis_client.keys("rag/datasource:*")
+  return [DataSourceInfo(**json.loads(await redis_client.get(key))) for key in keys]
+
+
+def client(redis_url, rtt):
+  """A Redis client counting commands; with fakeredis, each command first waits `rtt` seconds."""
+  base = redis.Redis if redis_url else fakeredis.aioredis.FakeRedis
+
+  class CountingRedis(base):
+    commands = 0
+
+    async def execute_command(self, *args, **options):
+      CountingRedis.commands += 1
+      if rtt:
+        await asyncio.sleep(rtt)
+      return await super().execute_command(*args, **options)
+
+  return CountingRedis.from_url(redis_url) if redis_url else CountingRedis()
+
+
+async def populate(redis_client, count):
+  now = datetime.datetime.now(datetime.timezone.utc)
+  await redis_client.flushdb()
+  for start in range(0, count, 1000):
+    pipe = redis_client.pipeline(transaction=False)
+    for i in range(start, min(start + 1000, count)):
+      source_info = DataSourceInfo(datasource_id=f"src_{i:06d}", description=f"Datasource {i}", source_type="web",
+                                   path=f"https://example.com/docs/{i}", created_at=now, last_updated=now, total_documents=i % 500)
+      pipe.set(f"rag/datasource:{source_info.datasource_id}", json.dumps(source_info.model_dump(), default=str))
+    await pipe.execute()
+
+
+async def measure(redis_client, listing):
+  type(redis_client).commands = 0
+  started = time.perf_counter()
+  result = await listing()
+  return len(result), time.perf_counter() - started, type(redis_client).commands
+
+
+async def run(args):
+  redis_client = client(args.redis_url, 0 if args.redis_url else args.rtt_ms / 1000)
+  await populate(redis_client, args.datasources)
+  storage = MetadataStorage(redis_client)
+
+  async def first_page():
+    page, _ = await storage.list_datasource_info(limit=args.page_size)
+    return page
+
+  return [
+    ("KEYS + GET per key, all", await measure(redis_client, lambda: keys_and_get(redis_client))),
+    ("index backfill + MGET, all", await measure(redis_client, storage.fetch_all_datasource_info)),
+    ("index + MGET, all", await measure(redis_client, storage.fetch_all_datasource_info)),
+    (f"index + MGET, page of {args.page_size}", await measure(redis_client, first_page)),
+  ]
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--datasources", type=int, default=50_000, help="Stored datasources")
+  parser.add_argument("--page-size", type=int, default=100, help="Limit of the paginated listing")
+  parser.add_argument("--rtt-ms", type=float, default=0.2, help="Latency added to each fakeredis command")
+  parser.add_argument("--redis-url", help="Use this Redis server (flushed) instead of fakeredis")
+  args = parser.parse_args()
+
+  print(f"{args.datasources:,} datasources, {'Redis at ' + args.redis_url if args.redis_url else f'fakeredis, {args.rtt_ms:g} ms RTT'}")
+  print(f"{'listing':<30} {'entries':>8} {'time':>9} {'Redis cmds':>11}")
+  for name, (entries, elapsed, commands) in asyncio.run(run(args)):
+    print(f"{name:<30} {entries:>8,} {elapsed:>8.2f}s {commands:>11,}")
+
+
+if __name__ == "__main__":
+  main()
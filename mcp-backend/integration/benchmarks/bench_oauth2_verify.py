@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Authenticated request throughput of OAuth2Middleware against a local JWKS stub.
+
+A Starlette app behind OAuth2Middleware is driven in-process over httpx's
+ASGI transport with --clients bearer tokens, each reused for --requests
+requests (the pattern of streaming reconnects), and verify_token is also
+timed on its own. The JWKS endpoint is a local
+HTTP server that counts fetches. Runs once with OAUTH2_TOKEN_CACHE_SIZE=0
+(full signature check per request) and once with the verified-token cache,
+then expires the JWKS and fires --burst concurrent verifications to count
+refresh fetches.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_oauth2_verify.py --requests 5000
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+KID = "bench-key"
+ISSUER = "https://idp.example.com"
+AUDIENCE = "agents"
+CLIENT_ID = "bench"
+
+
+class JwksStub:
+  def __init__(self, jwk, delay=0.0):
+    self.fetches = 0
+    stub = self
+
+    class Handler(BaseHTTPRequestHandler):
+      def do_GET(self):
+        stub.fetches += 1
+        time.sleep(delay)
+        body = json.dumps({"keys": [jwk]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", "max-age=300")
+        self.end_headers()
+        self.wfile.write(body)
+
+      def log_message(self, *args):
+        pass
+
+    self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    self.url = f"http://127.0.0.1:{self.httpd.server_port}/jwks"
+    threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+def load_middleware(jwks_url, cache_size):
+  os.environ.update({
+    "A2A_AUTH_OAUTH2": "true",
+    "JWKS_URI": jwks_url,
+    "AUDIENCE": AUDIENCE,
+    "ISSUER": ISSUER,
+    "OAUTH2_CLIENT_ID": CLIENT_ID,
+    "OAUTH2_TOKEN_CACHE_SIZE": str(cache_size),
+  })
+  from ai_platform_engineering.utils.auth import oauth2_middleware
+  return importlib.reload(oauth2_middleware)
+
+
+async def run(label, module, tokens, requests_per_token):
+  async def ok(request):
+    return PlainTextResponse("ok")
+
+  app = Starlette(routes=[Route("/", ok, methods=["POST"])])
+  app.add_middleware(module.OAuth2Middleware)
+  transport = httpx.ASGITransport(app=app)
+  async with httpx.AsyncClient(transport=transport, base_url="http://agent") as client:
+    async def send(token):
+      response = await client.post("/", headers={"Authorization": f"Bearer {token}"})
+      assert response.status_code == 200, response.text
+
+    for token in tokens:  # warm up: first verification and JWKS fetch
+      await send(token)
+    started = time.perf_counter()
+    for _ in range(requests_per_token):
+      await asyncio.gather(*(send(token) for token in tokens))
+    elapsed = time.perf_counter() - started
+
+  total = requests_per_token * len(tokens)
+  print(f"{label:<24} {total / elapsed:>10,.0f} req/s   {elapsed / total * 1e6:>8.1f} us/request")
+
+  started = time.perf_counter()
+  for _ in range(requests_per_token):
+    for token in tokens:
+      module.verify_token(token)
+  elapsed = time.perf_counter() - started
+  print(f"{'':<24} verify_token alone: {elapsed / total * 1e6:.1f} us/call")
+
+
+def burst(module, stub, tokens, count):
+  module._jwks_cache._expires_at = 0
+  before = stub.fetches
+  threads = [threading.Thread(target=module.verify_token, args=(tokens[i % len(tokens)],)) for i in range(count)]
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join()
+  print(f"{count} concurrent verifications after JWKS expiry: {stub.fetches - before} JWKS fetch(es)")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--requests", type=int, default=5000, help="Requests per token")
+  parser.add_argument("--clients", type=int, default=10, help="Distinct bearer tokens")
+  parser.add_argument("--burst", type=int, default=50, help="Concurrent verifications after JWKS expiry")
+  parser.add_argument("--jwks-delay", type=float, default=0.05, help="Seconds the JWKS stub takes to answer")
+  args = parser.parse_args()
+
+  key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+  jwk = {**jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key(), as_dict=True), "kid": KID}
+  now = int(time.time())
+  tokens = [
+    jwt.encode({"iss": ISSUER, "aud": AUDIENCE, "cid": CLIENT_ID, "sub": f"user-{i}", "iat": now, "exp": now + 3600},
+               key, algorithm="RS256", headers={"kid": KID})
+    for i in range(args.clients)
+  ]
+  stub = JwksStub(jwk, delay=args.jwks_delay)
+
+  for label, cache_size in (("full verification", 0), ("verified-token cache", 1024)):
+    module = load_middleware(stub.url, cache_size)
+    fetches = stub.fetches
+    asyncio.run(run(label, module, tokens, args.requests))
+    print(f"{'':<24} JWKS fetches: {stub.fetches - fetches}")
+
+  burst(module, stub, tokens, args.burst)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+First-chunk latency of PARALLEL sub-agent fan-out with skewed agents.
+
+Runs AIPlatformEngineerA2AExecutor._stream_from_multiple_agents against stub
+agents whose first chunk is delayed by --delays-ms (one value per agent) and
+records, per request:
+
+  first chunk  first streamed artifact (streaming merge)
+  summary      aggregated summary artifact; before the streaming merge this
+               was the first content the caller saw
+
+--deadline-s sets PARALLEL_AGENT_TIMEOUT to show the partial-result cut-off.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_parallel_fanout.py --delays-ms 20 250 1000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from a2a.types import Task, TaskArtifactUpdateEvent, TaskState, TaskStatus
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from stub_a2a_server import StubAgentConfig, start_stub_agents  # noqa: E402
+
+# The supervisor loads ./prompt_config.yaml on import; use its built-in prompts
+os.chdir(Path(__file__).resolve().parent)
+
+# Importing the executor creates the platform registry; keep it from probing agents
+with patch('ai_platform_engineering.multi_agents.agent_registry.AgentRegistry._load_agents'):
+  from ai_platform_engineering.multi_agents.platform_engineer.protocol_bindings.a2a import agent_executor  # noqa: E402
+from ai_platform_engineering.utils.a2a_common.transport import get_transport_pool  # noqa: E402
+
+
+class TimingEventQueue:
+  def __init__(self):
+    self.started = time.perf_counter()
+    self.first_chunk = None
+    self.summary = None
+
+  async def enqueue_event(self, event):
+    if isinstance(event, TaskArtifactUpdateEvent):
+      elapsed = time.perf_counter() - self.started
+      if event.last_chunk:
+        self.summary = elapsed
+      elif self.first_chunk is None:
+        self.first_chunk = elapsed
+
+
+def percentile(samples, pct):
+  ordered = sorted(samples)
+  return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(label: str, samples):
+  ms = [s * 1000 for s in samples]
+  print(f"  {label:<12} p50={percentile(ms, 50):8.1f} ms  p95={percentile(ms, 95):8.1f} ms  mean={statistics.mean(ms):8.1f} ms")
+
+
+async def run(args) -> None:
+  servers = start_stub_agents([
+    StubAgentConfig(name=f"agent{i}", chunks=args.chunks, first_chunk_delay=delay / 1000, chunk_interval=args.interval_ms / 1000)
+    for i, delay in enumerate(args.delays_ms)
+  ])
+  agents = [(server.config.name, server.url) for server in servers]
+
+  with patch.object(agent_executor, 'AIPlatformEngineerA2ABinding', lambda: SimpleNamespace()):
+    executor = agent_executor.AIPlatformEngineerA2AExecutor()
+  if args.deadline_s:
+    executor.parallel_agent_timeout = args.deadline_s
+
+  first_chunks, summaries = [], []
+  try:
+    for i in range(args.requests):
+      task = Task(id=f"task-{i}", context_id=f"ctx-{i}", status=TaskStatus(state=TaskState.submitted))
+      queue = TimingEventQueue()
+      await executor._stream_from_multiple_agents(agents, "bench", task, queue)
+      first_chunks.append(queue.first_chunk)
+      summaries.append(queue.summary)
+
+    print(f"\n{args.requests} fan-outs over {len(agents)} stub agents, first-chunk delays {args.delays_ms} ms, "
+          f"{args.chunks} chunks {args.interval_ms} ms apart, deadline {executor.parallel_agent_timeout:.1f}s")
+    report("first chunk", first_chunks)
+    report("summary", summaries)
+  finally:
+    await get_transport_pool().aclose()
+    for server in servers:
+      server.stop()
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--requests", type=int, default=30, help="Number of fan-out requests")
+  parser.add_argument("--delays-ms", type=float, nargs="+", default=[20, 250, 1000], help="First-chunk delay per stub agent")
+  parser.add_argument("--chunks", type=int, default=5, help="Chunks streamed by each agent")
+  parser.add_argument("--interval-ms", type=float, default=10, help="Delay between chunks")
+  parser.add_argument("--deadline-s", type=float, default=0, help="Per-agent deadline (default: PARALLEL_AGENT_TIMEOUT)")
+  asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Routing accuracy and latency of the supervisor query router.
+
+Prompts and expected agents come from the evaluation datasets
+(evals/datasets/*.yaml); agent cards are loaded from each agent's
+agentcard.py. Three routers are compared:
+
+  legacy          substring scan over agent names (previous _route_query)
+  compiled        QueryRouter: Aho-Corasick over names/aliases, word boundaries
+  compiled+tfidf  QueryRouter with TF-IDF scoring over agent card skills
+
+Accuracy is reported as exact agent-set match plus precision/recall of the
+agents the router picked. COMPLEX decisions without agents count as "no
+pick" (the Deep Agent decides), so recall shows how often a fast path was
+taken. Latency is also measured with many synthetic agents registered.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_query_router.py --synthetic-agents 500
+"""
+
+import argparse
+import importlib.util
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import yaml
+
+from ai_platform_engineering.multi_agents.query_router import QueryRouter, RoutingType, TfidfSkillScorer
+
+ROOT = Path(__file__).resolve().parents[2]
+DATASETS = [ROOT / "evals" / "datasets" / "single_agent.yaml", ROOT / "evals" / "datasets" / "multi_agent.yaml"]
+AGENTS = ["ARGOCD", "BACKSTAGE", "CONFLUENCE", "GITHUB", "JIRA", "KOMODOR", "PAGERDUTY", "SLACK", "SPLUNK", "WEBEX", "RAG"]
+KB_KEYWORDS = ["docs:", "@docs"]
+ORCH_KEYWORDS = ["analyze", "compare", "if", "then", "create", "update", "based on", "depending on", "which", "that have"]
+
+
+def load_prompts():
+  prompts = []
+  for path in DATASETS:
+    for item in yaml.safe_load(path.read_text())["prompts"]:
+      query = next(m["content"] for m in item["messages"] if m["role"] == "user")
+      # Dataset agent ids look like "github_tools_agent"; registry names are upper case
+      expected = {name.replace("_tools_agent", "").upper() for name in item["expected_agents"]}
+      prompts.append((item["id"], query, expected))
+  return prompts
+
+
+def load_card(agent_name: str):
+  name = agent_name.lower()
+  path = ROOT / "ai_platform_engineering" / "agents" / name / f"agent_{name}" / "agentcard.py"
+  if not path.exists():
+    return None
+  spec = importlib.util.spec_from_file_location(f"bench_agentcard_{name}", path)
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  return {"description": module.AGENT_DESCRIPTION, "skills": [module.agent_skill.model_dump()]}
+
+
+def make_registry(names, cards):
+  return SimpleNamespace(
+    AGENT_ADDRESS_MAPPING={name: f"http://{name.lower()}:8000" for name in names},
+    agents={name: cards.get(name) for name in names},
+    generation=1,
+  )
+
+
+def legacy_route(registry, query):
+  """The substring router this benchmark replaces, kept for comparison."""
+  query_lower = query.lower()
+  if any(query_lower.startswith(k) for k in KB_KEYWORDS) and "RAG" in registry.AGENT_ADDRESS_MAPPING:
+    return RoutingType.DIRECT, ["RAG"]
+  mentioned = [name for name in registry.AGENT_ADDRESS_MAPPING if name.lower() in query_lower]
+  if not mentioned:
+    return RoutingType.COMPLEX, []
+  if len(mentioned) == 1:
+    return RoutingType.DIRECT, mentioned
+  if any(k in query_lower for k in ORCH_KEYWORDS):
+    return RoutingType.COMPLEX, mentioned
+  return RoutingType.PARALLEL, mentioned
+
+
+def router_route(router):
+  def route(registry, query):
+    decision = router.route(query)
+    return decision.type, [name for name, _ in decision.agents]
+  return route
+
+
+def accuracy(route, registry, prompts, verbose=False):
+  exact = tp = picked = expected_total = 0
+  for prompt_id, query, expected in prompts:
+    routing_type, agents = route(registry, query)
+    agents = set(agents)
+    exact += agents == expected
+    tp += len(agents & expected)
+    picked += len(agents)
+    expected_total += len(expected)
+    if verbose and agents != expected:
+      print(f"    {prompt_id:<40} {routing_type.value:<8} got={sorted(agents)} expected={sorted(expected)}")
+  return exact / len(prompts), tp / picked if picked else 0.0, tp / expected_total
+
+
+def latency_us(route, registry, prompts, rounds):
+  queries = [query for _, query, _ in prompts]
+  route(registry, queries[0])  # compile outside the timed loop
+  start = time.perf_counter()
+  for _ in range(rounds):
+    for query in queries:
+      route(registry, query)
+  return (time.perf_counter() - start) / (rounds * len(queries)) * 1e6
+
+
+def routers(registry, min_confidence):
+  return [
+    ("legacy", legacy_route),
+    ("compiled", router_route(QueryRouter(registry, KB_KEYWORDS, ORCH_KEYWORDS))),
+    ("compiled+tfidf", router_route(QueryRouter(
+      registry, KB_KEYWORDS, ORCH_KEYWORDS, scorer=TfidfSkillScorer(), min_confidence=min_confidence
+    ))),
+  ]
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--rounds", type=int, default=200, help="Passes over the dataset for latency")
+  parser.add_argument("--synthetic-agents", type=int, default=500, help="Extra registered agents for the scaling run")
+  parser.add_argument("--min-confidence", type=float, default=0.35, help="Scorer confidence for a direct route")
+  parser.add_argument("--verbose", action="store_true", help="Print misrouted prompts")
+  args = parser.parse_args()
+
+  prompts = load_prompts()
+  cards = {name: load_card(name) for name in AGENTS}
+  registry = make_registry(AGENTS, cards)
+
+  print(f"{len(prompts)} prompts, {len(AGENTS)} agents ({sum(c is not None for c in cards.values())} with cards)\n")
+  print(f"  {'router':<16} {'exact':>7} {'precision':>10} {'recall':>8} {'µs/route':>10}")
+  for label, route in routers(registry, args.min_confidence):
+    exact, precision, recall = accuracy(route, registry, prompts)
+    print(f"  {label:<16} {exact:7.1%} {precision:10.1%} {recall:8.1%} {latency_us(route, registry, prompts, args.rounds):10.1f}")
+    if args.verbose:
+      accuracy(route, registry, prompts, verbose=True)
+
+  names = AGENTS + [f"SERVICE_{i}" for i in range(args.synthetic_agents)]
+  scaled = make_registry(names, cards)
+  print(f"\nwith {len(names)} registered agents:")
+  for label, route in routers(scaled, args.min_confidence):
+    print(f"  {label:<16} {latency_us(route, scaled, prompts, max(1, args.rounds // 10)):10.1f} µs/route")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Pages/s and chunks/s of the RAG loader with and without the staged ingestion
+pipeline.
+
+Serves a local fixture corpus (sitemap plus --pages HTML pages) and ingests it
+with Loader.load_url into an in-memory vector store, once embedding and
+storing each page on its own and once through the pipeline, which packs chunks
+from many pages into fixed-size embedding batches and groups upserts. The
+embedding model is deterministic. Like a remote embedding API, it takes
+--embed-latency per request plus --embed-latency-per-text per input, and
+serves at most --embed-max-inflight requests at a time (a provider concurrency
+or rate limit). --upsert-latency adds a round trip per vector store write.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_rag_ingestion_pipeline.py --pages 300
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RAG = os.path.join(os.path.dirname(__file__), "../../ai_platform_engineering/knowledge_bases/rag")
+sys.path[:0] = [os.path.join(RAG, "server/src"), os.path.join(RAG, "common/src")]
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding  # noqa: E402
+from langchain_core.vectorstores import InMemoryVectorStore  # noqa: E402
+from pydantic import PrivateAttr  # noqa: E402
+
+from common.job_manager import JobInfo, JobStatus  # noqa: E402
+from common.models.rag import DataSourceInfo  # noqa: E402
+from server.loader.loader import Loader  # noqa: E402
+from server.loader.pipeline import PipelineConfig  # noqa: E402
+from server.metadata_storage import MetadataStorage  # noqa: E402
+
+WORDS = "kubernetes deployment rollout service ingress argocd sync health status cluster namespace pod replica".split()
+
+
+class Corpus:
+  def __init__(self, pages, paragraphs):
+    self.pages = {}
+    for n in range(pages):
+      body = "".join(
+        f"<p>{' '.join(WORDS[(n + p + w) % len(WORDS)] for w in range(60))}.</p>" for p in range(paragraphs))
+      self.pages[f"/docs/page-{n}.html"] = f"<html lang='en'><head><title>Page {n}</title></head><body><nav>Menu</nav>{body}</body></html>"
+    corpus = self
+
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = "HTTP/1.1"
+      disable_nagle_algorithm = True
+
+      def do_GET(self):
+        if self.path == "/sitemap.xml":
+          locs = "".join(f"<url><loc>{corpus.url}{path}</loc></url>" for path in corpus.pages)
+          body = f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</urlset>'.encode()
+        elif self.path in corpus.pages:
+          body = corpus.pages[self.path].encode()
+        else:
+          self.send_response(404)
+          self.send_header("Content-Length", "0")
+          self.end_headers()
+          return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+      def log_message(self, *args):
+        pass
+
+    self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+    threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+class RemoteEmbeddings(DeterministicFakeEmbedding):
+  latency: float = 0.0
+  latency_per_text: float = 0.0
+  max_inflight: int = 4
+  calls: int = 0
+  _inflight: asyncio.Semaphore = PrivateAttr(default=None)
+
+  async def aembed_documents(self, texts):
+    if self._inflight is None:
+      self._inflight = asyncio.Semaphore(self.max_inflight)
+    async with self._inflight:
+      self.calls += 1
+      await asyncio.sleep(self.latency + self.latency_per_text * len(texts))
+      return self.embed_documents(texts)
+
+
+class RemoteVectorStore(InMemoryVectorStore):
+  """In-memory store with a round trip per write; accepts precomputed embeddings like Milvus."""
+
+  def __init__(self, embedding, latency):
+    super().__init__(embedding=embedding)
+    self.latency = latency
+    self.writes = 0
+
+  async def aadd_documents(self, documents, **kwargs):
+    self.writes += 1
+    await asyncio.sleep(self.latency)
+    return await super().aadd_documents(documents, **kwargs)
+
+  def add_embeddings(self, texts, embeddings, metadatas=None, ids=None, **kwargs):
+    self.writes += 1
+    time.sleep(self.latency)
+    for id_, text, vector, metadata in zip(ids, texts, embeddings, metadatas):
+      self.store[id_] = {"id": id_, "vector": vector, "text": text, "metadata": metadata}
+    return ids
+
+
+class InMemoryRedis:
+  def __init__(self):
+    self.values, self.sets = {}, {}
+
+  async def get(self, key):
+    return self.values.get(key)
+
+  async def set(self, key, value):
+    self.values[key] = value
+
+  async def sadd(self, key, *members):
+    self.sets.setdefault(key, set()).update(members)
+
+  async def smembers(self, key):
+    return set(self.sets.get(key, set()))
+
+
+class StubJobManager:
+  def __init__(self, total):
+    self.total = total
+
+  async def update_job(self, *args, **kwargs):
+    return True
+
+  async def is_job_terminated(self, job_id):
+    return False
+
+  async def get_job(self, job_id):
+    return JobInfo(job_id=job_id, status=JobStatus.IN_PROGRESS, message="", processed_counter=self.total, failed_counter=0,
+                   created_at=datetime.datetime.now(), completed_at=None, total=self.total, errors=[])
+
+
+async def ingest(corpus, config, args):
+  embeddings = RemoteEmbeddings(size=256, latency=args.embed_latency, latency_per_text=args.embed_latency_per_text,
+                                max_inflight=args.embed_max_inflight)
+  vstore = RemoteVectorStore(embeddings, args.upsert_latency)
+  now = datetime.datetime.now(datetime.timezone.utc)
+  datasource = DataSourceInfo(datasource_id=DataSourceInfo.generate_id_from_url(corpus.url), description="bench", source_type="web",
+                              path=corpus.url, default_chunk_size=args.chunk_size, default_chunk_overlap=0, created_at=now, last_updated=now)
+  loader = Loader(vstore, MetadataStorage(redis_client=InMemoryRedis()), datasource, StubJobManager(len(corpus.pages)),  # type: ignore
+                  args.fetch_concurrency, pipeline_config=config)
+  started = time.perf_counter()
+  async with loader:
+    await loader.load_url(corpus.url, f"job_{uuid.uuid4().hex}", check_for_site_map=True)
+  elapsed = time.perf_counter() - started
+  return elapsed, len(vstore.store), embeddings.calls, vstore.writes
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--pages", type=int, default=300, help="Pages in the fixture corpus")
+  parser.add_argument("--paragraphs", type=int, default=8, help="Paragraphs per page")
+  parser.add_argument("--chunk-size", type=int, default=1000, help="Chunk size of the datasource")
+  parser.add_argument("--fetch-concurrency", type=int, default=30, help="MAX_INGESTION_CONCURRENCY")
+  parser.add_argument("--embed-latency", type=float, default=0.05, help="Seconds per embedding request")
+  parser.add_argument("--embed-latency-per-text", type=float, default=0.0005, help="Additional seconds per embedded chunk")
+  parser.add_argument("--embed-max-inflight", type=int, default=4, help="Embedding requests the provider serves at once")
+  parser.add_argument("--upsert-latency", type=float, default=0.02, help="Seconds per vector store write")
+  parser.add_argument("--embed-batch-size", type=int, default=64)
+  parser.add_argument("--embed-concurrency", type=int, default=4)
+  args = parser.parse_args()
+
+  corpus = Corpus(args.pages, args.paragraphs)
+  modes = (
+    ("per page", PipelineConfig(enabled=False)),
+    ("pipeline", PipelineConfig(embed_batch_size=args.embed_batch_size, embed_concurrency=args.embed_concurrency)),
+  )
+  for label, config in modes:
+    elapsed, chunks, calls, writes = asyncio.run(ingest(corpus, config, args))
+    print(f"{label:<10} {args.pages} pages, {chunks} chunks in {elapsed:6.2f}s   "
+          f"{args.pages / elapsed:7.1f} pages/s {chunks / elapsed:8.1f} chunks/s   "
+          f"embedding requests {calls:>4}  vector store writes {writes:>4}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Time to first URL, total read time and peak RSS of the RAG loader reading a
+large gzipped sitemap index: the previous full read (download, gunzip and
+BeautifulSoup "xml" parse of each sitemap, then the URL list) vs the streaming
+SitemapReader used by load_url.
+
+A local HTTP server serves a sitemap index of gzipped child sitemaps with
+--children x 50,000 URLs. Each mode runs in its own process, so peak RSS is
+comparable; both dedupe the URLs the way the loader does.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_sitemap_streaming.py --children 4
+"""
+
+import argparse
+import asyncio
+import datetime
+import gzip
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RAG = os.path.join(os.path.dirname(__file__), "../../ai_platform_engineering/knowledge_bases/rag")
+sys.path[:0] = [os.path.join(RAG, "server/src"), os.path.join(RAG, "common/src")]
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import aiohttp  # noqa: E402
+from bs4 import BeautifulSoup  # noqa: E402
+
+from common.models.rag import DataSourceInfo  # noqa: E402
+from server.loader.loader import Loader  # noqa: E402
+
+URLS_PER_SITEMAP = 50_000  # The sitemap protocol's per-file limit
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def build_files(base, children):
+  files = {"/sitemap_index.xml.gz": gzip.compress(
+    (f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex {NS}>'
+     + "".join(f"<sitemap><loc>{base}/sitemap-{i}.xml.gz</loc></sitemap>" for i in range(children))
+     + "</sitemapindex>").encode())}
+  for i in range(children):
+    entries = "".join(f"<url><loc>{base}/docs/section-{i}/page-{n}.html</loc><lastmod>2025-06-01</lastmod></url>"
+                      for n in range(URLS_PER_SITEMAP))
+    files[f"/sitemap-{i}.xml.gz"] = gzip.compress(f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{entries}</urlset>'.encode())
+  return files
+
+
+def serve(children):
+  files = {}
+
+  class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+      body = files[self.path]
+      self.send_response(200)
+      self.send_header("Content-Type", "application/x-gzip")
+      self.send_header("Content-Length", str(len(body)))
+      self.end_headers()
+      try:
+        self.wfile.write(body)
+      except (BrokenPipeError, ConnectionResetError):
+        pass
+
+    def log_message(self, *args):
+      pass
+
+  httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+  base = f"http://127.0.0.1:{httpd.server_port}"
+  files.update(build_files(base, children))
+  threading.Thread(target=httpd.serve_forever, daemon=True).start()
+  return base
+
+
+async def full_read(session, sitemap_url):
+  """The loader's sitemap read before streaming: whole body, gunzip, BeautifulSoup, recurse, dedupe."""
+  async with session.get(sitemap_url) as resp:
+    soup = BeautifulSoup(gzip.decompress(await resp.read()), "xml")
+  locs = [tag.get_text(strip=True) for tag in soup.find_all(lambda t: isinstance(t.name, str) and t.name.lower().endswith("loc"))]
+  if soup.find(True).name.lower().endswith("sitemapindex"):
+    urls = []
+    for child in locs:
+      urls.extend(await full_read(session, child))
+    seen = set()
+    return [u for u in urls if not (u in seen or seen.add(u))]
+  return locs
+
+
+async def run(mode, base):
+  now = datetime.datetime.now()
+  datasource = DataSourceInfo(datasource_id="src_bench", description="", source_type="web", path="", created_at=now, last_updated=now)
+  sitemap_url = base + "/sitemap_index.xml.gz"
+  baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  started = time.perf_counter()
+  first = None
+  count = 0
+  if mode == "full":
+    async with aiohttp.ClientSession() as session:
+      for _ in await full_read(session, sitemap_url):
+        first = first or time.perf_counter()
+        count += 1
+  else:
+    async with Loader(None, None, datasource, None, 1) as loader:  # type: ignore
+      seen = set()
+      async for entry in loader.iter_sitemap_urls(sitemap_url):
+        key = loader.document_key(entry.loc)
+        if key not in seen:
+          seen.add(key)
+          first = first or time.perf_counter()
+          count += 1
+  total = time.perf_counter() - started
+  peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024
+  return {"urls": count, "first_url_s": first - started, "total_s": total, "peak_rss_mb": peak}
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--children", type=int, default=4, help="Child sitemaps of 50,000 URLs each")
+  parser.add_argument("--mode", choices=["full", "streaming"], help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.mode:
+    base = serve(args.children)
+    print(json.dumps(asyncio.run(run(args.mode, base))))
+    return
+
+  print(f"{args.children * URLS_PER_SITEMAP:,} URLs in {args.children} gzipped child sitemaps")
+  print(f"{'mode':<10} {'URLs':>9} {'first URL':>10} {'total':>8} {'peak RSS':>10}")
+  for mode in ("full", "streaming"):
+    out = subprocess.run([sys.executable, __file__, "--children", str(args.children), "--mode", mode],
+                         check=True, capture_output=True, text=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    print(f"{mode:<10} {result['urls']:>9,} {result['first_url_s']:>9.2f}s {result['total_s']:>7.2f}s {result['peak_rss_mb']:>7.0f} MB")
+
+
+if __name__ == "__main__":
+  main()
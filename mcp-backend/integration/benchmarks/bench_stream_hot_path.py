@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Events per second per core on the supervisor's streaming hot path.
+
+Three paths are driven with token-sized chunks (no network, no LLM):
+
+  supervisor  AIPlatformEngineerA2AExecutor.execute relaying a stub graph stream
+  direct      _stream_from_sub_agent relaying a sub-agent's A2A stream (DIRECT routing)
+  tool        A2ARemoteAgentConnectTool._arun consuming a sub-agent's A2A stream
+              (ENABLE_ARTIFACT_STREAMING=true, so every chunk reaches the writer)
+
+CPU time (time.process_time) is measured, so results are per core. Logging is
+at INFO, as in the deployed supervisor, with output discarded. Run once with
+A2A_STREAM_HOT_PATH=false and once with true to compare coalescing and
+sampled logging against plain relaying.
+
+Usage:
+    PYTHONPATH=. python integration/benchmarks/bench_stream_hot_path.py --chunks 20000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+from a2a.server.agent_execution import RequestContext
+from a2a.types import (
+    Artifact,
+    Message,
+    MessageSendParams,
+    Part,
+    Role,
+    SendStreamingMessageResponse,
+    SendStreamingMessageSuccessResponse,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+# The supervisor loads ./prompt_config.yaml on import; use its built-in prompts
+os.chdir(Path(__file__).resolve().parent)
+
+# Importing the executor creates the platform registry; keep it from probing agents
+with patch('ai_platform_engineering.multi_agents.agent_registry.AgentRegistry._load_agents'):
+  from ai_platform_engineering.multi_agents.platform_engineer.protocol_bindings.a2a import agent_executor  # noqa: E402
+from ai_platform_engineering.utils.a2a_common import a2a_remote_agent_connect  # noqa: E402
+
+TOKEN = "tok "
+
+
+class StubBinding:
+  def __init__(self, chunks):
+    self.chunks = chunks
+
+  async def stream(self, query, context_id, trace_id=None):
+    for _ in range(self.chunks):
+      yield {'is_task_complete': False, 'require_user_input': False, 'content': TOKEN}
+    yield {'is_task_complete': True, 'require_user_input': False, 'content': ''}
+
+
+class CountingEventQueue:
+  def __init__(self):
+    self.events = 0
+
+  async def enqueue_event(self, event):
+    self.events += 1
+
+
+def sub_agent_responses(chunks):
+  task_id, context_id, artifact_id = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+  responses = [
+    SendStreamingMessageResponse(root=SendStreamingMessageSuccessResponse(id="1", result=TaskArtifactUpdateEvent(
+      task_id=task_id, context_id=context_id, append=i > 0, last_chunk=False,
+      artifact=Artifact(artifact_id=artifact_id, parts=[Part(root=TextPart(text=TOKEN))]),
+    )))
+    for i in range(chunks)
+  ]
+  responses.append(SendStreamingMessageResponse(root=SendStreamingMessageSuccessResponse(id="1", result=TaskStatusUpdateEvent(
+    task_id=task_id, context_id=context_id, final=True, status=TaskStatus(state=TaskState.completed),
+  ))))
+  return responses
+
+
+class StubSubAgentClient:
+  def __init__(self, responses):
+    self.responses = responses
+
+  async def send_message_streaming(self, request):
+    for response in self.responses:
+      yield response
+
+
+class StubPool:
+  def __init__(self, client):
+    self.client = client
+
+  @asynccontextmanager
+  async def session(self, agent_url):
+    yield self.client
+
+
+def make_context(query: str) -> RequestContext:
+  message = Message(role=Role.user, parts=[Part(root=TextPart(text=query))], message_id=str(uuid.uuid4()), context_id=str(uuid.uuid4()))
+  return RequestContext(request=MessageSendParams(message=message))
+
+
+def make_executor(chunks):
+  with patch.object(agent_executor, 'AIPlatformEngineerA2ABinding', lambda: StubBinding(chunks)):
+    executor = agent_executor.AIPlatformEngineerA2AExecutor()
+  executor.routing_mode = "DEEP_AGENT_SEQUENTIAL_ORCHESTRATION"
+  return executor
+
+
+async def bench_supervisor(chunks, responses):
+  executor = make_executor(chunks)
+  queue = CountingEventQueue()
+  await executor.execute(make_context("bench"), queue)
+  return queue.events
+
+
+async def bench_direct(chunks, responses):
+  executor = make_executor(0)
+  queue = CountingEventQueue()
+  task = Task(id="task", context_id="ctx", status=TaskStatus(state=TaskState.submitted))
+  with patch.object(agent_executor, 'get_transport_pool', lambda: StubPool(StubSubAgentClient(responses))):
+    await executor._stream_from_sub_agent("http://stub", "bench", task, queue)
+  return queue.events
+
+
+async def bench_tool(chunks, responses):
+  os.environ["ENABLE_ARTIFACT_STREAMING"] = "true"
+  tool = a2a_remote_agent_connect.A2ARemoteAgentConnectTool(remote_agent_card="http://stub", skill_id="stub", name="stub", description="stub")
+  tool._client = StubSubAgentClient(responses)
+  written = []
+  with patch.object(a2a_remote_agent_connect, 'get_stream_writer', lambda: written.append):
+    await tool._arun("bench", trace_id="0" * 32)
+  return len(written)
+
+
+async def run(args):
+  print(f"A2A_STREAM_HOT_PATH={os.getenv('A2A_STREAM_HOT_PATH', 'false')}  {args.chunks} chunks of {len(TOKEN)} chars")
+  # Sub-agent responses are built up front so model construction is not timed
+  warm_up, responses = sub_agent_responses(100), sub_agent_responses(args.chunks)
+  for label, bench in (("supervisor", bench_supervisor), ("direct", bench_direct), ("tool", bench_tool)):
+    await bench(100, warm_up)
+    start = time.process_time()
+    emitted = await bench(args.chunks, responses)
+    elapsed = time.process_time() - start
+    print(f"  {label:<11} {args.chunks / elapsed:10,.0f} chunks/s/core   {emitted:6} events out")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--chunks", type=int, default=20000, help="Chunks per path")
+  args = parser.parse_args()
+  logging.basicConfig(level=logging.INFO, stream=open(os.devnull, "w"), force=True)
+  asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,138 @@
+# Copyright 2025 CNOE Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Minimal local A2A sub-agent for benchmarks.
+
+Serves an agent card (with ETag / 304 support) and answers message/stream
+JSON-RPC calls with a Server-Sent Events stream of artifact-update chunks
+followed by a completed status-update. Each server runs uvicorn in a
+background thread on an ephemeral port.
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import List
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+
+@dataclass
+class StubAgentConfig:
+  name: str
+  chunks: int = 5
+  chunk_text: str = "chunk "
+  first_chunk_delay: float = 0.0   # seconds before the first chunk
+  chunk_interval: float = 0.0      # seconds between chunks
+  card_delay: float = 0.0          # extra latency on the agent card endpoint
+
+
+def _sse(request_id, result) -> str:
+  return f"data: {json.dumps({'jsonrpc': '2.0', 'id': request_id, 'result': result})}\n\n"
+
+
+def build_app(config: StubAgentConfig) -> Starlette:
+  card = {
+    "name": config.name,
+    "description": f"Stub {config.name} agent",
+    "url": "http://0.0.0.0:8000/",
+    "version": "0.1.0",
+    "capabilities": {"streaming": True},
+    "defaultInputModes": ["text"],
+    "defaultOutputModes": ["text"],
+    "skills": [{"id": config.name, "name": config.name, "description": "stub", "tags": [config.name]}],
+  }
+  etag = f'"{config.name}-v1"'
+  stats = {"card_requests": 0, "card_not_modified": 0, "stream_requests": 0}
+
+  async def agent_card(request: Request):
+    stats["card_requests"] += 1
+    if config.card_delay:
+      await asyncio.sleep(config.card_delay)
+    if request.headers.get("if-none-match") == etag:
+      stats["card_not_modified"] += 1
+      return Response(status_code=304, headers={"etag": etag})
+    return JSONResponse(card, headers={"etag": etag})
+
+  async def rpc(request: Request):
+    stats["stream_requests"] += 1
+    body = await request.json()
+    request_id = body.get("id")
+    task_id = str(uuid.uuid4())
+    context_id = str(uuid.uuid4())
+    artifact_id = str(uuid.uuid4())
+
+    async def events():
+      if config.first_chunk_delay:
+        await asyncio.sleep(config.first_chunk_delay)
+      for i in range(config.chunks):
+        if i and config.chunk_interval:
+          await asyncio.sleep(config.chunk_interval)
+        yield _sse(request_id, {
+          "kind": "artifact-update",
+          "taskId": task_id,
+          "contextId": context_id,
+          "append": i > 0,
+          "lastChunk": False,
+          "artifact": {"artifactId": artifact_id, "parts": [{"kind": "text", "text": f"{config.name} {config.chunk_text}{i} "}]},
+        })
+      yield _sse(request_id, {
+        "kind": "status-update",
+        "taskId": task_id,
+        "contextId": context_id,
+        "final": True,
+        "status": {"state": "completed"},
+      })
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+  app = Starlette(routes=[
+    Route("/.well-known/agent.json", agent_card, methods=["GET"]),
+    Route("/", rpc, methods=["POST"]),
+  ])
+  app.state.stats = stats
+  return app
+
+
+class StubA2AServer:
+  """Run a stub agent in a background uvicorn thread."""
+
+  def __init__(self, config: StubAgentConfig):
+    self.config = config
+    with socket.socket() as sock:
+      sock.bind(("127.0.0.1", 0))
+      self.port = sock.getsockname()[1]
+    self.url = f"http://127.0.0.1:{self.port}"
+    self.app = build_app(config)
+    self._server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off"))
+    self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+  @property
+  def stats(self):
+    return self.app.state.stats
+
+  def start(self) -> "StubA2AServer":
+    self._thread.start()
+    deadline = time.time() + 10
+    while not self._server.started:
+      if time.time() > deadline:
+        raise RuntimeError(f"Stub agent {self.config.name} did not start")
+      time.sleep(0.01)
+    return self
+
+  def stop(self) -> None:
+    self._server.should_exit = True
+    self._thread.join(timeout=5)
+
+
+def start_stub_agents(configs: List[StubAgentConfig]) -> List[StubA2AServer]:
+  return [StubA2AServer(config).start() for config in configs]